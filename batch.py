@@ -0,0 +1,33 @@
+#!/usr/bin/env python3
+"""
+Rasch Counter - Oflayn katalog tahlili
+Katalogdagi test fayllarini bot va web'siz tahlil qilish (semestr oxiridagi ommaviy tahlil)
+
+    python batch.py imtihonlar/ -o natijalar/ --workers 4
+"""
+
+import os
+import sys
+from pathlib import Path
+
+# Add src directory to Python path
+src_dir = Path(__file__).parent / "src"
+sys.path.insert(0, str(src_dir))
+
+def load_env_file():
+    """Load environment variables from .env file"""
+    env_file = Path(__file__).parent / ".env"
+    if env_file.exists():
+        with open(env_file, 'r') as f:
+            for line in f:
+                line = line.strip()
+                if line and not line.startswith('#') and '=' in line:
+                    key, value = line.split('=', 1)
+                    os.environ[key] = value
+
+if __name__ == "__main__":
+    # Load .env file (config.settings import qilinishidan oldin - BATCH_WORKERS va boshqalar o'qilishi uchun)
+    load_env_file()
+    
+    from services.batch_runner import main
+    sys.exit(main())
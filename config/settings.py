@@ -1,6 +1,7 @@
 """
 Configuration settings for Rasch Counter Bot
 """
+import json
 import os
 from pathlib import Path
 
@@ -36,6 +37,50 @@ REG_LAMBDA = 0.05  # L2 regularization parameter
 MAX_WORKERS = min(int(os.cpu_count() * 0.8), 4) if os.cpu_count() else 4
 MAX_STUDENTS_CHUNK = 2000
 
+# Tahlil worker jarayonlari: soni, navbat hajmi va foydalanuvchi boshiga bir vaqtdagi ishlar
+# (ko'p varaqli ish kitobining varaqlari ham shu jarayonlarda parallel tahlil qilinadi)
+ANALYSIS_WORKERS = int(os.environ.get("ANALYSIS_WORKERS", str(max(1, MAX_WORKERS))))
+ANALYSIS_QUEUE_SIZE = int(os.environ.get("ANALYSIS_QUEUE_SIZE", "20"))
+ANALYSIS_PER_USER_LIMIT = int(os.environ.get("ANALYSIS_PER_USER_LIMIT", "1"))
+# Oflayn katalog tahlili (batch.py): fayllar bir vaqtda tahlil qilinadigan jarayonlar soni
+BATCH_WORKERS = int(os.environ.get("BATCH_WORKERS", str(max(1, MAX_WORKERS))))
+# Hisobotlar (Excel, PDF, diagrammalar) parallel chiziladigan jarayonlar soni (1 - joriy jarayonda).
+# Tahlil worker'lari va Manager jarayoniga qo'shimcha - kichik serverda 2 tadan oshmaydi
+REPORT_WORKERS = int(os.environ.get("REPORT_WORKERS", str(max(1, min(2, MAX_WORKERS)))))
+# Diagrammalar piksel zichligi kanal bo'yicha: Telegram ko'rinishi va chop etiladigan PDF
+CHART_DPI = {
+    'telegram': int(os.environ.get("CHART_DPI_TELEGRAM", "150")),
+    'print': int(os.environ.get("CHART_DPI_PRINT", "300")),
+}
+# Tayyor diagramma PNG keshi (ma'lumotlar xeshi bo'yicha), MB
+CHART_CACHE_MAX_MB = int(os.environ.get("CHART_CACHE_MAX_MB", "32"))
+# Excel eksport rejimi: "plain" - faqat jadvallar, "charts" - Excel'ning o'z diagrammalari
+# (ma'lumotlar varag'iga bog'langan, jadval tahrirlanganda qayta chiziladi)
+EXCEL_EXPORT_MODE = os.environ.get("EXCEL_EXPORT_MODE", "plain").lower()
+
+# Doimiy ishlar navbati: yuklangan fayllar va natijalar diskda, qayta ishga tushishda tiklanadi
+JOB_QUEUE_PATH = DATA_DIR / "jobs.db"
+JOBS_DIR = DATA_DIR / "jobs"
+JOB_MAX_ATTEMPTS = int(os.environ.get("JOB_MAX_ATTEMPTS", "3"))
+# Yakunlangan/xato ishlar (fayllari bilan) necha kundan keyin o'chiriladi va tozalash oralig'i (soniya)
+JOB_MAX_AGE_DAYS = float(os.environ.get("JOB_MAX_AGE_DAYS", "7"))
+JOB_CLEANUP_INTERVAL_SECONDS = int(os.environ.get("JOB_CLEANUP_INTERVAL_SECONDS", "3600"))
+
+# Item bank: bir xil test qayta yuklanganda kalibrlangan beta'larni qayta ishlatish
+# 'off' - o'chirilgan, 'warm' - bankdan boshlash va yangilash, 'anchor' - bank beta qat'iy
+ITEM_BANK_MODE = os.environ.get("ITEM_BANK_MODE", "off").lower()
+ITEM_BANK_PATH = DATA_DIR / "item_bank.db"
+
+# Fayllarni o'qish backend'i: 'auto' (format bo'yicha), 'openpyxl', 'xlrd', 'csv', 'pandas', 'calamine'
+INGESTION_READER = os.environ.get("INGESTION_READER", "auto").lower()
+
+# Natijalar keshi: bir xil fayl qayta yuborilganda tahlil takrorlanmaydi (0 - o'chirilgan)
+RESULT_CACHE_MAX_MB = int(os.environ.get("RESULT_CACHE_MAX_MB", "256"))
+
+# Sessiyalar: oxirgi murojaatdan keyin yashash muddati va umumiy xotira chegarasi
+SESSION_TTL_SECONDS = int(os.environ.get("SESSION_TTL_SECONDS", "21600"))
+SESSION_MAX_MEMORY_MB = int(os.environ.get("SESSION_MAX_MEMORY_MB", "512"))
+
 # Logging settings
 LOG_LEVEL = os.environ.get("LOG_LEVEL", "INFO")
 LOG_FORMAT = "%(asctime)s - %(name)s - %(levelname)s - %(message)s"
@@ -50,6 +95,9 @@ GRADE_THRESHOLDS = {
     'C': 46,
     'NC': 0
 }
+# JSON bilan almashtirish mumkin, masalan GRADE_THRESHOLDS='{"A+": 72, "A": 66, ..., "NC": 0}'
+if os.environ.get("GRADE_THRESHOLDS"):
+    GRADE_THRESHOLDS = {grade: float(cutoff) for grade, cutoff in json.loads(os.environ["GRADE_THRESHOLDS"]).items()}
 
 # Grade descriptions
 GRADE_DESCRIPTIONS = {
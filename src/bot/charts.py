@@ -0,0 +1,476 @@
+"""
+Bot diagrammalari (matplotlib Figure API, Agg).
+
+pyplot global holatidan (plt.style.use, plt.subplots, plt.savefig) foydalanilmaydi:
+har bir diagramma o'zining Figure obyekti va Agg canvas'iga chiziladi, shuning uchun
+funksiyalar handler oqimlarida va hisobotlar hovuzida (services.report_pipeline)
+parallel ishlashi xavfsiz. Uslub global rcParams orqali emas, CHART_TEMPLATES
+shablonlari bilan har bir o'qqa alohida qo'llanadi.
+
+Piksel o'lchami kanal bo'yicha (CHART_DPI: Telegram ko'rinishi yoki chop etish uchun
+PDF). Tayyor PNG baytlari diagramma nomi, kanal va kirish ma'lumotlari xeshi bo'yicha
+keshlanadi - bir xil ma'lumot (qayta yuborilgan fayl, qayta baholashdan keyin
+o'zgarmagan qiyinliklar) qayta chizilmaydi.
+"""
+import hashlib
+import logging
+import threading
+from collections import OrderedDict
+from io import BytesIO
+from pathlib import Path
+import sys
+
+import numpy as np
+import pandas as pd
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+from matplotlib.figure import Figure
+from matplotlib.lines import Line2D
+
+# config paketi loyiha ildizida
+project_root = Path(__file__).parent.parent.parent
+if str(project_root) not in sys.path:
+    sys.path.append(str(project_root))
+
+from config.settings import CHART_CACHE_MAX_MB, CHART_DPI
+
+logger = logging.getLogger(__name__)
+
+# Oldindan sozlangan diagramma shablonlari
+CHART_TEMPLATES = {
+    # Bitta o'q, seaborn-whitegrid ko'rinishi
+    'single': {'figsize': (12, 8), 'whitegrid': True, 'pad_inches': 0.2},
+    # Diagramma + pastda jadval
+    'panel': {'figsize': (14, 12), 'nrows': 2, 'height_ratios': [3, 1], 'whitegrid': True, 'pad_inches': 0.2},
+    # 2x2 umumiy ko'rinish
+    'dashboard': {'figsize': (12, 10), 'nrows': 2, 'ncols': 2, 'whitegrid': False, 'pad_inches': 0.1},
+    # Kichik diagramma (statistika PDF sahifasida)
+    'compact': {'figsize': (6, 3), 'whitegrid': False, 'pad_inches': 0.1},
+}
+
+# Baho ranglari va izohlari (standart UZBMB baholari)
+GRADE_ORDER = ['A+', 'A', 'B+', 'B', 'C+', 'C', 'NC']
+GRADE_BAR_COLORS = {
+    'A+': '#1E8449',  # Dark Green
+    'A': '#28B463',   # Green
+    'B+': '#58D68D',  # Light Green
+    'B': '#3498DB',   # Blue
+    'C+': '#5DADE2',  # Light Blue
+    'C': '#F4D03F',   # Yellow
+    'NC': '#E67E22',  # Orange
+}
+GRADE_BAR_DESCRIPTIONS = {
+    'A+': 'Maksimal ball (70+)',
+    'A': 'Maksimal ball (65-70)',
+    'B+': 'Proporsional ball (60-65)',
+    'B': 'Proporsional ball (55-60)',
+    'C+': 'Proporsional ball (50-55)',
+    'C': 'Proporsional ball (46-50)',
+    'NC': 'DTM ga tavsiya etilmaydi'
+}
+# Standart bo'lmagan baholar uchun (qayta baholashdan keyin)
+FALLBACK_COLORS = ['#1E8449', '#3498DB', '#F4D03F', '#E67E22', '#8E44AD', '#95A5A6', '#C0392B']
+
+
+class ChartCache:
+    """Thread-safe LRU kesh: kalit -> PNG baytlari, hajm chegarasi MB da"""
+
+    def __init__(self, max_memory_mb=CHART_CACHE_MAX_MB):
+        self.max_bytes = int(max_memory_mb * 1024 * 1024)
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.current_bytes = 0
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key):
+        with self._lock:
+            data = self._entries.get(key)
+            if data is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return data
+
+    def put(self, key, data):
+        if len(data) > self.max_bytes:
+            return
+        with self._lock:
+            if key in self._entries:
+                self.current_bytes -= len(self._entries.pop(key))
+            self._entries[key] = data
+            self.current_bytes += len(data)
+            while self.current_bytes > self.max_bytes:
+                _, evicted = self._entries.popitem(last=False)
+                self.current_bytes -= len(evicted)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.current_bytes = 0
+
+
+chart_cache = ChartCache()
+
+
+def data_key(*parts):
+    """Kirish ma'lumotlari xeshi (massivlar baytlari bo'yicha, qolganlari repr)"""
+    digest = hashlib.sha256()
+    for part in parts:
+        if isinstance(part, np.ndarray):
+            digest.update(f"{part.dtype}{part.shape}".encode('utf-8'))
+            digest.update(np.ascontiguousarray(part).tobytes())
+        elif isinstance(part, dict):
+            digest.update(repr([(str(k), v) for k, v in part.items()]).encode('utf-8'))
+        else:
+            digest.update(repr(part).encode('utf-8'))
+        digest.update(b'\x00')
+    return digest.hexdigest()
+
+
+def new_figure(template):
+    """Shablon bo'yicha Figure va o'qlar (pyplot'siz, o'z Agg canvas'i bilan)"""
+    spec = CHART_TEMPLATES[template]
+    fig = Figure(figsize=spec['figsize'], facecolor='white')
+    FigureCanvasAgg(fig)
+    gridspec_kw = {'height_ratios': spec['height_ratios']} if 'height_ratios' in spec else None
+    axes = fig.subplots(spec.get('nrows', 1), spec.get('ncols', 1), gridspec_kw=gridspec_kw, squeeze=False)
+    if spec['whitegrid']:
+        for ax in axes.flat:
+            _whitegrid(ax)
+    return fig, (axes[0, 0] if axes.size == 1 else axes)
+
+
+def _whitegrid(ax):
+    """seaborn-v0_8-whitegrid uslubi (faqat shu o'qqa)"""
+    ax.set_facecolor('white')
+    ax.set_axisbelow(True)
+    ax.grid(True, color='#cccccc', linewidth=0.8)
+    for spine in ax.spines.values():
+        spine.set_edgecolor('#cccccc')
+    ax.tick_params(length=0)
+
+
+def to_png(fig, template, channel='telegram'):
+    """Figure -> PNG baytlari (kanal DPI si bilan)"""
+    buffer = BytesIO()
+    fig.savefig(buffer, format='png', dpi=CHART_DPI[channel], bbox_inches='tight',
+                facecolor='white', edgecolor='none', pad_inches=CHART_TEMPLATES[template]['pad_inches'])
+    return buffer.getvalue()
+
+
+def render_chart(name, template, draw, *data, channel='telegram'):
+    """
+    Keshdagi PNG yoki draw(fig, axes, *data) bilan yangi chizilgani.
+
+    Returns:
+        PNG baytlari
+    """
+    if channel not in CHART_DPI:
+        raise ValueError(f"Noma'lum kanal: {channel}")
+    key = data_key(name, template, channel, *data)
+    png = chart_cache.get(key)
+    if png is None:
+        fig, axes = new_figure(template)
+        draw(fig, axes, *data)
+        png = to_png(fig, template, channel)
+        chart_cache.put(key, png)
+    return png
+
+
+def percent_correct(data_df, n_items):
+    """Har bir savol uchun to'g'ri javoblar foizi (birinchi ustun - talaba ID)"""
+    if data_df is None or len(data_df) == 0:
+        return np.zeros(n_items)
+    frame = pd.DataFrame(data_df) if not isinstance(data_df, pd.DataFrame) else data_df
+    answers = frame.iloc[:, 1:n_items + 1]
+    percents = (answers == 1).mean(axis=0).to_numpy(dtype=np.float64) * 100
+    return np.pad(percents, (0, n_items - percents.shape[0]))
+
+
+# --- diagrammalar ---
+
+def diagrams_png(beta_values, grade_counts, channel='telegram'):
+    """Umumiy ko'rinish (2x2): qiyinliklar, baholar, scatter, fit sifati (xatolikda None)"""
+    try:
+        return render_chart('diagrams', 'dashboard', _draw_diagrams,
+                            np.asarray(beta_values, dtype=np.float64), dict(grade_counts), channel=channel)
+    except Exception as e:
+        logger.error(f"Diagram yaratishda xatolik: {e}")
+        return None
+
+
+def grade_distribution_png(grade_counts, channel='telegram'):
+    """Baholar taqsimoti ustunli diagrammasi"""
+    return render_chart('grade_distribution', 'single', _draw_grade_distribution,
+                        dict(grade_counts), channel=channel)
+
+
+def item_difficulty_png(beta_values, percents=None, channel='telegram'):
+    """Savollar qiyinligi tahlili (percents - to'g'ri javoblar foizi, percent_correct)"""
+    if beta_values is None:
+        return render_chart('item_difficulty_empty', 'single', _draw_empty, channel=channel)
+    beta_values = np.asarray(beta_values, dtype=np.float64)
+    percents = np.zeros(beta_values.shape[0]) if percents is None else np.asarray(percents, dtype=np.float64)
+    return render_chart('item_difficulty', 'panel', _draw_item_difficulty, beta_values, percents, channel=channel)
+
+
+def ability_distribution_png(ability_estimates, channel='telegram'):
+    """Talabalar qobiliyati taqsimoti gistogrammasi"""
+    return render_chart('ability_distribution', 'single', _draw_ability_distribution,
+                        np.asarray(ability_estimates, dtype=np.float64), channel=channel)
+
+
+def statistics_grades_png(grade_counts, channel='print'):
+    """Statistika PDF uchun kichik baholar taqsimoti (grade_counts tartibida)"""
+    return render_chart('statistics_grades', 'compact', _draw_statistics_grades, dict(grade_counts), channel=channel)
+
+
+def statistics_ability_png(ability_estimates, channel='print'):
+    """Statistika PDF uchun kichik qobiliyat (theta) gistogrammasi"""
+    return render_chart('statistics_ability', 'compact', _draw_statistics_ability,
+                        np.asarray(ability_estimates, dtype=np.float64), channel=channel)
+
+
+def _grade_colors(grades):
+    """Standart baholar - GRADE_BAR_COLORS, boshqa baho nomlari - FALLBACK_COLORS tartib bo'yicha"""
+    if set(grades) <= set(GRADE_BAR_COLORS):
+        return [GRADE_BAR_COLORS[grade] for grade in grades]
+    return [FALLBACK_COLORS[i % len(FALLBACK_COLORS)] for i in range(len(grades))]
+
+
+def _draw_statistics_grades(fig, ax, grade_counts):
+    grades = [str(grade) for grade in grade_counts]
+    counts = [int(count) for count in grade_counts.values()]
+    bars = ax.bar(grades, counts, color=_grade_colors(grades))
+    ax.set_title('Baholar taqsimoti')
+    ax.set_xlabel('Baho')
+    ax.set_ylabel('Talabalar soni')
+    for bar in bars:
+        ax.text(bar.get_x() + bar.get_width()/2, bar.get_height(), str(int(bar.get_height())),
+                ha='center', va='bottom', fontsize=8)
+    fig.tight_layout()
+
+
+def _draw_statistics_ability(fig, ax, ability_estimates):
+    ax.hist(ability_estimates, bins=20, color='#3498DB', edgecolor='white')
+    ax.set_title('Qobiliyat (Theta) taqsimoti')
+    ax.set_xlabel('Theta')
+    ax.set_ylabel('Talabalar soni')
+    fig.tight_layout()
+
+
+def _draw_diagrams(fig, axes, beta_values, grade_counts):
+    (ax1, ax2), (ax3, ax4) = axes
+    fig.suptitle('📊 RASCH MODEL TAHLILI - PROFESSIONAL DIAGRAMMALAR', fontsize=14, fontweight='bold')
+
+    # 1. Item Difficulty Distribution
+    ax1.hist(beta_values, bins=20, alpha=0.7, color='skyblue', edgecolor='black')
+    ax1.set_title('📈 Savollar Qiyinligi Taqsimoti', fontweight='bold', fontsize=12)
+    ax1.set_xlabel('Qiyinlik Darajasi (Beta)', fontsize=10)
+    ax1.set_ylabel('Savollar Soni', fontsize=10)
+    ax1.grid(True, alpha=0.3)
+
+    # Add difficulty level zones
+    ax1.axvline(x=-1.25, color='green', linestyle='--', alpha=0.7, label='Oson')
+    ax1.axvline(x=-0.25, color='yellow', linestyle='--', alpha=0.7, label="O'rta")
+    ax1.axvline(x=0.75, color='red', linestyle='--', alpha=0.7, label='Qiyin')
+    ax1.legend()
+
+    # 2. Grade Distribution Pie Chart (faqat nol bo'lmagan baholar)
+    colors = ['#ff9999', '#66b3ff', '#99ff99', '#ffcc99', '#ff99cc', '#c2c2f0', '#ffb3e6']
+    slices = [(grade, count, colors[i % len(colors)])
+              for i, (grade, count) in enumerate(grade_counts.items()) if count > 0]
+    if slices:
+        grades, counts, slice_colors = zip(*slices)
+        ax2.pie(counts, labels=grades, autopct='%1.1f%%', colors=slice_colors)
+    ax2.set_title('📊 Baholar Taqsimoti', fontweight='bold', fontsize=12)
+
+    # 3. Item Difficulty Scatter Plot
+    question_numbers = np.arange(1, len(beta_values) + 1)
+    colors_scatter = np.where(beta_values < -0.5, 'green', np.where(beta_values < 0.5, 'orange', 'red'))
+    ax3.scatter(question_numbers, beta_values, c=colors_scatter, alpha=0.7, s=60)
+    ax3.set_title('🎯 Savollar Qiyinligi Scatter Plot', fontweight='bold', fontsize=12)
+    ax3.set_xlabel('Savol Raqami', fontsize=10)
+    ax3.set_ylabel('Qiyinlik Darajasi', fontsize=10)
+    ax3.grid(True, alpha=0.3)
+
+    # Add difficulty level lines
+    ax3.axhline(y=-0.5, color='green', linestyle='--', alpha=0.7, label='Oson')
+    ax3.axhline(y=0.5, color='red', linestyle='--', alpha=0.7, label='Qiyin')
+    ax3.legend()
+
+    # 4. Fit Quality Assessment - qiyinliklar taqsimoti bo'yicha
+    # Items with extreme difficulties are more likely to have poor fit
+    magnitude = np.abs(beta_values)
+    item_counts = np.array([
+        np.count_nonzero(magnitude > 2),
+        np.count_nonzero((magnitude >= 1) & (magnitude <= 2)),
+        np.count_nonzero(magnitude < 1)
+    ], dtype=np.float64)
+    total = item_counts.sum()
+    fit_percents = item_counts / total * 100 if total > 0 else item_counts
+
+    fit_categories = ['Yomon', 'Qabul qilinadigan', 'Yaxshi']
+    fit_counts = [round(float(value), 1) for value in fit_percents]
+    fit_colors = ['#e53e3e', '#ed8936', '#38a169']
+
+    bars = ax4.bar(fit_categories, fit_counts, color=fit_colors, alpha=0.8)
+    ax4.set_title('🎯 Fit Sifatini Baholash', fontweight='bold', fontsize=12)
+    ax4.set_ylabel('Foiz (%)', fontsize=10)
+    ax4.set_ylim(0, 60)
+
+    # Add value labels on bars
+    for bar, count in zip(bars, fit_counts):
+        ax4.text(bar.get_x() + bar.get_width()/2, bar.get_height() + 1,
+                 f'{count}%', ha='center', va='bottom', fontweight='bold')
+
+    fig.tight_layout()
+
+
+def _draw_grade_distribution(fig, ax, grade_counts):
+    # Standart baholar BBM tartibida (hammasi ko'rsatiladi), boshqa chegaralarda - grade_counts tartibida
+    standard = set(grade_counts) <= set(GRADE_ORDER)
+    grades = GRADE_ORDER if standard else list(grade_counts)
+    counts = [int(grade_counts.get(grade, 0)) for grade in grades]
+    colors = _grade_colors(grades)
+
+    bars = ax.bar(grades, counts, color=colors, width=0.6, edgecolor='white', linewidth=1.5)
+
+    # Add count labels on top of each bar
+    for bar in bars:
+        height = bar.get_height()
+        if height > 0:  # Only add label if there are students with this grade
+            ax.text(bar.get_x() + bar.get_width()/2., height + 0.3, str(int(height)),
+                    ha='center', va='bottom', fontweight='bold', fontsize=12, color='black')
+
+    # Calculate a good upper limit for the y-axis (rounded up to nearest 5)
+    max_count = max(counts) if counts else 0
+    y_upper = 5 * ((int(max_count * 1.2) // 5) + 1) if max_count > 0 else 10
+
+    ax.set_ylim(0, y_upper)
+    ax.set_xlabel('Baho', fontsize=14, fontweight='bold')
+    ax.set_ylabel('Talabalar soni', fontsize=14, fontweight='bold')
+    ax.set_title('BAHOLAR TAQSIMOTI', fontsize=16, fontweight='bold')
+    ax.grid(axis='y', linestyle='--', alpha=0.7)
+    ax.tick_params(axis='both', labelsize=12)
+
+    # Baho izohlari x o'qi yorlig'ida
+    ax.set_xticks(range(len(grades)))
+    ax.set_xticklabels([f"{grade}\n{GRADE_BAR_DESCRIPTIONS.get(grade, '')}".rstrip() for grade in grades])
+
+    # Add percentage labels inside each bar
+    total_students = sum(counts)
+    if total_students > 0:
+        for grade, bar in zip(grades, bars):
+            height = bar.get_height()
+            if height > 0:
+                ax.text(bar.get_x() + bar.get_width()/2., height / 2, f"{height / total_students * 100:.2f}%",
+                        ha='center', va='center', fontweight='bold', fontsize=11,
+                        color='white' if grade in ['A+', 'A', 'B'] else 'black')
+
+    fig.tight_layout()
+    for spine in ['top', 'right']:
+        ax.spines[spine].set_visible(False)
+
+
+def _draw_empty(fig, ax):
+    ax.text(0.5, 0.5, "Ma'lumotlar mavjud emas", ha='center', va='center', fontsize=16)
+
+
+def _draw_item_difficulty(fig, axes, beta_values, percents):
+    ax1, ax2 = axes[0, 0], axes[1, 0]
+    num_items = len(beta_values)
+    item_indices = np.arange(1, num_items + 1)
+
+    # Savollar qiyinlik bo'yicha (qiyinidan osoniga), 5 ta toifaga bo'linadi
+    order = np.argsort(-beta_values, kind='stable')
+    per_category = max(1, num_items // 5)
+    category = np.minimum(np.argsort(order, kind='stable') // per_category, 4)
+    category_colors = np.array(['#E74C3C', '#F39C12', '#F1C40F', '#2ECC71', '#27AE60'])
+    colors = category_colors[category]
+
+    bars = ax1.bar(item_indices, beta_values, color=colors, width=0.7, edgecolor='white', linewidth=1)
+
+    # To'g'ri javoblar foizi har bir ustunda
+    for bar, percent in zip(bars, percents):
+        height = bar.get_height()
+        y_pos = height + 0.1 if height >= 0 else height - 0.3
+        ax1.text(bar.get_x() + bar.get_width() / 2, y_pos, f"{percent:.2f}%",
+                 ha='center', va='bottom' if height >= 0 else 'top',
+                 fontsize=8, rotation=90, color='black', fontweight='bold')
+
+    # Qiyinlik toifalari chegaralari
+    percentiles = np.percentile(beta_values, [20, 40, 60, 80])
+    for value, color in zip(percentiles[::-1], category_colors[:4]):
+        ax1.axhline(y=value, color=color, linestyle='--', alpha=0.7)
+
+    ax1.set_ylabel('Qiyinlik darajasi (Beta)', fontsize=14, fontweight='bold')
+    ax1.set_title('SAVOLLAR QIYINLIGI TAHLILI', fontsize=16, fontweight='bold')
+    ax1.set_xticks(item_indices)
+    ax1.set_xticklabels([str(i) for i in item_indices], rotation=90, fontsize=8)
+    ax1.set_xlabel('Savol raqami', fontsize=14, fontweight='bold')
+
+    legend_elements = [
+        Line2D([0], [0], color=color, lw=4, label=label)
+        for color, label in zip(category_colors, ['Juda qiyin', 'Qiyin', 'O\'rta', 'Oson', 'Juda oson'])
+    ]
+    ax1.legend(handles=legend_elements, loc='upper right', fontsize=10)
+    ax1.grid(axis='y', linestyle='--', alpha=0.7)
+    ax1.tick_params(axis='both', labelsize=12)
+
+    # Pastda: eng qiyin va eng oson 5 ta savol jadvali
+    def cell(index):
+        return f"#{index + 1}: {beta_values[index]:.2f} ({percents[index]:.2f}%)"
+
+    cell_text = [[cell(i) for i in order[:5]], [cell(i) for i in order[-5:]]]
+    ax2.axis('tight')
+    ax2.axis('off')
+    table = ax2.table(cellText=cell_text, rowLabels=['Eng qiyin savollar', 'Eng oson savollar'],
+                      loc='center', cellLoc='center', colWidths=[0.18] * len(cell_text[0]))
+    table.auto_set_font_size(False)
+    table.set_fontsize(10)
+    table.scale(1, 1.5)
+    for (row, column), table_cell in table.get_celld().items():
+        if column >= 0:
+            table_cell.set_facecolor('#FADBD8' if row == 0 else '#D5F5E3')
+
+    fig.tight_layout()
+
+
+def _draw_ability_distribution(fig, ax, ability_estimates):
+    n, bins, patches = ax.hist(ability_estimates, bins=20, color='#3498DB',
+                               edgecolor='white', linewidth=1.5, alpha=0.9)
+
+    mean_ability = np.mean(ability_estimates)
+    median_ability = np.median(ability_estimates)
+    std_ability = np.std(ability_estimates)
+
+    # Add mean line
+    ax.axvline(mean_ability, color='#E74C3C', linestyle='--', linewidth=2)
+    ax.text(mean_ability, ax.get_ylim()[1] * 0.9, f'O\'rtacha: {mean_ability:.2f}',
+            color='#E74C3C', fontweight='bold', ha='center',
+            bbox=dict(facecolor='white', alpha=0.8, edgecolor='none', boxstyle='round,pad=0.5'))
+
+    # Add a bell curve of the normal distribution for comparison
+    if std_ability > 0:
+        x = np.linspace(min(ability_estimates), max(ability_estimates), 100)
+        y = np.max(n) * 0.9 * np.exp(-(x - mean_ability)**2 / (2 * std_ability**2)) / (std_ability * np.sqrt(2 * np.pi))
+        ax.plot(x, y, 'r-', linewidth=2, alpha=0.6)
+
+    ax.set_xlabel('Qobiliyat ko\'rsatkichi', fontsize=14, fontweight='bold')
+    ax.set_ylabel('Talabalar soni', fontsize=14, fontweight='bold')
+    ax.set_title('TALABALAR QOBILIYATI TAQSIMOTI', fontsize=16, fontweight='bold')
+    ax.grid(axis='y', linestyle='--', alpha=0.7)
+    ax.tick_params(axis='both', labelsize=12)
+
+    stats_text = (f"Statistik ma'lumotlar:\n"
+                  f"O'rtacha: {mean_ability:.2f}\n"
+                  f"Median: {median_ability:.2f}\n"
+                  f"Standart og'ish: {std_ability:.2f}")
+    ax.text(0.77, 0.15, stats_text, transform=ax.transAxes, fontsize=12, verticalalignment='bottom',
+            bbox=dict(boxstyle='round', facecolor='#F0F3F4', alpha=0.9))
+
+    fig.tight_layout()
+    for spine in ['top', 'right']:
+        ax.spines[spine].set_visible(False)
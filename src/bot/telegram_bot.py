@@ -2,16 +2,12 @@ import logging
 import os
 import pandas as pd
 import io
-from io import BytesIO
-import matplotlib
-# Tkinter errors - use a non-interactive backend
-matplotlib.use('Agg')
-import matplotlib.pyplot as plt
 import telebot
 from telebot import types
 import numpy as np
 import threading
 import time
+from types import SimpleNamespace
 import sys
 from pathlib import Path
 
@@ -20,115 +16,26 @@ src_dir = Path(__file__).parent.parent
 sys.path.insert(0, str(src_dir))
 
 from services.analysis_service import analysis_service
-from config.settings import GRADE_DESCRIPTIONS
+from config.settings import GRADE_DESCRIPTIONS, SESSION_TTL_SECONDS, SESSION_MAX_MEMORY_MB
+from services.session_store import SessionStore
+from services.worker_pool import AnalysisWorkerPool, PoolBusyError, UserLimitError
+from services.job_queue import JobQueue
+from data_processing.ingestion import read_frame
+from data_processing.excel_writer import HEADER_STYLE, add_banding, add_grade_formats, open_workbook, write_table
+from models.grading import grade_scores, grade_summary, top_grade_labels
 from utils.monitoring import monitor
 from bot.health_check import create_health_app
 
-def create_diagram_images(beta_values, grade_counts):
-    """Diagrammalar uchun rasm yaratish"""
-    try:
-        # Create figure with subplots - Telegram compatible size
-        fig, ((ax1, ax2), (ax3, ax4)) = plt.subplots(2, 2, figsize=(12, 10))
-        fig.suptitle('📊 RASCH MODEL TAHLILI - PROFESSIONAL DIAGRAMMALAR', fontsize=14, fontweight='bold')
-        
-        # 1. Item Difficulty Distribution
-        ax1.hist(beta_values, bins=20, alpha=0.7, color='skyblue', edgecolor='black')
-        ax1.set_title('📈 Savollar Qiyinligi Taqsimoti', fontweight='bold', fontsize=12)
-        ax1.set_xlabel('Qiyinlik Darajasi (Beta)', fontsize=10)
-        ax1.set_ylabel('Savollar Soni', fontsize=10)
-        ax1.grid(True, alpha=0.3)
-        
-        # Add difficulty level zones
-        ax1.axvline(x=-1.25, color='green', linestyle='--', alpha=0.7, label='Oson')
-        ax1.axvline(x=-0.25, color='yellow', linestyle='--', alpha=0.7, label="O'rta")
-        ax1.axvline(x=0.75, color='red', linestyle='--', alpha=0.7, label='Qiyin')
-        ax1.legend()
-        
-        # 2. Grade Distribution Pie Chart
-        grades = list(grade_counts.keys())
-        counts = list(grade_counts.values())
-        colors = ['#ff9999', '#66b3ff', '#99ff99', '#ffcc99', '#ff99cc', '#c2c2f0', '#ffb3e6']
-        
-        # Filter out zero counts
-        non_zero_grades = []
-        non_zero_counts = []
-        non_zero_colors = []
-        for i, count in enumerate(counts):
-            if count > 0:
-                non_zero_grades.append(grades[i])
-                non_zero_counts.append(count)
-                non_zero_colors.append(colors[i % len(colors)])
-        
-        ax2.pie(non_zero_counts, labels=non_zero_grades, autopct='%1.1f%%', colors=non_zero_colors)
-        ax2.set_title('📊 Baholar Taqsimoti', fontweight='bold', fontsize=12)
-        
-        # 3. Item Difficulty Scatter Plot
-        question_numbers = list(range(1, len(beta_values) + 1))
-        colors_scatter = ['green' if x < -0.5 else 'orange' if x < 0.5 else 'red' for x in beta_values]
-        
-        scatter = ax3.scatter(question_numbers, beta_values, c=colors_scatter, alpha=0.7, s=60)
-        ax3.set_title('🎯 Savollar Qiyinligi Scatter Plot', fontweight='bold', fontsize=12)
-        ax3.set_xlabel('Savol Raqami', fontsize=10)
-        ax3.set_ylabel('Qiyinlik Darajasi', fontsize=10)
-        ax3.grid(True, alpha=0.3)
-        
-        # Add difficulty level lines
-        ax3.axhline(y=-0.5, color='green', linestyle='--', alpha=0.7, label='Oson')
-        ax3.axhline(y=0.5, color='red', linestyle='--', alpha=0.7, label='Qiyin')
-        ax3.legend()
-        
-        # 4. Fit Quality Assessment (Based on actual data)
-        # Calculate fit statistics based on item difficulties
-        n_items = len(beta_values)
-        
-        # Simulate fit statistics based on item difficulty distribution
-        # Items with extreme difficulties are more likely to have poor fit
-        extreme_items = sum(1 for x in beta_values if abs(x) > 2)
-        moderate_items = sum(1 for x in beta_values if 1 <= abs(x) <= 2)
-        good_items = sum(1 for x in beta_values if abs(x) < 1)
-        
-        # Calculate percentages
-        total_items = n_items
-        poor_fit_pct = (extreme_items / total_items) * 100
-        moderate_fit_pct = (moderate_items / total_items) * 100
-        good_fit_pct = (good_items / total_items) * 100
-        
-        # Ensure percentages add up to 100
-        total_pct = poor_fit_pct + moderate_fit_pct + good_fit_pct
-        if total_pct > 0:
-            poor_fit_pct = (poor_fit_pct / total_pct) * 100
-            moderate_fit_pct = (moderate_fit_pct / total_pct) * 100
-            good_fit_pct = (good_fit_pct / total_pct) * 100
-        
-        fit_categories = ['Yomon', 'Qabul qilinadigan', 'Yaxshi']
-        fit_counts = [round(poor_fit_pct, 1), round(moderate_fit_pct, 1), round(good_fit_pct, 1)]
-        fit_colors = ['#e53e3e', '#ed8936', '#38a169']
-        
-        bars = ax4.bar(fit_categories, fit_counts, color=fit_colors, alpha=0.8)
-        ax4.set_title('🎯 Fit Sifatini Baholash', fontweight='bold', fontsize=12)
-        ax4.set_ylabel('Foiz (%)', fontsize=10)
-        ax4.set_ylim(0, 60)
-        
-        # Add value labels on bars
-        for bar, count in zip(bars, fit_counts):
-            ax4.text(bar.get_x() + bar.get_width()/2, bar.get_height() + 1, 
-                    f'{count}%', ha='center', va='bottom', fontweight='bold')
-        
-        plt.tight_layout()
-        
-        # Save to BytesIO with Telegram compatible settings
-        img_buffer = BytesIO()
-        plt.savefig(img_buffer, format='png', dpi=200, bbox_inches='tight', 
-                   facecolor='white', edgecolor='none', pad_inches=0.1)
-        img_buffer.seek(0)
-        
-        plt.close(fig)
-        
-        return img_buffer
-        
-    except Exception as e:
-        logging.error(f"Diagram yaratishda xatolik: {e}")
-        return None
+# "Barcha hisobotlar" tugmasi: hisobot turi -> (fayl nomi, izoh)
+ALL_REPORTS = {
+    'excel': ("rasch_model_results.xlsx", "💾 natijalar Excel fayli."),
+    'excel_charts': ("rasch_model_diagrammalar.xlsx", "📈 Excel diagrammalari (jadval tahrirlansa qayta chiziladi)."),
+    'pdf': ("rasch_model_results.pdf", "📑 Rasch model natijalarining PDF fayli."),
+    'stats_pdf': ("statistika.pdf", "📊 Statistika PDF fayli."),
+    'grade_chart': ("baholar.png", "📊 Baholar taqsimoti"),
+    'ability_chart': ("qobiliyat.png", "📈 Talabalar qobiliyati taqsimoti"),
+    'difficulty_chart': ("savollar.png", "🎯 Savollar qiyinligi tahlili"),
+}
 
 def create_main_keyboard():
     """Asosiy keyboard yaratish - barcha tugmalar bir xil"""
@@ -137,11 +44,13 @@ def create_main_keyboard():
     btn_pdf = types.InlineKeyboardButton('📑 Natijalar hisoboti PDF', callback_data='download_pdf')
     btn_excel = types.InlineKeyboardButton('💾 Natijalar hisoboti Excel', callback_data='download_excel')
     btn_simple_excel = types.InlineKeyboardButton('📝 Yozma ish ballarini qo\'shish', callback_data='download_simple_excel')
+    btn_all = types.InlineKeyboardButton('📦 Barcha hisobotlar', callback_data='download_all')
     
     markup.add(btn_stats)
     markup.add(btn_pdf)
     markup.add(btn_excel)
     markup.add(btn_simple_excel)
+    markup.add(btn_all)
     
     return markup
 from reportlab.lib import colors
@@ -161,8 +70,13 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
-# Keep track of user data
-user_data = {}
+# Keep track of user data (TTL va xotira chegarasi bilan - eski sessiyalar o'chiriladi)
+user_data = SessionStore(
+    ttl_seconds=SESSION_TTL_SECONDS,
+    max_memory_mb=SESSION_MAX_MEMORY_MB,
+    name='bot_user_data',
+    on_evict=monitor.record_session_eviction
+)
 from collections import defaultdict
 user_locks = defaultdict(threading.Lock)
 
@@ -199,6 +113,7 @@ Asosiy buyruqlar:
 🔹 /start - Botni ishga tushirish
 🔹 /help - Yordam olish
 🔹 /ball - Ikki Excel fayldan o'rtacha ball hisoblash
+🔹 /bahola 0110... - Yangi javoblar varag'ini oxirgi tahlil bo'yicha baholash
 🔹 /cancel - Joriy jarayonni bekor qilish
 
 Excel fayl qanday bo'lishi kerak:
@@ -250,7 +165,9 @@ def main():
     """Start the bot."""
     from config.settings import (
         TELEGRAM_TOKEN, TELEGRAM_WEBHOOK_HOST, TELEGRAM_WEBHOOK_PORT,
-        TELEGRAM_CERT_FILE, TELEGRAM_KEY_FILE, ADMIN_USER_ID
+        TELEGRAM_CERT_FILE, TELEGRAM_KEY_FILE, ADMIN_USER_ID,
+        ANALYSIS_WORKERS, ANALYSIS_QUEUE_SIZE, ANALYSIS_PER_USER_LIMIT,
+        JOB_QUEUE_PATH, JOBS_DIR, JOB_MAX_ATTEMPTS, JOB_MAX_AGE_DAYS, JOB_CLEANUP_INTERVAL_SECONDS
     )
     from utils.validation import validate_all
     
@@ -277,6 +194,20 @@ def main():
     # Initialize database
     db = BotDatabase()
     
+    # Tahlil ishlari uchun jarayonlar puli (handler'lar bloklanmaydi). Ishlar doimiy
+    # navbatda saqlanadi - bot qayta ishga tushganda tugallanmagan ishlar davom etadi
+    job_queue = JobQueue(JOB_QUEUE_PATH, JOBS_DIR, max_attempts=JOB_MAX_ATTEMPTS)
+    analysis_service.job_queue = job_queue
+    # Eski ishlar va ularning fayllari davriy o'chiriladi (disk va jadval cheksiz o'smaydi)
+    job_queue.start_cleanup(JOB_MAX_AGE_DAYS, JOB_CLEANUP_INTERVAL_SECONDS)
+    analysis_pool = AnalysisWorkerPool(
+        analysis_service,
+        max_workers=ANALYSIS_WORKERS,
+        max_pending=ANALYSIS_QUEUE_SIZE,
+        per_user_limit=ANALYSIS_PER_USER_LIMIT,
+        job_queue=job_queue
+    )
+    
     # Admin command handler - only accessible by specific admin user ID
     @bot.message_handler(commands=['adminos'])
     def admin_command(message):
@@ -317,7 +248,7 @@ def main():
     @bot.message_handler(commands=['start'])
     def start_command(message):
         # Reset any user state if active
-        if message.from_user.id in user_data:
+        if user_data.get(message.from_user.id) is not None:
             # Clear any ongoing operation like /ball
             user_data[message.from_user.id] = {}
         
@@ -379,15 +310,11 @@ def main():
             detailed_results = analysis_service.get_results(session_id, format='json')
             
             # Store session_id for user
+            # Natijalar analysis_service sessiyasida - bu yerda faqat kichik ma'lumotlar
             user_data[user_id] = {
                 'session_id': session_id,
-                'results_df': detailed_results['results_df'],
-                'ability_estimates': detailed_results['ability_estimates'],
                 'grade_counts': summary_results['grade_distribution'],
-                'excel_data': None,
-                'data_df': detailed_results['df_cleaned'],
-                'beta_values': detailed_results['item_difficulties'],
-                'original_df': None
+                'total_students': summary_results['total_students']
             }
             
             # Create results message
@@ -402,7 +329,7 @@ def main():
                 f"📊 *Umumiy Statistika:*\n"
                 f"👥 Jami talabalar: {total_students} ta\n"
                 f"📝 Jami savollar: 55 ta\n\n"
-                f"🏆 *A+ va A baholar:*\n"
+                f"🏆 *{summary_results['top_grades_label'].replace('/', ' va ')} baholar:*\n"
                 f"👑 Eng yaxshi natija: {top_grades_count} ta ({top_grades_percent}%)\n\n"
                 f"📈 *O'tish/O'tmaslik:*\n"
                 f"✅ O'tgan talabalar: {pass_rate}%\n"
@@ -487,6 +414,41 @@ def main():
         
         bot.send_message(chat_id=message.chat.id, text=instruction_text, parse_mode='HTML')
         
+    # Bahola command handler
+    @bot.message_handler(commands=['bahola'])
+    def score_command(message):
+        """Oxirgi tahlil kalibrovkasi bo'yicha yangi javoblar varag'ini baholash (qayta tahlilsiz)"""
+        user_info = user_data.get(message.from_user.id, {})
+        session_id = user_info.get('session_id')
+        if not session_id:
+            bot.send_message(message.chat.id, "❌ Avval test faylini yuboring va tahlil natijasini oling.")
+            return
+        
+        parts = message.text.split(maxsplit=1)
+        rows = [line.strip() for line in parts[1].splitlines() if line.strip()] if len(parts) > 1 else []
+        # Ko'p varaqli fayl: birinchi qatorda fan (varaq) nomi
+        sheet = rows.pop(0) if rows and set(rows[0]) - set('01 ,;') else None
+        if not rows:
+            bot.send_message(
+                message.chat.id,
+                "Javoblarni 0 va 1 ko'rinishida yuboring, masalan:\n/bahola 0110101...\n"
+                "Bir nechta talaba uchun har birini yangi qatordan yozing."
+            )
+            return
+        
+        scored = analysis_service.score_responses(session_id, rows, sheet=sheet)
+        if 'error' in scored:
+            bot.send_message(message.chat.id, f"❌ {scored['error']}")
+            return
+        
+        lines = [f"📝 Baholash natijasi ({scored['total_questions']} savol):"]
+        for index, result in enumerate(scored['results'], start=1):
+            lines.append(
+                f"{index}. To'g'ri: {result['raw_score']}, ball: {result['standard_score']:.2f}, "
+                f"daraja: {result['grade']}"
+            )
+        bot.send_message(message.chat.id, "\n".join(lines))
+    
     # Fill command handler - disabled/removed as requested
             
     # Cancel command handler
@@ -494,10 +456,11 @@ def main():
     def cancel_command(message):
         user_id = message.from_user.id
         
-        if user_id in user_data:
+        # Bitta get() - sessiya tekshiruv va o'qish orasida eskirib qolmasligi uchun
+        state = user_data.get(user_id)
+        if state is not None:
             # Check for broadcast mode
-            if 'waiting_for_broadcast' in user_data[user_id]:
-                broadcast_type = user_data[user_id]['waiting_for_broadcast']
+            if 'waiting_for_broadcast' in state:
                 # Reset the user state
                 user_data[user_id] = {}
                 
@@ -509,7 +472,7 @@ def main():
                 return
             
             # Check for ball mode
-            if 'waiting_for_balls' in user_data[user_id]:
+            if 'waiting_for_balls' in state:
                 # Reset the user state
                 user_data[user_id] = {}
                 
@@ -526,11 +489,13 @@ def main():
             "⚠️ Bekor qilinadigan jarayon yo'q."
         )
     
+    def broadcast_mode(message):
+        """Kutilayotgan xabar turi (sessiya yo'q yoki eskirgan bo'lsa None)"""
+        state = user_data.get(message.from_user.id)
+        return state.get('waiting_for_broadcast') if state is not None else None
+
     # Text message handler for broadcast
-    @bot.message_handler(func=lambda message: message.from_user.id in user_data 
-                                        and 'waiting_for_broadcast' in user_data[message.from_user.id]
-                                        and (user_data[message.from_user.id]['waiting_for_broadcast'] == 'text' 
-                                             or user_data[message.from_user.id]['waiting_for_broadcast'] == 'any'))
+    @bot.message_handler(func=lambda message: broadcast_mode(message) in ('text', 'any'))
     def handle_broadcast_text(message):
         # Only allow the admin to broadcast
         if message.from_user.id != 7537966029:
@@ -590,10 +555,7 @@ def main():
         )
     
     # Image handler for broadcast
-    @bot.message_handler(content_types=['photo'], func=lambda message: message.from_user.id in user_data 
-                                          and 'waiting_for_broadcast' in user_data[message.from_user.id]
-                                          and (user_data[message.from_user.id]['waiting_for_broadcast'] == 'image'
-                                               or user_data[message.from_user.id]['waiting_for_broadcast'] == 'any'))
+    @bot.message_handler(content_types=['photo'], func=lambda message: broadcast_mode(message) in ('image', 'any'))
     def handle_broadcast_image(message):
         # Only allow the admin to broadcast
         if message.from_user.id != 7537966029:
@@ -659,10 +621,7 @@ def main():
         )
         
     # Video handler for broadcast
-    @bot.message_handler(content_types=['video'], func=lambda message: message.from_user.id in user_data 
-                                          and 'waiting_for_broadcast' in user_data[message.from_user.id]
-                                          and (user_data[message.from_user.id]['waiting_for_broadcast'] == 'video'
-                                               or user_data[message.from_user.id]['waiting_for_broadcast'] == 'any'))
+    @bot.message_handler(content_types=['video'], func=lambda message: broadcast_mode(message) in ('video', 'any'))
     def handle_broadcast_video(message):
         # Only allow the admin to broadcast
         if message.from_user.id != 7537966029:
@@ -728,10 +687,7 @@ def main():
         )
         
     # Sticker handler for broadcast
-    @bot.message_handler(content_types=['sticker'], func=lambda message: message.from_user.id in user_data 
-                                          and 'waiting_for_broadcast' in user_data[message.from_user.id]
-                                          and (user_data[message.from_user.id]['waiting_for_broadcast'] == 'sticker'
-                                               or user_data[message.from_user.id]['waiting_for_broadcast'] == 'any'))
+    @bot.message_handler(content_types=['sticker'], func=lambda message: broadcast_mode(message) in ('sticker', 'any'))
     def handle_broadcast_sticker(message):
         # Only allow the admin to broadcast
         if message.from_user.id != 7537966029:
@@ -791,6 +747,182 @@ def main():
                  f"• Xatolik: {failed_count} ta"
         )
     
+    def make_progress_reporter(chat_id, message_id, min_interval=2.0):
+        """Worker progressini "hisoblanmoqda" xabarida ko'rsatish (Telegram limitlari uchun siyrak)"""
+        state = {'last': 0.0, 'text': None}
+        
+        def report(percent, text):
+            now = time.time()
+            new_text = f"⏳ {text} ({int(percent)}%)"
+            if new_text == state['text'] or now - state['last'] < min_interval:
+                return
+            state['last'], state['text'] = now, new_text
+            try:
+                bot.edit_message_text(chat_id=chat_id, message_id=message_id, text=new_text)
+            except Exception:
+                pass
+        
+        return report
+    
+    def send_analysis_results(message, process_message, session_id):
+        """Tahlil yakunlangach natijalar xulosasini yuborish (worker callback)"""
+        user_id = message.from_user.id
+        try:
+            # Get results from service - faqat xulosa (jadvallar JSON ga aylantirilmaydi)
+            summary_results = analysis_service.get_results(session_id, format='summary')
+        
+            grade_counts = summary_results['grade_distribution']
+            total_students = summary_results['total_students']
+        
+            # Track user activity in database
+            db.add_user(
+                user_id=message.from_user.id,
+                first_name=message.from_user.first_name,
+                last_name=message.from_user.last_name or "",
+                username=message.from_user.username or ""
+            )
+        
+            # Log file processing with statistics
+            db.log_file_processing(
+                user_id=message.from_user.id,
+                action_type="process_exam",
+                num_students=total_students,
+                num_questions=summary_results['total_questions']
+            )
+        
+            # Monitor processed files
+            monitor.increment_processed_files(total_students)
+        
+            # Natijalar va fayllar analysis_service sessiyasida saqlanadi (Excel tugma
+            # bosilganda tayyorlanadi) - bu yerda faqat kichik ma'lumotlar
+            user_data[user_id] = {
+                'session_id': session_id,  # Store session_id for service access
+                'grade_counts': grade_counts,
+                'total_students': total_students
+            }
+        
+            # We no longer need to send the comparison file automatically
+            # The results are sufficient if they are successfully processed
+        
+            # Create keyboard with buttons
+            markup = create_main_keyboard()
+        
+            # Emojilar bilan ma'noli javob
+            # Eng yuqori baholar (standartda A+/A), o'tganlar va sertifikat ololmaganlar (eng past baho, NC)
+            # soni - qayta baholash yoki GRADE_THRESHOLDS dagi boshqa baho nomlarida ham to'g'ri
+            top_grades_count, passing_grades_count, failing_count = grade_summary(grade_counts)
+        
+            # Umumiy o'tish foizini hisoblash
+            pass_rate = (passing_grades_count / total_students * 100) if total_students > 0 else 0
+        
+            # Natijani chiqarish
+        
+            # Natija tayyorligi haqida xabar
+            try:
+                bot.edit_message_text(
+                    chat_id=message.chat.id,
+                    message_id=process_message.message_id,
+                    text="✅ Tahlil muvaffaqiyatli yakunlandi!"
+                )
+                time.sleep(1)  # Natija chiqganini ko'rish uchun 1 soniya kutish
+            
+                # Endi eski xabarni olib tashlaymiz
+                bot.delete_message(chat_id=message.chat.id, message_id=process_message.message_id)
+            except Exception as e:
+                print(f"Xabarni yangilash/o'chirishda xatolik: {str(e)}")
+                # Xatolikni e'tiborsiz qoldiramiz
+            
+            # Natijalar haqida qisqa ma'lumot
+            # Nolga bo'linish xatosidan himoya
+            top_grade_percent = (top_grades_count/total_students*100) if total_students > 0 else 0
+            failing_percent = (failing_count/total_students*100) if total_students > 0 else 0
+        
+            success_message = (
+                f"✅ Tahlil yakunlandi!\n\n"
+                f"📊 Natijalar xulosasi:\n"
+                f"👨‍🎓 Jami: {total_students} talaba\n"
+                f"🏆 {'/'.join(top_grade_labels(grade_counts))}: {top_grades_count} ta ({top_grade_percent:.2f}%)\n"
+                f"✅ O'tish: {passing_grades_count} ta ({pass_rate:.2f}%)\n"
+                f"❌ O'tmagan: {failing_count} ta ({failing_percent:.2f}%)\n\n"
+            )
+            # Ko'p varaqli ish kitobi: har bir fan bo'yicha qisqa natija
+            for sheet in summary_results.get('sheets', []):
+                success_message += (
+                    f"📄 {sheet['sheet']}: {sheet['total_students']} talaba, "
+                    f"o'rtacha {sheet['average_score']:.1f} ball\n"
+                )
+            if summary_results.get('sheets'):
+                success_message += "\n"
+            # Fayl tekshiruvi ogohlantirishlari (o'tkazib yuborilgan qatorlar va h.k.)
+            if summary_results.get('warnings'):
+                success_message += "⚠️ " + "\n⚠️ ".join(summary_results['warnings']) + "\n\n"
+            success_message += "📈 Quyidagi tugmalardan birini tanlang 👇"
+        
+            bot.send_message(
+                message.chat.id,
+                success_message,
+                reply_markup=markup
+            )
+            
+        except Exception as e:
+            report_analysis_error(message, process_message, e)
+    
+    def report_analysis_error(message, process_message, e):
+        """Tahlil xatoligi haqida foydalanuvchiga xabar berish"""
+        # Xatolik yuz bergani haqida xabar berish
+        monitor.increment_error()
+            
+        # Xatolik haqida log yozish
+        logger.error(f"Error processing file: {str(e)}")
+            
+        # Avval hisoblanmoqda... xabarini yangilaymiz
+        try:
+            bot.edit_message_text(
+                chat_id=message.chat.id,
+                message_id=process_message.message_id,
+                text="❌ Xatolik yuz berdi! Fayl bilan muammo bor."
+            )
+            time.sleep(1)  # Xatolik xabarini ko'rish uchun 1 soniya kutish
+                
+            # Endi eski xabarni olib tashlaymiz
+            bot.delete_message(chat_id=message.chat.id, message_id=process_message.message_id)
+        except Exception as msg_error:
+            print(f"Xabarni yangilash/o'chirishda xatolik: {str(msg_error)}")
+            # Xatolikni e'tiborsiz qoldiramiz
+            
+        # Foydalanuvchiga xatolik haqida batafsil ma'lumot beramiz
+        bot.send_message(
+            message.chat.id,
+            f"❌ Xatolik yuz berdi!\n\n"
+            f"⚠️ Muammo tavsifi: {str(e)}\n\n"
+            f"📋 Excel fayl quyidagi talablarga javob berishi kerak:\n"
+            f"1️⃣ Birinchi ustunda talaba ID/ismi bo'lishi kerak\n"
+            f"2️⃣ Har bir savol 1 (to'g'ri) yoki 0 (noto'g'ri) qiymatlardan iborat bo'lishi kerak\n"
+            f"3️⃣ Fayl tuzilishi: har bir qator = bir talaba, har bir ustun = bir savol\n\n"
+            f"🔄 Iltimos, faylni tekshirib, qayta yuboring."
+        )
+    
+    def recovered_job_callbacks(job):
+        """Qayta ishga tushishdan keyin tiklangan ish natijasini foydalanuvchiga yetkazish"""
+        meta = job['meta']
+        if 'chat_id' not in meta:
+            return None
+        message = SimpleNamespace(
+            chat=SimpleNamespace(id=meta['chat_id']),
+            from_user=SimpleNamespace(
+                id=meta['user_id'],
+                first_name=meta.get('first_name', ""),
+                last_name=meta.get('last_name', ""),
+                username=meta.get('username', "")
+            )
+        )
+        process_message = SimpleNamespace(message_id=meta['process_message_id'])
+        return {
+            'on_progress': make_progress_reporter(meta['chat_id'], meta['process_message_id']),
+            'on_done': lambda sid: send_analysis_results(message, process_message, sid),
+            'on_error': lambda sid, error: report_analysis_error(message, process_message, error)
+        }
+    
     # File handler
     @bot.message_handler(content_types=['document'])
     def handle_document(message):
@@ -813,7 +945,8 @@ def main():
             return
         
         # Check if user is in /ball command mode
-        if message.from_user.id in user_data and 'waiting_for_balls' in user_data[message.from_user.id]:
+        state = user_data.get(message.from_user.id)
+        if state is not None and 'waiting_for_balls' in state:
             handle_ball_file(message, file_info)
             return
         
@@ -867,162 +1000,48 @@ def main():
             # Faylni ishlov berish jarayoni
             import time
             
-            # Fayl yuklanmoqda...
-            
             # Faylni yuklab olish
             file_id = file_info.file_id
             file_info = bot.get_file(file_id)
             downloaded_file = bot.download_file(file_info.file_path)
-            file_bytes = io.BytesIO(downloaded_file)
-            
-            # Ma'lumotlarni o'qish
-            df = pd.read_excel(file_bytes)
             
-            # Create session and process using analysis service
+            # Tahlil worker jarayonida bajariladi - handler darhol bo'shaydi,
+            # natija tayyor bo'lganda send_analysis_results chaqiriladi
             session_id = f"bot_{user_id}_{int(time.time())}"
             analysis_service.create_session(session_id)
             
-            success = analysis_service.process_file(df, session_id)
-            if not success:
-                bot.edit_message_text(
-                    chat_id=message.chat.id,
-                    message_id=process_message.message_id,
-                    text="❌ Tahlil jarayonida xatolik yuz berdi. Iltimos, qayta urinib ko'ring."
-                )
-                return
-            
-            # Get results from service
-            detailed_results = analysis_service.get_results(session_id, format='json')
-            summary_results = analysis_service.get_results(session_id, format='json')
-            
-            results_df = detailed_results['results_df']
-            ability_estimates = detailed_results['ability_estimates']
-            grade_counts = detailed_results['grade_counts']
-            data_df = detailed_results['df_cleaned']
-            beta_values = detailed_results['item_difficulties']
-            
-            # Track user activity in database
-            db.add_user(
-                user_id=message.from_user.id,
-                first_name=message.from_user.first_name,
-                last_name=message.from_user.last_name or "",
-                username=message.from_user.username or ""
-            )
-            
-            # Log file processing with statistics
-            db.log_file_processing(
-                user_id=message.from_user.id,
-                action_type="process_exam",
-                num_students=len(results_df),
-                num_questions=len(detailed_results['item_difficulties'])  # Use item_difficulties length
+            analysis_pool.submit(
+                user_id, downloaded_file, session_id,
+                on_progress=make_progress_reporter(message.chat.id, process_message.message_id),
+                on_done=lambda sid: send_analysis_results(message, process_message, sid),
+                on_error=lambda sid, error: report_analysis_error(message, process_message, error),
+                origin='bot',
+                meta={
+                    'chat_id': message.chat.id,
+                    'user_id': user_id,
+                    'first_name': message.from_user.first_name,
+                    'last_name': message.from_user.last_name or "",
+                    'username': message.from_user.username or "",
+                    'process_message_id': process_message.message_id
+                }
             )
             
-            # Monitor processed files
-            monitor.increment_processed_files(len(results_df))
-            
-            # Get Excel data from analysis service
-            excel_data = analysis_service.get_excel_file(session_id)
-            
-            user_data[user_id] = {
-                'session_id': session_id,  # Store session_id for service access
-                'results_df': results_df,
-                'ability_estimates': ability_estimates,
-                'grade_counts': grade_counts,
-                'excel_data': excel_data,
-                'data_df': data_df,
-                'beta_values': beta_values,
-                'original_df': df
-            }
-            
-            # We no longer need to send the comparison file automatically
-            # The results are sufficient if they are successfully processed
-            
-            # Create keyboard with buttons
-            markup = create_main_keyboard()
-            
-            # Emojilar bilan ma'noli javob
-            # A+/A baholar soni uchun
-            top_grades_count = grade_counts.get('A+', 0) + grade_counts.get('A', 0)
-            # B+/B/C+/C baholar soni uchun
-            passing_grades_count = top_grades_count + grade_counts.get('B+', 0) + grade_counts.get('B', 0) + grade_counts.get('C+', 0) + grade_counts.get('C', 0)
-            # Sertifikat ololmaganlar soni (NC - No Certificate)
-            failing_count = grade_counts.get('NC', 0)
-            
-            # Umumiy o'tish foizini hisoblash
-            pass_rate = (passing_grades_count / len(results_df) * 100) if len(results_df) > 0 else 0
-            
-            # Natijani chiqarish
-            
-            # Natija tayyorligi haqida xabar
-            try:
-                bot.edit_message_text(
-                    chat_id=message.chat.id,
-                    message_id=process_message.message_id,
-                    text="✅ Tahlil muvaffaqiyatli yakunlandi!"
-                )
-                time.sleep(1)  # Natija chiqganini ko'rish uchun 1 soniya kutish
-                
-                # Endi eski xabarni olib tashlaymiz
-                bot.delete_message(chat_id=message.chat.id, message_id=process_message.message_id)
-            except Exception as e:
-                print(f"Xabarni yangilash/o'chirishda xatolik: {str(e)}")
-                # Xatolikni e'tiborsiz qoldiramiz
-                
-            # Natijalar haqida qisqa ma'lumot
-            # Nolga bo'linish xatosidan himoya
-            total_students = len(results_df)
-            top_grade_percent = (top_grades_count/total_students*100) if total_students > 0 else 0
-            failing_percent = (failing_count/total_students*100) if total_students > 0 else 0
-            
-            success_message = (
-                f"✅ Tahlil yakunlandi!\n\n"
-                f"📊 Natijalar xulosasi:\n"
-                f"👨‍🎓 Jami: {total_students} talaba\n"
-                f"🏆 A+/A: {top_grades_count} ta ({top_grade_percent:.2f}%)\n"
-                f"✅ O'tish: {passing_grades_count} ta ({pass_rate:.2f}%)\n"
-                f"❌ O'tmagan: {failing_count} ta ({failing_percent:.2f}%)\n\n"
-                f"📈 Quyidagi tugmalardan birini tanlang 👇"
+        except UserLimitError:
+            bot.edit_message_text(
+                chat_id=message.chat.id,
+                message_id=process_message.message_id,
+                text="⏳ Oldingi faylingiz hali tahlil qilinmoqda.\n\n"
+                     "Natijani kuting, so'ng yangi faylni yuboring."
             )
-            
-            bot.send_message(
-                message.chat.id,
-                success_message,
-                reply_markup=markup
+        except PoolBusyError:
+            bot.edit_message_text(
+                chat_id=message.chat.id,
+                message_id=process_message.message_id,
+                text="⏳ Hozir juda ko'p fayllar tahlil qilinmoqda.\n\n"
+                     "🔄 Iltimos, bir necha daqiqadan so'ng faylni qayta yuboring."
             )
-            
         except Exception as e:
-            # Xatolik yuz bergani haqida xabar berish
-            monitor.increment_error()
-            
-            # Xatolik haqida log yozish
-            logger.error(f"Error processing file: {str(e)}")
-            
-            # Avval hisoblanmoqda... xabarini yangilaymiz
-            try:
-                bot.edit_message_text(
-                    chat_id=message.chat.id,
-                    message_id=process_message.message_id,
-                    text="❌ Xatolik yuz berdi! Fayl bilan muammo bor."
-                )
-                time.sleep(1)  # Xatolik xabarini ko'rish uchun 1 soniya kutish
-                
-                # Endi eski xabarni olib tashlaymiz
-                bot.delete_message(chat_id=message.chat.id, message_id=process_message.message_id)
-            except Exception as msg_error:
-                print(f"Xabarni yangilash/o'chirishda xatolik: {str(msg_error)}")
-                # Xatolikni e'tiborsiz qoldiramiz
-            
-            # Foydalanuvchiga xatolik haqida batafsil ma'lumot beramiz
-            bot.send_message(
-                message.chat.id,
-                f"❌ Xatolik yuz berdi!\n\n"
-                f"⚠️ Muammo tavsifi: {str(e)}\n\n"
-                f"📋 Excel fayl quyidagi talablarga javob berishi kerak:\n"
-                f"1️⃣ Birinchi ustunda talaba ID/ismi bo'lishi kerak\n"
-                f"2️⃣ Har bir savol 1 (to'g'ri) yoki 0 (noto'g'ri) qiymatlardan iborat bo'lishi kerak\n"
-                f"3️⃣ Fayl tuzilishi: har bir qator = bir talaba, har bir ustun = bir savol\n\n"
-                f"🔄 Iltimos, faylni tekshirib, qayta yuboring."
-            )
+            report_analysis_error(message, process_message, e)
     
     # Callback handler for inline buttons
     @bot.callback_query_handler(func=lambda call: True)
@@ -1097,7 +1116,8 @@ def main():
             return
         
         # Handle regular user callbacks
-        if user_id not in user_data:
+        user_info = user_data.get(user_id)
+        if user_info is None:
             bot.edit_message_text(
                 chat_id=call.message.chat.id,
                 message_id=call.message.message_id,
@@ -1107,31 +1127,25 @@ def main():
             )
             return
         
-        user_info = user_data[user_id]
-        
         # Check if we're waiting for broadcast message
         if 'waiting_for_broadcast' in user_info and user_info['waiting_for_broadcast']:
             return
             
-        results_df = user_info['results_df']
+        total_students = user_info.get('total_students', 0)
         grade_counts = user_info['grade_counts']
         
         if call.data == "back_to_menu":
             # Return to the main menu with original buttons
             markup = create_main_keyboard()
             
-            # A+/A baholar soni uchun
-            top_grades_count = grade_counts.get('A+', 0) + grade_counts.get('A', 0)
-            # B+/B/C+/C baholar soni uchun
-            passing_grades_count = top_grades_count + grade_counts.get('B+', 0) + grade_counts.get('B', 0) + grade_counts.get('C+', 0) + grade_counts.get('C', 0)
-            # Sertifikat ololmaganlar soni (NC - No Certificate)
-            failing_count = grade_counts.get('NC', 0)
+            # Eng yuqori baholar (standartda A+/A), o'tganlar va sertifikat ololmaganlar (eng past baho, NC)
+            # soni - qayta baholash yoki GRADE_THRESHOLDS dagi boshqa baho nomlarida ham to'g'ri
+            top_grades_count, passing_grades_count, failing_count = grade_summary(grade_counts)
             
             # Umumiy o'tish foizini hisoblash
-            pass_rate = (passing_grades_count / len(results_df) * 100) if len(results_df) > 0 else 0
+            pass_rate = (passing_grades_count / total_students * 100) if total_students > 0 else 0
             
             # Nolga bo'linish xatosidan himoya
-            total_students = len(results_df)
             top_grade_percent = (top_grades_count/total_students*100) if total_students > 0 else 0
             failing_percent = (failing_count/total_students*100) if total_students > 0 else 0
             
@@ -1139,7 +1153,7 @@ def main():
             menu_message = (
                 f"📊 *Rasch model natijalar tahlili*\n\n"
                 f"👨‍🎓 Jami: {total_students} talaba\n"
-                f"🏆 A+/A: {top_grades_count} ta ({top_grade_percent:.2f}%)\n"
+                f"🏆 {'/'.join(top_grade_labels(grade_counts))}: {top_grades_count} ta ({top_grade_percent:.2f}%)\n"
                 f"✅ O'tish: {passing_grades_count} ta ({pass_rate:.2f}%)\n"
                 f"❌ O'tmagan: {failing_count} ta ({failing_percent:.2f}%)\n\n"
                 f"📈 Quyidagi tugmalardan birini tanlang 👇"
@@ -1237,12 +1251,10 @@ def main():
                     grade_counts = summary_results['grade_distribution']
                     
                     # Calculate additional statistics
-                    top_grades_count = grade_counts.get('A+', 0) + grade_counts.get('A', 0)
+                    # Pass/Fail calculation (eng past bahodan boshqalari o'tgan)
+                    top_grades_count, pass_count, _ = grade_summary(grade_counts)
                     top_grades_percent = (top_grades_count / total_students * 100) if total_students > 0 else 0
                     
-                    # Pass/Fail calculation
-                    pass_grades = ['A+', 'A', 'B+', 'B', 'C+', 'C']
-                    pass_count = sum(grade_counts.get(grade, 0) for grade in pass_grades)
                     pass_rate = (pass_count / total_students * 100) if total_students > 0 else 0
                     fail_percent = 100 - pass_rate
                     
@@ -1254,7 +1266,7 @@ def main():
                     stats_text += f"👥 *Jami talabalar:* {total_students} ta\n"
                     stats_text += f"📝 *Jami savollar:* {len(beta_values)} ta\n\n"
                     
-                    stats_text += f"🏆 *A+ va A baholar:*\n"
+                    stats_text += f"🏆 *{' va '.join(top_grade_labels(grade_counts))} baholar:*\n"
                     stats_text += f"👑 Eng yaxshi natija: {top_grades_count} ta ({top_grades_percent}%)\n\n"
                     
                     stats_text += f"📈 *O'tish/O'tmaslik:*\n"
@@ -1335,8 +1347,8 @@ def main():
                     stats_text += f"💡 *Tavsiya:* Model natijalari professional tahlil uchun yaxshi. "
                     stats_text += f"Yomon moslik ko'rsatkichlari bo'lgan elementlar qo'shimcha tekshirish talab qiladi."
                     
-                    # Create and send diagram images
-                    img_buffer = create_diagram_images(beta_values, grade_counts)
+                    # Create and send diagram images (hisobotlar hovuzida chiziladi va sessiyada saqlanadi)
+                    img_buffer = analysis_service.get_report(session_id, 'diagrams')
                     
                     if img_buffer:
                         # Send diagram image
@@ -1407,371 +1419,44 @@ def main():
                 reply_markup=create_main_keyboard()
             )
         
-
-    
-    # Create grade distribution plot
-    def grade_distribution_plot(grade_counts, img_buf):
-        """Create a grade distribution plot and save to BytesIO buffer."""
-        # Set a clean style for better visuals
-        plt.style.use('seaborn-v0_8-whitegrid')
-        
-        # Define grade order for consistent display (BBM standards)
-        grade_order = ['A+', 'A', 'B+', 'B', 'C+', 'C', 'NC']
-        
-        # Prepare data ensuring all grades are represented
-        grades = []
-        counts = []
-        colors = []
-        
-        # Grade colors for visualization - more vibrant colors
-        grade_colors = {
-            'A+': '#1E8449',  # Dark Green
-            'A': '#28B463',   # Green
-            'B+': '#58D68D',  # Light Green
-            'B': '#3498DB',   # Blue
-            'C+': '#5DADE2',  # Light Blue
-            'C': '#F4D03F',   # Yellow
-            'NC': '#E67E22',   # Orange
-        }
-        
-        for grade in grade_order:
-            if grade in grade_counts:
-                grades.append(grade)
-                counts.append(grade_counts[grade])
-                colors.append(grade_colors[grade])
-            else:
-                grades.append(grade)
-                counts.append(0)
-                colors.append(grade_colors[grade])
-        
-        # Create the figure and axis with larger size for better quality
-        fig, ax = plt.subplots(figsize=(12, 8))
-        
-        # Create the bar chart with slightly wider bars and edge color
-        bars = ax.bar(
-            grades, 
-            counts, 
-            color=colors,
-            width=0.6,
-            edgecolor='white',
-            linewidth=1.5
-        )
-        
-        # Add count labels on top of each bar with better styling
-        for i, bar in enumerate(bars):
-            height = bar.get_height()
-            if height > 0:  # Only add label if there are students with this grade
-                ax.text(
-                    bar.get_x() + bar.get_width()/2.,
-                    height + 0.3,  # Slightly higher position
-                    str(height),
-                    ha='center',
-                    va='bottom',
-                    fontweight='bold',
-                    fontsize=12,
-                    color='black'
+        elif call.data == "download_all":
+            # Barcha hisobotlar parallel chiziladi - har biri tayyor bo'lishi bilan yuboriladi
+            user_info = user_data.get(user_id, {})
+            session_id = user_info.get('session_id')
+            
+            if not session_id:
+                bot.send_message(
+                    chat_id=call.message.chat.id,
+                    text="❌ Session topilmadi."
                 )
-        
-        # Get the maximum count for y-axis scaling
-        max_count = max(counts) if counts else 0
-        
-        # Calculate a good upper limit for the y-axis (rounded up to nearest 5)
-        y_upper = 5 * ((int(max_count * 1.2) // 5) + 1) if max_count > 0 else 10
-        
-        # Customize the chart with better styling
-        ax.set_ylim(0, y_upper)
-        ax.set_xlabel('Baho', fontsize=14, fontweight='bold')
-        ax.set_ylabel('Talabalar soni', fontsize=14, fontweight='bold')
-        ax.set_title('BAHOLAR TAQSIMOTI', fontsize=16, fontweight='bold')
-        
-        # Customize grid
-        ax.grid(axis='y', linestyle='--', alpha=0.7)
-        
-        # Customize ticks
-        ax.tick_params(axis='both', labelsize=12)
-        
-        # Add custom grade descriptions as a secondary x-axis label
-        grade_description = {
-            'A+': 'Maksimal ball (70+)',
-            'A': 'Maksimal ball (65-70)',
-            'B+': 'Proporsional ball (60-65)',
-            'B': 'Proporsional ball (55-60)',
-            'C+': 'Proporsional ball (50-55)',
-            'C': 'Proporsional ball (46-50)',
-            'NC': 'DTM ga tavsiya etilmaydi'
-        }
-        
-        # Display grade descriptions
-        ax.set_xticklabels([f"{grade}\n{grade_description[grade]}" for grade in grades])
-        
-        # Add percentage labels below each count
-        total_students = sum(counts)
-        if total_students > 0:
-            for i, bar in enumerate(bars):
-                height = bar.get_height()
-                if height > 0:
-                    percentage = (height / total_students) * 100
-                    ax.text(
-                        bar.get_x() + bar.get_width()/2.,
-                        height / 2,  # Position in middle of bar
-                        f"{percentage:.2f}%",
-                        ha='center',
-                        va='center',
-                        fontweight='bold',
-                        color='white' if grades[i] in ['A+', 'A', 'B'] else 'black',
-                        fontsize=11
-                    )
-        
-        # Adjust layout
-        fig.tight_layout()
-        
-        # Disable spines
-        for spine in ['top', 'right']:
-            ax.spines[spine].set_visible(False)
-        
-        # Save to buffer with higher DPI for better quality
-        plt.savefig(img_buf, format='png', dpi=300, bbox_inches='tight', 
-                   facecolor='white', edgecolor='none', pad_inches=0.2)
-        plt.close()
-
-    # Create item difficulty plot and analysis function
-    def item_difficulty_plot(data_df, beta_values, img_buf):
-        """
-        Create item difficulty analysis and plot showing which questions were the most difficult.
-        
-        Parameters:
-        - data_df: DataFrame containing raw student responses
-        - beta_values: Array of item difficulty parameters from Rasch model
-        - img_buf: BytesIO buffer to save the plot
-        """
-        if data_df is None or beta_values is None:
-            # Create empty plot if no data is available
-            fig, ax = plt.subplots(figsize=(12, 8))
-            ax.text(0.5, 0.5, "Ma'lumotlar mavjud emas", ha='center', va='center', fontsize=16)
-            plt.savefig(img_buf, format='png', dpi=150, bbox_inches='tight')
-            plt.close()
-            return
-        
-        # Set a clean style for better visuals
-        plt.style.use('seaborn-v0_8-whitegrid')
-        
-        # Create figure and axes
-        fig, (ax1, ax2) = plt.subplots(2, 1, figsize=(14, 12), gridspec_kw={'height_ratios': [3, 1]})
-        
-        # Get number of questions/items
-        num_items = len(beta_values)
-        
-        # Calculate percent correct for each item
-        percent_correct = []
-        for i in range(num_items):
-            # Calculate from df_cleaned data (list of dicts)
-            if isinstance(data_df, list) and len(data_df) > 0:
-                # Get column names from first row
-                col_names = list(data_df[0].keys())
-                if i+1 < len(col_names):
-                    col_name = col_names[i+1]  # +1 because first column is student ID
-                    correct_count = sum(1 for row in data_df if row.get(col_name, 0) == 1)
-                    total_count = len(data_df)
-                    percent_correct.append(100 * correct_count / total_count if total_count > 0 else 0)
+                return
+            
+            bot.edit_message_text(
+                chat_id=call.message.chat.id,
+                message_id=call.message.message_id,
+                text="⏳ Hisobotlar tayyorlanmoqda..."
+            )
+            sent = 0
+            for name, data in analysis_service.iter_reports(session_id, list(ALL_REPORTS)):
+                file_name, caption = ALL_REPORTS[name]
+                if data is None:
+                    bot.send_message(chat_id=call.message.chat.id, text=f"❌ {caption} tayyorlanmadi.")
+                elif file_name.endswith('.png'):
+                    bot.send_photo(chat_id=call.message.chat.id, photo=data, caption=caption)
+                    sent += 1
                 else:
-                    percent_correct.append(0)
-            else:
-                percent_correct.append(0)
-        
-        # Create item indices
-        item_indices = np.arange(1, num_items+1)
-        
-        # Sort items by difficulty for classification
-        difficulty_with_index = [(beta, i+1, percent) for i, (beta, percent) in enumerate(zip(beta_values, percent_correct))]
-        difficulty_with_index.sort(key=lambda x: x[0], reverse=True)  # Sort by beta (difficulty)
-        
-        # Classify items into categories based on percentiles
-        num_items_per_category = max(1, num_items // 5)  # Aim for roughly 5 categories
-        
-        very_difficult = [item[1] for item in difficulty_with_index[:num_items_per_category]]
-        difficult = [item[1] for item in difficulty_with_index[num_items_per_category:2*num_items_per_category]]
-        moderate = [item[1] for item in difficulty_with_index[2*num_items_per_category:3*num_items_per_category]]
-        easy = [item[1] for item in difficulty_with_index[3*num_items_per_category:4*num_items_per_category]]
-        very_easy = [item[1] for item in difficulty_with_index[4*num_items_per_category:]]
-        
-        # Create colors based on difficulty
-        colors = []
-        for i in range(1, num_items+1):
-            if i in very_difficult:
-                colors.append('#E74C3C')  # Red for very difficult
-            elif i in difficult:
-                colors.append('#F39C12')  # Orange for difficult
-            elif i in moderate:
-                colors.append('#F1C40F')  # Yellow for moderate
-            elif i in easy:
-                colors.append('#2ECC71')  # Green for easy
-            elif i in very_easy:
-                colors.append('#27AE60')  # Dark green for very easy
-            else:
-                colors.append('#3498DB')  # Blue default
-        
-        # Plot item difficulties
-        bars = ax1.bar(item_indices, beta_values, color=colors, width=0.7, 
-                  edgecolor='white', linewidth=1)
-        
-        # Add percent correct as text on each bar
-        for i, (bar, percent) in enumerate(zip(bars, percent_correct)):
-            height = bar.get_height()
-            y_pos = height + 0.1 if height >= 0 else height - 0.3
-            ax1.text(bar.get_x() + bar.get_width() / 2, y_pos,
-                   f"{percent:.2f}%", ha='center', va='bottom' if height >= 0 else 'top',
-                   fontsize=8, rotation=90, color='black', fontweight='bold')
-        
-        # Add horizontal lines for difficulty categorization
-        percentiles = np.percentile(beta_values, [20, 40, 60, 80])
-        
-        ax1.axhline(y=percentiles[3], color='#E74C3C', linestyle='--', alpha=0.7)
-        ax1.axhline(y=percentiles[2], color='#F39C12', linestyle='--', alpha=0.7)
-        ax1.axhline(y=percentiles[1], color='#F1C40F', linestyle='--', alpha=0.7)
-        ax1.axhline(y=percentiles[0], color='#2ECC71', linestyle='--', alpha=0.7)
-        
-        # Customize the chart
-        ax1.set_ylabel('Qiyinlik darajasi (Beta)', fontsize=14, fontweight='bold')
-        ax1.set_title('SAVOLLAR QIYINLIGI TAHLILI', fontsize=16, fontweight='bold')
-        ax1.set_xticks(item_indices)
-        ax1.set_xticklabels([str(i) for i in item_indices], rotation=90, fontsize=8)
-        ax1.set_xlabel('Savol raqami', fontsize=14, fontweight='bold')
-        
-        # Add legend for difficulty categories
-        legend_elements = [
-            plt.Line2D([0], [0], color='#E74C3C', lw=4, label='Juda qiyin'),
-            plt.Line2D([0], [0], color='#F39C12', lw=4, label='Qiyin'),
-            plt.Line2D([0], [0], color='#F1C40F', lw=4, label='O\'rta'),
-            plt.Line2D([0], [0], color='#2ECC71', lw=4, label='Oson'),
-            plt.Line2D([0], [0], color='#27AE60', lw=4, label='Juda oson')
-        ]
-        ax1.legend(handles=legend_elements, loc='upper right', fontsize=10)
-        
-        # Add grid lines
-        ax1.grid(axis='y', linestyle='--', alpha=0.7)
-        
-        # Customize ticks
-        ax1.tick_params(axis='both', labelsize=12)
-        
-        # Second subplot: Analysis of top 5 difficult and top 5 easy questions
-        hardest_items = difficulty_with_index[:5]
-        easiest_items = difficulty_with_index[-5:]
-        
-        # Table data for analysis
-        rows = ['Eng qiyin savollar', 'Eng oson savollar']
-        cols = [f"#{item[1]}: {item[0]:.2f} ({item[2]:.2f}%)" for item in hardest_items + easiest_items]
-        cellText = [
-            [f"#{item[1]}: {item[0]:.2f} ({item[2]:.2f}%)" for item in hardest_items],
-            [f"#{item[1]}: {item[0]:.2f} ({item[2]:.2f}%)" for item in easiest_items]
-        ]
-        
-        # Add a table at the bottom
-        ax2.axis('tight')
-        ax2.axis('off')
-        table = ax2.table(cellText=cellText, rowLabels=rows, 
-                         loc='center', cellLoc='center',
-                         colWidths=[0.18] * 5)
-        
-        # Style the table
-        table.auto_set_font_size(False)
-        table.set_fontsize(10)
-        table.scale(1, 1.5)
-        
-        # Color code the table cells
-        for i in range(2):
-            for j in range(5):
-                cell = table[(i, j)]
-                if i == 0:  # Hardest items
-                    cell.set_facecolor('#FADBD8')
-                else:  # Easiest items
-                    cell.set_facecolor('#D5F5E3')
-        
-        # Adjust layout
-        fig.tight_layout()
-        
-        # Save to buffer with higher DPI for better quality
-        plt.savefig(img_buf, format='png', dpi=300, bbox_inches='tight', 
-                   facecolor='white', edgecolor='none', pad_inches=0.2)
-        plt.close()
-        
-    # Create ability distribution plot
-    def ability_distribution_plot(ability_estimates, img_buf):
-        """Create an ability distribution plot and save to BytesIO buffer."""
-        # Set a clean style for better visuals
-        plt.style.use('seaborn-v0_8-whitegrid')
-        
-        fig, ax = plt.subplots(figsize=(12, 8))
-        
-        # Create a better histogram with custom styling
-        n, bins, patches = ax.hist(
-            ability_estimates, 
-            bins=20, 
-            color='#3498DB',  # Nice blue color
-            edgecolor='white',
-            linewidth=1.5,
-            alpha=0.9
-        )
-        
-        # Calculate statistics for annotation
-        mean_ability = np.mean(ability_estimates)
-        median_ability = np.median(ability_estimates)
-        std_ability = np.std(ability_estimates)
-        
-        # Add mean line
-        ax.axvline(mean_ability, color='#E74C3C', linestyle='--', linewidth=2)
-        ax.text(
-            mean_ability, 
-            ax.get_ylim()[1] * 0.9, 
-            f'O\'rtacha: {mean_ability:.2f}',
-            color='#E74C3C',
-            fontweight='bold',
-            ha='center',
-            bbox=dict(facecolor='white', alpha=0.8, edgecolor='none', boxstyle='round,pad=0.5')
-        )
-        
-        # Add a bell curve of the normal distribution for comparison
-        x = np.linspace(min(ability_estimates), max(ability_estimates), 100)
-        y = np.max(n) * 0.9 * np.exp(-(x - mean_ability)**2 / (2 * std_ability**2)) / (std_ability * np.sqrt(2 * np.pi))
-        ax.plot(x, y, 'r-', linewidth=2, alpha=0.6)
-        
-        # Customize the chart
-        ax.set_xlabel('Qobiliyat ko\'rsatkichi', fontsize=14, fontweight='bold')
-        ax.set_ylabel('Talabalar soni', fontsize=14, fontweight='bold')
-        ax.set_title('TALABALAR QOBILIYATI TAQSIMOTI', fontsize=16, fontweight='bold')
-        
-        # Customize grid
-        ax.grid(axis='y', linestyle='--', alpha=0.7)
-        
-        # Customize ticks
-        ax.tick_params(axis='both', labelsize=12)
-        
-        # Add statistics box
-        stats_text = f"Statistik ma'lumotlar:\n"
-        stats_text += f"O'rtacha: {mean_ability:.2f}\n"
-        stats_text += f"Median: {median_ability:.2f}\n"
-        stats_text += f"Standart og'ish: {std_ability:.2f}"
-        
-        props = dict(boxstyle='round', facecolor='#F0F3F4', alpha=0.9)
-        ax.text(
-            0.77, 0.15, stats_text, 
-            transform=ax.transAxes, 
-            fontsize=12,
-            verticalalignment='bottom', 
-            bbox=props
-        )
-        
-        # Adjust layout
-        fig.tight_layout()
-        
-        # Disable spines
-        for spine in ['top', 'right']:
-            ax.spines[spine].set_visible(False)
+                    bot.send_document(chat_id=call.message.chat.id, document=data,
+                                      visible_file_name=file_name, caption=caption)
+                    sent += 1
+            
+            bot.edit_message_text(
+                chat_id=call.message.chat.id,
+                message_id=call.message.message_id,
+                text=f"✅ {sent}/{len(ALL_REPORTS)} ta hisobot yuborildi!",
+                reply_markup=create_main_keyboard()
+            )
         
-        # Save to buffer with higher DPI for better quality
-        plt.savefig(img_buf, format='png', dpi=300, bbox_inches='tight', 
-                   facecolor='white', edgecolor='none', pad_inches=0.2)
-        plt.close()
-
+    
     # Handler for processing ball files
     def handle_ball_file(message, file_info):
         chat_id = message.chat.id
@@ -1790,10 +1475,9 @@ def main():
             file_id = file_info.file_id
             file_info_obj = bot.get_file(file_id)
             downloaded_file = bot.download_file(file_info_obj.file_path)
-            file_bytes = io.BytesIO(downloaded_file)
             
             # Read file data
-            df = pd.read_excel(file_bytes)
+            df = read_frame(downloaded_file, filename=file_info.file_name)
             
             # Ensure required columns exist
             if "Talaba" not in df.columns or "Ball" not in df.columns:
@@ -1805,10 +1489,21 @@ def main():
                 return
             
             # Processing based on state (first or second file)
-            if user_data[user_id]['waiting_for_balls'] == 'first_file':
+            # Sessiya fayl yuklanayotganda eskirgan bo'lishi mumkin - bitta get()
+            state = user_data.get(user_id)
+            if state is None or 'waiting_for_balls' not in state:
+                bot.send_message(
+                    chat_id,
+                    "⚠️ Sessiya muddati tugadi.\n"
+                    "Iltimos, /ball buyrug'i bilan qaytadan boshlang."
+                )
+                return
+
+            if state['waiting_for_balls'] == 'first_file':
                 # Save first file data
-                user_data[user_id]['first_file'] = df
-                user_data[user_id]['waiting_for_balls'] = 'second_file'
+                state['first_file'] = df
+                state['waiting_for_balls'] = 'second_file'
+                user_data.refresh(user_id)
                 
                 # Ask for second file
                 bot.send_message(
@@ -1817,9 +1512,10 @@ def main():
                     "Iltimos, ikkinchi Excel faylni yuboring."
                 )
                 
-            elif user_data[user_id]['waiting_for_balls'] == 'second_file':
+            elif state['waiting_for_balls'] == 'second_file':
                 # Save second file
-                user_data[user_id]['second_file'] = df
+                state['second_file'] = df
+                user_data.refresh(user_id)
                 
                 # Process both files
                 process_message = bot.send_message(
@@ -1829,8 +1525,8 @@ def main():
                 )
                 
                 # Get both dataframes
-                df1 = user_data[user_id]['first_file']
-                df2 = user_data[user_id]['second_file']
+                df1 = state['first_file']
+                df2 = state['second_file']
                 
                 # Merge data on 'Talaba' column and calculate average
                 result_df = calculate_average_scores(df1, df2)
@@ -1897,8 +1593,8 @@ def main():
         # Calculate average
         result_df['O\'rtacha Ball'] = (filled_df['Ball_1'] + filled_df['Ball_2']) / 2
         
-        # Assign grade based on average score
-        result_df['Daraja'] = result_df['O\'rtacha Ball'].apply(assign_grade)
+        # Assign grade based on average score (1 xonagacha yaxlitlab, butun ustun bitta operatsiyada)
+        result_df['Daraja'] = grade_scores(result_df['O\'rtacha Ball'].to_numpy(), decimals=1)
         
         # Sort by average score in descending order (higher scores at top)
         result_df = result_df.sort_values('O\'rtacha Ball', ascending=False).reset_index(drop=True)
@@ -1908,27 +1604,6 @@ def main():
         
         return result_df
     
-    # Function to assign grade based on score
-    def assign_grade(score):
-        """
-        Assign a grade (A+, A, B+, B, C+, C, NC) based on score.
-        """
-        score = round(score, 1)
-        if score > 70:
-            return 'A+'
-        elif score >= 65 and score <= 70:
-            return 'A'
-        elif score >= 60 and score < 65:
-            return 'B+'
-        elif score >= 55 and score < 60:
-            return 'B'
-        elif score >= 50 and score < 55:
-            return 'C+'
-        elif score >= 46 and score < 50:
-            return 'C'
-        else:
-            return 'NC'
-    
     # Function to create Excel file with average scores
     def prepare_ball_excel(df):
         """
@@ -1937,99 +1612,43 @@ def main():
         # Create BytesIO object to store Excel data
         excel_data = io.BytesIO()
         
-        # Create Excel writer with xlsxwriter engine for better formatting
-        with pd.ExcelWriter(excel_data, engine='xlsxwriter') as writer:
-            # Write dataframe to Excel
-            df.to_excel(writer, sheet_name='O\'rtacha Ballar', index=False)
-            
-            # Get the worksheet
-            workbook = writer.book
-            worksheet = writer.sheets['O\'rtacha Ballar']
-            
-            # Add formatting
-            header_format = workbook.add_format({
-                'bold': True,
-                'bg_color': '#4472C4',
-                'font_color': 'white',
-                'border': 1,
-                'align': 'center',
-                'valign': 'vcenter'
-            })
-            
-            # Create grade-specific formats with same colors as used elsewhere
-            grade_formats = {
-                'A+': workbook.add_format({'bg_color': '#006400', 'font_color': 'white', 'border': 1, 'align': 'center'}),  # Dark green
-                'A': workbook.add_format({'bg_color': '#28B463', 'font_color': 'white', 'border': 1, 'align': 'center'}),  # Green
-                'B+': workbook.add_format({'bg_color': '#1A237E', 'font_color': 'white', 'border': 1, 'align': 'center'}),  # Dark blue
-                'B': workbook.add_format({'bg_color': '#3498DB', 'font_color': 'white', 'border': 1, 'align': 'center'}),  # Blue
-                'C+': workbook.add_format({'bg_color': '#8D6E63', 'font_color': 'white', 'border': 1, 'align': 'center'}),  # Brown
-                'C': workbook.add_format({'bg_color': '#F4D03F', 'font_color': 'black', 'border': 1, 'align': 'center'}),  # Yellow
-                'NC': workbook.add_format({'bg_color': '#E74C3C', 'font_color': 'white', 'border': 1, 'align': 'center'})   # Red
-            }
-            
-            # Format for numeric columns
-            number_format = workbook.add_format({
-                'border': 1,
-                'align': 'center',
-                'num_format': '0.00'  # Display with 2 decimal places
-            })
-            
-            # Format for rank column
-            rank_format = workbook.add_format({
-                'border': 1,
-                'align': 'center',
-                'bold': True
-            })
-            
-            # Format the header row
-            for col_num, value in enumerate(df.columns.values):
-                worksheet.write(0, col_num, value, header_format)
-            
-            # Format each row based on data type
-            for row_num, row in enumerate(df.itertuples(index=False), 1):
-                # Rank column (index 0)
-                worksheet.write(row_num, 0, row.Rin, rank_format)
-                
-                # Student name (index 1)
-                worksheet.write(row_num, 1, row.Talaba)
-                
-                # Score columns (2-4)
-                worksheet.write(row_num, 2, row.Ball_1, number_format)
-                worksheet.write(row_num, 3, row.Ball_2, number_format)
-                # Use df directly to access the column value because of the special character in column name
-                worksheet.write(row_num, 4, df.iloc[row_num-1]["O'rtacha Ball"], number_format)
-                
-                # Grade column (5)
-                grade = row.Daraja
-                if grade in grade_formats:
-                    worksheet.write(row_num, 5, grade, grade_formats[grade])
-            
-            # Set column widths
-            worksheet.set_column('A:A', 6)   # Rin (No ustuni uchun kichikroq kenglik)
-            worksheet.set_column('B:B', 30)  # Talaba (Ism-familiya uchun kattaroq kenglik)
-            worksheet.set_column('C:E', 12)  # Ball columns
-            worksheet.set_column('F:F', 10)  # Daraja
-            
-            # Apply alternating row colors for readability
-            for row_num in range(1, len(df) + 1):
-                if row_num % 2 == 0:
-                    # Use a very light gray for every other row
-                    for col_num in range(len(df.columns)):
-                        # Skip grade column which has its own formatting
-                        if col_num == 5:  # Daraja column
-                            continue
-                        
-                        # Apply light background for even rows
-                        alt_format = workbook.add_format({'bg_color': '#F9F9F9'})
-                        worksheet.conditional_format(row_num, col_num, row_num, col_num, 
-                                                    {'type': 'no_blanks', 
-                                                     'format': alt_format})
+        # Oqimli ish kitobi: formatlar ustun bo'yicha, ranglar diapazon qoidalari bilan
+        workbook = open_workbook(excel_data)
+        header_format = workbook.add_format(dict(HEADER_STYLE, bg_color='#4472C4'))
+        # Format for numeric columns (2 decimal places)
+        number_format = workbook.add_format({'border': 1, 'align': 'center', 'num_format': '0.00'})
+        column_formats = {
+            'Rin': workbook.add_format({'border': 1, 'align': 'center', 'bold': True}),
+            'Ball_1': number_format,
+            'Ball_2': number_format,
+            "O'rtacha Ball": number_format,
+            'Daraja': workbook.add_format({'border': 1, 'align': 'center'}),
+        }
+        widths = {
+            'Rin': 6,      # Rin (No ustuni uchun kichikroq kenglik)
+            'Talaba': 30,  # Talaba (Ism-familiya uchun kattaroq kenglik)
+            'Ball_1': 12, 'Ball_2': 12, "O'rtacha Ball": 12,
+            'Daraja': 10,
+        }
+        worksheet = write_table(workbook, 'O\'rtacha Ballar', df, column_formats, widths, header_format, freeze=False)
+        
+        grade_col = df.columns.get_loc('Daraja')
+        # Daraja ustuni baho rangida, qolgan ustunlarda navbatma-navbat qator foni
+        add_grade_formats(workbook, worksheet, grade_col, 1, len(df))
+        add_banding(workbook, worksheet, 1, len(df), 0, grade_col - 1)
+        workbook.close()
         
         # Reset the pointer to the beginning of the BytesIO object
         excel_data.seek(0)
         
         return excel_data
     
+    # Oldingi ishga tushishdan qolgan tahlillarni davom ettirish
+    try:
+        analysis_pool.recover(recovered_job_callbacks, origin='bot')
+    except Exception as e:
+        logger.error(f"Job recovery error: {e}")
+    
     print("Bot ishga tushdi akasi...")
     if use_webhook:
         app = create_health_app()
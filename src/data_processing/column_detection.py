@@ -0,0 +1,401 @@
+"""
+Ustun rollarini aniqlash: o'quvchi ID/ism ustuni va savol ustunlari.
+
+Evristikalar (ism balli, ketma-ket ID, faqat sonli ustunlar) butun jadval o'rniga
+cheklangan, qatlamli tanlanma (boshi, o'rtasi, oxiri) ustida ishlaydi. Aniqlangan
+tuzilma sarlavha imzosi bo'yicha keshlanadi - bir xil shablondagi fayllar qayta
+yuklanganda aniqlash bosqichi butunlay o'tkazib yuboriladi.
+"""
+import hashlib
+import json
+import re
+import threading
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
+
+# Aniqlash uchun olinadigan qatorlar soni (kichik jadvallar to'liq tekshiriladi)
+DEFAULT_SAMPLE_ROWS = 500
+# Keshda saqlanadigan shablonlar soni
+LAYOUT_CACHE_SIZE = 64
+
+
+def header_signature(columns):
+    """Sarlavhalar (nomi va turi, tartibi bilan) bo'yicha barqaror imzo (sha1)"""
+    payload = json.dumps([[type(col).__name__, str(col)] for col in columns], ensure_ascii=False)
+    return hashlib.sha1(payload.encode('utf-8')).hexdigest()
+
+
+def stratified_sample(df, max_rows=DEFAULT_SAMPLE_ROWS):
+    """
+    Jadvalning boshi, oxiri va o'rtasidan teng oraliqda olingan qatorlar.
+    Boshidagi qatorlar doim kiradi (ketma-ket ID tekshiruvi birinchi qiymatlarga qaraydi).
+    """
+    n_rows = len(df)
+    if not max_rows or n_rows <= max_rows:
+        return df
+    edge = max_rows // 4
+    middle = np.linspace(edge, n_rows - edge - 1, max_rows - 2 * edge).astype(np.int64)
+    positions = np.unique(np.concatenate([np.arange(edge), middle, np.arange(n_rows - edge, n_rows)]))
+    return df.iloc[positions]
+
+
+class LayoutCache:
+    """Sarlavha imzosi -> (id_column, question_columns), thread-safe LRU"""
+
+    def __init__(self, max_entries=LAYOUT_CACHE_SIZE):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, signature):
+        with self._lock:
+            layout = self._entries.get(signature)
+            if layout is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(signature)
+            self.hits += 1
+            return layout
+
+    def put(self, signature, layout):
+        with self._lock:
+            self._entries[signature] = layout
+            self._entries.move_to_end(signature)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self):
+        with self._lock:
+            return {'layouts': len(self._entries), 'hits': self.hits, 'misses': self.misses}
+
+
+layout_cache = LayoutCache()
+
+
+def detect_column_roles(df, sample_rows=DEFAULT_SAMPLE_ROWS, cache=layout_cache):
+    """
+    ID/ism ustuni va savol ustunlarini aniqlash.
+
+    Parameters:
+    - df: Asl DataFrame
+    - sample_rows: Evristikalar uchun tanlanma hajmi (None - barcha qatorlar)
+    - cache: LayoutCache (None - keshsiz)
+
+    Returns:
+    - id_column: O'quvchi ID/ism ustuni
+    - question_columns: Savol ustunlari (raqamlari bo'yicha tartiblangan)
+    """
+    signature = header_signature(df.columns) if cache is not None else None
+    if signature is not None:
+        layout = cache.get(signature)
+        if layout is not None:
+            return layout[0], list(layout[1])
+
+    sample = stratified_sample(df, sample_rows)
+    id_column = _detect_id_column(sample)
+    question_columns = _detect_question_columns(sample, id_column)
+
+    # Savol topilmagan tuzilma keshlanmaydi (bunday fayl baribir tahlil qilinmaydi)
+    if signature is not None and question_columns:
+        cache.put(signature, (id_column, tuple(question_columns)))
+    return id_column, question_columns
+
+
+def _detect_id_column(df):
+    """O'quvchi ism/ID ustunini nomlari va qiymatlari bo'yicha aniqlash"""
+    # Ustunlarning matn ko'rinishi (dropna + str) bir marta hisoblanadi va ID ustunini
+    # aniqlashdagi barcha tekshiruvlarda qayta ishlatiladi
+    text_views = {}
+    invalid_values = ['0', '1', 'true', 'false', 'yes', 'no', 'y', 'n']
+    
+    def text_view(col):
+        if col not in text_views:
+            values = df[col].dropna().astype(str)
+            stripped = values.str.strip()
+            text_views[col] = {
+                'values': values,
+                'count': len(values),
+                'lower': stripped.str.lower(),
+                'is_digit': stripped.str.isdigit().astype(bool),
+                'length': stripped.str.len()
+            }
+        return text_views[col]
+    
+    def invalid_count(view):
+        # 0, 1, true/false kabi qiymatlar yoki bitta raqam
+        return int((view['lower'].isin(invalid_values) | (view['is_digit'] & (view['length'] <= 1))).sum())
+    
+    # STEP 1: Identify student ID/name column
+    id_column = None
+    id_column_keywords = ['student', 'name', 'id', 'ism', 'familiya', 'номи', 'исм', 'фамилия', 'names']
+    exclude_keywords = ['n0', 'no', '№', '#', 'number']
+    
+    # XUSUSIY HOLAT - 504, 505, 506... kabi ketma-ket raqamlar birinchi ustunda bo'lsa, 
+    # u holda ikkinchi ustunni ism-familiya deb olishimiz kerak
+    # Agar PDF formatdagi chiziqli ro'yxatda birinchi ustun tartib raqami bo'lsa
+    # First check if this is one of the special 'sequential ID number' cases
+    is_sequential_id_case = False
+    if len(df.columns) >= 2:
+        # Check if the first column contains sequential numeric IDs (like 504, 505, 506...)
+        first_col = df.columns[0]
+        # Faqat birinchi 5 ta qiymat kerak
+        first_col_values = df[first_col].dropna().head(5).astype(str).tolist()
+        # Check at least 5 values to be sure (or all if there are fewer)
+        check_len = min(5, len(first_col_values))
+        
+        if check_len > 0:
+            # Filter only numeric values
+            numeric_values = [int(v) for v in first_col_values[:check_len] if str(v).strip().isdigit()]
+            
+            # If all are numeric and have 3 or more digits, likely sequential IDs like in screenshot
+            if len(numeric_values) == check_len and all(len(str(v)) >= 3 for v in numeric_values):
+                # Also check if they are roughly sequential
+                is_sequential = True
+                if len(numeric_values) > 1:
+                    # Check if the values increase somewhat sequentially
+                    numeric_values.sort()
+                    # Assume sequential if average difference between consecutive numbers is < 10
+                    diffs = [numeric_values[i+1] - numeric_values[i] for i in range(len(numeric_values)-1)]
+                    avg_diff = sum(diffs) / len(diffs) if diffs else 0
+                    is_sequential = 1 <= avg_diff <= 10
+                
+                if is_sequential:
+                    # This is likely the case in the screenshot where first column is just sequential IDs
+                    is_sequential_id_case = True
+                    # Take the second column as the name/ID column directly
+                    id_column = df.columns[1]
+    
+    # Only proceed with the normal logic if we haven't identified a special case
+    if not is_sequential_id_case:
+        # Regular logic for identifying ID column by name...
+        # First check column names for keywords
+        for col in df.columns:
+            col_lower = str(col).lower().strip()
+            
+            # Skip columns that are likely numbering/ordering columns
+            if col_lower in exclude_keywords or col_lower == 'n' or col_lower == 'no':
+                continue
+                
+            # Check if this is likely an ID column based on keywords
+            if any(keyword in col_lower for keyword in id_column_keywords):
+                # Verify that this column contains valid student names/IDs (not just numbers like 0, 1)
+                valid_name_column = True
+                
+                # Get non-empty values from this column
+                view = text_view(col)
+                
+                # Skip if no values
+                if not view['count']:
+                    continue
+                    
+                # Check if the column values look like valid names (not just 0, 1, or single digits)
+                # If more than 50% of values are just single digits or invalid values, skip this column
+                if invalid_count(view) / view['count'] > 0.5:
+                    valid_name_column = False
+                    
+                if valid_name_column:
+                    id_column = col
+                    break
+        
+        # If no obvious ID column by name, look at content - assuming student names are text, not numbers
+        if id_column is None:
+            # First check if all columns contain mostly just numbers - the "all numeric columns" case
+            all_numeric_columns = True
+            for col in df.columns:
+                view = text_view(col)
+                if view['count'] > 0:
+                    numeric_count = int(view['is_digit'].sum())
+                    if numeric_count / view['count'] < 0.8:  # If less than 80% are numbers, not a pure numeric column
+                        all_numeric_columns = False
+                        break
+            
+            # If all columns are numeric (like in the screenshot), take the second column as ID column
+            if all_numeric_columns and len(df.columns) >= 2:
+                id_column = df.columns[1]
+            else:
+                # Normal case - try to find the best column based on content
+                best_name_column = None
+                max_name_score = -1
+                
+                for col in df.columns:
+                    # Skip already known non-name columns
+                    col_lower = str(col).lower().strip()
+                    if col_lower in exclude_keywords or col_lower == 'n' or col_lower == 'no':
+                        continue
+                        
+                    # Look at all non-empty values to determine if this looks like a name column
+                    view = text_view(col)
+                    n_values = view['count']
+                    
+                    # Skip if no values
+                    if not n_values:
+                        continue
+                    
+                    # Skip columns that have all pure numeric values with 3+ digits
+                    if (view['is_digit'] & (view['length'] >= 3)).all():
+                        continue
+                    
+                    # Calculate a "name score" based on characteristics of typical student names
+                    # Higher score = more likely to be a name column
+                    
+                    # 1. Text length should be reasonable for a name (not too short, not too long)
+                    avg_len = view['length'].sum() / n_values
+                    length_score = 0
+                    if 5 <= avg_len <= 30:  # Typical name length range
+                        length_score = 2.0
+                    elif avg_len > 3:  # Short but could be initials or abbreviations
+                        length_score = 1.0
+                        
+                    # 2. Should contain some letters (not just numbers)
+                    contains_letters = int(view['values'].str.contains(r'[^\W\d_]', regex=True).sum())
+                    letter_score = contains_letters / n_values
+                    
+                    # 3. Shouldn't be mostly 0s, 1s or very short values
+                    valid_score = 1.0 - (invalid_count(view) / n_values)
+                    
+                    # 4. Penalty for pure numeric columns
+                    numeric_penalty = 0
+                    if view['is_digit'].all():
+                        numeric_penalty = 2.0
+                    
+                    # Total score for this column
+                    name_score = length_score + 2*letter_score + 3*valid_score - numeric_penalty
+                    
+                    # Update best column if this one has a higher score
+                    if name_score > max_name_score:
+                        max_name_score = name_score
+                        best_name_column = col
+                
+                # Use the best scoring column if found
+                if best_name_column is not None and max_name_score > 2.0:  # Threshold for accepting a column
+                    id_column = best_name_column
+        
+        # If we still can't find a name column, use the second column if available, otherwise first column
+        if id_column is None:
+            if len(df.columns) > 1:
+                # Use second column as student names are often in the second column after numbering
+                id_column = df.columns[1]
+            else:
+                # Fallback to first column
+                id_column = df.columns[0]
+        
+        # Final verification - make sure the column doesn't contain mostly 0s and 1s or all digits
+        # If it does, try to find a better column
+        view = text_view(id_column)
+        if view['count']:
+            # Check if over 80% of values are pure numbers with 3+ digits (likely IDs not names)
+            pure_number_count = int((view['is_digit'] & (view['length'] >= 3)).sum())
+            if pure_number_count / view['count'] > 0.8:
+                # This column is mostly 3+ digit numbers, might not be names
+                # Try to find a better alternative (especially if there's a second column)
+                if len(df.columns) > 1:
+                    second_col = df.columns[1]
+                    if second_col != id_column:
+                        id_column = second_col  # Use second column
+
+    return id_column
+
+
+def _detect_question_columns(df, id_column):
+    """Savol ustunlarini nomlari (1, 2, Q1, savol1...) yoki 0/1 qiymatlari bo'yicha aniqlash"""
+    # STEP 2: Identify question columns
+    question_columns = []
+    pattern_prefixes = ['q', 'savol', 'question', 'сав']
+    numeric_pattern = r'^\d+$'  # Matches columns that are just numbers (1, 2, 3...)
+    exclude_keywords = ['exam', 'total', 'rank', 'ball', 'foiz', 'daraja', 'percentage']
+    
+    # Group columns by their base name (Q1Option, Q1Key would be grouped under Q1)
+    column_groups = {}
+    
+    for col in df.columns:
+        col_str = str(col).lower()
+        
+        # Skip the ID column
+        if col == id_column:
+            continue
+            
+        # Skip columns with exclude keywords
+        if any(keyword in col_str for keyword in exclude_keywords):
+            continue
+        
+        # Check for numeric column names (1, 2, 3...)
+        if re.match(numeric_pattern, col_str):
+            question_columns.append(col)
+            continue
+        
+        # Check for columns with Q1, Q2 patterns or other prefixes
+        for prefix in pattern_prefixes:
+            if col_str.startswith(prefix):
+                # Extract the number if it's a pattern like Q1, Q2...
+                match = re.search(r'(\d+)', col_str)
+                if match:
+                    base_name = prefix + match.group(1)
+                    if base_name not in column_groups:
+                        column_groups[base_name] = []
+                    column_groups[base_name].append(col)
+                    break
+        
+        # If the column name contains "mark" or "key" without a number, try to associate it
+        if "mark" in col_str or "key" in col_str or "option" in col_str:
+            # See if we can find a number in the column name
+            match = re.search(r'(\d+)', col_str)
+            if match:
+                base_name = "q" + match.group(1)
+                if base_name not in column_groups:
+                    column_groups[base_name] = []
+                column_groups[base_name].append(col)
+    
+    # Process column groups - pick the best column from each group (prefer 'mark' over others)
+    for base_name, cols in column_groups.items():
+        if len(cols) > 0:
+            # Prefer columns with 'mark' in the name if available
+            mark_cols = [c for c in cols if 'mark' in str(c).lower()]
+            if mark_cols:
+                question_columns.append(mark_cols[0])
+            else:
+                # Otherwise take the first column in the group
+                question_columns.append(cols[0])
+    
+    # If we didn't find any valid question columns, check for columns with mostly binary (0/1) values
+    if not question_columns:
+        binary_columns = []
+        for col in df.columns:
+            if col == id_column:
+                continue
+            if any(keyword in str(col).lower() for keyword in exclude_keywords):
+                continue
+                
+            # Try to convert to numeric
+            numeric_values = pd.to_numeric(df[col], errors='coerce')
+            # Count how many values are 0 or 1
+            binary_count = ((numeric_values == 0) | (numeric_values == 1)).sum()
+            # If more than 70% are 0s or 1s, consider it a question column
+            if binary_count / len(df) > 0.7:
+                binary_columns.append((col, binary_count))
+        
+        # Sort by binary count (descending) and take top columns
+        binary_columns.sort(key=lambda x: x[1], reverse=True)
+        question_columns.extend([col for col, _ in binary_columns])
+    
+    # Sort question columns to maintain order (if they are numbers or have numbers in them)
+    # The sort should preserve the order of duplicate column numbers (e.g., 36, 36, 37, 37)
+    def extract_number(col_name):
+        match = re.search(r'(\d+)', str(col_name))
+        if match:
+            return int(match.group(1))
+        return float('inf')  # Put columns without numbers at the end
+    
+    # Sort the question columns by their extracted numbers
+    # This will keep duplicate numbers together in the original order they appeared
+    # For example: 1, 2, 3, 4, ..., 36, 36, 37, 37, ..., 44, 44, 45, 45
+    question_columns.sort(key=extract_number)
+
+    return question_columns
@@ -2,13 +2,20 @@ import pandas as pd
 import numpy as np
 import io
 import os
-import re
-from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from concurrent.futures import ProcessPoolExecutor
 from multiprocessing import cpu_count
-from models.rasch_model import rasch_model, ability_to_grade, ability_to_standard_score
+from models.rasch_model import rasch_model, ability_to_grade, item_information
+from models.grading import grade_labels, grade_scores, grade_summary, to_standard_scores
+from models.score_table import ScoreTable, REPORT_COLUMNS as SCORE_TABLE_COLUMNS
+from models.calibration import Calibration
+from models.item_bank import exam_fingerprint
+from models.response_matrix import PackedResponses
+from data_processing.ingestion import ExamTable, table_from_frame
+from data_processing.excel_writer import HEADER_STYLE, add_grade_formats, open_workbook, table_to_excel, write_table
+from xlsxwriter.utility import xl_col_to_name
 from reportlab.lib import colors
 from reportlab.lib.pagesizes import A4, landscape
-from reportlab.platypus import SimpleDocTemplate, Table, TableStyle, Paragraph, Spacer
+from reportlab.platypus import SimpleDocTemplate, Table, TableStyle, Paragraph, Spacer, PageBreak
 from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
 from reportlab.lib.enums import TA_CENTER, TA_LEFT
 import PyPDF2
@@ -30,7 +37,7 @@ if current_load > NUM_CORES * 1.2:  # Agar load juda yuqori bo'lsa
 elif current_load > NUM_CORES * 0.8:
     MAX_WORKERS = max(3, int(NUM_CORES * 0.7))  # 70% ishlatish
 else:
-    MAX_WORKERS = min(int(NUM_CORES * 0.8), 4)  # 80% ishlatish
+    MAX_WORKERS = max(1, min(int(NUM_CORES * 0.8), 4))  # 80% ishlatish
 
 # Numpy/BLAS performans sozlamalari
 os.environ['OPENBLAS_NUM_THREADS'] = str(MAX_WORKERS)
@@ -54,348 +61,25 @@ def preprocess_exam_data(df):
     Returns:
     - cleaned_df: DataFrame with standardized columns and values
     """
-    # Create a copy to avoid modifying the original DataFrame
-    processed_df = df.copy()
-    
-    # STEP 1: Identify student ID/name column
-    id_column = None
-    id_column_keywords = ['student', 'name', 'id', 'ism', 'familiya', 'номи', 'исм', 'фамилия', 'names']
-    exclude_keywords = ['n0', 'no', '№', '#', 'number']
-    
-    # XUSUSIY HOLAT - 504, 505, 506... kabi ketma-ket raqamlar birinchi ustunda bo'lsa, 
-    # u holda ikkinchi ustunni ism-familiya deb olishimiz kerak
-    # Agar PDF formatdagi chiziqli ro'yxatda birinchi ustun tartib raqami bo'lsa
-    # First check if this is one of the special 'sequential ID number' cases
-    is_sequential_id_case = False
-    if len(processed_df.columns) >= 2:
-        # Check if the first column contains sequential numeric IDs (like 504, 505, 506...)
-        first_col = processed_df.columns[0]
-        first_col_values = processed_df[first_col].dropna().astype(str).tolist()
-        # Check at least 5 values to be sure (or all if there are fewer)
-        check_len = min(5, len(first_col_values))
-        
-        if check_len > 0:
-            # Filter only numeric values
-            numeric_values = [int(v) for v in first_col_values[:check_len] if str(v).strip().isdigit()]
-            
-            # If all are numeric and have 3 or more digits, likely sequential IDs like in screenshot
-            if len(numeric_values) == check_len and all(len(str(v)) >= 3 for v in numeric_values):
-                # Also check if they are roughly sequential
-                is_sequential = True
-                if len(numeric_values) > 1:
-                    # Check if the values increase somewhat sequentially
-                    numeric_values.sort()
-                    # Assume sequential if average difference between consecutive numbers is < 10
-                    diffs = [numeric_values[i+1] - numeric_values[i] for i in range(len(numeric_values)-1)]
-                    avg_diff = sum(diffs) / len(diffs) if diffs else 0
-                    is_sequential = 1 <= avg_diff <= 10
-                
-                if is_sequential:
-                    # This is likely the case in the screenshot where first column is just sequential IDs
-                    is_sequential_id_case = True
-                    # Take the second column as the name/ID column directly
-                    id_column = processed_df.columns[1]
-    
-    # Only proceed with the normal logic if we haven't identified a special case
-    if not is_sequential_id_case:
-        # Regular logic for identifying ID column by name...
-        # First check column names for keywords
-        for col in processed_df.columns:
-            col_lower = str(col).lower().strip()
-            
-            # Skip columns that are likely numbering/ordering columns
-            if col_lower in exclude_keywords or col_lower == 'n' or col_lower == 'no':
-                continue
-                
-            # Check if this is likely an ID column based on keywords
-            if any(keyword in col_lower for keyword in id_column_keywords):
-                # Verify that this column contains valid student names/IDs (not just numbers like 0, 1)
-                valid_name_column = True
-                
-                # Get non-empty values from this column
-                col_values = processed_df[col].dropna().astype(str).tolist()
-                
-                # Skip if no values
-                if not col_values:
-                    continue
-                    
-                # Check if the column values look like valid names (not just 0, 1, or single digits)
-                invalid_values = ['0', '1', 'true', 'false', 'yes', 'no', 'y', 'n']
-                # If more than 50% of values are just single digits or invalid values, skip this column
-                invalid_count = sum(1 for v in col_values if str(v).strip().lower() in invalid_values or
-                                  (str(v).strip().isdigit() and len(str(v).strip()) <= 1))
-                
-                if invalid_count / len(col_values) > 0.5:
-                    valid_name_column = False
-                    
-                if valid_name_column:
-                    id_column = col
-                    break
-        
-        # If no obvious ID column by name, look at content - assuming student names are text, not numbers
-        if id_column is None:
-            # First check if all columns contain mostly just numbers - the "all numeric columns" case
-            all_numeric_columns = True
-            for col in processed_df.columns:
-                col_values = processed_df[col].dropna().astype(str).tolist()
-                if len(col_values) > 0:
-                    numeric_count = sum(1 for v in col_values if str(v).strip().isdigit())
-                    if numeric_count / len(col_values) < 0.8:  # If less than 80% are numbers, not a pure numeric column
-                        all_numeric_columns = False
-                        break
-            
-            # If all columns are numeric (like in the screenshot), take the second column as ID column
-            if all_numeric_columns and len(processed_df.columns) >= 2:
-                id_column = processed_df.columns[1]
-            else:
-                # Normal case - try to find the best column based on content
-                best_name_column = None
-                max_name_score = -1
-                
-                for col in processed_df.columns:
-                    # Skip already known non-name columns
-                    col_lower = str(col).lower().strip()
-                    if col_lower in exclude_keywords or col_lower == 'n' or col_lower == 'no':
-                        continue
-                        
-                    # Look at all non-empty values to determine if this looks like a name column
-                    col_values = processed_df[col].dropna().astype(str).tolist()
-                    
-                    # Skip if no values
-                    if not col_values:
-                        continue
-                    
-                    # Skip columns that have all pure numeric values with 3+ digits
-                    if all(str(v).strip().isdigit() and len(str(v).strip()) >= 3 for v in col_values):
-                        continue
-                    
-                    # Calculate a "name score" based on characteristics of typical student names
-                    # Higher score = more likely to be a name column
-                    
-                    # 1. Text length should be reasonable for a name (not too short, not too long)
-                    avg_len = sum(len(str(v).strip()) for v in col_values) / len(col_values)
-                    length_score = 0
-                    if 5 <= avg_len <= 30:  # Typical name length range
-                        length_score = 2.0
-                    elif avg_len > 3:  # Short but could be initials or abbreviations
-                        length_score = 1.0
-                        
-                    # 2. Should contain some letters (not just numbers)
-                    contains_letters = sum(1 for v in col_values if any(c.isalpha() for c in str(v)))
-                    letter_score = contains_letters / len(col_values)
-                    
-                    # 3. Shouldn't be mostly 0s, 1s or very short values
-                    invalid_values = ['0', '1', 'true', 'false', 'yes', 'no', 'y', 'n']
-                    invalid_count = sum(1 for v in col_values if str(v).strip().lower() in invalid_values or
-                                      (str(v).strip().isdigit() and len(str(v).strip()) <= 1))
-                    valid_score = 1.0 - (invalid_count / len(col_values))
-                    
-                    # 4. Penalty for pure numeric columns
-                    numeric_penalty = 0
-                    if all(str(v).strip().isdigit() for v in col_values):
-                        numeric_penalty = 2.0
-                    
-                    # Total score for this column
-                    name_score = length_score + 2*letter_score + 3*valid_score - numeric_penalty
-                    
-                    # Update best column if this one has a higher score
-                    if name_score > max_name_score:
-                        max_name_score = name_score
-                        best_name_column = col
-                
-                # Use the best scoring column if found
-                if best_name_column is not None and max_name_score > 2.0:  # Threshold for accepting a column
-                    id_column = best_name_column
-        
-        # If we still can't find a name column, use the second column if available, otherwise first column
-        if id_column is None:
-            if len(processed_df.columns) > 1:
-                # Use second column as student names are often in the second column after numbering
-                id_column = processed_df.columns[1]
-            else:
-                # Fallback to first column
-                id_column = processed_df.columns[0]
-        
-        # Final verification - make sure the column doesn't contain mostly 0s and 1s or all digits
-        # If it does, try to find a better column
-        col_values = processed_df[id_column].dropna().astype(str).tolist()
-        if col_values:
-            # Check if over 80% of values are pure numbers with 3+ digits (likely IDs not names)
-            pure_number_count = sum(1 for v in col_values if str(v).strip().isdigit() and len(str(v).strip()) >= 3)
-            if pure_number_count / len(col_values) > 0.8:
-                # This column is mostly 3+ digit numbers, might not be names
-                # Try to find a better alternative (especially if there's a second column)
-                if len(processed_df.columns) > 1:
-                    second_col = processed_df.columns[1]
-                    if second_col != id_column:
-                        id_column = second_col  # Use second column
-    
-    # STEP 2: Identify question columns
-    question_columns = []
-    pattern_prefixes = ['q', 'savol', 'question', 'сав']
-    numeric_pattern = r'^\d+$'  # Matches columns that are just numbers (1, 2, 3...)
-    exclude_keywords = ['exam', 'total', 'rank', 'ball', 'foiz', 'daraja', 'percentage']
-    
-    # Group columns by their base name (Q1Option, Q1Key would be grouped under Q1)
-    column_groups = {}
-    
-    for col in processed_df.columns:
-        col_str = str(col).lower()
-        
-        # Skip the ID column
-        if col == id_column:
-            continue
-            
-        # Skip columns with exclude keywords
-        if any(keyword in col_str for keyword in exclude_keywords):
-            continue
-        
-        # Check for numeric column names (1, 2, 3...)
-        if re.match(numeric_pattern, col_str):
-            question_columns.append(col)
-            continue
-        
-        # Check for columns with Q1, Q2 patterns or other prefixes
-        for prefix in pattern_prefixes:
-            if col_str.startswith(prefix):
-                # Extract the number if it's a pattern like Q1, Q2...
-                match = re.search(r'(\d+)', col_str)
-                if match:
-                    base_name = prefix + match.group(1)
-                    if base_name not in column_groups:
-                        column_groups[base_name] = []
-                    column_groups[base_name].append(col)
-                    break
-        
-        # If the column name contains "mark" or "key" without a number, try to associate it
-        if "mark" in col_str or "key" in col_str or "option" in col_str:
-            # See if we can find a number in the column name
-            match = re.search(r'(\d+)', col_str)
-            if match:
-                base_name = "q" + match.group(1)
-                if base_name not in column_groups:
-                    column_groups[base_name] = []
-                column_groups[base_name].append(col)
-    
-    # Process column groups - pick the best column from each group (prefer 'mark' over others)
-    for base_name, cols in column_groups.items():
-        if len(cols) > 0:
-            # Prefer columns with 'mark' in the name if available
-            mark_cols = [c for c in cols if 'mark' in str(c).lower()]
-            if mark_cols:
-                question_columns.append(mark_cols[0])
-            else:
-                # Otherwise take the first column in the group
-                question_columns.append(cols[0])
-    
-    # If we didn't find any valid question columns, check for columns with mostly binary (0/1) values
-    if not question_columns:
-        binary_columns = []
-        for col in processed_df.columns:
-            if col == id_column:
-                continue
-            if any(keyword in str(col).lower() for keyword in exclude_keywords):
-                continue
-                
-            # Try to convert to numeric
-            numeric_values = pd.to_numeric(processed_df[col], errors='coerce')
-            # Count how many values are 0 or 1
-            binary_count = ((numeric_values == 0) | (numeric_values == 1)).sum()
-            # If more than 70% are 0s or 1s, consider it a question column
-            if binary_count / len(processed_df) > 0.7:
-                binary_columns.append((col, binary_count))
-        
-        # Sort by binary count (descending) and take top columns
-        binary_columns.sort(key=lambda x: x[1], reverse=True)
-        question_columns.extend([col for col, _ in binary_columns])
-    
-    # Sort question columns to maintain order (if they are numbers or have numbers in them)
-    # The sort should preserve the order of duplicate column numbers (e.g., 36, 36, 37, 37)
-    def extract_number(col_name):
-        match = re.search(r'(\d+)', str(col_name))
-        if match:
-            return int(match.group(1))
-        return float('inf')  # Put columns without numbers at the end
-    
-    # Sort the question columns by their extracted numbers
-    # This will keep duplicate numbers together in the original order they appeared
-    # For example: 1, 2, 3, 4, ..., 36, 36, 37, 37, ..., 44, 44, 45, 45
-    question_columns.sort(key=extract_number)
-    
-    # STEP 3: Create a new DataFrame with only the columns we want
-    selected_columns = [id_column] + question_columns
-    cleaned_df = processed_df[selected_columns].copy()
-    
-    # STEP 4: Clean up row data
-    # Remove rows where student ID/name is empty, NaN, or invalid (just 0 or 1)
-    cleaned_df = cleaned_df.dropna(subset=[id_column])
-    
-    # Filter out rows where the ID column is empty or just contains invalid values (0, 1, etc)
-    invalid_id_values = ['0', '1', 'true', 'false', 'yes', 'no', 'y', 'n', '(ism familya)']
-    cleaned_df = cleaned_df[
-        (~cleaned_df[id_column].astype(str).str.strip().isin(invalid_id_values)) &  # Not just 0, 1, "ism familya" etc.
-        (cleaned_df[id_column].astype(str).str.strip() != '') &  # Not empty
-        (~cleaned_df[id_column].astype(str).str.strip().str.isdigit() | 
-         (cleaned_df[id_column].astype(str).str.strip().str.len() > 1))  # Not just a single digit
-    ]
-    
-    # YANGI QO'SHIMCHA: Ism-familya belgilangan qatorda kamida 1ta javob bo'lishi kerak
-    # Aks holda bu o'quvchi emas, adashib qo'shilgan yozuv
-    
-    # Har bir qator uchun tekshirish - kamida 1ta "1" qiymati bo'lishi kerak
-    rows_with_answers = []
-    
-    for idx, row in cleaned_df.iterrows():
-        # Faqat savol ustunlarini tekshiramiz (ID ustunidan tashqari)
-        answers = row[question_columns]
-        
-        # Agar kamida 1ta "1" (to'g'ri javob) bo'lsa, bu qatorni saqlash
-        if (answers == 1).sum() >= 1:
-            rows_with_answers.append(idx)
-    
-    # Faqat kamida 1ta javob bergan o'quvchilarni qoldirish
-    cleaned_df = cleaned_df.loc[rows_with_answers]
-    
-    # STEP 5: Clean and standardize question data values to 0s and 1s
-    # Convert all empty/NaN values to 0 as requested
-    for col in question_columns:
-        # First try to interpret letter grades as 1s and 0s
-        # Common mappings: 'A', 'B', 'C', 'D', etc. might represent answers
-        
-        # Get unique values to determine what kind of column this is
-        unique_vals = cleaned_df[col].dropna().unique()
-        
-        # Special processing for letter grades
-        if all(isinstance(val, str) for val in unique_vals if pd.notna(val)):
-            # If values are strings like A, B, C, D, convert to 1s and 0s
-            # For now, treat any value as 1 (can be customized based on specific rules)
-            cleaned_df[col] = cleaned_df[col].apply(
-                lambda x: 1 if pd.notna(x) and str(x).strip() != '' else 0
-            )
-        else:
-            # For numeric values, convert to numeric and fill NaNs with 0
-            cleaned_df[col] = pd.to_numeric(cleaned_df[col], errors='coerce').fillna(0)
-            
-            # Check if values are already 0s and 1s
-            unique_numeric = cleaned_df[col].unique()
-            if set(unique_numeric).issubset({0, 1}):
-                # Already 0s and 1s, just ensure they are integers
-                cleaned_df[col] = cleaned_df[col].astype(int)
-            else:
-                # For other numeric values (like scaled scores), convert to binary
-                # Values > 0 become 1, others become 0
-                cleaned_df[col] = cleaned_df[col].apply(lambda x: 1 if x > 0 else 0)
-    
-    return cleaned_df, id_column, question_columns
+    # Barcha bosqichlar ingestion.table_from_frame da: ustunlar tanlanmada aniqlanadi,
+    # qatorlar filtrlanadi va javoblar int8 matritsaga keltiriladi
+    table = table_from_frame(df)
+    return table.to_frame(), table.id_column, table.question_columns
 
-def process_exam_data(df, progress_callback=None):
+def process_exam_data(df, progress_callback=None, estimator='jmle', max_memory_mb=None,
+                      item_bank=None, bank_mode='warm', exam_key=None):
     """
     Tezlashtirilgan va aniq Rasch modeli qayta ishlash algoritmi.
     Katta ma'lumotlar uchun optimallashtirilgan.
     
     Parameters:
-    - df: Ma'lumotlar jadvalи
+    - df: Ma'lumotlar jadvalи yoki ExamTable (oqimli o'qilgan, allaqachon tozalangan)
     - progress_callback: Progress yangilanish funksiyasi
+    - estimator: Savol qiyinliklarini baholash usuli ('jmle' yoki 'pairwise')
+    - max_memory_mb: Rasch iteratsiya buferlari uchun xotira chegarasi (MB)
+    - item_bank: ItemBank (ixtiyoriy) - avvalgi kalibrovkalarni qayta ishlatish uchun
+    - bank_mode: 'warm' (bankdan boshlash va yangilash) yoki 'anchor' (bank beta qat'iy)
+    - exam_key: Fingerprint uchun qo'shimcha test kaliti
     
     Returns:
     - results_df: Natijalar jadvali
@@ -403,85 +87,61 @@ def process_exam_data(df, progress_callback=None):
     - grade_counts: Baholar soni
     - original_df: Asl ma'lumotlar
     - item_difficulties: Savol qiyinliklari
+    - calibration: Calibration - beta, og'irliklar, normalizatsiya va ScoreTable (calibration.score_table)
     """
     if progress_callback:
         progress_callback(5, "Ma'lumotlar tahlil qilinmoqda...")
     
-    # Tezkor preprocessing
-    df_cleaned, id_column, question_columns = preprocess_exam_data(df)
+    # Tezkor preprocessing (fayl oqimli o'qilgan bo'lsa tozalash allaqachon bajarilgan)
+    table = df if isinstance(df, ExamTable) else table_from_frame(df)
+    table.check()
+    df_cleaned, id_column, question_columns = table.to_frame(), table.id_column, table.question_columns
+    # Javoblar 1 bit/javob ko'rinishida saqlanadi, kernel'lar bloklab ochadi
+    response_data = PackedResponses.from_dense(table.responses)
     
     # Ma'lumotlarni NumPy array sifatida olish (tezroq)
     student_ids = df_cleaned[id_column].values.astype(str)
-    response_data = df_cleaned[question_columns].values.astype(np.int8)  # int8 xotira tejaydi
-    raw_scores = df_cleaned[question_columns].sum(axis=1).astype(int)
+    raw_scores = response_data.row_sums()
     
     if progress_callback:
         progress_callback(20, "Rasch modeli ishga tushirilmoqda...")
     
     n_students, n_questions = response_data.shape
     
-    # Parallel processing bilan adaptiv chunking
-    if n_students > 1000:
-        # Server quvvatining 80% ishlatish uchun optimal chunk size
-        optimal_chunk = max(n_students // MAX_WORKERS, 800)
-        outputs = rasch_model(
-            response_data, 
-            max_students=optimal_chunk
-        )
+    # Savollar banki: bir xil test uchun avvalgi kalibrovka
+    banked = None
+    if item_bank is not None and bank_mode != 'off':
+        fingerprint = exam_fingerprint(question_columns, exam_key)
+        banked = item_bank.get(fingerprint)
+    
+    # Xom ball guruhlari bo'yicha baholash: hisoblash hajmi savollar soniga bog'liq,
+    # shuning uchun katta fayllar uchun ham chunking talab qilinmaydi
+    if banked is not None and bank_mode == 'anchor':
+        outputs = rasch_model(response_data, score_groups=True, max_memory_mb=max_memory_mb,
+                              anchor_beta=banked['beta'])
     else:
-        outputs = rasch_model(response_data)
+        outputs = rasch_model(response_data, score_groups=True, estimator=estimator,
+                              max_memory_mb=max_memory_mb,
+                              init_beta=banked['beta'] if banked is not None else None)
 
     # Rasch model (1PL) chiqishlari - faqat ability va difficulty
     ability_estimates, item_difficulties = outputs
+    
+    # Yangi kalibrovkani bankka qo'shish (anchor rejimida bank o'zgarmaydi)
+    if item_bank is not None and bank_mode != 'off' and not (banked is not None and bank_mode == 'anchor'):
+        item_bank.update(fingerprint, question_columns, item_difficulties,
+                         item_information(ability_estimates, item_difficulties), n_students)
     item_discriminations = None  # Rasch modelida discrimination parameter yo'q
     
     if progress_callback:
         progress_callback(50, "Baholar hisoblanmoqda...")
     
-    # Parallel baholash mexanizmi (BBM standartlariga muvofiq)
-    def fast_parallel_grade(abilities):
-        if len(abilities) == 0:
-            return np.array([])
-        
-        # Parallel processing uchun chunk_grade funksiyasi
-        def chunk_grade(ability_chunk):
-            scores = np.array([ability_to_standard_score(a) for a in ability_chunk], dtype=np.float32)
-            scores = np.round(scores, 1)
-            grades = np.full(len(scores), 'NC', dtype='<U3')
-            
-            # Vectorized grading
-            grades[:] = 'NC'
-            # explicit, non-overlapping ranges
-            grades[(scores >= 46) & (scores < 50)] = 'C'
-            grades[(scores >= 50) & (scores < 55)] = 'C+'
-            grades[(scores >= 55) & (scores < 60)] = 'B'
-            grades[(scores >= 60) & (scores < 65)] = 'B+'
-            grades[(scores >= 65) & (scores <= 70)] = 'A'
-            grades[scores > 70] = 'A+'
-            return grades
-        
-        # Parallel processing agar talabalar ko'p bo'lsa
-        if len(abilities) > 5000:
-            chunk_size = max(len(abilities) // MAX_WORKERS, 1000)
-            chunks = [abilities[i:i+chunk_size] for i in range(0, len(abilities), chunk_size)]
-            
-            try:
-                with ThreadPoolExecutor(max_workers=MAX_WORKERS) as executor:
-                    results = list(executor.map(chunk_grade, chunks))
-                return np.concatenate(results)
-            except Exception:
-                # Fallback to sequential
-                return chunk_grade(abilities)
-        else:
-            return chunk_grade(abilities)
-    
     # Weight point orqali ball berish (Rasch model asosida)
     # Har bir savol uchun weight = max_beta - beta (qiyinroq savollar katta weight)
     eps = 1e-6
     max_beta = float(np.max(item_difficulties)) if len(item_difficulties) > 0 else 0.0
     weights = (max_beta - item_difficulties) + eps
-    resp_mat = response_data.astype(np.float64)
-    weighted_scores = np.dot(resp_mat, weights)
+    weighted_scores = response_data.dot(weights)
     
     # Weight point ni standartlashtirish va 10-90.1 oralig'iga o'tkazish
     # Z-score hisoblash
@@ -490,20 +150,11 @@ def process_exam_data(df, progress_callback=None):
     if weighted_std <= 0 or not np.isfinite(weighted_std):
         weighted_std = 1e-6
     
-    # T-score: dataset ichida standartlashtirish (Z -> T)
-    z_scores = (weighted_scores - weighted_mean) / weighted_std
-    t_scores = 50.0 + 10.0 * z_scores
-    # So'rovga muvofiq: Standard Score 10–90.1 diapazonda
-    t_scores = np.clip(t_scores, 10, 90.1)
-    
-    # UZBMB standartlariga muvofiq baholash
-    grades = np.full(len(t_scores), 'NC', dtype='<U3')
-    grades[(t_scores >= 46) & (t_scores < 50)] = 'C'
-    grades[(t_scores >= 50) & (t_scores < 55)] = 'C+'
-    grades[(t_scores >= 55) & (t_scores < 60)] = 'B'
-    grades[(t_scores >= 60) & (t_scores < 65)] = 'B+'
-    grades[(t_scores >= 65) & (t_scores < 70)] = 'A'
-    grades[(t_scores >= 70)] = 'A+'
+    # T-score: dataset ichida standartlashtirish (Z -> T), Standard Score 10–90.1 diapazonda
+    t_scores = to_standard_scores(weighted_scores, weighted_mean, weighted_std)
+    
+    # UZBMB standartlariga muvofiq baholash (GRADE_THRESHOLDS jadvali bo'yicha)
+    grades = grade_scores(t_scores)
     standard_scores = t_scores
     
     if progress_callback:
@@ -516,6 +167,13 @@ def process_exam_data(df, progress_callback=None):
     if theta_std <= 0 or not np.isfinite(theta_std):
         theta_std = 1e-6
     ability_z = np.round((ability_estimates - theta_mean) / theta_std, 2)
+    
+    # Xom ball -> theta -> standart ball -> baho jadvali (hisobotlar va kechikkan talabalar uchun)
+    score_table = ScoreTable.build(item_difficulties, weights, raw_scores, ability_estimates,
+                                   theta_mean, theta_std, weighted_mean, weighted_std)
+    # Yangi javoblar varaqlarini qayta tahlilsiz baholash uchun (models.calibration.score_responses)
+    calibration = Calibration(question_columns, item_difficulties, weights, theta_mean, theta_std,
+                              weighted_mean, weighted_std, score_table)
     results_df = pd.DataFrame({
         'Student ID': student_ids,
         'Raw Score': raw_scores,
@@ -524,59 +182,25 @@ def process_exam_data(df, progress_callback=None):
         'Grade': grades
     })
     
-    # Tartiblash: Baholar bo'yicha va ballari bo'yicha
-    grade_order_map = {'A+': 0, 'A': 1, 'B+': 2, 'B': 3, 'C+': 4, 'C': 5, 'NC': 6}
-    results_df['Grade_Order'] = results_df['Grade'].apply(lambda x: grade_order_map.get(x, 6))
-    
     # Tie-breaker: bir xil T-score va grade bo'lsa, qiyin savollarga to'g'ri javob ko'proq bo'lganlar yuqorida
     # Weight point allaqachon hisoblangan, shuning uchun uni qayta ishlatamiz
     try:
         # Weight point allaqachon hisoblangan (weighted_scores)
-        weighted_correct = weighted_scores
-        results_df['Weighted Correct'] = weighted_correct
+        results_df['Weighted Correct'] = weighted_scores
 
         # Hard-correct count: correct answers on items harder than average (beta > 0)
-        hard_mask = (item_difficulties > 0) if len(item_difficulties) > 0 else np.zeros(resp_mat.shape[1], dtype=bool)
-        hard_correct = (resp_mat[:, hard_mask]).sum(axis=1) if hard_mask.any() else np.zeros(resp_mat.shape[0])
-        results_df['Hard Correct'] = hard_correct
-
-        # Build a ranked score (presentation-only) to deterministically break ties without changing grades
-        # Normalize components to [0,1]
-        wc_min, wc_max = float(np.min(weighted_correct)), float(np.max(weighted_correct))
-        wc_norm = (weighted_correct - wc_min) / (wc_max - wc_min + eps)
-        if hard_mask.any():
-            hc_min, hc_max = float(np.min(hard_correct)), float(np.max(hard_correct))
-            hc_norm = (hard_correct - hc_min) / (hc_max - hc_min + eps)
-        else:
-            hc_norm = np.zeros_like(wc_norm)
-
-        # Very small adjustments to avoid changing grades (<= 0.03 total)
-        ranked_score = standard_scores + 0.02 * wc_norm + 0.01 * hc_norm
-        results_df['Ranked Score'] = ranked_score.astype(np.float32)
+        hard_mask = (item_difficulties > 0) if len(item_difficulties) > 0 else np.zeros(n_questions, dtype=bool)
+        results_df['Hard Correct'] = response_data.sum_columns(hard_mask)
     except Exception:
         results_df['Weighted Correct'] = 0.0
         results_df['Hard Correct'] = 0.0
-        results_df['Ranked Score'] = results_df['Standard Score']
-
-    # Tartiblash: Grade -> Ranked Score (deterministic, fewer ties)
-    results_df = results_df.sort_values(by=['Grade_Order', 'Ranked Score'], 
-                                      ascending=[True, False])
     
     if progress_callback:
         progress_callback(90, "Yakuniy natijalar tayyorlanmoqda...")
     
-    # O'rindiqlar qo'shish
-    rank_list = list(range(1, len(results_df) + 1))
-    results_df.insert(1, 'Rank', rank_list)
-    
-    # Vaqtinchalik ustunni o'chirish
-    results_df = results_df.drop(columns=['Grade_Order'])
-    
-    # Count occurrences of each grade - ensure all grades are included
-    all_grades = ['A+', 'A', 'B+', 'B', 'C+', 'C', 'NC']
-    grade_counts = {}
-    for grade in all_grades:
-        grade_counts[grade] = int((results_df['Grade'] == grade).sum())
+    # Ranked Score, tartiblash, o'rinlar va baholar soni
+    all_grades = grade_labels()
+    results_df, grade_counts = _rank_results(results_df, standard_scores, all_grades)
     
     # Debug info for grade distribution
     total_students = len(results_df)
@@ -589,74 +213,67 @@ def process_exam_data(df, progress_callback=None):
         progress_callback(100, "Tahlil yakunlandi!")
     
     # Return updated results including the cleaned dataframe and item difficulties
-    return results_df, ability_estimates, grade_counts, df_cleaned, item_difficulties
-
-# FAOLSIZLANTIRILGAN: Keraksiz takroriy funksiya
-# def prepare_simplified_excel_old(results_df, title="Nazorat Ballari"):
+    return results_df, ability_estimates, grade_counts, df_cleaned, item_difficulties, calibration
 
-def prepare_simplified_excel(results_df, title="Nazorat Ballari"):
+def _rank_results(results_df, standard_scores, all_grades):
     """
-    Prepare a simplified Excel file with just student names and scores.
+    Ranked Score (tie-breaker), Grade -> Ranked Score tartibi, o'rinlar va baholar soni.
+    process_exam_data va regrade_results uchun umumiy.
     
     Parameters:
-    - results_df: DataFrame with processed results
-    - title: Title for the sheet
+    - results_df: 'Grade', 'Weighted Correct' va 'Hard Correct' ustunli natijalar
+    - standard_scores: Yaxlitlanmagan standart ballar (results_df qatorlari tartibida)
+    - all_grades: Baholar yuqoridan pastga
     
     Returns:
-    - excel_data: BytesIO object containing Excel file data
+    - results_df, grade_counts
     """
-    # Copy the dataframe to avoid modifying the original
-    df = results_df.copy()
+    eps = 1e-6
+    # Build a ranked score (presentation-only) to deterministically break ties without changing grades
+    # Normalize components to [0,1]
+    weighted_correct = results_df['Weighted Correct'].to_numpy(dtype=np.float64)
+    hard_correct = results_df['Hard Correct'].to_numpy(dtype=np.float64)
+    wc_norm = (weighted_correct - weighted_correct.min()) / (weighted_correct.max() - weighted_correct.min() + eps)
+    hc_norm = (hard_correct - hard_correct.min()) / (hard_correct.max() - hard_correct.min() + eps)
     
-    # Sort by Standard Score in descending order
-    df = df.sort_values(by='Standard Score', ascending=False).reset_index(drop=True)
+    # Very small adjustments to avoid changing grades (<= 0.03 total)
+    ranked_score = np.asarray(standard_scores, dtype=np.float64) + 0.02 * wc_norm + 0.01 * hc_norm
+    results_df['Ranked Score'] = ranked_score.astype(np.float32)
     
-    # Keep only Student ID and Standard Score columns
-    simplified_df = df[['Student ID', 'Standard Score']].copy()
-    simplified_df.columns = ['Ism Familiya', 'Ball']
+    # Tartiblash: Grade -> Ranked Score (deterministic, fewer ties)
+    grade_order_map = {grade: order for order, grade in enumerate(all_grades)}
+    results_df['Grade_Order'] = results_df['Grade'].map(grade_order_map).fillna(len(all_grades)).astype(int)
+    results_df = results_df.sort_values(by=['Grade_Order', 'Ranked Score'], 
+                                      ascending=[True, False])
     
-    # Format Ball column to 2 decimal places
-    simplified_df['Ball'] = simplified_df['Ball'].apply(lambda x: f"{float(x):.2f}")
+    # O'rindiqlar qo'shish
+    results_df.insert(1, 'Rank', np.arange(1, len(results_df) + 1))
     
-    # Create a BytesIO object
-    excel_data = io.BytesIO()
+    # Vaqtinchalik ustunni o'chirish
+    results_df = results_df.drop(columns=['Grade_Order'])
     
-    # Create a Pandas Excel writer using the BytesIO object
-    with pd.ExcelWriter(excel_data, engine='xlsxwriter') as writer:
-        # Write the DataFrame to an Excel sheet
-        simplified_df.to_excel(writer, sheet_name=title, index=False)
-        
-        # Get the workbook and worksheet objects
-        workbook = writer.book
-        worksheet = writer.sheets[title]
-        
-        # Define header format
-        header_format = workbook.add_format({
-            'bold': True,
-            'bg_color': '#4B8BBE',
-            'font_color': 'white',
-            'border': 1,
-            'align': 'center',
-            'valign': 'vcenter'
-        })
-        
-        # Format the header row
-        for col_num, value in enumerate(simplified_df.columns.values):
-            worksheet.write(0, col_num, value, header_format)
-        
-        # Set column widths
-        worksheet.set_column('A:A', 35)  # Ism Familiya
-        worksheet.set_column('B:B', 12)  # Ball
-        
-        # Format score column with 2 decimal places
-        score_format = workbook.add_format({'num_format': '0.00', 'border': 1})
-        for row_num in range(len(simplified_df)):
-            worksheet.write(row_num+1, 1, simplified_df['Ball'].iloc[row_num], score_format)
+    # Count occurrences of each grade - ensure all grades are included
+    grade_counts = {grade: int((results_df['Grade'] == grade).sum()) for grade in all_grades}
+    return results_df, grade_counts
+
+def regrade_results(results_df, calibration):
+    """
+    Natijalarni yangi baho chegaralari / ball oralig'i bilan qayta baholash - Rasch modeli
+    qayta ishga tushirilmaydi. Faqat standart ballar, baholar, o'rinlar va baholar soni
+    saqlangan og'irlangan ballardan ('Weighted Correct') qayta hisoblanadi.
     
-    # Reset the pointer to the beginning of the BytesIO object
-    excel_data.seek(0)
+    Parameters:
+    - results_df: process_exam_data natijalari jadvali
+    - calibration: Calibration.regraded(...) - yangi chegaralar va oraliq
     
-    return excel_data
+    Returns:
+    - results_df, grade_counts
+    """
+    df = results_df.drop(columns=['Rank', 'Ranked Score'], errors='ignore').copy()
+    t_scores = calibration.standard_scores(df['Weighted Correct'].to_numpy(dtype=np.float64))
+    df['Standard Score'] = np.round(t_scores, 2).astype(np.float32)
+    df['Grade'] = calibration.grade(t_scores)
+    return _rank_results(df, t_scores, calibration.grade_labels)
 
 def prepare_simplified_excel(results_df, title="Nazorat Ballari"):
     """
@@ -686,44 +303,18 @@ def prepare_simplified_excel(results_df, title="Nazorat Ballari"):
     # Reorder columns to put Rin first
     simplified_df = simplified_df[['Rin', 'Talaba', 'Ball']]
     
-    # Create a BytesIO object
-    excel_data = io.BytesIO()
-    
-    # Create a Pandas Excel writer using the BytesIO object
-    with pd.ExcelWriter(excel_data, engine='xlsxwriter') as writer:
-        # Write the DataFrame to an Excel sheet
-        simplified_df.to_excel(writer, sheet_name=title, index=False)
-        
-        # Get the workbook and worksheet objects
-        workbook = writer.book
-        worksheet = writer.sheets[title]
-        
-        # Define cell formats
-        header_format = workbook.add_format({
-            'bold': True,
-            'bg_color': '#4B8BBE',
-            'font_color': 'white',
-            'border': 1,
-            'align': 'center',
-            'valign': 'vcenter'
-        })
-        # Two-decimal score format for 'Ball' column
-        score_format = workbook.add_format({'num_format': '0.00'})
-        
-        # Format the header row
-        for col_num, value in enumerate(simplified_df.columns.values):
-            worksheet.write(0, col_num, value, header_format)
-        
-        # Set column widths
-        worksheet.set_column('A:A', 35)  # Student name (Ism-familiya uchun kattaroq kenglik)
-        worksheet.set_column('B:B', 10, score_format)  # Score (2 decimals)
-    
-    # Reset the pointer to the beginning of the BytesIO object
-    excel_data.seek(0)
-    
-    return excel_data
+    # Oqimli yozish: formatlar ustun bo'yicha
+    return table_to_excel(
+        simplified_df, title,
+        column_formats={'Ball': {'num_format': '0.00'}},  # Two-decimal score format
+        widths={'Rin': 6, 'Talaba': 35, 'Ball': 10}  # Ism-familiya uchun kattaroq kenglik
+    )
+
+# Diagrammalar bog'langan (ko'rinadigan) ma'lumotlar varag'i
+CHART_DATA_SHEET = 'Diagramma jadvali'
 
-def prepare_excel_with_charts(results_df, grade_counts, ability_estimates, data_df=None, beta_values=None):
+def prepare_excel_with_charts(results_df, grade_counts, ability_estimates, data_df=None, beta_values=None,
+                              score_table=None):
     """
     Prepare an Excel file containing both results and charts/diagrams.
     
@@ -733,13 +324,14 @@ def prepare_excel_with_charts(results_df, grade_counts, ability_estimates, data_
     - ability_estimates: Array of ability estimates
     - data_df: DataFrame containing raw student responses (optional)
     - beta_values: Array of item difficulty parameters (optional)
+    - score_table: ScoreTable (ixtiyoriy) - 'Ball jadvali' varag'i qo'shiladi
     
     Returns:
     - excel_data: BytesIO object containing Excel file data with charts
-    """
-    import matplotlib.pyplot as plt
-    import numpy as np
     
+    Diagrammalar Excel'ning o'z (native) diagramma obyektlari - matplotlib ishlatilmaydi,
+    rasm joylashtirilmaydi.
+    """
     # Copy the dataframe to avoid modifying the original
     df = results_df.copy()
     
@@ -766,9 +358,11 @@ def prepare_excel_with_charts(results_df, grade_counts, ability_estimates, data_
         # Write the results to the first sheet
         df.to_excel(writer, sheet_name='Natijalar', index=False)
         
-        # Create a sheet for charts
+        # Diagrammalar ko'rinadigan ma'lumotlar varag'iga bog'langan (yashirin vaqtinchalik
+        # varaqlar yo'q) - o'qituvchi qiymatlarni o'zgartirsa Excel diagrammalarni qayta chizadi
         workbook = writer.book
         chart_sheet = workbook.add_worksheet('Diagrammalar')
+        data_sheet = workbook.add_worksheet(CHART_DATA_SHEET)
         
         # Format settings
         title_format = workbook.add_format({
@@ -777,9 +371,15 @@ def prepare_excel_with_charts(results_df, grade_counts, ability_estimates, data_
             'align': 'center',
             'valign': 'vcenter'
         })
+        data_header_format = workbook.add_format({
+            'bold': True,
+            'bg_color': '#E9F1F7',
+            'border': 1,
+            'align': 'center'
+        })
         
-        # 1. Create Grade Distribution Chart
-        grade_order = ['A+', 'A', 'B+', 'B', 'C+', 'C', 'NC']
+        # 1. Grade Distribution Chart - soni Natijalar varag'idagi DARAJA ustunidan COUNTIF bilan
+        grade_order = list(grade_counts)
         grade_colors = {
             'A+': '#1E8449',  # Dark Green
             'A': '#28B463',   # Green
@@ -789,171 +389,110 @@ def prepare_excel_with_charts(results_df, grade_counts, ability_estimates, data_
             'C': '#F4D03F',   # Yellow
             'NC': '#E67E22',  # Orange
         }
+        grade_column = xl_col_to_name(df.columns.get_loc('Grade'))
+        grade_range = f"Natijalar!${grade_column}$2:${grade_column}${len(df) + 1}"
         
-        # Prepare data for grade chart
-        grades = []
-        counts = []
-        colors = []
-        
-        for grade in grade_order:
-            if grade in grade_counts:
-                count = grade_counts[grade]
-                grades.append(grade)
-                counts.append(count)
-                colors.append(grade_colors.get(grade, '#CCCCCC'))
+        data_sheet.write_row(0, 0, ['Baho', 'Talabalar soni'], data_header_format)
+        for i, grade in enumerate(grade_order):
+            data_sheet.write(i + 1, 0, grade)
+            data_sheet.write_formula(i + 1, 1, f'=COUNTIF({grade_range},"{grade}")', None, int(grade_counts[grade]))
         
-        # Create a chart object for grade distribution
         grade_chart = workbook.add_chart({'type': 'column'})
-        
-        # Create a temp sheet for grade data
-        workbook.add_worksheet('_temp_grades').hide()
-        temp_grades = writer.sheets['_temp_grades']
-        
-        # Write grade data to temp sheet
-        for i, (grade, count) in enumerate(zip(grades, counts)):
-            temp_grades.write(i, 0, grade)
-            temp_grades.write(i, 1, count)
-        
-        # Add a title to the chart
         grade_chart.set_title({'name': 'Baholar taqsimoti'})
-        
-        # Add the series
         grade_chart.add_series({
             'name': 'Talabalar soni',
-            'categories': '=_temp_grades!$A$1:$A$' + str(len(grades)),
-            'values': '=_temp_grades!$B$1:$B$' + str(len(grades)),
-            'points': [{'fill': {'color': color}} for color in colors],
+            'categories': [CHART_DATA_SHEET, 1, 0, len(grade_order), 0],
+            'values': [CHART_DATA_SHEET, 1, 1, len(grade_order), 1],
+            'points': [{'fill': {'color': grade_colors.get(grade, '#CCCCCC')}} for grade in grade_order],
         })
-        
-        # Set axes labels
         grade_chart.set_x_axis({'name': 'Baholar'})
         grade_chart.set_y_axis({'name': 'Talabalar soni'})
+        grade_chart.set_legend({'none': True})
         
-        # Insert chart into the chart sheet
         chart_sheet.merge_range('A1:H1', 'BAHOLAR TAQSIMOTI', title_format)
         chart_sheet.insert_chart('A2', grade_chart, {'x_scale': 1.5, 'y_scale': 1.2})
         
-        # 2. Create Ability Distribution Chart (using column chart instead of histogram)
-        ability_chart = workbook.add_chart({'type': 'column'})
-        
-        # Create temp sheet for ability data
-        workbook.add_worksheet('_temp_ability').hide()
-        temp_ability = writer.sheets['_temp_ability']
-        
-        # Prepare ability data for bins
+        # 2. Ability Distribution Chart (0.5 kenglikdagi oraliqlar, column chart)
         if ability_estimates is not None and len(ability_estimates) > 0:
-            abilities = np.array(ability_estimates)
+            abilities = np.asarray(ability_estimates, dtype=np.float64)
             bin_width = 0.5
-            min_val = np.floor(min(abilities))
-            max_val = np.ceil(max(abilities))
-            bins = np.arange(min_val, max_val + bin_width, bin_width)
+            bins = np.arange(np.floor(abilities.min()), np.ceil(abilities.max()) + bin_width, bin_width)
             hist, _ = np.histogram(abilities, bins=bins)
+            bin_labels = [f"{(bins[i] + bins[i + 1]) / 2:.1f}" for i in range(len(hist))]
             
-            # Create bin labels for x-axis (use middle of bin)
-            bin_labels = [(bins[i] + bins[i+1])/2 for i in range(len(bins)-1)]
+            data_sheet.write_row(0, 3, ['Qobiliyat (Theta)', 'Talabalar soni'], data_header_format)
+            data_sheet.write_column(1, 3, bin_labels)
+            data_sheet.write_column(1, 4, [int(count) for count in hist])
             
-            # Write bin data
-            for i, (count, bin_label) in enumerate(zip(hist, bin_labels)):
-                temp_ability.write(i, 0, f"{bin_label:.1f}")
-                temp_ability.write(i, 1, count)
-            
-            # Add a title to the chart
+            ability_chart = workbook.add_chart({'type': 'column'})
             ability_chart.set_title({'name': 'Talabalar qobiliyat taqsimoti'})
-            
-            # Add the series
             ability_chart.add_series({
                 'name': 'Talabalar soni',
-                'categories': '=_temp_ability!$A$1:$A$' + str(len(hist)),
-                'values': '=_temp_ability!$B$1:$B$' + str(len(hist)),
+                'categories': [CHART_DATA_SHEET, 1, 3, len(hist), 3],
+                'values': [CHART_DATA_SHEET, 1, 4, len(hist), 4],
                 'fill': {'color': '#3498DB'},
+                'gap': 10,
             })
-            
-            # Set axes labels
             ability_chart.set_x_axis({'name': 'Qobiliyat (Theta)'})
             ability_chart.set_y_axis({'name': 'Talabalar soni'})
+            ability_chart.set_legend({'none': True})
             
-            # Insert chart into the chart sheet
             chart_sheet.merge_range('A25:H25', 'TALABALAR QOBILIYAT TAQSIMOTI', title_format)
             chart_sheet.insert_chart('A26', ability_chart, {'x_scale': 1.5, 'y_scale': 1.2})
         
-        # 3. Create Item Difficulty Analysis Chart (if data is available)
+        # 3. Item Difficulty Analysis Charts (if data is available)
+        question_analysis = []
         if data_df is not None and beta_values is not None and len(beta_values) > 0:
-            # Create temp sheet for item difficulty data
-            workbook.add_worksheet('_temp_item_diff').hide()
-            temp_item_diff = writer.sheets['_temp_item_diff']
+            # To'g'ri javoblar foizi (birinchi ustun - talaba ID)
+            answers = data_df.iloc[:, 1:len(beta_values) + 1]
+            percentages = answers.mean(axis=0).to_numpy(dtype=np.float64) * 100 if len(data_df) else np.zeros(answers.shape[1])
+            question_analysis = [(i + 1, float(beta_values[i]), float(percentages[i])) for i in range(answers.shape[1])]
+        
+        if question_analysis:
+            # Qiyinlik bo'yicha (eng qiyini birinchi)
+            by_difficulty = sorted(question_analysis, key=lambda x: x[1], reverse=True)
+            n_questions = len(by_difficulty)
             
-            # Calculate correct answer percentages
-            percentages = []
-            question_numbers = []
+            data_sheet.write_row(0, 6, ['Savol', 'Qiyinlik', "To'g'ri javoblar %"], data_header_format)
+            data_sheet.write_column(1, 6, [f"Q{q_num}" for q_num, _, _ in by_difficulty])
+            data_sheet.write_column(1, 7, [round(diff, 4) for _, diff, _ in by_difficulty])
+            data_sheet.write_column(1, 8, [round(percent, 2) for _, _, percent in by_difficulty])
             
-            for i in range(len(beta_values)):
-                # Find the corresponding column in data_df
-                if i+1 < len(data_df.columns):
-                    question_numbers.append(i+1)
-                    col_name = data_df.columns[i+1]  # +1 because first column is student ID
-                    correct_count = data_df[col_name].sum()
-                    total_count = len(data_df)
-                    percentages.append(100 * correct_count / total_count if total_count > 0 else 0)
+            item_chart = workbook.add_chart({'type': 'scatter'})
+            item_chart.set_title({'name': 'Savollar qiyinligi tahlili'})
+            item_chart.add_series({
+                'name': 'Qiyinlik',
+                'categories': [CHART_DATA_SHEET, 1, 6, n_questions, 6],
+                'values': [CHART_DATA_SHEET, 1, 7, n_questions, 7],
+                'marker': {'type': 'circle', 'size': 8, 'fill': {'color': '#E74C3C'}},
+            })
+            item_chart.set_x_axis({'name': 'Savol raqami'})
+            item_chart.set_y_axis({'name': 'Qiyinlik darajasi'})
+            item_chart.set_legend({'none': True})
             
-            # Sort by difficulty
-            difficulty_with_index = [(beta, i+1, percent) for i, (beta, percent) 
-                                    in enumerate(zip(beta_values, percentages))]
-            difficulty_with_index.sort(key=lambda x: x[0], reverse=True)
+            chart_sheet.merge_range('A50:H50', 'SAVOLLAR QIYINLIGI TAHLILI', title_format)
+            chart_sheet.insert_chart('A51', item_chart, {'x_scale': 1.5, 'y_scale': 1.2})
             
-            # Write data for chart
-            for i, (diff, q_num, percent) in enumerate(difficulty_with_index):
-                temp_item_diff.write(i, 0, f"Q{q_num}")
-                temp_item_diff.write(i, 1, diff)
-                temp_item_diff.write(i, 2, percent)
+            percent_chart = workbook.add_chart({'type': 'column'})
+            percent_chart.set_title({'name': "To'g'ri javoblar foizi"})
+            percent_chart.add_series({
+                'name': "To'g'ri javoblar %",
+                'categories': [CHART_DATA_SHEET, 1, 6, n_questions, 6],
+                'values': [CHART_DATA_SHEET, 1, 8, n_questions, 8],
+                'fill': {'color': '#2ECC71'},
+            })
+            percent_chart.set_x_axis({'name': 'Savol raqami'})
+            percent_chart.set_y_axis({
+                'name': "To'g'ri javoblar foizi",
+                'min': 0,
+                'max': 100,
+            })
+            percent_chart.set_legend({'none': True})
             
-            if len(difficulty_with_index) > 0:
-                # Create chart for item difficulty
-                item_chart = workbook.add_chart({'type': 'scatter'})
-                
-                # Add a title to the chart
-                item_chart.set_title({'name': 'Savollar qiyinligi tahlili'})
-                
-                # Add the series for difficulty
-                item_chart.add_series({
-                    'name': 'Qiyinlik',
-                    'categories': '=_temp_item_diff!$A$1:$A$' + str(len(difficulty_with_index)),
-                    'values': '=_temp_item_diff!$B$1:$B$' + str(len(difficulty_with_index)),
-                    'marker': {'type': 'circle', 'size': 8, 'fill': {'color': '#E74C3C'}},
-                })
-                
-                # Set axes labels
-                item_chart.set_x_axis({'name': 'Savol raqami'})
-                item_chart.set_y_axis({'name': 'Qiyinlik darajasi'})
-                
-                # Insert chart into the chart sheet
-                chart_sheet.merge_range('A50:H50', 'SAVOLLAR QIYINLIGI TAHLILI', title_format)
-                chart_sheet.insert_chart('A51', item_chart, {'x_scale': 1.5, 'y_scale': 1.2})
-                
-                # Create a second chart for correct answer percentages
-                percent_chart = workbook.add_chart({'type': 'column'})
-                
-                # Add a title to the chart
-                percent_chart.set_title({'name': "To'g'ri javoblar foizi"})
-                
-                # Add the series for percentages
-                percent_chart.add_series({
-                    'name': "To'g'ri javoblar %",
-                    'categories': '=_temp_item_diff!$A$1:$A$' + str(len(difficulty_with_index)),
-                    'values': '=_temp_item_diff!$C$1:$C$' + str(len(difficulty_with_index)),
-                    'fill': {'color': '#2ECC71'},
-                })
-                
-                # Set axes labels
-                percent_chart.set_x_axis({'name': 'Savol raqami'})
-                percent_chart.set_y_axis({
-                    'name': "To'g'ri javoblar foizi",
-                    'min': 0,
-                    'max': 100,
-                })
-                
-                # Insert chart into the chart sheet
-                chart_sheet.merge_range('A75:H75', "TO'G'RI JAVOBLAR FOIZI", title_format)
-                chart_sheet.insert_chart('A76', percent_chart, {'x_scale': 1.5, 'y_scale': 1.2})
+            chart_sheet.merge_range('A75:H75', "TO'G'RI JAVOBLAR FOIZI", title_format)
+            chart_sheet.insert_chart('A76', percent_chart, {'x_scale': 1.5, 'y_scale': 1.2})
+        
+        data_sheet.set_column(0, 8, 16)
         
         # Format the results sheet
         results_sheet = writer.sheets['Natijalar']
@@ -998,8 +537,8 @@ def prepare_excel_with_charts(results_df, grade_counts, ability_estimates, data_
         avg_std_score = df['Standard Score'].mean()
         avg_raw_score = df['Raw Score'].mean()
         
-        # Calculate passing percentage (students with grade other than NC)
-        passing_students = total_students - grade_counts.get('NC', 0)
+        # Calculate passing percentage (students with grade other than the lowest, NC)
+        passing_students = total_students - (grade_counts[grade_order[-1]] if grade_order else 0)
         passing_percent = (passing_students / total_students) * 100 if total_students > 0 else 0
         
         # General statistics section
@@ -1054,19 +593,7 @@ def prepare_excel_with_charts(results_df, grade_counts, ability_estimates, data_
         stats_sheet.conditional_format(f'A10:C{row-1}', {'type': 'no_blanks', 'format': border_format})
         
         # If item difficulties are available, add question analysis
-        if data_df is not None and beta_values is not None and len(beta_values) > 0:
-            # Calculate difficulty with question numbers and percentages
-            question_analysis = []
-            
-            for i in range(len(beta_values)):
-                if i+1 < len(data_df.columns):
-                    q_num = i+1
-                    col_name = data_df.columns[i+1]  # +1 because first column is student ID
-                    correct_count = data_df[col_name].sum()
-                    total_count = len(data_df)
-                    percent_correct = 100 * correct_count / total_count if total_count > 0 else 0
-                    question_analysis.append((q_num, beta_values[i], percent_correct))
-            
+        if question_analysis:
             # Sort by difficulty (most difficult first)
             question_analysis.sort(key=lambda x: x[1], reverse=True)
             
@@ -1126,24 +653,16 @@ def prepare_excel_with_charts(results_df, grade_counts, ability_estimates, data_
                 stats_sheet.write(f'C{row}', f"{percent:.1f}%")
                 row += 1
         
+        if score_table is not None:
+            _write_score_table_worksheet(workbook, score_table, 'Ball jadvali')
+        
     # Ensure the file is properly closed and flushed
     excel_data.seek(0)
     return excel_data
 
 
-def prepare_excel_for_download(results_df, data_df=None, beta_values=None, title="REPETITSION TEST NATIJALARI"):
-    """
-    Prepare the results DataFrame as an Excel file for download with all features like PDF.
-    
-    Parameters:
-    - results_df: DataFrame with processed results
-    - data_df: Original data DataFrame
-    - beta_values: Item difficulty values
-    - title: Title for the report
-    
-    Returns:
-    - excel_data: BytesIO object containing Excel file data
-    """
+def _results_report_table(results_df):
+    """Natijalar jadvalini hisobot ko'rinishiga keltirish (ball bo'yicha tartiblangan)"""
     # Copy the dataframe to avoid modifying the original
     df = results_df.copy()
     
@@ -1186,95 +705,182 @@ def prepare_excel_for_download(results_df, data_df=None, beta_values=None, title
     # Keep only required columns
     df = df[required_cols]
     
-    # Create a BytesIO object
-    excel_data = io.BytesIO()
-    
-    # Create a Pandas Excel writer using the BytesIO object
-    with pd.ExcelWriter(excel_data, engine='xlsxwriter') as writer:
-        # Get the workbook object first
-        workbook = writer.book
-        
-        # Define cell formats for different grades
-        header_format = workbook.add_format({
-            'bold': True,
-            'bg_color': '#4B8BBE',
-            'font_color': 'white',
-            'border': 1,
-            'align': 'center',
-            'valign': 'vcenter'
-        })
-        
-        # Grade-specific formats (same as PDF - all columns same color)
-        grade_formats = {
-            'A+': workbook.add_format({'bg_color': '#006400', 'font_color': 'white', 'border': 1}),  # Dark green
-            'A': workbook.add_format({'bg_color': '#28B463', 'font_color': 'white', 'border': 1}),  # Green
-            'B+': workbook.add_format({'bg_color': '#1A237E', 'font_color': 'white', 'border': 1}),  # Dark blue
-            'B': workbook.add_format({'bg_color': '#3498DB', 'font_color': 'white', 'border': 1}),  # Blue
-            'C+': workbook.add_format({'bg_color': '#8D6E63', 'font_color': 'white', 'border': 1}),  # Brown
-            'C': workbook.add_format({'bg_color': '#F4D03F', 'font_color': 'black', 'border': 1}),  # Yellow
-            'NC': workbook.add_format({'bg_color': '#E74C3C', 'font_color': 'white', 'border': 1})   # Red
-        }
-        
-        # Create worksheet manually to control formats
-        worksheet = workbook.add_worksheet('Natijalar')
-
-        # Define separate numeric formats (2 decimals) for grade-colored rows
-        grade_formats_numeric = {
-            'A+': workbook.add_format({'bg_color': '#006400', 'font_color': 'white', 'border': 1, 'num_format': '0.00'}),
-            'A': workbook.add_format({'bg_color': '#28B463', 'font_color': 'white', 'border': 1, 'num_format': '0.00'}),
-            'B+': workbook.add_format({'bg_color': '#1A237E', 'font_color': 'white', 'border': 1, 'num_format': '0.00'}),
-            'B': workbook.add_format({'bg_color': '#3498DB', 'font_color': 'white', 'border': 1, 'num_format': '0.00'}),
-            'C+': workbook.add_format({'bg_color': '#8D6E63', 'font_color': 'white', 'border': 1, 'num_format': '0.00'}),
-            'C': workbook.add_format({'bg_color': '#F4D03F', 'font_color': 'black', 'border': 1, 'num_format': '0.00'}),
-            'NC': workbook.add_format({'bg_color': '#E74C3C', 'font_color': 'white', 'border': 1, 'num_format': '0.00'})
-        }
-
-        # Write header row
-        for col_num, value in enumerate(df.columns.values):
-            worksheet.write(0, col_num, value, header_format)
+    return df
 
-        # Write all rows manually with correct formatting
-        if 'DARAJA' in df.columns:
-            for row_num in range(len(df)):
-                grade = df.iloc[row_num]['DARAJA']
-                row_format_map = grade_formats.get(grade, None)
-                row_format_map_numeric = grade_formats_numeric.get(grade, None)
+def _grade_order(results_df, grade_order=None):
+    """
+    Baholar yuqoridan pastga. grade_order berilmasa - config chegaralari, natijalarda boshqa
+    baho nomlari bo'lsa (qayta baholash) - natijalardagi baholar ball bo'yicha tartiblanadi.
+    """
+    if grade_order is not None:
+        return [str(grade) for grade in grade_order]
+    labels = grade_labels()
+    if 'Grade' not in results_df.columns or not len(results_df):
+        return labels
+    present = (results_df.groupby('Grade')['Standard Score'].max()
+               .sort_values(ascending=False).index.astype(str).tolist())
+    return labels if set(present) <= set(labels) else present
 
-                for col_num in range(len(df.columns)):
-                    col_name = df.columns[col_num]
-                    cell_value = df.iloc[row_num, col_num]
+def _write_results_worksheet(workbook, df, sheet_name, grades=None):
+    """Hisobot jadvalini baho ranglari bilan varaqqa yozish (qatorma-qator, oqimli)"""
+    border_format = workbook.add_format({'border': 1})
+    # BALL va ABILITY - 2 xonali raqam formati
+    number_format = workbook.add_format({'border': 1, 'num_format': '0.00'})
+    column_formats = {column: border_format for column in df.columns}
+    column_formats.update({'BALL': number_format, 'ABILITY': number_format})
+    widths = {'NO': 6, 'ISM FAMILIYA': 30, 'ABILITY': 12, 'BALL': 10, 'DARAJA': 8}
+    
+    worksheet = write_table(workbook, sheet_name, df, column_formats, widths, freeze=False)
+    
+    # Butun qator baho rangida (PDF bilan bir xil) - har bir baho uchun bitta diapazon qoidasi
+    if 'DARAJA' in df.columns:
+        add_grade_formats(workbook, worksheet, df.columns.get_loc('DARAJA'), 1, len(df),
+                          0, len(df.columns) - 1, grades)
 
-                    # Determine if value is numeric (handle NumPy numeric types too)
-                    is_numeric = isinstance(cell_value, (int, float, np.integer, np.floating))
+def _write_score_table_worksheet(workbook, score_table, sheet_name):
+    """Xom ball -> theta -> standart ball -> baho jadvalini varaqqa yozish"""
+    df = score_table.to_frame().rename(columns=SCORE_TABLE_COLUMNS)
+    cell_format = workbook.add_format({'border': 1, 'align': 'center'})
+    number_format = workbook.add_format({'border': 1, 'align': 'center', 'num_format': '0.00'})
+    theta_format = workbook.add_format({'border': 1, 'align': 'center', 'num_format': '0.000'})
+    column_formats = {column: cell_format for column in df.columns}
+    column_formats.update({'THETA': theta_format, 'SE': theta_format, 'ABILITY': number_format, 'BALL': number_format})
+    
+    write_table(workbook, sheet_name, df, column_formats, {column: 12 for column in df.columns})
 
-                    if col_name in ['BALL', 'ABILITY'] and is_numeric:
-                        # Write as numeric with 2-decimal format and grade color
-                        worksheet.write(row_num + 1, col_num, float(cell_value), row_format_map_numeric)
-                    else:
-                        # Write other columns with grade color format
-                        worksheet.write(row_num + 1, col_num, cell_value, row_format_map)
-        
-        # Set column widths
-        worksheet.set_column('A:A', 6)   # NO
-        worksheet.set_column('B:B', 30)  # ISM FAMILIYA
-        worksheet.set_column('C:C', 12)  # ABILITY
-        worksheet.set_column('D:D', 10)  # BALL
-        worksheet.set_column('E:E', 8)   # DARAJA
-        
-        # Per your request, charts and statistics are PDF-only. Excel will contain only the main results sheet.
+def prepare_excel_for_download(results_df, data_df=None, beta_values=None, title="REPETITSION TEST NATIJALARI",
+                               score_table=None, grade_order=None):
+    """
+    Prepare the results DataFrame as an Excel file for download with all features like PDF.
+    
+    Parameters:
+    - results_df: DataFrame with processed results
+    - data_df: Original data DataFrame
+    - beta_values: Item difficulty values
+    - title: Title for the report
+    - score_table: ScoreTable (ixtiyoriy) - 'Ball jadvali' varag'i qo'shiladi
+    - grade_order: Baholar yuqoridan pastga (None - chegaralar/natijalar bo'yicha), ranglar uchun
+    
+    Returns:
+    - excel_data: BytesIO object containing Excel file data
+    """
+    grades = _grade_order(results_df, grade_order)
+    # Convert results to the report table (NO, ISM FAMILIYA, ABILITY, BALL, DARAJA)
+    df = _results_report_table(results_df)
+    
+    # Create a BytesIO object
+    excel_data = io.BytesIO()
+    
+    # Oqimli ish kitobi (constant_memory) - katta natijalarda ham xotira kichik
+    workbook = open_workbook(excel_data)
+    _write_results_worksheet(workbook, df, 'Natijalar', grades)
+    if score_table is not None:
+        _write_score_table_worksheet(workbook, score_table, 'Ball jadvali')
+    # Per your request, charts and statistics are PDF-only. Excel will contain only the main results sheet.
+    workbook.close()
     
     # Reset the pointer to the beginning of the BytesIO object
     excel_data.seek(0)
     
     return excel_data
 
-def prepare_pdf_for_download(results_df, title="REPETITSION TEST NATIJALARI"):
+def _worksheet_name(name, used):
+    """Excel varaq nomi: 31 belgigacha, taqiqlangan belgilarsiz va takrorlanmas"""
+    base = str(name).translate({ord(ch): '_' for ch in '[]:*?/\\'}).strip()[:31] or 'Varaq'
+    candidate, counter = base, 2
+    while candidate.lower() in used:
+        suffix = f" ({counter})"
+        candidate = base[:31 - len(suffix)] + suffix
+        counter += 1
+    used.add(candidate.lower())
+    return candidate
+
+def prepare_workbook_excel(sheet_results, title="REPETITSION TEST NATIJALARI", score_tables=None, grade_order=None):
+    """
+    Ko'p varaqli (fan/sinf bo'yicha) ish kitobi uchun yagona Excel fayl.
+    
+    Parameters:
+    - sheet_results: {varaq nomi: results_df} - tahlil qilingan varaqlar (tartibi bilan)
+    - title: Hisobot sarlavhasi
+    - score_tables: {varaq nomi: ScoreTable} (ixtiyoriy) - har bir fan uchun ball jadvali varag'i
+    - grade_order: Baholar yuqoridan pastga (None - chegaralar/natijalar bo'yicha)
+    
+    Returns:
+    - excel_data: BytesIO - 'Umumiy' xulosa varag'i va har bir fan uchun natijalar varag'i
+    """
+    frames = [df[['Grade', 'Standard Score']] for df in sheet_results.values() if 'Grade' in df.columns]
+    grades = _grade_order(pd.concat(frames) if frames else pd.DataFrame(), grade_order)
+    excel_data = io.BytesIO()
+    
+    # Oqimli ish kitobi - varaqlar qatorma-qator yoziladi
+    workbook = open_workbook(excel_data)
+    header_format = workbook.add_format(HEADER_STYLE)
+    cell_format = workbook.add_format({'border': 1})
+    number_format = workbook.add_format({'border': 1, 'num_format': '0.00'})
+    
+    # Umumiy varaq: har bir fan bo'yicha talabalar soni, baholar va o'rtacha ball
+    used_names = {'umumiy'}
+    summary = workbook.add_worksheet('Umumiy')
+    summary.write(0, 0, title, workbook.add_format({'bold': True, 'font_size': 14}))
+    headers = ['FAN / VARAQ', 'TALABALAR'] + grades + ["O'RTACHA BALL"]
+    for col_num, value in enumerate(headers):
+        summary.write(2, col_num, value, header_format)
+    
+    for row_num, (name, results_df) in enumerate(sheet_results.items(), start=3):
+        grade_counts = results_df['Grade'].value_counts() if 'Grade' in results_df.columns else {}
+        summary.write(row_num, 0, str(name), cell_format)
+        summary.write(row_num, 1, len(results_df), cell_format)
+        for offset, grade in enumerate(grades, start=2):
+            summary.write(row_num, offset, int(grade_counts.get(grade, 0)), cell_format)
+        average = float(results_df['Standard Score'].mean()) if len(results_df) else 0.0
+        summary.write(row_num, len(headers) - 1, average, number_format)
+    
+    summary.set_column(0, 0, 24)
+    summary.set_column(1, len(headers) - 1, 10)
+    
+    # Har bir fan natijalari alohida varaqda (bitta varaqli hisobot bilan bir xil ko'rinish)
+    for name, results_df in sheet_results.items():
+        _write_results_worksheet(workbook, _results_report_table(results_df), _worksheet_name(name, used_names), grades)
+        score_table = (score_tables or {}).get(name)
+        if score_table is not None:
+            _write_score_table_worksheet(workbook, score_table, _worksheet_name(f"{name} - jadval", used_names))
+
+    workbook.close()
+    excel_data.seek(0)
+    return excel_data
+
+def merge_pdf_reports(pdf_reports):
+    """
+    Bir nechta PDF hisobotni bitta faylga birlashtirish.
+    
+    Parameters:
+    - pdf_reports: {bo'lim nomi: BytesIO} - har bir bo'lim uchun mundarijada belgi qo'shiladi
+    
+    Returns:
+    - pdf_data: BytesIO
+    """
+    writer = PyPDF2.PdfWriter()
+    for name, buffer in pdf_reports.items():
+        buffer.seek(0)
+        first_page = len(writer.pages)
+        for page in PyPDF2.PdfReader(buffer).pages:
+            writer.add_page(page)
+        if len(writer.pages) > first_page:
+            writer.add_outline_item(str(name), first_page)
+    
+    pdf_data = io.BytesIO()
+    writer.write(pdf_data)
+    pdf_data.seek(0)
+    return pdf_data
+
+def prepare_pdf_for_download(results_df, title="REPETITSION TEST NATIJALARI", score_table=None):
     """
     Prepare the results DataFrame as a PDF file for download.
     
     Parameters:
     - results_df: DataFrame with processed results
     - title: Title for the PDF document
+    - score_table: ScoreTable (ixtiyoriy) - natijalardan keyin ball jadvali sahifasi
     
     Returns:
     - pdf_data: BytesIO object containing PDF file data
@@ -1522,6 +1128,29 @@ def prepare_pdf_for_download(results_df, title="REPETITSION TEST NATIJALARI"):
     # Add the table to the elements
     elements.append(table)
     
+    # Xom ball -> standart ball -> baho jadvali (yangi sahifada)
+    if score_table is not None:
+        elements.append(PageBreak())
+        elements.append(Paragraph("BALL JADVALI", title_style))
+        elements.append(Spacer(1, 4*mm))
+        score_df = score_table.to_frame().rename(columns=SCORE_TABLE_COLUMNS)
+        score_data = [list(score_df.columns)]
+        for row in score_df.itertuples(index=False):
+            score_data.append([str(row[0]), f"{row[1]:.3f}", f"{row[2]:.3f}", f"{row[3]:.2f}",
+                               f"{row[4]:.2f}", row[5], str(row[6])])
+        score_style = [
+            ('BACKGROUND', (0, 0), (-1, 0), colors.HexColor("#4472C4")),
+            ('TEXTCOLOR', (0, 0), (-1, 0), colors.white),
+            ('FONTNAME', (0, 0), (-1, 0), f'{base_font}-Bold'),
+            ('FONTNAME', (0, 1), (-1, -1), base_font),
+            ('FONTSIZE', (0, 0), (-1, -1), 9),
+            ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
+            ('GRID', (0, 0), (-1, -1), 0.5, colors.black),
+        ]
+        score_table_flowable = Table(score_data, colWidths=[25*mm] * len(score_df.columns), repeatRows=1)
+        score_table_flowable.setStyle(TableStyle(score_style))
+        elements.append(score_table_flowable)
+    
     # Summary information is not needed
     
     # Add footer with contact info - moved to bottom for better mobile viewing
@@ -1566,10 +1195,6 @@ def prepare_statistics_pdf(results_df, grade_counts, ability_estimates, data_df=
     from reportlab.platypus import Image
     from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
     from reportlab.lib.enums import TA_CENTER
-    import matplotlib
-    matplotlib.use('Agg')
-    import matplotlib.pyplot as plt
-    import io as _io
 
     pdf_data = io.BytesIO()
 
@@ -1599,7 +1224,8 @@ def prepare_statistics_pdf(results_df, grade_counts, ability_estimates, data_df=
         total_students = len(results_df)
         avg_std = float(results_df['Standard Score'].mean()) if 'Standard Score' in results_df.columns else 0.0
         avg_raw = float(results_df['Raw Score'].mean()) if 'Raw Score' in results_df.columns else 0.0
-        passing = total_students - int(grade_counts.get('NC', 0))
+        # O'tganlar - eng past bahodan (standart chegaralarda NC) boshqalar
+        _, passing, _ = grade_summary(grade_counts)
         pass_rate = (passing / total_students * 100.0) if total_students > 0 else 0.0
 
         table_data = [["Ko'rsatkich", "Qiymat"],
@@ -1622,46 +1248,26 @@ def prepare_statistics_pdf(results_df, grade_counts, ability_estimates, data_df=
 
     elements.append(Spacer(1, 6*mm))
 
+    # Diagrammalar bot.charts orqali (Figure API, chop etish DPI si, PNG keshi)
+    from bot import charts
+
     # Grade distribution chart
     try:
-        grade_order = ['A+', 'A', 'B+', 'B', 'C+', 'C', 'NC']
-        counts = [int(grade_counts.get(g, 0)) for g in grade_order]
-        if sum(counts) > 0:
-            fig, ax = plt.subplots(figsize=(6, 3))
-            bars = ax.bar(grade_order, counts, color=['#1E8449', '#28B463', '#58D68D', '#3498DB', '#5DADE2', '#F4D03F', '#E67E22'])
-            ax.set_title('Baholar taqsimoti')
-            ax.set_xlabel('Baho')
-            ax.set_ylabel('Talabalar soni')
-            for b in bars:
-                ax.text(b.get_x()+b.get_width()/2, b.get_height(), str(int(b.get_height())), ha='center', va='bottom', fontsize=8)
-            buf = _io.BytesIO()
-            plt.tight_layout()
-            fig.savefig(buf, format='png', dpi=150)
-            plt.close(fig)
-            buf.seek(0)
-            elements.append(Image(buf, width=160*mm, height=80*mm))
+        if sum(int(count) for count in grade_counts.values()) > 0:
+            png = charts.statistics_grades_png(grade_counts, channel='print')
+            elements.append(Image(io.BytesIO(png), width=160*mm, height=80*mm))
             elements.append(Spacer(1, 4*mm))
-    except Exception:
-        pass
+    except Exception as e:
+        print(f"Statistika diagrammasi (baholar) xatoligi: {e}")
 
     # Ability distribution chart
     try:
         if ability_estimates is not None and len(ability_estimates) > 0:
-            abilities = np.array(ability_estimates, dtype=float)
-            fig, ax = plt.subplots(figsize=(6, 3))
-            ax.hist(abilities, bins=20, color='#3498DB', edgecolor='white')
-            ax.set_title('Qobiliyat (Theta) taqsimoti')
-            ax.set_xlabel('Theta')
-            ax.set_ylabel('Talabalar soni')
-            buf = _io.BytesIO()
-            plt.tight_layout()
-            fig.savefig(buf, format='png', dpi=150)
-            plt.close(fig)
-            buf.seek(0)
-            elements.append(Image(buf, width=160*mm, height=80*mm))
+            png = charts.statistics_ability_png(ability_estimates, channel='print')
+            elements.append(Image(io.BytesIO(png), width=160*mm, height=80*mm))
             elements.append(Spacer(1, 4*mm))
-    except Exception:
-        pass
+    except Exception as e:
+        print(f"Statistika diagrammasi (qobiliyat) xatoligi: {e}")
 
     # Build PDF
     doc.build(elements)
@@ -0,0 +1,165 @@
+"""
+Katta natijalar uchun oqimli Excel yozuvchi (xlsxwriter constant_memory rejimi).
+
+Qatorlar yuqoridan pastga bir marta yoziladi va har bir qator diskdagi vaqtinchalik
+faylga darhol tushadi - xotirada butun varaq saqlanmaydi, satrlar shared strings
+jadvaliga yig'ilmaydi. Formatlar katak bo'yicha emas: raqam formati va chegaralar
+ustunga (set_column), baho ranglari va navbatma-navbat qator foni esa butun diapazonga
+bitta shartli format qoidasi bilan qo'yiladi. Shuning uchun yozish vaqti va fayl
+hajmi qatorlar soniga chiziqli, formatlar soni esa o'zgarmas.
+
+constant_memory rejimida oldingi qatorga qaytib bo'lmaydi: varaqlar faqat
+write_table() yoki qatorma-qator yoziladi (write_column ishlatilmaydi).
+"""
+import io
+
+import xlsxwriter
+from xlsxwriter.utility import xl_col_to_name
+
+# Baho ranglari (PDF hisobot bilan bir xil): baho -> (fon, matn rangi)
+GRADE_COLORS = {
+    'A+': ('#006400', 'white'),  # Dark green
+    'A': ('#28B463', 'white'),   # Green
+    'B+': ('#1A237E', 'white'),  # Dark blue
+    'B': ('#3498DB', 'white'),   # Blue
+    'C+': ('#8D6E63', 'white'),  # Brown
+    'C': ('#F4D03F', 'black'),   # Yellow
+    'NC': ('#E74C3C', 'white'),  # Red
+}
+# Standart bo'lmagan baholar uchun (qayta baholash, GRADE_THRESHOLDS) - tartib bo'yicha
+FALLBACK_GRADE_COLORS = [
+    ('#006400', 'white'), ('#3498DB', 'white'), ('#F4D03F', 'black'), ('#E67E22', 'white'),
+    ('#8E44AD', 'white'), ('#95A5A6', 'black'), ('#E74C3C', 'white'),
+]
+
+HEADER_STYLE = {
+    'bold': True,
+    'bg_color': '#4B8BBE',
+    'font_color': 'white',
+    'border': 1,
+    'align': 'center',
+    'valign': 'vcenter'
+}
+
+
+def grade_colors(grades=None):
+    """
+    Baho -> (fon, matn rangi). grades - baholar yuqoridan pastga (None - standart baholar).
+    Hammasi standart bo'lsa GRADE_COLORS, aks holda palitradan tartib bo'yicha.
+    """
+    if grades is None:
+        return dict(GRADE_COLORS)
+    grades = [str(grade) for grade in grades]
+    if set(grades) <= set(GRADE_COLORS):
+        return {grade: GRADE_COLORS[grade] for grade in grades}
+    return {grade: FALLBACK_GRADE_COLORS[i % len(FALLBACK_GRADE_COLORS)] for i, grade in enumerate(grades)}
+
+
+def open_workbook(output):
+    """Oqimli ish kitobi (output - BytesIO yoki fayl yo'li)"""
+    return xlsxwriter.Workbook(output, {'constant_memory': True})
+
+
+def write_table(workbook, sheet_name, df, column_formats=None, widths=None, header_format=None,
+                start_row=0, freeze=True):
+    """
+    DataFrame ni varaqqa qatorma-qator yozish.
+
+    Args:
+        workbook: open_workbook() natijasi
+        sheet_name: Varaq nomi
+        df: Yoziladigan jadval (ustunlar tartibi bilan)
+        column_formats: {ustun nomi: format} - ustunning barcha kataklari uchun
+        widths: {ustun nomi: kenglik}
+        header_format: Sarlavha formati (None - HEADER_STYLE)
+        start_row: Sarlavha qatori (undan oldingi qatorlar oldin yozilgan bo'lishi kerak)
+        freeze: Sarlavhani qotirish
+
+    Returns:
+        worksheet - qo'shimcha diapazon formatlari uchun (add_grade_formats, add_banding)
+    """
+    worksheet = workbook.get_worksheet_by_name(sheet_name) or workbook.add_worksheet(sheet_name)
+    column_formats = column_formats or {}
+    widths = widths or {}
+
+    # Ustun formatlari qatorlardan oldin - constant_memory da katak yozilganda o'qiladi
+    for col_num, column in enumerate(df.columns):
+        if column in column_formats or column in widths:
+            worksheet.set_column(col_num, col_num, widths.get(column, 12), column_formats.get(column))
+
+    worksheet.write_row(start_row, 0, [str(column) for column in df.columns],
+                        header_format or workbook.add_format(HEADER_STYLE))
+    # NaN -> bo'sh katak
+    rows = df.astype(object).where(df.notna(), None).itertuples(index=False, name=None)
+    for row_num, values in enumerate(rows, start=start_row + 1):
+        worksheet.write_row(row_num, 0, values)
+
+    if freeze:
+        worksheet.freeze_panes(start_row + 1, 0)
+    return worksheet
+
+
+def add_grade_formats(workbook, worksheet, grade_col, first_row, last_row, first_col=None, last_col=None,
+                      grades=None):
+    """
+    Baho ranglari: har bir baho uchun diapazonga bitta shartli format qoidasi.
+
+    grade_col ustunidagi baho bo'yicha first_col..last_col kataklari bo'yaladi
+    (None - faqat baho ustuni). Qatorlar 0 dan boshlanadi. grades - baholar
+    yuqoridan pastga (None - standart baholar), ranglar grade_colors() dan.
+    """
+    if last_row < first_row:
+        return
+    first_col = grade_col if first_col is None else first_col
+    last_col = grade_col if last_col is None else last_col
+    grade_cell = f"${xl_col_to_name(grade_col)}{first_row + 1}"
+    for grade, (bg_color, font_color) in grade_colors(grades).items():
+        worksheet.conditional_format(first_row, first_col, last_row, last_col, {
+            'type': 'formula',
+            'criteria': f'={grade_cell}="{grade}"',
+            'format': workbook.add_format({'bg_color': bg_color, 'font_color': font_color}),
+            'stop_if_true': True
+        })
+
+
+def add_banding(workbook, worksheet, first_row, last_row, first_col, last_col, color='#F9F9F9'):
+    """Navbatma-navbat qator foni (toq raqamli Excel qatorlari, 3-qatordan) - bitta qoida"""
+    if last_row < first_row:
+        return
+    worksheet.conditional_format(first_row, first_col, last_row, last_col, {
+        'type': 'formula',
+        'criteria': '=MOD(ROW(),2)=1',
+        'format': workbook.add_format({'bg_color': color})
+    })
+
+
+def table_to_excel(df, sheet_name, column_formats=None, widths=None, grade_column=None, color_rows=False,
+                   grades=None):
+    """
+    Bitta varaqli oqimli Excel fayl.
+
+    Args:
+        df: Jadval
+        sheet_name: Varaq nomi
+        column_formats: {ustun nomi: xlsxwriter format xususiyatlari (dict)}
+        widths: {ustun nomi: kenglik}
+        grade_column: Baho ustuni (None - ranglanmaydi)
+        color_rows: True - butun qator baho rangida, False - faqat baho ustuni
+        grades: Baholar yuqoridan pastga (None - standart baholar)
+
+    Returns:
+        BytesIO
+    """
+    excel_data = io.BytesIO()
+    workbook = open_workbook(excel_data)
+    formats = {column: workbook.add_format(props) for column, props in (column_formats or {}).items()}
+    worksheet = write_table(workbook, sheet_name, df, formats, widths)
+    if grade_column is not None:
+        grade_col = df.columns.get_loc(grade_column)
+        if color_rows:
+            add_grade_formats(workbook, worksheet, grade_col, 1, len(df), 0, len(df.columns) - 1, grades)
+        else:
+            add_grade_formats(workbook, worksheet, grade_col, 1, len(df), grades=grades)
+    workbook.close()
+    excel_data.seek(0)
+    return excel_data
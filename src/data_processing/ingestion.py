@@ -0,0 +1,545 @@
+"""
+Yuklangan fayllarni oqimli o'qish (xlsx/xls/ods/csv).
+
+Fayl qatorlari reader backend orqali birma-bir o'qiladi: sarlavha va birinchi qatorlar
+bo'yicha ustun rollari aniqlanadi, keyin faqat ID va savol ustunlari olinadi va javoblar
+to'g'ridan-to'g'ri oldindan ajratilgan int8 matritsaga yoziladi. To'liq object-dtype
+DataFrame hech qachon yaratilmaydi.
+
+Qiymatlarni talqin qilish pandas.read_excel + preprocess_exam_data bilan bir xil:
+bo'sh kataklar va 'NA' kabi qiymatlar NaN, butun sonli float -> int, to'liq sonli
+ustunlardagi matn sonlar son sifatida, faqat matnli ustunlarda esa har qanday bo'sh
+bo'lmagan qiymat 1 hisoblanadi.
+
+Backend'lar register_reader() bilan qo'shiladi, har biri qatorlar (list) iteratorini
+qaytaradi. Tezroq kutubxonalar (masalan python-calamine) o'rnatilgan bo'lsa avtomatik
+ro'yxatdan o'tadi va reader='calamine' bilan tanlanadi.
+"""
+import csv
+import io
+import os
+from itertools import chain
+
+import numpy as np
+import pandas as pd
+from pandas.io.parsers import TextParser
+
+from data_processing.column_detection import DEFAULT_SAMPLE_ROWS, layout_cache, detect_column_roles
+
+# Qo'llab-quvvatlanadigan formatlar va ularning standart reader'lari
+DEFAULT_READERS = {
+    'xlsx': 'openpyxl',
+    'xls': 'xlrd',
+    'ods': 'pandas',
+    'csv': 'csv',
+}
+
+# Backend nomi -> {'formats': (...), 'read': func(data, sheet=0) -> qatorlar iteratori}
+READERS = {}
+
+# pandas read_excel standart NA qiymatlari (bunday matnlar bo'sh katak hisoblanadi)
+NA_STRINGS = frozenset([
+    '', '#N/A', '#N/A N/A', '#NA', '-1.#IND', '-1.#QNAN', '-NaN', '-nan', '1.#IND',
+    '1.#QNAN', '<NA>', 'N/A', 'NA', 'NULL', 'NaN', 'None', 'n/a', 'nan', 'null'
+])
+
+# Javob kataklari kodlari (int8). Yakuniy 0/1 qiymat ustunning turiga bog'liq,
+# shuning uchun katak turi ham saqlanadi.
+CELL_EMPTY = 0        # bo'sh / NA
+CELL_ONE = 1          # son, == 1
+CELL_POSITIVE = 2     # son, > 0 va != 1
+CELL_OTHER = 3        # son <= 0 yoki boshqa obyekt (sana va h.k.)
+CELL_TEXT_ONE = 4     # sonli matn, == 1
+CELL_TEXT_POSITIVE = 5  # sonli matn, > 0 va != 1
+CELL_TEXT_OTHER = 6   # sonli matn, <= 0
+CELL_TEXT = 7         # oddiy matn (A, B, ...)
+CELL_TEXT_BLANK = 8   # faqat bo'shliqlardan iborat matn
+
+# Eng ko'p uchraydigan qiymatlar uchun tezkor yo'l (1.0 va True ham 1 ga teng)
+_FAST_CODES = {'': CELL_EMPTY, 1: CELL_ONE, 0: CELL_OTHER}
+
+# Matritsa o'sish qadami (qatorlar soni oldindan ma'lum bo'lmaganda)
+_INITIAL_ROWS = 1024
+
+
+def register_reader(name, formats):
+    """Reader backend'ni ro'yxatdan o'tkazish uchun dekorator"""
+    def decorator(func):
+        READERS[name] = {'formats': tuple(formats), 'read': func}
+        return func
+    return decorator
+
+
+def sniff_format(data, filename=None):
+    """
+    Fayl formati: avval fayl boshidagi baytlar (zip - xlsx/ods, OLE - xls), ular
+    aniqlamasa kengaytma (masalan csv), oxirida csv. Kengaytmasi noto'g'ri fayllar
+    (.xls nomli xlsx) ham pandas.read_excel kabi mazmun bo'yicha o'qiladi.
+    """
+    if data[:4] == b'PK\x03\x04':
+        # ODS ham zip arxiv, lekin birinchi yozuvi 'mimetype'
+        return 'ods' if b'opendocument.spreadsheet' in data[:128] else 'xlsx'
+    if data[:8] == b'\xd0\xcf\x11\xe0\xa1\xb1\x1a\xe1':
+        return 'xls'
+    if filename:
+        extension = os.path.splitext(str(filename))[1].lower().lstrip('.')
+        if extension in ('xlsx', 'xlsm'):
+            return 'xlsx'
+        if extension in DEFAULT_READERS:
+            return extension
+    return 'csv'
+
+
+def get_reader(fmt, reader=None):
+    """
+    Format uchun reader backend.
+    reader berilgan va u formatni o'qiy olsa - o'sha, aks holda standart backend.
+    """
+    if reader and reader != 'auto':
+        if reader not in READERS:
+            raise ValueError(f"Noma'lum reader backend: {reader}")
+        if fmt in READERS[reader]['formats']:
+            return reader, READERS[reader]['read']
+    name = DEFAULT_READERS[fmt]
+    return name, READERS[name]['read']
+
+
+def _convert_value(value):
+    """Katak qiymatini pandas read_excel kabi talqin qilish"""
+    if value is None:
+        return ''
+    if isinstance(value, float):
+        if value != value:
+            return ''
+        if value.is_integer():
+            return int(value)
+    return value
+
+
+@register_reader('openpyxl', ('xlsx',))
+def _openpyxl_rows(data, sheet=0):
+    from openpyxl import load_workbook
+    workbook = load_workbook(io.BytesIO(data), read_only=True, data_only=True, keep_links=False)
+    try:
+        sheet = workbook.worksheets[sheet] if isinstance(sheet, int) else workbook[sheet]
+        # read_only rejimida saqlangan o'lchamlar noto'g'ri bo'lishi mumkin
+        sheet.reset_dimensions()
+        for row in sheet.iter_rows(values_only=True):
+            yield [_convert_value(value) for value in row]
+    finally:
+        workbook.close()
+
+
+@register_reader('xlrd', ('xls',))
+def _xlrd_rows(data, sheet=0):
+    import xlrd
+    book = xlrd.open_workbook(file_contents=data, on_demand=True)
+    try:
+        sheet = book.sheet_by_index(sheet) if isinstance(sheet, int) else book.sheet_by_name(sheet)
+        for index in range(sheet.nrows):
+            row = []
+            for cell in sheet.row(index):
+                if cell.ctype == xlrd.XL_CELL_DATE:
+                    try:
+                        row.append(xlrd.xldate.xldate_as_datetime(cell.value, book.datemode))
+                    except Exception:
+                        row.append(cell.value)
+                elif cell.ctype == xlrd.XL_CELL_BOOLEAN:
+                    row.append(bool(cell.value))
+                elif cell.ctype == xlrd.XL_CELL_ERROR:
+                    row.append('')
+                else:
+                    row.append(_convert_value(cell.value))
+            yield row
+    finally:
+        book.release_resources()
+
+
+@register_reader('pandas', ('xlsx', 'xls', 'ods'))
+def _pandas_rows(data, sheet=0, engine=None):
+    # Universal (oqimsiz) backend: pandas o'zi o'qiydi, qiymatlar o'zgartirilmaydi
+    frame = pd.read_excel(io.BytesIO(data), sheet_name=sheet, header=None, dtype=object, engine=engine)
+    for row in frame.itertuples(index=False, name=None):
+        yield [_convert_value(value) for value in row]
+
+
+@register_reader('csv', ('csv',))
+def _csv_rows(data, sheet=0):
+    text = data.decode('utf-8-sig', errors='replace')
+    try:
+        dialect = csv.Sniffer().sniff(text[:4096], delimiters=',;\t')
+    except csv.Error:
+        dialect = csv.excel
+    for row in csv.reader(io.StringIO(text), dialect):
+        yield row
+
+
+try:
+    import python_calamine  # noqa: F401
+
+    @register_reader('calamine', ('xlsx', 'xls', 'ods'))
+    def _calamine_rows(data, sheet=0):
+        return _pandas_rows(data, sheet, engine='calamine')
+except ImportError:
+    pass
+
+
+def list_sheets(source, filename=None):
+    """
+    Ish kitobidagi varaqlar nomlari (tartibi bilan).
+    CSV faylda bitta varaq bor - [0] qaytariladi.
+    """
+    data = _source_bytes(source)
+    if filename is None and isinstance(source, (str, os.PathLike)):
+        filename = source
+    fmt = sniff_format(data, filename)
+    if fmt == 'csv':
+        return [0]
+    if fmt == 'xlsx':
+        from openpyxl import load_workbook
+        workbook = load_workbook(io.BytesIO(data), read_only=True, keep_links=False)
+        try:
+            return [sheet.title for sheet in workbook.worksheets]
+        finally:
+            workbook.close()
+    if fmt == 'xls':
+        import xlrd
+        book = xlrd.open_workbook(file_contents=data, on_demand=True)
+        try:
+            return book.sheet_names()
+        finally:
+            book.release_resources()
+    with pd.ExcelFile(io.BytesIO(data)) as workbook:
+        return list(workbook.sheet_names)
+
+
+def _is_blank(value):
+    return value == '' and isinstance(value, str)
+
+
+def iter_rows(data, fmt=None, reader=None, sheet=0):
+    """
+    Fayl qatorlari (pandas read_excel kabi): oxirdagi bo'sh kataklar kesiladi,
+    o'rtadagi bo'sh qatorlar saqlanadi, fayl oxiridagi bo'sh qatorlar tashlab yuboriladi.
+    """
+    fmt = fmt or sniff_format(data)
+    _, read = get_reader(fmt, reader)
+    blank_rows = 0
+    for row in read(data, sheet):
+        end = len(row)
+        while end and _is_blank(row[end - 1]):
+            end -= 1
+        if end == 0:
+            # Keyinroq ma'lumotli qator kelsagina qaytariladi
+            blank_rows += 1
+            continue
+        for _ in range(blank_rows):
+            yield []
+        blank_rows = 0
+        yield row[:end] if end < len(row) else row
+
+
+def _parse_rows(rows):
+    """Qatorlar ro'yxatidan DataFrame (read_excel bilan bir xil tur aniqlash)"""
+    parser = TextParser(rows, header=0, skip_blank_lines=False)
+    try:
+        return parser.read()
+    finally:
+        parser.close()
+
+
+def _source_bytes(source):
+    if isinstance(source, (bytes, bytearray)):
+        return bytes(source)
+    if hasattr(source, 'read'):
+        return source.read()
+    with open(source, 'rb') as f:
+        return f.read()
+
+
+def read_frame(source, filename=None, reader=None, sheet=0):
+    """
+    Faylni to'liq DataFrame sifatida o'qish (barcha ustunlar kerak bo'lganda).
+
+    Args:
+        source: Fayl baytlari, fayl obyekti yoki yo'li
+        filename: Format aniqlash uchun fayl nomi (ixtiyoriy)
+        reader: Backend nomi (None/'auto' - format bo'yicha standart)
+        sheet: Varaq indeksi yoki nomi
+    """
+    data = _source_bytes(source)
+    if filename is None and isinstance(source, (str, os.PathLike)):
+        filename = source
+    rows = list(iter_rows(data, sniff_format(data, filename), reader, sheet))
+    if not rows:
+        return pd.DataFrame()
+    width = len(rows[0])
+    return _parse_rows([row[:width] for row in rows])
+
+
+def _cell_code(value):
+    code = _FAST_CODES.get(value)
+    if code is not None:
+        return code
+    if isinstance(value, str):
+        if value in NA_STRINGS:
+            return CELL_EMPTY
+        try:
+            number = float(value)
+        except ValueError:
+            return CELL_TEXT if value.strip() else CELL_TEXT_BLANK
+        if number == 1:
+            return CELL_TEXT_ONE
+        return CELL_TEXT_POSITIVE if number > 0 else CELL_TEXT_OTHER
+    if isinstance(value, (int, float, np.number)):
+        if value != value:
+            return CELL_EMPTY
+        if value == 1:
+            return CELL_ONE
+        return CELL_POSITIVE if value > 0 else CELL_OTHER
+    return CELL_OTHER
+
+
+def valid_student_rows(id_values):
+    """
+    Haqiqiy o'quvchi qatorlari maskasi: ID bo'sh emas va 0, 1, true/false,
+    "(ism familya)" yoki bitta raqam emas.
+    """
+    invalid_id_values = ['0', '1', 'true', 'false', 'yes', 'no', 'y', 'n', '(ism familya)']
+    id_text = id_values.astype(str).str.strip()
+    return (
+        id_values.notna() &
+        (~id_text.isin(invalid_id_values)) &  # Not just 0, 1, "ism familya" etc.
+        (id_text != '') &  # Not empty
+        (~id_text.str.isdigit().astype(bool) | (id_text.str.len() > 1))  # Not just a single digit
+    )
+
+
+def _finding(level, code, message, count=None):
+    finding = {'level': level, 'code': code, 'message': message}
+    if count is not None:
+        finding['count'] = int(count)
+    return finding
+
+
+class ExamTable:
+    """
+    Yuklangan faylning yagona ko'rinishi: bir marta o'qiladi va tahlil, hisobotlar
+    hamda tekshiruv natijalari uchun shu obyekt uzatiladi.
+
+    - student_ids: tozalangan o'quvchi ID lari (pd.Series, asl qator indekslari bilan)
+    - responses: int8 0/1 javoblar matritsasi (o'quvchilar x savollar)
+    - findings: tekshiruv natijalari [{'level': 'error'|'warning', 'code', 'message', 'count'}]
+    - schema: aniqlangan tuzilma (ID ustuni, savollar, qatorlar soni, reader)
+    """
+
+    def __init__(self, id_column, question_columns, student_ids, responses, source_rows=0,
+                 reader=None, findings=None):
+        self.id_column = id_column
+        self.question_columns = list(question_columns)
+        self.student_ids = student_ids
+        self.responses = responses
+        self.source_rows = source_rows
+        self.reader = reader
+        self.findings = findings or []
+
+    @property
+    def shape(self):
+        return self.responses.shape
+
+    @property
+    def errors(self):
+        return [f['message'] for f in self.findings if f['level'] == 'error']
+
+    @property
+    def warnings(self):
+        return [f['message'] for f in self.findings if f['level'] == 'warning']
+
+    @property
+    def is_valid(self):
+        return not self.errors
+
+    @property
+    def schema(self):
+        return {
+            'id_column': str(self.id_column),
+            'question_columns': [str(col) for col in self.question_columns],
+            'total_questions': len(self.question_columns),
+            'total_students': int(self.responses.shape[0]),
+            'source_rows': int(self.source_rows),
+            'reader': self.reader
+        }
+
+    def check(self):
+        """Xatolik bo'lsa ValueError (tahlilni boshlashdan oldin)"""
+        if self.errors:
+            raise ValueError(self.errors[0])
+
+    def summary(self):
+        """Natijalar bilan saqlanadigan qisqa ma'lumot (JSON ga mos)"""
+        return {'schema': self.schema, 'findings': list(self.findings)}
+
+    def to_frame(self):
+        """ID ustuni + savollar (int8) DataFrame - javoblar matritsasi nusxalanmaydi"""
+        frame = pd.DataFrame(self.responses, columns=self.question_columns,
+                             index=self.student_ids.index, copy=False)
+        frame.insert(0, self.id_column, self.student_ids)
+        return frame
+
+
+def _build_table(id_column, question_columns, id_values, keep, answers, text_columns,
+                 non_binary, no_answer_rows, source_rows, reader):
+    """Tozalangan qatorlardan ExamTable va tekshiruv natijalari"""
+    findings = []
+    invalid_ids = int(source_rows - no_answer_rows - keep.sum())
+    if invalid_ids:
+        findings.append(_finding(
+            'warning', 'invalid_ids',
+            f"{invalid_ids} ta qator ism-familiyasiz yoki noto'g'ri ID bilan o'tkazib yuborildi", invalid_ids))
+    if no_answer_rows:
+        findings.append(_finding(
+            'warning', 'no_answers',
+            f"{no_answer_rows} ta qatorda birorta ham to'g'ri javob yo'q - o'tkazib yuborildi", no_answer_rows))
+    if text_columns:
+        findings.append(_finding(
+            'warning', 'text_columns',
+            f"{len(text_columns)} ta savol ustuni matnli - har qanday bo'sh bo'lmagan qiymat 1 deb olindi",
+            len(text_columns)))
+    if non_binary:
+        findings.append(_finding(
+            'warning', 'non_binary',
+            f"{non_binary} ta katakda 0/1 dan boshqa musbat qiymat - 1 deb olindi", non_binary))
+    if not keep.any():
+        findings.append(_finding('error', 'no_students', "Faylda javob bergan o'quvchilar topilmadi"))
+
+    return ExamTable(id_column, question_columns, id_values[keep], answers, source_rows=source_rows,
+                     reader=reader, findings=findings)
+
+
+def _empty_table(id_column, source_rows, reader, message="Faylda savol ustunlari topilmadi"):
+    """Savol ustunlari topilmagan (yoki bo'sh) fayl"""
+    findings = [_finding('error', 'no_questions', message)]
+    return ExamTable(id_column, [], pd.Series([], dtype=object, name=id_column),
+                     np.zeros((0, 0), dtype=np.int8), source_rows=source_rows, reader=reader,
+                     findings=findings)
+
+
+def table_from_frame(df, cache=layout_cache):
+    """
+    Tayyor DataFrame (masalan read_excel natijasi) dan ExamTable.
+    Faqat ID va savol ustunlari o'qiladi, jadval nusxalanmaydi.
+    """
+    id_column, question_columns = detect_column_roles(df, cache=cache)
+    if not question_columns:
+        return _empty_table(id_column, len(df), 'frame')
+
+    id_values = df[id_column]
+    valid_ids = valid_student_rows(id_values).to_numpy()
+    # Ism-familya belgilangan qatorda kamida 1ta "1" (to'g'ri javob) bo'lishi kerak
+    has_answer = np.zeros(len(df), dtype=bool)
+    for col in question_columns:
+        has_answer |= (df[col] == 1).to_numpy()
+    keep = valid_ids & has_answer
+
+    # Savollar 0/1 ga keltiriladi (faqat qoldirilgan qatorlar, ustun bo'yicha)
+    answers = np.empty((int(keep.sum()), len(question_columns)), dtype=np.int8)
+    text_columns = []
+    non_binary = 0
+    for position, col in enumerate(question_columns):
+        values = df[col][keep]
+        
+        # Faqat matnli (yoki bo'sh) ustunlar: A, B, C, D kabi har qanday qiymat 1 hisoblanadi
+        if pd.api.types.infer_dtype(values, skipna=True) in ('string', 'empty'):
+            answers[:, position] = (values.notna() & (values.astype(str).str.strip() != '')).to_numpy()
+            if values.notna().any():
+                text_columns.append(col)
+        else:
+            # Sonli qiymatlar: NaN -> 0, musbat qiymatlar (0/1 yoki ballar) -> 1
+            numeric = pd.to_numeric(values, errors='coerce').fillna(0)
+            answers[:, position] = (numeric > 0).to_numpy()
+            non_binary += int(((numeric > 0) & (numeric != 1)).sum())
+
+    no_answer_rows = int((valid_ids & ~has_answer).sum())
+    return _build_table(id_column, question_columns, id_values, keep, answers, text_columns,
+                        non_binary, no_answer_rows, len(df), 'frame')
+
+
+def read_exam_table(source, filename=None, reader=None, sample_rows=DEFAULT_SAMPLE_ROWS, cache=layout_cache,
+                    sheet=0):
+    """
+    Imtihon faylini oqimli o'qish.
+
+    Birinchi sample_rows qator bo'yicha ustun rollari aniqlanadi (yoki keshdan olinadi),
+    qolgan qatorlardan faqat ID va savol kataklari olinadi. Fayl mazmunidagi muammolar
+    (savollar yo'q, o'quvchilar yo'q va h.k.) istisno emas, findings sifatida qaytadi.
+    sheet - varaq indeksi yoki nomi (standart: birinchi varaq).
+
+    Returns:
+        ExamTable
+    """
+    data = _source_bytes(source)
+    if filename is None and isinstance(source, (str, os.PathLike)):
+        filename = source
+    fmt = sniff_format(data, filename)
+    reader_name, _ = get_reader(fmt, reader)
+    rows = iter_rows(data, fmt, reader_name, sheet)
+
+    header = next(rows, None)
+    if header is None:
+        return _empty_table(None, 0, reader_name, "Fayl bo'sh")
+    width = len(header)
+    sample = []
+    for row in rows:
+        sample.append(row[:width])
+        if len(sample) >= sample_rows:
+            break
+    sample_df = _parse_rows([header] + sample)
+    id_column, question_columns = detect_column_roles(sample_df, sample_rows=None, cache=cache)
+
+    columns = list(sample_df.columns)
+    id_position = columns.index(id_column)
+    positions = [columns.index(col) for col in question_columns]
+
+    ids = []
+    codes = np.zeros((max(_INITIAL_ROWS, len(sample)), len(positions)), dtype=np.int8)
+    n_rows = 0
+    for row in chain(sample, rows):
+        if n_rows == codes.shape[0]:
+            grown = np.zeros((codes.shape[0] * 2, codes.shape[1]), dtype=np.int8)
+            grown[:n_rows] = codes
+            codes = grown
+        size = min(len(row), width)
+        ids.append(row[id_position] if id_position < size else '')
+        codes[n_rows] = [_cell_code(row[p]) if p < size else CELL_EMPTY for p in positions]
+        n_rows += 1
+    codes = codes[:n_rows]
+
+    if not question_columns:
+        return _empty_table(id_column, n_rows, reader_name)
+
+    # ID ustuni read_excel kabi tur aniqlanadi (masalan 504, 505 -> int)
+    id_values = _parse_rows([[header[id_position]]] + [[value] for value in ids]).iloc[:, 0]
+
+    # Ustun turi read_excel kabi butun fayl bo'yicha: oddiy matn bo'lmasa - sonli ustun
+    numeric_columns = ~((codes == CELL_TEXT) | (codes == CELL_TEXT_BLANK)).any(axis=0)
+    is_one = (codes == CELL_ONE) | ((codes == CELL_TEXT_ONE) & numeric_columns)
+    valid_ids = valid_student_rows(id_values).to_numpy()
+    has_answer = is_one.any(axis=1)
+    keep = valid_ids & has_answer
+
+    # 0/1 ga keltirish esa preprocess_exam_data kabi qoldirilgan qatorlar bo'yicha:
+    # sonli qiymati yo'q matnli ustunlarda har qanday bo'sh bo'lmagan qiymat 1
+    kept = codes[keep]
+    text_mask = ~numeric_columns & ~((kept >= CELL_ONE) & (kept <= CELL_OTHER)).any(axis=0)
+    answers = np.isin(kept, (CELL_ONE, CELL_POSITIVE, CELL_TEXT_ONE, CELL_TEXT_POSITIVE))
+    answers[:, text_mask] = np.isin(
+        kept[:, text_mask], (CELL_TEXT_ONE, CELL_TEXT_POSITIVE, CELL_TEXT_OTHER, CELL_TEXT)
+    )
+    text_columns = [col for col, is_text, has_value in
+                    zip(question_columns, text_mask, (kept != CELL_EMPTY).any(axis=0)) if is_text and has_value]
+    positive = (kept == CELL_POSITIVE) | (kept == CELL_TEXT_POSITIVE)
+    non_binary = int(positive[:, ~text_mask].sum())
+
+    no_answer_rows = int((valid_ids & ~has_answer).sum())
+    return _build_table(id_column, question_columns, id_values, keep, answers.astype(np.int8),
+                        text_columns, non_binary, no_answer_rows, n_rows, reader_name)
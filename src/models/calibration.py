@@ -0,0 +1,171 @@
+"""
+Saqlangan kalibrovka bo'yicha yangi javoblar varag'ini baholash.
+
+Calibration - tahlildan keyin talabani baholash uchun kerak bo'lgan hamma narsa:
+savol qiyinliklari (beta), og'irliklar, ABILITY va standart ball normalizatsiyasi
+hamda ScoreTable. score_responses bitta javoblar vektori yoki kichik partiya uchun
+process_exam_data bilan bir xil ability, standart ball va bahoni beradi - modelni
+qayta ishga tushirmasdan (bir nechta massiv operatsiyasi).
+"""
+import re
+
+import numpy as np
+
+from models.grading import DEFAULT_SCORE_RANGE, check_score_range, grade_labels, grade_scores, to_standard_scores
+from models.score_table import ScoreTable
+
+
+class Calibration:
+    """
+    Bitta test kalibrovkasi.
+
+    Args:
+        question_columns: Savol ustunlari (javoblar tartibi)
+        beta: Savol qiyinliklari
+        weights: Savol og'irliklari (standart ball uchun og'irlangan yig'indi)
+        theta_mean, theta_std: ABILITY (z-score) normalizatsiyasi
+        weighted_mean, weighted_std: Standart ball (T-score) normalizatsiyasi
+        score_table: ScoreTable - xom ball bo'yicha theta va SE
+        score_range: Standart ball oralig'i (min, max)
+        thresholds: Baho chegaralari {baho: minimal ball} (None - config.settings.GRADE_THRESHOLDS)
+    """
+
+    # Oldingi versiyada saqlangan (pickle) kalibrovkalar uchun standart qiymatlar
+    score_range = DEFAULT_SCORE_RANGE
+    thresholds = None
+
+    def __init__(self, question_columns, beta, weights, theta_mean, theta_std,
+                 weighted_mean, weighted_std, score_table, score_range=DEFAULT_SCORE_RANGE, thresholds=None):
+        self.question_columns = [str(column) for column in question_columns]
+        self.beta = np.asarray(beta, dtype=np.float64)
+        self.weights = np.asarray(weights, dtype=np.float64)
+        self.theta_mean = float(theta_mean)
+        self.theta_std = float(theta_std)
+        self.weighted_mean = float(weighted_mean)
+        self.weighted_std = float(weighted_std)
+        self.score_table = score_table
+        self.score_range = tuple(float(value) for value in score_range)
+        self.thresholds = dict(thresholds) if thresholds is not None else None
+
+    @property
+    def n_items(self):
+        return self.beta.shape[0]
+
+    @property
+    def grade_labels(self):
+        return grade_labels(self.thresholds)
+
+    @property
+    def nbytes(self):
+        """Massivlar va ScoreTable hajmi (bayt) - sessiya va kesh xotira chegaralari uchun"""
+        columns = sum(len(column) for column in self.question_columns) + 8 * len(self.question_columns)
+        return self.beta.nbytes + self.weights.nbytes + self.score_table.nbytes + columns
+
+    def standard_scores(self, weighted):
+        """Og'irlangan ballardan standart ball (T-score)"""
+        return to_standard_scores(weighted, self.weighted_mean, self.weighted_std, self.score_range)
+
+    def grade(self, standard_scores):
+        return grade_scores(standard_scores, self.thresholds)
+
+    def regraded(self, thresholds=None, score_range=None):
+        """
+        Yangi baho chegaralari va/yoki ball oralig'i bilan kalibrovka (model qayta baholanmaydi).
+        None berilgan parametr o'zgarmaydi.
+
+        Raises:
+            ValueError: Chegaralar takrorlansa yoki ball oralig'i noto'g'ri bo'lsa
+        """
+        score_range = self.score_range if score_range is None else check_score_range(score_range)
+        thresholds = self.thresholds if thresholds is None else {
+            str(grade): float(cutoff) for grade, cutoff in dict(thresholds).items()
+        }
+        # Chegaralar jadvalini oldindan tekshirish (takroriy chegaralar - ValueError)
+        grade_labels(thresholds)
+        score_table = self.score_table.regraded(self.weighted_mean, self.weighted_std, score_range, thresholds)
+        return Calibration(self.question_columns, self.beta, self.weights, self.theta_mean, self.theta_std,
+                           self.weighted_mean, self.weighted_std, score_table, score_range, thresholds)
+
+    def to_dict(self):
+        """JSON uchun (saqlash yoki boshqa jarayonga uzatish)"""
+        return {
+            'question_columns': self.question_columns,
+            'beta': self.beta.tolist(),
+            'weights': self.weights.tolist(),
+            'theta_mean': self.theta_mean,
+            'theta_std': self.theta_std,
+            'weighted_mean': self.weighted_mean,
+            'weighted_std': self.weighted_std,
+            'score_table': self.score_table.to_dict(),
+            'score_range': list(self.score_range),
+            'thresholds': self.thresholds,
+        }
+
+    @classmethod
+    def from_dict(cls, data):
+        return cls(data['question_columns'], data['beta'], data['weights'], data['theta_mean'],
+                   data['theta_std'], data['weighted_mean'], data['weighted_std'],
+                   ScoreTable.from_dict(data['score_table']),
+                   data.get('score_range', DEFAULT_SCORE_RANGE), data.get('thresholds'))
+
+
+def parse_responses(responses, n_items):
+    """
+    Javoblarni (n, n_items) 0/1 massivga keltirish.
+
+    Qabul qilinadi: "0110..." yoki "0 1 1 0" satri, 0/1 ro'yxati, ro'yxatlar ro'yxati
+    yoki NumPy massivi.
+
+    Raises:
+        ValueError: Uzunlik savollar soniga mos kelmasa yoki qiymatlar 0/1 bo'lmasa
+    """
+    if isinstance(responses, str):
+        responses = [responses]
+    if len(responses) and isinstance(responses[0], str):
+        # Har bir satr - bitta talaba javoblari (bo'shliq/vergul ixtiyoriy)
+        rows = [re.sub(r'[\s,;]', '', row) for row in responses]
+        if any(set(row) - {'0', '1'} for row in rows):
+            raise ValueError("Javoblar faqat 0 va 1 dan iborat bo'lishi kerak")
+        responses = [[int(ch) for ch in row] for row in rows]
+
+    try:
+        data = np.asarray(responses, dtype=np.float64)
+    except (TypeError, ValueError):
+        raise ValueError("Javoblar faqat 0 va 1 dan iborat bo'lishi kerak")
+    if data.ndim == 1:
+        data = data[np.newaxis, :]
+    if data.ndim != 2 or data.shape[1] != n_items:
+        raise ValueError(f"Javoblar soni {n_items} ta bo'lishi kerak")
+    if not np.isin(data, (0, 1)).all():
+        raise ValueError("Javoblar faqat 0 va 1 dan iborat bo'lishi kerak")
+    return data.astype(np.int8)
+
+
+def score_responses(calibration, responses):
+    """
+    Javoblar varaqlarini saqlangan kalibrovka bo'yicha baholash.
+
+    Parameters:
+    - calibration: Calibration
+    - responses: Bitta javoblar vektori yoki kichik partiya (parse_responses formatlari)
+
+    Returns:
+    - dict: raw_score, theta, se, ability, standard_score, grade massivlari (har bir talaba uchun)
+    """
+    data = parse_responses(responses, calibration.n_items)
+    raw_scores = data.sum(axis=1, dtype=np.int64)
+
+    # Theta va SE faqat xom ballga bog'liq - jadvaldan olinadi
+    table = calibration.score_table
+    theta = table.theta[raw_scores]
+
+    # Standart ball process_exam_data dagidek og'irlangan yig'indidan
+    t_scores = calibration.standard_scores(data @ calibration.weights)
+    return {
+        'raw_score': raw_scores,
+        'theta': theta,
+        'se': table.se[raw_scores],
+        'ability': np.round((theta - calibration.theta_mean) / calibration.theta_std, 2),
+        'standard_score': np.round(t_scores, 2),
+        'grade': calibration.grade(t_scores),
+    }
@@ -0,0 +1,120 @@
+"""
+Baholash kernel'i: standart ballardan UZBMB baholariga.
+
+Chegaralar jadvali ({baho: minimal ball}) o'sish tartibida saralanadi va butun massiv
+bitta np.searchsorted (binar qidiruv) bilan baholanadi - qatorlar soniga qarab Python
+sikli yo'q. Tahlil (process_exam_data), ball jadvali, kalibrovka bo'yicha baholash
+va botning /ball oqimi shu funksiyadan foydalanadi.
+"""
+import sys
+from functools import lru_cache
+from pathlib import Path
+
+import numpy as np
+
+# config paketi loyiha ildizida
+project_root = Path(__file__).parent.parent.parent
+if str(project_root) not in sys.path:
+    sys.path.append(str(project_root))
+
+from config.settings import GRADE_THRESHOLDS
+
+# Standart ball (T-score) chegaralari
+DEFAULT_SCORE_RANGE = (10, 90.1)
+
+
+@lru_cache(maxsize=16)
+def _threshold_table(items):
+    """(baho, chegara) juftliklaridan o'suvchi chegaralar va mos baholar massivlari"""
+    ordered = sorted(items, key=lambda item: item[1])
+    cutoffs = np.array([float(cutoff) for _, cutoff in ordered], dtype=np.float64)
+    if np.unique(cutoffs).size != cutoffs.size:
+        raise ValueError("Baho chegaralari takrorlanmasligi kerak")
+    labels = np.array([str(grade) for grade, _ in ordered])
+    return cutoffs, labels
+
+
+def threshold_table(thresholds=None):
+    """
+    Chegaralar jadvali (o'sish tartibida).
+
+    Returns:
+    - cutoffs: Minimal ballar, masalan [0, 46, 50, 55, 60, 65, 70]
+    - labels: Mos baholar, masalan ['NC', 'C', 'C+', 'B', 'B+', 'A', 'A+']
+    """
+    thresholds = GRADE_THRESHOLDS if thresholds is None else thresholds
+    return _threshold_table(tuple(thresholds.items()))
+
+
+def grade_labels(thresholds=None):
+    """Baholar yuqoridan pastga (tartiblash va baholar soni uchun), masalan ['A+', ..., 'NC']"""
+    return [str(label) for label in threshold_table(thresholds)[1][::-1]]
+
+
+def top_grade_labels(grades):
+    """
+    Eng yuqori baholar (xulosadagi "top"): yuqoridan ko'pi bilan ikkitasi, lekin eng past
+    (yiqilgan) baho hech qachon kirmaydi - masalan ['A+', 'A'], {'P', 'F'} uchun ['P'].
+    grades - baholar yoki grade_counts, yuqoridan pastga tartibda.
+    """
+    labels = [str(label) for label in grades]
+    return labels[:min(2, len(labels) - 1)] if labels else []
+
+
+def grade_summary(grade_counts):
+    """
+    Baholar soni bo'yicha xulosa. grade_counts yuqoridan pastga tartibda bo'lishi kerak
+    (process_exam_data / grade_labels tartibi) - maxsus chegaralarda ham to'g'ri ishlaydi.
+
+    Returns:
+    - top: Eng yuqori baholar soni (top_grade_labels, standart chegaralarda A+ va A)
+    - passing: O'tganlar - eng past bahodan boshqa barcha baholar
+    - failing: Eng past baho soni (standart chegaralarda NC)
+    """
+    labels = list(grade_counts)
+    total = sum(int(count) for count in grade_counts.values())
+    failing = int(grade_counts[labels[-1]]) if labels else 0
+    top = sum(int(grade_counts[label]) for label in labels[:len(top_grade_labels(labels))])
+    return top, total - failing, failing
+
+
+def check_score_range(score_range):
+    """(min, max) juftligini tekshirish"""
+    try:
+        lower, upper = (float(value) for value in score_range)
+    except (TypeError, ValueError):
+        raise ValueError("Ball oralig'i ikki sondan iborat bo'lishi kerak: [min, max]")
+    if not lower < upper:
+        raise ValueError("Ball oralig'ida min < max bo'lishi kerak")
+    return lower, upper
+
+
+def to_standard_scores(weighted, weighted_mean, weighted_std, score_range=DEFAULT_SCORE_RANGE):
+    """Og'irlangan ballardan T-score: 50 + 10 * z, score_range oralig'ida chegaralangan"""
+    z_scores = (np.asarray(weighted, dtype=np.float64) - weighted_mean) / weighted_std
+    t_scores = 50.0 + 10.0 * z_scores
+    return np.clip(t_scores, *score_range)
+
+
+def grade_scores(scores, thresholds=None, decimals=None):
+    """
+    Standart ballarni bahoga o'tkazish: ball >= chegara bo'lgan eng yuqori baho.
+
+    Parameters:
+    - scores: Ball yoki ballar massivi
+    - thresholds: {baho: minimal ball} (default: config.settings.GRADE_THRESHOLDS)
+    - decimals: Berilsa ballar avval shu xonagacha yaxlitlanadi
+
+    Returns:
+    - grades: Baholar massivi (skalyar uchun satr). Eng kichik chegaradan past va
+      NaN ballar eng past bahoni oladi.
+    """
+    cutoffs, labels = threshold_table(thresholds)
+    values = np.asarray(scores, dtype=np.float64)
+    if decimals is not None:
+        values = np.round(values, decimals)
+
+    index = np.searchsorted(cutoffs, values, side='right') - 1
+    index = np.where(np.isnan(values), 0, np.maximum(index, 0))
+    grades = labels[index]
+    return str(grades) if grades.ndim == 0 else grades
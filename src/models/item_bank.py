@@ -0,0 +1,158 @@
+"""
+Savollar banki (item bank) - kalibrlangan savol qiyinliklarini saqlash.
+
+Bir xil test qayta-qayta yuklanganda (yangi sinflar natijalari bilan) beta har safar
+noldan hisoblanmasligi uchun kalibrovka natijalari SQLite bazasida saqlanadi.
+Kalit - savol ustunlari nomlaridan olingan fingerprint.
+
+Rejimlar:
+- 'warm': bankdagi beta boshlang'ich qiymat sifatida ishlatiladi, natija bankka qo'shiladi
+- 'anchor': bankdagi beta qat'iy, faqat theta hisoblanadi (ballar partiyalar bo'yicha taqqoslanadi)
+"""
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+from datetime import datetime
+
+import numpy as np
+
+BANK_MODES = ('off', 'warm', 'anchor')
+
+
+def exam_fingerprint(question_columns, exam_key=None):
+    """
+    Savol ustunlari ro'yxatidan barqaror fingerprint (sha1).
+    exam_key - bir xil ustun nomli turli testlarni ajratish uchun qo'shimcha kalit.
+    """
+    payload = json.dumps([str(col) for col in question_columns], ensure_ascii=False)
+    if exam_key:
+        payload = f"{exam_key}\n{payload}"
+    return hashlib.sha1(payload.encode('utf-8')).hexdigest()
+
+
+class ItemBank:
+    def __init__(self, db_file=None):
+        if db_file is None:
+            data_dir = os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))), '.data')
+            if not os.path.exists(data_dir):
+                os.makedirs(data_dir)
+            db_file = os.path.join(data_dir, 'item_bank.db')
+
+        self.db_file = db_file
+        # Thread-local storage for connections
+        self.local = threading.local()
+        self.create_tables()
+
+    def connect(self):
+        """Joriy thread uchun baza ulanishi"""
+        if not hasattr(self.local, 'conn') or self.local.conn is None:
+            # Boshqa jarayon yozayotgan bo'lsa qulf bo'shashini kutish
+            self.local.conn = sqlite3.connect(self.db_file, timeout=30)
+            self.local.conn.row_factory = sqlite3.Row
+        return self.local.conn
+
+    def close(self):
+        """Joriy thread ulanishini yopish"""
+        if hasattr(self.local, 'conn') and self.local.conn:
+            self.local.conn.close()
+            self.local.conn = None
+
+    def create_tables(self):
+        conn = self.connect()
+        conn.execute('''
+        CREATE TABLE IF NOT EXISTS item_calibrations (
+            fingerprint TEXT PRIMARY KEY,
+            question_columns TEXT,
+            beta TEXT,
+            precision TEXT,
+            n_students INTEGER DEFAULT 0,
+            n_updates INTEGER DEFAULT 0,
+            updated_at TEXT
+        )
+        ''')
+        conn.commit()
+        self.close()
+
+    def get(self, fingerprint):
+        """
+        Bankdagi kalibrovka yoki None.
+
+        Returns:
+            dict: beta, precision (np.ndarray), question_columns, n_students, n_updates
+        """
+        conn = self.connect()
+        row = conn.execute(
+            "SELECT * FROM item_calibrations WHERE fingerprint = ?", (fingerprint,)
+        ).fetchone()
+        if row is None:
+            return None
+        return {
+            'beta': np.array(json.loads(row['beta']), dtype=np.float64),
+            'precision': np.array(json.loads(row['precision']), dtype=np.float64),
+            'question_columns': json.loads(row['question_columns']),
+            'n_students': row['n_students'],
+            'n_updates': row['n_updates'],
+        }
+
+    def update(self, fingerprint, question_columns, beta, precision, n_students):
+        """
+        Yangi kalibrovkani bankka qo'shish.
+
+        Mavjud yozuv bo'lsa, yangi beta avval bank shkalasiga keltiriladi (aniqlik bo'yicha
+        og'irlangan o'rtacha siljish), keyin aniqlik bo'yicha og'irlangan o'rtacha olinadi.
+        Aniqliklar (Fisher informatsiyasi) qo'shiladi.
+
+        O'qish va yozish bitta BEGIN IMMEDIATE tranzaksiyasida: yangilanishlar alohida
+        jarayonlarda (worker pul, batch) bajariladi, shuning uchun bir xil testning ikki
+        yuklanishi bir-birining natijasini yo'qotmasligi uchun qulf bazaning o'zida.
+        """
+        beta = np.asarray(beta, dtype=np.float64)
+        precision = np.maximum(np.asarray(precision, dtype=np.float64), 1e-6)
+
+        conn = self.connect()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            existing = self.get(fingerprint)
+            if existing is not None and existing['beta'].shape == beta.shape:
+                old_beta, old_precision = existing['beta'], existing['precision']
+                # Mean/mean linking: har bir partiya theta bo'yicha markazlashtirilgan
+                link_weights = old_precision * precision / (old_precision + precision)
+                shift = np.average(old_beta - beta, weights=link_weights)
+                beta = beta + shift
+
+                total_precision = old_precision + precision
+                beta = (old_precision * old_beta + precision * beta) / total_precision
+                precision = total_precision
+                n_students = existing['n_students'] + n_students
+                n_updates = existing['n_updates'] + 1
+            else:
+                n_updates = 1
+
+            conn.execute(
+                "INSERT OR REPLACE INTO item_calibrations "
+                "(fingerprint, question_columns, beta, precision, n_students, n_updates, updated_at) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (
+                    fingerprint,
+                    json.dumps([str(col) for col in question_columns], ensure_ascii=False),
+                    json.dumps(beta.tolist()),
+                    json.dumps(precision.tolist()),
+                    int(n_students),
+                    n_updates,
+                    datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+                )
+            )
+        except BaseException:
+            conn.rollback()
+            raise
+        conn.commit()
+
+        return beta, precision
+
+    def delete(self, fingerprint):
+        """Kalibrovkani bankdan o'chirish"""
+        conn = self.connect()
+        conn.execute("DELETE FROM item_calibrations WHERE fingerprint = ?", (fingerprint,))
+        conn.commit()
@@ -15,11 +15,20 @@ REG_LAMBDA = 0.05  # increase to shrink more, decrease to shrink less
 # Rasch model is always 1PL - no need for environment variable
 IRT_MODEL = '1PL'
 
+# Baholash usullari: 'jmle' - regulyarizatsiyalangan joint MLE,
+# 'pairwise' - savol juftliklari bo'yicha conditional ML (faqat items x items matritsa)
+ESTIMATORS = ('jmle', 'pairwise')
+
+# Pairwise baholashda nol juftliklarni barqarorlashtirish uchun psevdo-hisob
+PAIRWISE_PRIOR = 0.5
+
 # Server quvvati optimizatsiyasi - adaptive CPU ishlatish
 NUM_CORES = os.cpu_count() or 6
 
 # CPU load function moved to utils.performance
 from utils.performance import get_cpu_load
+from models.response_matrix import row_sums, column_sums, iter_row_blocks
+from models.grading import grade_scores
 
 # Adaptive worker count based on current load
 current_load = get_cpu_load()
@@ -28,7 +37,7 @@ if current_load > NUM_CORES * 1.2:  # Load juda yuqori
 elif current_load > NUM_CORES * 0.8:
     MAX_WORKERS = max(3, int(NUM_CORES * 0.6))  # 60% ishlatish
 else:
-    MAX_WORKERS = min(int(NUM_CORES * 0.8), 4)  # 80% ishlatish
+    MAX_WORKERS = max(1, min(int(NUM_CORES * 0.8), 4))  # 80% ishlatish
 
 # Numpy/BLAS sozlamalari
 os.environ['OMP_NUM_THREADS'] = str(MAX_WORKERS)
@@ -37,76 +46,246 @@ os.environ['OPENBLAS_NUM_THREADS'] = str(MAX_WORKERS)
 os.environ['VECLIB_MAXIMUM_THREADS'] = str(MAX_WORKERS)
 os.environ['NUMEXPR_NUM_THREADS'] = str(MAX_WORKERS)
 
-def rasch_model(data, max_students=None):
+def _initial_logits(scores, n_total):
+    """
+    Xom ballardan boshlang'ich logit baholar (vektorlashtirilgan).
+    
+    Parameters:
+    - scores: Talaba yoki savol bo'yicha to'g'ri javoblar soni
+    - n_total: Maksimal mumkin bo'lgan ball
+    
+    Returns:
+    - seed: log(p / (1 - p)), chekka ballar uchun -3.0 / 3.0
+    """
+    scores = np.asarray(scores, dtype=np.float64)
+    p = np.clip((scores + 0.5) / (n_total + 1), 1e-6, 1 - 1e-6)
+    seed = np.log(p / (1 - p))
+    seed[scores == 0] = -3.0
+    seed[scores == n_total] = 3.0
+    return seed
+
+def _masked_newton(scores, params, other, sign, lower, upper, other_counts=None, max_iter=100, tol=1e-8):
+    """
+    Barcha parametrlarni bir vaqtda Newton-Raphson bilan yangilash.
+    
+    Har bir qator (talaba) yoki ustun (savol) uchun alohida Python sikli o'rniga
+    faol parametrlar to'plami bitta massiv operatsiyasida yangilanadi. Konvergensiyaga
+    yetgan parametrlar maskadan chiqariladi va keyingi iteratsiyalarda hisoblanmaydi.
+    
+    Parameters:
+    - scores: Yetarli statistika (talaba yoki savol bo'yicha to'g'ri javoblar soni)
+    - params: Boshlang'ich qiymatlar (joyida yangilanadi)
+    - other: Qarama-qarshi tomon parametrlari (theta uchun beta, beta uchun theta)
+    - sign: +1 theta uchun (theta - beta), -1 beta uchun (theta - beta = -(beta - theta))
+    - lower, upper: Chegaralash oralig'i
+    - other_counts: other ning noyob qiymatlari uchun og'irliklar (takrorlanishlar soni)
+    
+    Returns:
+    - params: Baholangan parametrlar (float64)
+    """
+    scores = np.asarray(scores, dtype=np.float64)
+    other = np.asarray(other, dtype=np.float64)
+    active = np.arange(params.shape[0])
+    
+    for iteration in range(max_iter):
+        if active.size == 0:
+            break
+        
+        logits = params[active, np.newaxis] - other[np.newaxis, :]
+        if sign < 0:
+            np.negative(logits, out=logits)
+        np.clip(logits, -15, 15, out=logits)
+        p = expit(logits)
+        
+        if other_counts is None:
+            gradient = scores[active] - np.sum(p, axis=1)
+            p *= (1 - p)
+            hessian = np.sum(p, axis=1)
+        else:
+            gradient = scores[active] - p @ other_counts
+            p *= (1 - p)
+            hessian = p @ other_counts
+        
+        # Raqamli barqarorlik: hessian juda kichik bo'lsa yangilanish yo'q
+        stable = hessian > 1e-10
+        update = np.zeros_like(gradient)
+        update[stable] = sign * gradient[stable] / hessian[stable]
+        params[active] = np.clip(params[active] + update, lower, upper)
+        
+        # Konvergensiyaga yetganlarni maskadan chiqarish
+        active = active[stable & (np.abs(update) >= tol)]
+    
+    return params
+
+def _score_groups(raw_scores):
+    """
+    Talabalarni xom ball bo'yicha guruhlash.
+    
+    Rasch modelida bir xil savollar to'plamida bir xil xom ball to'plagan talabalar
+    bir xil theta ga ega bo'ladi (xom ball - yetarli statistika). Shuning uchun
+    baholashni ko'pi bilan n_items + 1 ta guruh ustida olib borish mumkin.
+    
+    Returns:
+    - groups: Noyob xom ballar (float64)
+    - inverse: Har bir talabaning guruh indeksi
+    - counts: Har bir guruhdagi talabalar soni (float64)
+    """
+    groups, inverse, counts = np.unique(raw_scores, return_inverse=True, return_counts=True)
+    return groups.astype(np.float64), inverse.ravel(), counts.astype(np.float64)
+
+def _block_rows_for_budget(max_memory_mb, n_items, n_buffers=2):
+    """Xotira byudjetiga (MB) sig'adigan float64 blok qatorlari soni"""
+    budget_bytes = max_memory_mb * 1024 * 1024
+    return max(1, int(budget_bytes // (n_buffers * max(n_items, 1) * 8)))
+
+def _joint_sweep(theta, beta, counts, block_rows, workspace):
+    """
+    Joint MLE ning bitta o'tishi: kutilgan ballar va Fisher informatsiyasini
+    qator bloklari bo'yicha oldindan ajratilgan buferlarda hisoblash.
+    
+    Natijalar workspace['exp_theta'], ['hess_theta'], ['exp_beta'], ['hess_beta'] ga yoziladi.
+    """
+    p_buffer = workspace['p']
+    info_buffer = workspace['info']
+    column_buffer = workspace['column']
+    exp_theta = workspace['exp_theta']
+    hess_theta = workspace['hess_theta']
+    exp_beta = workspace['exp_beta']
+    hess_beta = workspace['hess_beta']
+    
+    exp_beta.fill(0.0)
+    hess_beta.fill(0.0)
+    
+    n_rows = theta.shape[0]
+    for start in range(0, n_rows, block_rows):
+        stop = min(start + block_rows, n_rows)
+        p = p_buffer[:stop - start]
+        info = info_buffer[:stop - start]
+        
+        # Ehtimolliklar: p = sigmoid(clip(theta - beta))
+        np.subtract(theta[start:stop, np.newaxis], beta[np.newaxis, :], out=p)
+        np.clip(p, -15, 15, out=p)
+        expit(p, out=p)
+        
+        # Fisher informatsiyasi: p * (1 - p)
+        np.subtract(1.0, p, out=info)
+        info *= p
+        
+        np.sum(p, axis=1, out=exp_theta[start:stop])
+        np.sum(info, axis=1, out=hess_theta[start:stop])
+        
+        if counts is None:
+            np.sum(p, axis=0, out=column_buffer)
+            exp_beta += column_buffer
+            np.sum(info, axis=0, out=column_buffer)
+            hess_beta += column_buffer
+        else:
+            np.dot(counts[start:stop], p, out=column_buffer)
+            exp_beta += column_buffer
+            np.dot(counts[start:stop], info, out=column_buffer)
+            hess_beta += column_buffer
+
+def rasch_model(data, max_students=None, score_groups=False, estimator='jmle', max_memory_mb=None,
+                init_beta=None, anchor_beta=None):
     """
     Rasch model (1PL IRT): p_ij = sigmoid(theta_i - beta_j)
     MLE orqali theta (qobiliyat) va beta (qiyinlik) ni baholaydi.
     
     Parameters:
-    - data: Numpy array (qatorlar: talabalar, ustunlar: savollar), 0/1
+    - data: Numpy array yoki PackedResponses (qatorlar: talabalar, ustunlar: savollar), 0/1
     - max_students: Katta ma'lumotlar uchun parallel qayta ishlash cheklovi
+    - score_groups: True bo'lsa talabalar xom ball bo'yicha guruhlanadi va iteratsiyalar
+                    guruhlar soniga (<= n_items + 1) bog'liq bo'ladi, talabalar soniga emas.
+                    Natija to'liq rejim bilan bir xil.
+    - estimator: 'jmle' (standart) yoki 'pairwise' (savol juftliklari bo'yicha CML)
+    - max_memory_mb: Iteratsiya buferlari uchun xotira byudjeti (MB). Berilsa, matritsa
+                     qator bloklari bo'yicha qayta ishlatiladigan buferlarda hisoblanadi va
+                     eng yuqori xotira talabalar sonidan qat'i nazar o'zgarmaydi.
+    - init_beta: Oldingi kalibrovkadan beta (warm start). Faqat 'jmle' uchun ishlatiladi.
+    - anchor_beta: Qat'iy (anchor) beta. Berilsa savol qiyinliklari qayta baholanmaydi,
+                   faqat theta hisoblanadi va markazlashtirilmaydi - ballar avvalgi
+                   partiyalar bilan bir shkalada qoladi.
                   
     Returns:
     - theta: Talabalar qobiliyati (float32)
     - beta: Savollar qiyinligi (float32)
     """
+    if estimator not in ESTIMATORS:
+        raise ValueError(f"Noma'lum estimator: {estimator}. Mumkin: {', '.join(ESTIMATORS)}")
+    
     n_students, n_items = data.shape
     
-    # Katta ma'lumotlar uchun parallel processing
-    if max_students and n_students > max_students:
+    if anchor_beta is not None:
+        anchor_beta = np.asarray(anchor_beta, dtype=np.float64)
+        if anchor_beta.shape != (n_items,):
+            raise ValueError(f"anchor_beta uzunligi {anchor_beta.shape} savollar soniga ({n_items}) mos emas")
+    elif estimator == 'pairwise':
+        return _pairwise_rasch(data, max_memory_mb=max_memory_mb)
+    
+    # Guruhlash rejimida chunking kerak emas - hisoblash hajmi test uzunligiga bog'liq
+    if max_students and n_students > max_students and not score_groups and anchor_beta is None:
         return _process_large_dataset(data, max_students)
     
-    # Boshlang'ich baholar (logit prop)
-    student_scores = np.sum(data, axis=1, dtype=np.float64)
-    item_scores = np.sum(data, axis=0, dtype=np.float64)
-    
-    # Theta (talaba qobiliyatlari) - logit transformatsiya
-    theta = np.zeros(n_students, dtype=np.float64)
-    for i in range(n_students):
-        if student_scores[i] == 0:
-            theta[i] = -3.0  # Juda past qobiliyat
-        elif student_scores[i] == n_items:
-            theta[i] = 3.0   # Juda yuqori qobiliyat
-        else:
-            p = (student_scores[i] + 0.5) / (n_items + 1)
-            p = np.clip(p, 1e-6, 1 - 1e-6)
-            theta[i] = np.log(p / (1 - p))
-    
-    # Beta (savol qiyinliklari) - logit transformatsiya
-    beta = np.zeros(n_items, dtype=np.float64)
-    for j in range(n_items):
-        if item_scores[j] == 0:
-            beta[j] = 3.0    # Juda qiyin savol
-        elif item_scores[j] == n_students:
-            beta[j] = -3.0   # Juda oson savol
-        else:
-            p = (item_scores[j] + 0.5) / (n_students + 1)
-            p = np.clip(p, 1e-6, 1 - 1e-6)
-            beta[j] = -np.log(p / (1 - p))
+    # Boshlang'ich baholar (logit prop) - faqat yetarli statistikalar kerak
+    student_scores = row_sums(data)
+    item_scores = column_sums(data)
+    
+    if score_groups:
+        student_scores, inverse, counts = _score_groups(student_scores)
+    else:
+        inverse, counts = None, None
+    
+    # Theta (talaba qobiliyatlari) va beta (savol qiyinliklari) - logit transformatsiya
+    theta = _initial_logits(student_scores, n_items)
+    if anchor_beta is not None:
+        beta = anchor_beta.copy()
+    elif init_beta is not None:
+        beta = np.array(init_beta, dtype=np.float64)
+        if beta.shape != (n_items,):
+            raise ValueError(f"init_beta uzunligi {beta.shape} savollar soniga ({n_items}) mos emas")
+    else:
+        beta = -_initial_logits(item_scores, n_students)
     
     # MLE iteratsiyalari (Rasch model uchun)
     max_iter = 100
     tol = 1e-6
     
+    # Ish buferlari bir marta ajratiladi va barcha iteratsiyalarda qayta ishlatiladi
+    n_rows = theta.shape[0]
+    if max_memory_mb:
+        block_rows = min(n_rows, _block_rows_for_budget(max_memory_mb, n_items))
+    else:
+        block_rows = n_rows
+    block_rows = max(block_rows, 1)
+    workspace = {
+        'p': np.empty((block_rows, n_items), dtype=np.float64),
+        'info': np.empty((block_rows, n_items), dtype=np.float64),
+        'column': np.empty(n_items, dtype=np.float64),
+        'exp_theta': np.empty(n_rows, dtype=np.float64),
+        'hess_theta': np.empty(n_rows, dtype=np.float64),
+        'exp_beta': np.empty(n_items, dtype=np.float64),
+        'hess_beta': np.empty(n_items, dtype=np.float64),
+    }
+    
     for iteration in range(max_iter):
-        old_theta = theta.copy()
-        old_beta = beta.copy()
-        
-        # Ehtimolliklar hisoblash
-        logits = theta[:, np.newaxis] - beta[np.newaxis, :]
-        np.clip(logits, -15, 15, out=logits)
-        p = expit(logits)
-        residuals = data - p
+        # Kutilgan ballar va informatsiya (bloklar bo'yicha)
+        _joint_sweep(theta, beta, counts, block_rows, workspace)
         
         # Theta yangilanishi (talaba qobiliyatlari)
-        grad_theta = np.sum(residuals, axis=1) - REG_LAMBDA * theta
-        hess_theta = np.sum(p * (1 - p), axis=1) + REG_LAMBDA
+        grad_theta = (student_scores - workspace['exp_theta']) - REG_LAMBDA * theta
+        hess_theta = workspace['hess_theta'] + REG_LAMBDA
         update_theta = np.where(hess_theta > 1e-10, grad_theta / hess_theta, 0.0)
         theta += update_theta
         
+        # Anchor rejimida beta o'zgarmaydi - faqat theta iteratsiyalari
+        if anchor_beta is not None:
+            if np.max(np.abs(update_theta)) < tol:
+                break
+            continue
+        
         # Beta yangilanishi (savol qiyinliklari)
-        grad_beta = -np.sum(residuals, axis=0) - REG_LAMBDA * beta
-        hess_beta = np.sum(p * (1 - p), axis=0) + REG_LAMBDA
+        grad_beta = -(item_scores - workspace['exp_beta']) - REG_LAMBDA * beta
+        hess_beta = workspace['hess_beta'] + REG_LAMBDA
         update_beta = np.where(hess_beta > 1e-10, grad_beta / hess_beta, 0.0)
         beta += update_beta
         
@@ -114,6 +293,98 @@ def rasch_model(data, max_students=None):
         if max(np.max(np.abs(update_theta)), np.max(np.abs(update_beta))) < tol:
             break
     
+    # Identifikatsiya: theta ni markazlash (mean = 0). Anchor rejimida shkala
+    # bank beta'lari bilan aniqlangan, shuning uchun siljitilmaydi
+    if anchor_beta is None:
+        theta = theta - np.average(theta, weights=counts)
+    
+    # Guruh qiymatlarini talabalarga qaytarish
+    if inverse is not None:
+        theta = theta[inverse]
+    
+    return theta.astype(np.float32), beta.astype(np.float32)
+
+def item_information(theta, beta):
+    """
+    Har bir savol uchun Fisher informatsiyasi: sum_i p_ij * (1 - p_ij).
+    Beta bahosining aniqligi (precision) sifatida ishlatiladi, SE = 1 / sqrt(info).
+    """
+    theta_values, _, theta_counts = _score_groups(np.asarray(theta, dtype=np.float64))
+    p = expit(np.clip(theta_values[:, np.newaxis] - np.asarray(beta, dtype=np.float64)[np.newaxis, :], -15, 15))
+    return theta_counts @ (p * (1 - p))
+
+def item_pair_counts(data, chunk_size=10000):
+    """
+    Savol juftliklari bo'yicha hisoblar matritsasi.
+    
+    n[i, j] - i-savolga to'g'ri, j-savolga noto'g'ri javob bergan talabalar soni.
+    Bitta matritsa ko'paytmasi (X^T X) orqali hisoblanadi: n[i, j] = s_i - (X^T X)[i, j].
+    Natija additiv, shuning uchun yangi talabalar qismlari uchun hisoblangan matritsalarni
+    oddiy qo'shish orqali inkremental yig'ish mumkin.
+    
+    Parameters:
+    - data: Numpy array yoki PackedResponses (talabalar x savollar), 0/1
+    - chunk_size: Bir vaqtda float ga o'tkaziladigan qatorlar soni
+    
+    Returns:
+    - counts: (n_items x n_items) float64 matritsa, diagonal = 0
+    """
+    n_students, n_items = data.shape
+    co_occurrence = np.zeros((n_items, n_items), dtype=np.float64)
+    item_scores = np.zeros(n_items, dtype=np.float64)
+    
+    for _, _, block in iter_row_blocks(data, chunk_size):
+        chunk = block.astype(np.float64)
+        co_occurrence += chunk.T @ chunk
+        item_scores += chunk.sum(axis=0)
+    
+    counts = item_scores[:, np.newaxis] - co_occurrence
+    np.fill_diagonal(counts, 0.0)
+    return counts
+
+def pairwise_item_difficulties(pair_counts, max_iter=500, tol=1e-8):
+    """
+    Conditional ML (pairwise) usulida savol qiyinliklarini baholash.
+    
+    Faqat bitta savolga to'g'ri javob berilgan juftliklar sharti ostida
+    P(i to'g'ri, j noto'g'ri) = sigmoid(beta_j - beta_i), bu theta ga bog'liq emas.
+    Bradley-Terry MM iteratsiyalari bilan yechiladi.
+    
+    Parameters:
+    - pair_counts: item_pair_counts() natijasi
+    
+    Returns:
+    - beta: Savol qiyinliklari (o'rtacha = 0), float64
+    """
+    n_items = pair_counts.shape[0]
+    counts = pair_counts + PAIRWISE_PRIOR
+    np.fill_diagonal(counts, 0.0)
+    
+    wins = counts.sum(axis=1)
+    totals = counts + counts.T
+    
+    # easiness = exp(-beta)
+    log_easiness = np.zeros(n_items, dtype=np.float64)
+    for iteration in range(max_iter):
+        easiness = np.exp(log_easiness)
+        denominator = np.sum(totals / (easiness[:, np.newaxis] + easiness[np.newaxis, :]), axis=1)
+        new_log_easiness = np.log(wins) - np.log(denominator)
+        new_log_easiness -= np.mean(new_log_easiness)
+        
+        delta = np.max(np.abs(new_log_easiness - log_easiness))
+        log_easiness = new_log_easiness
+        if delta < tol:
+            break
+    
+    return -log_easiness
+
+def _pairwise_rasch(data, max_memory_mb=None):
+    """Pairwise CML bilan beta, keyin berilgan beta bo'yicha theta"""
+    n_students, n_items = data.shape
+    chunk_size = _block_rows_for_budget(max_memory_mb, n_items, n_buffers=1) if max_memory_mb else 10000
+    beta = pairwise_item_difficulties(item_pair_counts(data, chunk_size=chunk_size))
+    theta = _estimate_theta_given_beta(data, beta)
+    
     # Identifikatsiya: theta ni markazlash (mean = 0)
     theta = theta - np.mean(theta)
     
@@ -175,151 +446,75 @@ def _process_large_dataset(data, max_students=2000):
             chunk_theta = _estimate_theta_given_beta(chunk_data, beta)
             all_theta[start_idx:end_idx] = chunk_theta
     
-    # Refine beta with parallel processing
-    final_beta = _estimate_beta_given_theta_parallel(data, all_theta)
+    # Refine beta (barcha savollar bir vaqtda)
+    final_beta = _estimate_beta_given_theta(data, all_theta)
     
     # Center abilities
     all_theta = all_theta - np.mean(all_theta)
     
     return all_theta, final_beta
 
-def _estimate_beta_given_theta_parallel(data, theta):
-    """To'g'ri MLE usuli bilan parallel beta estimation"""
-    n_students, n_items = data.shape
-    beta = np.zeros(n_items, dtype=np.float64)
-    
-    # Parallel processing for beta calculation
-    def process_item(j):
-        item_responses = data[:, j].astype(np.float64)
-        item_score = np.sum(item_responses)
-        
-        if item_score == 0:
-            beta_j = 3.0
-        elif item_score == n_students:
-            beta_j = -3.0
-        else:
-            prop = (item_score + 0.5) / (n_students + 1)
-            beta_j = -np.log(prop / (1 - prop))
-        
-        # MLE refinement
-        for iteration in range(100):
-            logits = np.clip(theta - beta_j, -15, 15)
-            p = expit(logits)
-            residual = item_responses - p
-            gradient = -np.sum(residual)
-            hessian = np.sum(p * (1 - p))
-            
-            if hessian > 1e-10:
-                update = gradient / hessian
-                beta_j += update
-                beta_j = np.clip(beta_j, -3, 3)
-                if abs(update) < 1e-8:
-                    break
-        
-        return beta_j
-    
-    try:
-        with ThreadPoolExecutor(max_workers=MAX_WORKERS) as executor:
-            beta = list(executor.map(process_item, range(n_items)))
-        beta = np.array(beta, dtype=np.float64)
-    except Exception:
-        # Fallback sequential
-        for j in range(n_items):
-            beta[j] = process_item(j)
-    
-    return beta
-
 def _estimate_theta_given_beta(data, beta):
-    """To'g'ri MLE usuli bilan talaba qobiliyatlarini baholash (beta berilgan)"""
+    """
+    To'g'ri MLE usuli bilan talaba qobiliyatlarini baholash (beta berilgan).
+    Beta ma'lum bo'lganda theta faqat xom ballga bog'liq, shuning uchun Newton
+    iteratsiyalari noyob xom ballar ustida bajariladi va natija talabalarga tarqatiladi.
+    """
     n_students, n_items = data.shape
-    theta = np.zeros(n_students, dtype=np.float64)
-    
-    # Har bir talaba uchun to'g'ri MLE algoritmi
-    for i in range(n_students):
-        student_responses = data[i].astype(np.float64)
-        
-        # Boshlang'ich baholash
-        raw_score = np.sum(student_responses)
-        if raw_score == 0:
-            theta_i = -3.0
-        elif raw_score == n_items:
-            theta_i = 3.0
-        else:
-            # Logit transformatsiya
-            prop = (raw_score + 0.5) / (n_items + 1)
-            theta_i = np.log(prop / (1 - prop))
-        
-        # MLE iteratsiyalari
-        for iteration in range(100):  # Ko'proq iteratsiya aniqroq natija uchun
-            # Ehtimolliklar
-            logits = theta_i - beta
-            logits = np.clip(logits, -15, 15)  # Raqamli barqarorlik
-            p = expit(logits)
-            
-            # Gradient va Hessian
-            residual = student_responses - p
-            gradient = np.sum(residual)
-            hessian = np.sum(p * (1 - p))
-            
-            # Yangilanish
-            if hessian > 1e-10:  # Raqamli barqarorlik
-                update = gradient / hessian
-                theta_i += update
-                theta_i = np.clip(theta_i, -5, 5)  # Chegaralash
-                
-                # Konvergensiya tekshiruvi
-                if abs(update) < 1e-8:
-                    break
-        
-        theta[i] = theta_i
-    
-    return theta
+    raw_scores = row_sums(data)
+    groups, inverse, _ = _score_groups(raw_scores)
+    theta = _initial_logits(groups, n_items)
+    theta = _masked_newton(groups, theta, beta, sign=1, lower=-5, upper=5)
+    return theta[inverse]
 
 def _estimate_beta_given_theta(data, theta):
     """To'g'ri MLE usuli bilan savol qiyinliklarini baholash (theta berilgan)"""
     n_students, n_items = data.shape
-    beta = np.zeros(n_items, dtype=np.float64)
+    item_scores = column_sums(data)
+    beta = -_initial_logits(item_scores, n_students)
+    
+    # Noyob theta qiymatlari bo'yicha og'irlangan yig'indilar: matritsa o'lchami
+    # talabalar soniga emas, theta guruhlari soniga bog'liq
+    theta_values, _, theta_counts = _score_groups(np.asarray(theta, dtype=np.float64))
+    return _masked_newton(item_scores, beta, theta_values, sign=-1, lower=-3, upper=3,
+                          other_counts=theta_counts)
+
+def raw_score_abilities(beta, reg_lambda=REG_LAMBDA, max_iter=100, tol=1e-8):
+    """
+    Har bir mumkin bo'lgan xom ball (0..n_items) uchun theta va standart xato.
     
-    # Har bir savol uchun to'g'ri MLE algoritmi
-    for j in range(n_items):
-        item_responses = data[:, j].astype(np.float64)
-        
-        # Boshlang'ich baholash
-        item_score = np.sum(item_responses)
-        if item_score == 0:
-            beta_j = 3.0  # Juda qiyin
-        elif item_score == n_students:
-            beta_j = -3.0  # Juda oson
-        else:
-            # Logit transformatsiya
-            prop = (item_score + 0.5) / (n_students + 1)
-            beta_j = -np.log(prop / (1 - prop))
-        
-        # MLE iteratsiyalari
-        for iteration in range(100):  # Ko'proq iteratsiya aniqroq natija uchun
-            # Ehtimolliklar
-            logits = theta - beta_j
-            logits = np.clip(logits, -15, 15)  # Raqamli barqarorlik
-            p = expit(logits)
-            
-            # Gradient va Hessian
-            residual = item_responses - p
-            gradient = -np.sum(residual)
-            hessian = np.sum(p * (1 - p))
-            
-            # Yangilanish
-            if hessian > 1e-10:  # Raqamli barqarorlik
-                update = gradient / hessian
-                beta_j += update
-                beta_j = np.clip(beta_j, -3, 3)  # Chegaralash
-                
-                # Konvergensiya tekshiruvi
-                if abs(update) < 1e-8:
-                    break
-        
-        beta[j] = beta_j
+    To'liq javob berilgan testda theta faqat xom ballga bog'liq, shuning uchun
+    n_items + 1 ta tenglama bitta vektorlashtirilgan Newton siklida yechiladi.
+    rasch_model dagi JMLE tenglamasi ishlatiladi (r - sum(p) - lambda * theta = 0),
+    shuning uchun chekka ballar (0 va n_items) uchun ham theta chekli.
+    
+    Parameters:
+    - beta: Savol qiyinliklari
+    - reg_lambda: L2 regulyarizatsiya (rasch_model bilan bir xil)
     
-    return beta
+    Returns:
+    - theta: Xom ball bo'yicha qobiliyat (markazlashtirilmagan, beta shkalasida)
+    - se: Standart xato, 1 / sqrt(sum(p * (1 - p)))
+    """
+    beta = np.asarray(beta, dtype=np.float64)
+    n_items = beta.shape[0]
+    scores = np.arange(n_items + 1, dtype=np.float64)
+    theta = _initial_logits(scores, n_items) if n_items > 0 else np.zeros(1)
+    
+    for iteration in range(max_iter):
+        p = expit(np.clip(theta[:, np.newaxis] - beta[np.newaxis, :], -15, 15))
+        gradient = scores - p.sum(axis=1) - reg_lambda * theta
+        hessian = (p * (1 - p)).sum(axis=1) + reg_lambda
+        # Chekka ballarda katta sakrashlarning oldini olish
+        update = np.clip(gradient / hessian, -2, 2)
+        theta += update
+        if np.max(np.abs(update)) < tol:
+            break
+    
+    p = expit(np.clip(theta[:, np.newaxis] - beta[np.newaxis, :], -15, 15))
+    information = (p * (1 - p)).sum(axis=1)
+    se = 1.0 / np.sqrt(np.maximum(information, 1e-12))
+    return theta, se
 
 def ability_to_standard_score(ability):
     """
@@ -351,7 +546,7 @@ def ability_to_grade(ability, thresholds=None, min_passing_percent=60):
     
     Parameters:
     - ability: Talabaning qobiliyat bahosi (θ)
-    - thresholds: Baho chegaralari (ixtiyoriy)
+    - thresholds: Baho chegaralari {baho: minimal ball} (default: config.settings.GRADE_THRESHOLDS)
     - min_passing_percent: Minimal o'tish foizi
     
     Returns:
@@ -361,31 +556,5 @@ def ability_to_grade(ability, thresholds=None, min_passing_percent=60):
     # UZBMB standartlariga muvofiq T-score hisoblash
     t_score = ability_to_standard_score(ability)
     
-    # UZBMB standartlariga muvofiq baho chegaralari
-    # Bu chegaralar milliy sertifikat imtihonlari uchun optimallashtirilgan
-    
-    # Array'lar uchun vectorized operations
-    if isinstance(t_score, np.ndarray):
-        grades = np.where(t_score >= 70, 'A+',
-                 np.where(t_score >= 65, 'A',
-                 np.where(t_score >= 60, 'B+',
-                 np.where(t_score >= 55, 'B',
-                 np.where(t_score >= 50, 'C+',
-                 np.where(t_score >= 46, 'C', 'NC'))))))
-        return grades
-    else:
-        # Single value uchun
-        if t_score >= 70:
-            return 'A+'  # 1-daraja (Oliy imtiyozli)
-        elif t_score >= 65:
-            return 'A'   # 1-daraja (Oliy)
-        elif t_score >= 60:
-            return 'B+'  # 2-daraja (Yuqori imtiyozli)
-        elif t_score >= 55:
-            return 'B'   # 2-daraja (Yuqori)
-        elif t_score >= 50:
-            return 'C+'  # 3-daraja (O'rta imtiyozli)
-        elif t_score >= 46:
-            return 'C'   # 3-daraja (O'rta)
-        else:
-            return 'NC'  # 4-daraja (Sertifikatsiz)
+    # Chegaralar jadvali bo'yicha binar qidiruv (skalyar va massivlar uchun bir xil)
+    return grade_scores(t_score, thresholds)
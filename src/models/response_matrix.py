@@ -0,0 +1,136 @@
+"""
+Bit-packed javoblar matritsasi.
+
+Har bir javob (0/1) bitta bit sifatida saqlanadi (np.packbits, qator bo'yicha).
+100k x 200 matritsa uchun ~2.5 MB, float64 ko'rinishida esa ~160 MB.
+Hisoblash funksiyalari ma'lumotlarni qator bloklari bo'yicha ochadi, shuning uchun
+to'liq o'lchamdagi vaqtinchalik massivlar hech qachon yaratilmaydi.
+"""
+import numpy as np
+
+# Bir blokda ochiladigan qatorlar soni (blok hajmi = block_rows x n_items bayt)
+DEFAULT_BLOCK_ROWS = 8192
+
+# Har bir bayt qiymati uchun 1 bitlar soni
+_POPCOUNT = np.array([bin(i).count('1') for i in range(256)], dtype=np.uint8)
+
+
+class PackedResponses:
+    """
+    Talabalar x savollar 0/1 matritsasining bit-packed ko'rinishi.
+
+    NumPy massiviga o'xshash minimal interfeys beradi (shape, qator indekslash),
+    shuning uchun rasch_model va boshqa kernel'lar uni to'g'ridan-to'g'ri qabul qiladi.
+    """
+
+    def __init__(self, bits, n_items):
+        self.bits = bits
+        self.n_items = int(n_items)
+        self._row_sums = None
+
+    @classmethod
+    def from_dense(cls, data, block_rows=DEFAULT_BLOCK_ROWS):
+        """Zich 0/1 massivdan (har qanday dtype) bit-packed matritsa yaratish"""
+        data = np.asarray(data)
+        n_students, n_items = data.shape
+        bits = np.empty((n_students, (n_items + 7) // 8), dtype=np.uint8)
+        for start in range(0, n_students, block_rows):
+            stop = min(start + block_rows, n_students)
+            bits[start:stop] = np.packbits(data[start:stop] != 0, axis=1)
+        return cls(bits, n_items)
+
+    @classmethod
+    def from_frame(cls, df, columns, block_rows=DEFAULT_BLOCK_ROWS):
+        """
+        DataFrame ustunlaridan bit-packed matritsa yaratish.
+        Qatorlar bloklab o'qiladi, to'liq int64 nusxa yaratilmaydi.
+        """
+        n_students, n_items = len(df), len(columns)
+        bits = np.empty((n_students, (n_items + 7) // 8), dtype=np.uint8)
+        for start in range(0, n_students, block_rows):
+            stop = min(start + block_rows, n_students)
+            block = df.iloc[start:stop][columns].to_numpy()
+            bits[start:stop] = np.packbits(block != 0, axis=1)
+        return cls(bits, n_items)
+
+    @property
+    def shape(self):
+        return (self.bits.shape[0], self.n_items)
+
+    @property
+    def nbytes(self):
+        return self.bits.nbytes
+
+    def __len__(self):
+        return self.bits.shape[0]
+
+    def __getitem__(self, rows):
+        """Qatorlar (slice yoki indekslar) ni zich int8 ko'rinishda qaytarish"""
+        return self.unpack(rows)
+
+    def unpack(self, rows=slice(None)):
+        """Tanlangan qatorlarni zich uint8 0/1 massivga ochish"""
+        return np.unpackbits(self.bits[rows], axis=1, count=self.n_items)
+
+    def iter_blocks(self, block_rows=DEFAULT_BLOCK_ROWS):
+        """(start, stop, blok) uchliklarini qaytaradi, blok - zich uint8 massiv"""
+        n_students = self.bits.shape[0]
+        for start in range(0, n_students, block_rows):
+            stop = min(start + block_rows, n_students)
+            yield start, stop, self.unpack(slice(start, stop))
+
+    def row_sums(self):
+        """Har bir talabaning xom bali (bitlarni ochmasdan, popcount orqali)"""
+        if self._row_sums is None:
+            self._row_sums = _POPCOUNT[self.bits].sum(axis=1, dtype=np.int64)
+        return self._row_sums
+
+    def column_sums(self, block_rows=DEFAULT_BLOCK_ROWS):
+        """Har bir savolga to'g'ri javob berganlar soni"""
+        totals = np.zeros(self.n_items, dtype=np.int64)
+        for _, _, block in self.iter_blocks(block_rows):
+            totals += block.sum(axis=0, dtype=np.int64)
+        return totals
+
+    def dot(self, weights, block_rows=DEFAULT_BLOCK_ROWS):
+        """Javoblar matritsasini weights vektoriga ko'paytirish (weighted score)"""
+        weights = np.asarray(weights, dtype=np.float64)
+        result = np.empty(self.bits.shape[0], dtype=np.float64)
+        for start, stop, block in self.iter_blocks(block_rows):
+            result[start:stop] = block @ weights
+        return result
+
+    def sum_columns(self, mask, block_rows=DEFAULT_BLOCK_ROWS):
+        """Har bir talaba uchun mask bilan tanlangan savollardagi to'g'ri javoblar soni"""
+        mask = np.asarray(mask, dtype=bool)
+        result = np.zeros(self.bits.shape[0], dtype=np.int64)
+        if not mask.any():
+            return result
+        for start, stop, block in self.iter_blocks(block_rows):
+            result[start:stop] = block[:, mask].sum(axis=1, dtype=np.int64)
+        return result
+
+
+def row_sums(data):
+    """Qator yig'indilari (zich massiv yoki PackedResponses uchun)"""
+    if isinstance(data, PackedResponses):
+        return data.row_sums().astype(np.float64)
+    return np.sum(data, axis=1, dtype=np.float64)
+
+
+def column_sums(data):
+    """Ustun yig'indilari (zich massiv yoki PackedResponses uchun)"""
+    if isinstance(data, PackedResponses):
+        return data.column_sums().astype(np.float64)
+    return np.sum(data, axis=0, dtype=np.float64)
+
+
+def iter_row_blocks(data, block_rows=DEFAULT_BLOCK_ROWS):
+    """Zich massiv yoki PackedResponses ni qator bloklari bo'yicha aylanib chiqish"""
+    if isinstance(data, PackedResponses):
+        yield from data.iter_blocks(block_rows)
+        return
+    n_students = data.shape[0]
+    for start in range(0, n_students, block_rows):
+        stop = min(start + block_rows, n_students)
+        yield start, stop, data[start:stop]
@@ -0,0 +1,155 @@
+"""
+Xom ball -> theta -> standart ball -> baho konvertatsiya jadvali.
+
+To'liq javob berilgan Rasch testida theta faqat xom ballga bog'liq (xom ball - yetarli
+statistika), shuning uchun kalibrovkadan keyin har bir mumkin bo'lgan xom ball
+(0..n_items) uchun bitta qator hisoblanadi. Jadval hisobotlarga chiqariladi va
+kechikkan talabalarni modelni qayta ishga tushirmasdan baholash uchun O(1) lookup
+sifatida ishlatiladi (massivlar xom ball bo'yicha indekslangan).
+
+Standart ball talabalar jadvalidagidek og'irlangan ballardan hisoblanadi: qator uchun
+shu theta da kutilgan og'irlangan ball olinadi. Bir xil xom balli talabalarning
+haqiqiy standart bali qaysi savollarga javob berganiga qarab biroz farq qilishi mumkin.
+"""
+import numpy as np
+import pandas as pd
+from scipy.special import expit
+
+from models.grading import DEFAULT_SCORE_RANGE, grade_scores, to_standard_scores
+from models.rasch_model import raw_score_abilities
+
+# Hisobot ustunlari (Excel/PDF)
+REPORT_COLUMNS = {
+    'raw_score': 'XOM BALL',
+    'theta': 'THETA',
+    'se': 'SE',
+    'ability': 'ABILITY',
+    'standard_score': 'BALL',
+    'grade': 'DARAJA',
+    'students': 'TALABALAR',
+}
+
+
+class ScoreTable:
+    """
+    Xom ball bo'yicha indekslangan konvertatsiya jadvali.
+
+    Barcha massivlar uzunligi n_items + 1: i-element xom ball i ga tegishli.
+    """
+
+    def __init__(self, theta, se, ability, weighted, standard_score, grade, students):
+        self.theta = np.asarray(theta, dtype=np.float64)
+        self.se = np.asarray(se, dtype=np.float64)
+        self.ability = np.asarray(ability, dtype=np.float64)
+        self.weighted = np.asarray(weighted, dtype=np.float64)
+        self.standard_score = np.asarray(standard_score, dtype=np.float64)
+        self.grade = np.asarray(grade, dtype=str)
+        self.students = np.asarray(students, dtype=np.int64)
+
+    @property
+    def n_items(self):
+        return self.theta.shape[0] - 1
+
+    @property
+    def nbytes(self):
+        """Massivlar hajmi (bayt) - sessiya va kesh xotira chegaralari uchun"""
+        return sum(array.nbytes for array in (self.theta, self.se, self.ability, self.weighted,
+                                              self.standard_score, self.grade, self.students))
+
+    @classmethod
+    def build(cls, beta, weights, raw_scores, ability_estimates, theta_mean, theta_std,
+              weighted_mean, weighted_std, score_range=DEFAULT_SCORE_RANGE, thresholds=None):
+        """
+        Kalibrovka natijalaridan jadval yaratish.
+
+        Parameters:
+        - beta: Savol qiyinliklari
+        - weights: Savol og'irliklari (process_exam_data dagi max_beta - beta + eps)
+        - raw_scores, ability_estimates: Talabalar xom ballari va theta baholari
+        - theta_mean, theta_std: ABILITY (z-score) uchun normalizatsiya
+        - weighted_mean, weighted_std: Standart ball (T-score) uchun normalizatsiya
+        - score_range, thresholds: Standart ball oralig'i va baho chegaralari
+        """
+        beta = np.asarray(beta, dtype=np.float64)
+        weights = np.asarray(weights, dtype=np.float64)
+        raw_scores = np.asarray(raw_scores, dtype=np.int64)
+        ability_estimates = np.asarray(ability_estimates, dtype=np.float64)
+
+        model_theta, se = raw_score_abilities(beta)
+        students = np.bincount(raw_scores, minlength=beta.shape[0] + 1)
+
+        # rasch_model theta ni markazlashtiradi - kuzatilgan ballar bo'yicha siljishni
+        # topib, kuzatilmagan ballarni ham shu shkalaga o'tkazamiz
+        observed = np.flatnonzero(students)
+        observed_theta = np.zeros(beta.shape[0] + 1)
+        if observed.size:
+            first = np.unique(raw_scores, return_index=True)[1]
+            observed_theta[observed] = ability_estimates[first]
+            shift = float(np.mean(model_theta[observed] - observed_theta[observed]))
+        else:
+            shift = 0.0
+        theta = model_theta - shift
+        theta[observed] = observed_theta[observed]
+
+        # Shu theta da kutilgan og'irlangan ball (model shkalasida, siljishsiz)
+        p = expit(np.clip((theta + shift)[:, np.newaxis] - beta[np.newaxis, :], -15, 15))
+        weighted = p @ weights
+
+        ability = np.round((theta - theta_mean) / theta_std, 2)
+        standard_score = np.round(to_standard_scores(weighted, weighted_mean, weighted_std, score_range), 2)
+        return cls(theta, se, ability, weighted, standard_score,
+                   grade_scores(standard_score, thresholds), students)
+
+    def regraded(self, weighted_mean, weighted_std, score_range=DEFAULT_SCORE_RANGE, thresholds=None):
+        """Yangi ball oralig'i/chegaralar bilan jadval (theta va og'irlangan ballar o'zgarmaydi)"""
+        standard_score = np.round(to_standard_scores(self.weighted, weighted_mean, weighted_std, score_range), 2)
+        return ScoreTable(self.theta, self.se, self.ability, self.weighted, standard_score,
+                          grade_scores(standard_score, thresholds), self.students)
+
+    def lookup(self, raw_scores):
+        """
+        Xom ballar bo'yicha theta, SE, ability, standart ball va baho (massiv indekslash).
+
+        Raises:
+            ValueError: Xom ball 0..n_items oralig'ida bo'lmasa
+        """
+        raw_scores = np.asarray(raw_scores, dtype=np.int64)
+        if raw_scores.size and (raw_scores.min() < 0 or raw_scores.max() > self.n_items):
+            raise ValueError(f"Xom ball 0..{self.n_items} oralig'ida bo'lishi kerak")
+        return {
+            'raw_score': raw_scores,
+            'theta': self.theta[raw_scores],
+            'se': self.se[raw_scores],
+            'ability': self.ability[raw_scores],
+            'standard_score': self.standard_score[raw_scores],
+            'grade': self.grade[raw_scores],
+        }
+
+    def to_frame(self):
+        """Hisobot uchun jadval (bir qator - bir xom ball)"""
+        return pd.DataFrame({
+            'raw_score': np.arange(self.n_items + 1),
+            'theta': np.round(self.theta, 3),
+            'se': np.round(self.se, 3),
+            'ability': self.ability,
+            'standard_score': self.standard_score,
+            'grade': self.grade,
+            'students': self.students,
+        })
+
+    def to_dict(self):
+        """JSON uchun (ro'yxatlar)"""
+        return {
+            'theta': self.theta.tolist(),
+            'se': self.se.tolist(),
+            'ability': self.ability.tolist(),
+            'weighted': self.weighted.tolist(),
+            'standard_score': self.standard_score.tolist(),
+            'grade': self.grade.tolist(),
+            'students': self.students.tolist(),
+        }
+
+    @classmethod
+    def from_dict(cls, data):
+        return cls(data['theta'], data['se'], data['ability'], data['weighted'],
+                   data['standard_score'], data['grade'], data['students'])
@@ -8,26 +8,319 @@ import pandas as pd
 import numpy as np
 import logging
 from datetime import datetime
+from functools import partial
 from pathlib import Path
 import sys
 
 # Add src directory to Python path
 src_dir = Path(__file__).parent.parent
 sys.path.insert(0, str(src_dir))
+# config paketi loyiha ildizida
+if str(src_dir.parent) not in sys.path:
+    sys.path.append(str(src_dir.parent))
 
-from data_processing.data_processor import process_exam_data, prepare_excel_for_download, prepare_pdf_for_download
+from config.settings import (
+    INGESTION_READER, ITEM_BANK_MODE, ITEM_BANK_PATH, RESULT_CACHE_MAX_MB, SESSION_TTL_SECONDS,
+    SESSION_MAX_MEMORY_MB, EXCEL_EXPORT_MODE
+)
+from data_processing.ingestion import ExamTable, list_sheets, read_exam_table, table_from_frame
+from data_processing.data_processor import (
+    process_exam_data, prepare_excel_for_download, prepare_excel_with_charts, prepare_pdf_for_download,
+    prepare_workbook_excel, merge_pdf_reports, regrade_results
+)
+from models.item_bank import ItemBank, BANK_MODES
+from models.calibration import score_responses
+from models.grading import grade_summary, top_grade_labels
 from models.rasch_model import rasch_model, ability_to_grade, ability_to_standard_score
+from services.artifact_manager import ArtifactManager
+from services.report_pipeline import REPORT_ARTIFACTS, ReportPipeline
+from services.result_cache import ResultCache, key_for_bytes, key_for_frame
+from services.session_store import SessionStore
+from utils.monitoring import monitor
 
 logger = logging.getLogger(__name__)
 
+def run_analysis(source, progress_callback=None, estimator='jmle', max_memory_mb=None,
+                 item_bank=None, bank_mode='off', exam_key=None, reader=INGESTION_READER, sheet=None):
+    """
+    Bitta faylni tahlil qilish (sessiyalarsiz) - natijalar lug'atini qaytaradi.
+    Worker jarayonlarida ham shu funksiya ishlatiladi.
+    
+    Args:
+        source: Fayl baytlari, pandas DataFrame yoki ExamTable
+        reader: Fayl o'qish backend'i (baytlar uchun, 'auto' - format bo'yicha)
+        sheet: Varaq nomi/indeksi. None bo'lsa va ish kitobida bir nechta varaq bo'lsa,
+            barcha javoblar varaqlari run_workbook_analysis orqali tahlil qilinadi
+    """
+    if isinstance(source, (bytes, bytearray)) and sheet is None:
+        sheets = list_sheets(source)
+        if len(sheets) > 1:
+            return run_workbook_analysis(
+                source, sheets, progress_callback, estimator=estimator, max_memory_mb=max_memory_mb,
+                item_bank=item_bank, bank_mode=bank_mode, exam_key=exam_key, reader=reader
+            )
+        sheet = 0
+    
+    # Fayl bir marta o'qiladi: tekshiruv natijalari, tuzilma va javoblar matritsasi
+    # bitta ExamTable da tahlil va hisobotlarga uzatiladi
+    if isinstance(source, (bytes, bytearray)):
+        # Oqimli o'qish: faqat ID va savol ustunlari int8 matritsaga olinadi
+        table = read_exam_table(source, reader=reader, sheet=sheet)
+    elif isinstance(source, ExamTable):
+        table = source
+    else:
+        table = table_from_frame(source)
+    
+    results_df, ability_estimates, grade_counts, df_cleaned, item_difficulties, calibration = process_exam_data(
+        table, progress_callback, estimator=estimator, max_memory_mb=max_memory_mb,
+        item_bank=item_bank, bank_mode=bank_mode, exam_key=exam_key
+    )
+    
+    # Fix item difficulties format for all files
+    if isinstance(item_difficulties, np.ndarray):
+        # Convert to list without clipping to preserve variation
+        item_difficulties = item_difficulties.tolist()
+    
+    return {
+        'results_df': results_df,
+        'ability_estimates': ability_estimates,
+        'grade_counts': grade_counts,
+        'df_cleaned': df_cleaned,
+        'item_difficulties': item_difficulties,
+        'score_table': calibration.score_table,
+        'calibration': calibration,
+        'ingestion': table.summary(),
+        'timestamp': datetime.now().isoformat()
+    }
+
+def run_sheet_analysis(source, sheet, reader=INGESTION_READER, item_bank=None, item_bank_path=None,
+                       exam_key=None, **options):
+    """
+    Ish kitobining bitta varag'ini tahlil qilish - joriy jarayonda yoki AnalysisWorkerPool
+    worker'ida (varaqlar umumiy pulga alohida ish sifatida yuboriladi).
+    
+    Args:
+        item_bank: ItemBank (joriy jarayonda)
+        item_bank_path: Worker jarayonida bank shu fayldan ochiladi (ulanish uzatilmaydi)
+    
+    Returns:
+        Natijalar lug'ati yoki javoblar varag'i bo'lmasa {'skipped': sabab}
+    """
+    if item_bank is None and item_bank_path and options.get('bank_mode', 'off') != 'off':
+        item_bank = ItemBank(str(item_bank_path))
+    
+    table = read_exam_table(source, reader=reader, sheet=sheet)
+    if not table.is_valid:
+        # Javoblar varag'i emas (bo'sh, yo'riqnoma va h.k.)
+        return {'skipped': table.errors[0]}
+    # Bir xil savol ustunli turli fanlar bankda aralashmasligi uchun
+    sheet_key = f"{exam_key}/{sheet}" if exam_key else str(sheet)
+    return run_analysis(table, item_bank=item_bank, exam_key=sheet_key, **options)
+
+def run_workbook_analysis(source, sheets, progress_callback=None, **options):
+    """
+    Ko'p varaqli ish kitobi (har bir fan/sinf alohida varaqda) - varaqlar joriy jarayonda
+    ketma-ket tahlil qilinadi. Bot va web'da varaqlar AnalysisWorkerPool'ga alohida ishlar
+    sifatida yuboriladi va parallel bajariladi (ichki jarayonlar puli ochilmaydi).
+    
+    Javoblar varag'i bo'lmagan varaqlar o'tkazib yuboriladi (join_sheet_outcomes).
+    """
+    outcomes = {}
+    for sheet in sheets:
+        try:
+            outcomes[sheet] = run_sheet_analysis(source, sheet, **options)
+        except Exception as e:
+            outcomes[sheet] = {'skipped': str(e)}
+        if progress_callback:
+            progress_callback(5 + int(90 * len(outcomes) / len(sheets)),
+                              f"{len(outcomes)}/{len(sheets)} varaq tahlil qilindi")
+    return join_sheet_outcomes(sheets, outcomes)
+
+def join_sheet_outcomes(sheets, outcomes):
+    """
+    Varaqlar natijalarini yakunlash: {varaq: natijalar yoki {'skipped': sabab}}.
+    
+    Bitta javoblar varag'i topilsa oddiy natijalar, bir nechta bo'lsa combine_sheet_results
+    to'plami qaytadi.
+    
+    Raises:
+        ValueError: Birorta ham javoblar varag'i topilmasa
+    """
+    # Varaqlar ish kitobidagi tartibda
+    sheet_results = {sheet: outcomes[sheet] for sheet in sheets if 'skipped' not in outcomes[sheet]}
+    skipped = {str(sheet): outcomes[sheet]['skipped'] for sheet in sheets if 'skipped' in outcomes[sheet]}
+    if not sheet_results:
+        raise ValueError(next(iter(skipped.values()), "Faylda javoblar varag'i topilmadi"))
+    if len(sheet_results) == 1:
+        return next(iter(sheet_results.values()))
+    return combine_sheet_results(sheet_results, skipped)
+
+def combine_sheet_results(sheet_results, skipped=None):
+    """
+    Varaqlar natijalarini bitta to'plamga birlashtirish.
+    
+    Umumiy maydonlar (results_df, grade_counts, ...) barcha varaqlar bo'yicha - mavjud
+    bot/web kodi o'zgarishsiz ishlaydi; 'sheets' da har bir varaqning to'liq natijalari.
+    """
+    frames = []
+    for name, results in sheet_results.items():
+        frame = results['results_df'].copy()
+        frame.insert(0, 'Sheet', str(name))
+        frames.append(frame)
+    
+    grade_counts = {}
+    for results in sheet_results.values():
+        for grade, count in results['grade_counts'].items():
+            grade_counts[grade] = grade_counts.get(grade, 0) + count
+    
+    findings = []
+    for name, results in sheet_results.items():
+        for finding in results.get('ingestion', {}).get('findings', []):
+            findings.append(dict(finding, message=f"{name}: {finding['message']}"))
+    
+    return {
+        'results_df': pd.concat(frames, ignore_index=True),
+        'ability_estimates': np.concatenate([np.asarray(r['ability_estimates']) for r in sheet_results.values()]),
+        'grade_counts': grade_counts,
+        'df_cleaned': pd.concat({str(name): r['df_cleaned'] for name, r in sheet_results.items()}, names=['Sheet', None]),
+        'item_difficulties': [d for r in sheet_results.values() for d in r['item_difficulties']],
+        'ingestion': {
+            'schema': {str(name): r.get('ingestion', {}).get('schema', {}) for name, r in sheet_results.items()},
+            'findings': findings
+        },
+        'sheets': {str(name): results for name, results in sheet_results.items()},
+        'skipped_sheets': skipped or {},
+        'timestamp': datetime.now().isoformat()
+    }
+
+def regrade_analysis(results, thresholds=None, score_range=None):
+    """
+    Tayyor natijalarni yangi baho chegaralari va/yoki standart ball oralig'i bilan qayta
+    baholash. Rasch modeli qayta ishga tushirilmaydi: standart ballar saqlangan og'irlangan
+    ballardan qayta hisoblanadi, baholar, o'rinlar, ball jadvali va kalibrovka yangilanadi.
+    
+    Args:
+        results: run_analysis natijalari (ko'p varaqli ish kitobi ham)
+        thresholds: {baho: minimal ball} (None - o'zgarmaydi)
+        score_range: (min, max) standart ball oralig'i (None - o'zgarmaydi)
+    
+    Raises:
+        ValueError: Kalibrovka bo'lmasa yoki parametrlar noto'g'ri bo'lsa
+    """
+    if results.get('sheets'):
+        sheet_results = {
+            name: regrade_analysis(sheet, thresholds, score_range)
+            for name, sheet in results['sheets'].items()
+        }
+        return combine_sheet_results(sheet_results, results.get('skipped_sheets'))
+    
+    calibration = results.get('calibration')
+    if calibration is None:
+        raise ValueError('Kalibrovka topilmadi - natijalarni qayta tahlil qiling')
+    calibration = calibration.regraded(thresholds=thresholds, score_range=score_range)
+    results_df, grade_counts = regrade_results(results['results_df'], calibration)
+    return dict(
+        results,
+        results_df=results_df,
+        grade_counts=grade_counts,
+        calibration=calibration,
+        score_table=calibration.score_table,
+        timestamp=datetime.now().isoformat()
+    )
+
+# Excel eksport rejimlari -> hisobot turi (REPORT_ARTIFACTS)
+EXCEL_MODES = {'plain': 'excel', 'charts': 'excel_charts'}
+
+def build_excel_report(results, charts=False):
+    """
+    Natijalar uchun Excel hisobot (ko'p varaqli ish kitobida - umumiy va fanlar varaqlari).
+
+    charts=True - Excel'ning o'z diagrammalari bilan (diagrammalar ma'lumotlar varag'iga
+    bog'langan, rasm joylashtirilmaydi). Ko'p varaqli ish kitobida e'tiborga olinmaydi.
+    """
+    if charts and not results.get('sheets'):
+        return prepare_excel_with_charts(
+            results['results_df'],
+            results['grade_counts'],
+            results['ability_estimates'],
+            results.get('df_cleaned'),
+            results['item_difficulties'],
+            score_table=results.get('score_table')
+        )
+    # Baholar tartibi natijalardan (qayta baholangan yoki maxsus chegaralardagi nomlar uchun)
+    grade_order = list(results['grade_counts'])
+    if results.get('sheets'):
+        return prepare_workbook_excel(
+            {name: sheet['results_df'] for name, sheet in results['sheets'].items()},
+            score_tables={name: sheet.get('score_table') for name, sheet in results['sheets'].items()},
+            grade_order=grade_order
+        )
+    return prepare_excel_for_download(
+        results['results_df'], 
+        results['df_cleaned'], 
+        results['item_difficulties'],
+        score_table=results.get('score_table'),
+        grade_order=grade_order
+    )
+
+def build_pdf_report(results):
+    """Natijalar uchun PDF hisobot (ko'p varaqli ish kitobida - har bir fan alohida bo'lim)"""
+    if results.get('sheets'):
+        return merge_pdf_reports({
+            name: prepare_pdf_for_download(sheet['results_df'], title=f"REPETITSION TEST NATIJALARI - {name}",
+                                           score_table=sheet.get('score_table'))
+            for name, sheet in results['sheets'].items()
+        })
+    return prepare_pdf_for_download(results['results_df'], score_table=results.get('score_table'))
+
 class RaschAnalysisService:
     """
     Umumiy Rasch Analysis Service
     Bot va Web app uchun bir xil API
     """
     
-    def __init__(self):
-        self.sessions = {}  # Active sessions
+    def __init__(self, item_bank_mode=ITEM_BANK_MODE, item_bank_path=ITEM_BANK_PATH,
+                 result_cache_mb=RESULT_CACHE_MAX_MB, session_ttl=SESSION_TTL_SECONDS,
+                 session_memory_mb=SESSION_MAX_MEMORY_MB, excel_mode=EXCEL_EXPORT_MODE):
+        # Active sessions (TTL va xotira chegarasi bilan)
+        self.sessions = SessionStore(
+            ttl_seconds=session_ttl,
+            max_memory_mb=session_memory_mb,
+            name='analysis_sessions',
+            on_evict=monitor.record_session_eviction
+        )
+        # Kontent bo'yicha natijalar keshi (bir xil fayl qayta tahlil qilinmaydi)
+        self.result_cache = ResultCache(result_cache_mb) if result_cache_mb else None
+        
+        if item_bank_mode not in BANK_MODES:
+            logger.warning(f"Noma'lum ITEM_BANK_MODE: {item_bank_mode}, bank o'chirildi")
+            item_bank_mode = 'off'
+        self.item_bank_mode = item_bank_mode
+        if excel_mode not in EXCEL_MODES:
+            logger.warning(f"Noma'lum EXCEL_EXPORT_MODE: {excel_mode}, 'plain' ishlatiladi")
+            excel_mode = 'plain'
+        self.excel_mode = excel_mode
+        self.item_bank_path = item_bank_path
+        self._item_bank = None
+        # Doimiy ishlar navbati (ixtiyoriy) - sessiya xotiradan o'chsa natijalar diskdan tiklanadi
+        self.job_queue = None
+        # Hisobot fayllari birinchi so'rovda (jarayonlar hovuzida) yaratiladi va sessiyada saqlanadi
+        self.report_pipeline = ReportPipeline()
+        self.artifacts = ArtifactManager(
+            self._get_session,
+            {name: partial(self.report_pipeline.build, name) for name in REPORT_ARTIFACTS},
+            on_change=self.sessions.refresh
+        )
+    
+    @property
+    def item_bank(self):
+        """Savollar banki (birinchi murojaatda ochiladi, rejim 'off' bo'lsa None)"""
+        if self.item_bank_mode == 'off':
+            return None
+        if self._item_bank is None:
+            Path(self.item_bank_path).parent.mkdir(parents=True, exist_ok=True)
+            self._item_bank = ItemBank(str(self.item_bank_path))
+        return self._item_bank
         
     def create_session(self, session_id=None):
         """Yangi session yaratish"""
@@ -44,14 +337,18 @@ class RaschAnalysisService:
         
         return session_id
     
-    def process_file(self, file_path_or_df, session_id, progress_callback=None):
+    def process_file(self, file_path_or_df, session_id, progress_callback=None, estimator='jmle',
+                     max_memory_mb=None, exam_key=None):
         """
         Excel fayl yoki DataFrame ni qayta ishlash
         
         Args:
-            file_path_or_df: Excel fayl yo'li yoki pandas DataFrame
+            file_path_or_df: Excel fayl yo'li, fayl baytlari yoki pandas DataFrame
             session_id: Session ID
             progress_callback: Progress callback function
+            estimator: Rasch baholash usuli ('jmle' yoki 'pairwise')
+            max_memory_mb: Rasch iteratsiyalari uchun xotira chegarasi (MB)
+            exam_key: Savollar banki uchun test kaliti (bir xil ustun nomli testlarni ajratadi)
         """
         try:
             # Session status yangilash
@@ -59,59 +356,130 @@ class RaschAnalysisService:
             self.sessions[session_id]['progress'] = 5
             self.sessions[session_id]['message'] = 'Ma\'lumotlar o\'qilmoqda...'
             
-            # DataFrame olish
-            if isinstance(file_path_or_df, str) or isinstance(file_path_or_df, Path):
-                df = pd.read_excel(file_path_or_df)
-            else:
-                df = file_path_or_df
+            # Kesh: bir xil fayl uchun tayyor natijalar
+            source, cache_key = self.prepare_source(file_path_or_df, estimator=estimator, exam_key=exam_key)
+            if self.load_cached(session_id, cache_key, progress_callback):
+                return True
             
             # Progress callback
             def internal_progress_callback(percent, message):
-                self.sessions[session_id]['progress'] = percent
-                self.sessions[session_id]['message'] = message
+                self.update_progress(session_id, percent, message)
                 if progress_callback:
                     progress_callback(percent, message)
             
             # Ma'lumotlarni qayta ishlash
-            results_df, ability_estimates, grade_counts, df_cleaned, item_difficulties = process_exam_data(
-                df, internal_progress_callback
+            results = run_analysis(
+                source, internal_progress_callback, estimator=estimator, max_memory_mb=max_memory_mb,
+                item_bank=self.item_bank, bank_mode=self.item_bank_mode, exam_key=exam_key
             )
-            
-            # Fix item difficulties format for all files
-            if isinstance(item_difficulties, np.ndarray):
-                # Convert to list without clipping to preserve variation
-                item_difficulties = item_difficulties.tolist()
-            
-            # Natijalarni saqlash
-            results = {
-                'results_df': results_df,
-                'ability_estimates': ability_estimates,
-                'grade_counts': grade_counts,
-                'df_cleaned': df_cleaned,
-                'item_difficulties': item_difficulties,
-                'timestamp': datetime.now().isoformat()
-            }
-            
-            self.sessions[session_id]['results'] = results
-            self.sessions[session_id]['status'] = 'completed'
-            self.sessions[session_id]['progress'] = 100
-            self.sessions[session_id]['message'] = 'Tahlil yakunlandi!'
+            self.store_results(session_id, results, cache_key)
             
             return True
             
         except Exception as e:
-            logger.error(f"Processing error: {e}")
-            self.sessions[session_id]['status'] = 'error'
-            self.sessions[session_id]['progress'] = 0
-            self.sessions[session_id]['message'] = f'Xatolik: {str(e)}'
+            self.fail_session(session_id, e)
             return False
     
+    def prepare_source(self, file_path_or_df, estimator='jmle', exam_key=None):
+        """
+        Kirish ma'lumotini tahlilga tayyorlash va kesh kalitini hisoblash.
+        
+        Returns:
+            (source, cache_key): source - fayl baytlari yoki DataFrame
+        """
+        # Kesh kaliti: fayl baytlari yoki DataFrame qiymatlari + tahlil parametrlari
+        cache_params = {
+            'estimator': estimator,
+            'exam_key': exam_key,
+            'item_bank_mode': self.item_bank_mode
+        }
+        if isinstance(file_path_or_df, str) or isinstance(file_path_or_df, Path):
+            with open(file_path_or_df, 'rb') as f:
+                source = f.read()
+        else:
+            source = file_path_or_df
+        
+        if isinstance(source, (bytes, bytearray)):
+            cache_key = key_for_bytes(source, **cache_params)
+        else:
+            cache_key = key_for_frame(source, **cache_params)
+        return source, cache_key
+    
+    def load_cached(self, session_id, cache_key, progress_callback=None):
+        """Keshda natija bo'lsa sessiyani to'ldirish (True) yoki False"""
+        self.sessions[session_id]['cache_key'] = cache_key
+        cached = self.result_cache.get(cache_key) if self.result_cache is not None else None
+        if cached is None:
+            return False
+        
+        logger.info(f"Result cache hit: {cache_key[:12]}")
+        self._complete_session(session_id, dict(cached))
+        if progress_callback:
+            progress_callback(100, 'Tahlil yakunlandi!')
+        return True
+    
+    def update_progress(self, session_id, percent, message):
+        """Session progressini yangilash"""
+        session = self.sessions.get(session_id)
+        if session is not None:
+            session['progress'] = percent
+            session['message'] = message
+    
+    def store_results(self, session_id, results, cache_key=None):
+        """Tayyor tahlil natijalarini sessiyaga (va keshga) yozish"""
+        if cache_key is not None and self.result_cache is not None:
+            self.result_cache.put(cache_key, results)
+        self._complete_session(session_id, dict(results))
+    
+    def fail_session(self, session_id, error):
+        """Sessiyani xatolik holatiga o'tkazish"""
+        logger.error(f"Processing error: {error}")
+        session = self.sessions.get(session_id)
+        if session is not None:
+            session['status'] = 'error'
+            session['progress'] = 0
+            session['message'] = f'Xatolik: {str(error)}'
+    
+    def _get_session(self, session_id):
+        """
+        Sessiyani olish. Xotirada bo'lmasa (TTL, qayta ishga tushish) va job_queue da
+        shu sessiya ishi bo'lsa, holat va natijalar diskdan qayta yuklanadi.
+        """
+        session = self.sessions.get(session_id)
+        if session is not None or self.job_queue is None:
+            return session
+        
+        job = self.job_queue.get_by_session(session_id)
+        if job is None:
+            return None
+        results = self.job_queue.load_results(job['job_id']) if job['status'] == 'completed' else None
+        self.sessions[session_id] = {
+            'status': 'error' if job['status'] == 'failed' else job['status'],
+            'progress': job['progress'],
+            'message': job['message'],
+            'results': results,
+            'timestamp': job['created_at'],
+            'job_id': job['job_id']
+        }
+        return self.sessions.get(session_id)
+    
+    def _complete_session(self, session_id, results):
+        session = self.sessions[session_id]
+        session['results'] = results
+        # Yangi natijalar - oldingi hisobot fayllari eskirgan
+        session.pop('artifacts', None)
+        session['status'] = 'completed'
+        session['progress'] = 100
+        session['message'] = 'Tahlil yakunlandi!'
+        # Natijalar qo'shildi - sessiya hajmini qayta hisoblash
+        self.sessions.refresh(session_id)
+    
     def get_status(self, session_id):
         """Session statusini olish"""
-        if session_id not in self.sessions:
+        session = self._get_session(session_id)
+        if session is None:
             return {'error': 'Session topilmadi'}
         
-        session = self.sessions[session_id]
         return {
             'status': session['status'],
             'progress': session['progress'],
@@ -126,10 +494,10 @@ class RaschAnalysisService:
             session_id: Session ID
             format: 'json', 'summary', 'detailed'
         """
-        if session_id not in self.sessions:
+        session = self._get_session(session_id)
+        if session is None:
             return {'error': 'Session topilmadi'}
         
-        session = self.sessions[session_id]
         if not session['results']:
             return {'error': 'Natijalar topilmadi'}
         
@@ -226,14 +594,8 @@ class RaschAnalysisService:
         grade_counts = results['grade_counts']
         total_students = len(results['results_df'])
         
-        # A+/A baholar
-        top_grades = grade_counts.get('A+', 0) + grade_counts.get('A', 0)
-        # O'tgan talabalar
-        passing_grades = (top_grades + grade_counts.get('B+', 0) + 
-                         grade_counts.get('B', 0) + grade_counts.get('C+', 0) + 
-                         grade_counts.get('C', 0))
-        # O'tmagan talabalar
-        failing_count = grade_counts.get('NC', 0)
+        # Eng yuqori baholar (standartda A+/A), o'tganlar va eng past baho (NC) - maxsus chegaralarda ham
+        top_grades, passing_grades, failing_count = grade_summary(grade_counts)
         
         # Foizlar
         top_percent = (top_grades/total_students*100) if total_students > 0 else 0
@@ -262,6 +624,14 @@ class RaschAnalysisService:
             'grade_counts': grade_counts,
             'df_cleaned': df_cleaned_dict,  # Convert to dict for JSON
             'item_difficulties': item_difficulties_list_raw,
+            # Fayl tuzilmasi va tekshiruv natijalari (ogohlantirishlar)
+            'ingestion': results.get('ingestion', {}),
+            # Xom ball -> theta -> standart ball -> baho jadvali
+            'score_table': (results['score_table'].to_frame().to_dict('records')
+                            if results.get('score_table') is not None else []),
+            # Ko'p varaqli ish kitobi: har bir varaq bo'yicha qisqa natijalar
+            'sheets': [self._format_sheet_summary(name, sheet) for name, sheet in results.get('sheets', {}).items()],
+            'skipped_sheets': results.get('skipped_sheets', {}),
             'timestamp': results['timestamp'],
             # Bot uchun to'g'ridan-to'g'ri kirish
             'total_students': total_students,
@@ -272,6 +642,7 @@ class RaschAnalysisService:
             'lowest_score': lowest_score,
             'std_deviation': std_deviation,
             # Summary statistics for bot
+            'top_grades_label': '/'.join(top_grade_labels(grade_counts)),
             'top_grades_count': top_grades,
             'top_grades_percent': round(top_percent, 2),
             'passing_count': passing_grades,
@@ -285,14 +656,8 @@ class RaschAnalysisService:
         grade_counts = results['grade_counts']
         total_students = len(results['results_df'])
         
-        # A+/A baholar
-        top_grades = grade_counts.get('A+', 0) + grade_counts.get('A', 0)
-        # O'tgan talabalar
-        passing_grades = (top_grades + grade_counts.get('B+', 0) + 
-                         grade_counts.get('B', 0) + grade_counts.get('C+', 0) + 
-                         grade_counts.get('C', 0))
-        # O'tmagan talabalar
-        failing_count = grade_counts.get('NC', 0)
+        # Eng yuqori baholar (standartda A+/A), o'tganlar va eng past baho (NC) - maxsus chegaralarda ham
+        top_grades, passing_grades, failing_count = grade_summary(grade_counts)
         
         # Foizlar
         top_percent = (top_grades/total_students*100) if total_students > 0 else 0
@@ -301,13 +666,30 @@ class RaschAnalysisService:
         
         return {
             'total_students': total_students,
+            'total_questions': len(results['item_difficulties']),
+            'top_grades_label': '/'.join(top_grade_labels(grade_counts)),
             'top_grades_count': top_grades,
             'top_grades_percent': round(top_percent, 2),
             'passing_count': passing_grades,
             'pass_rate': round(pass_rate, 2),
             'failing_count': failing_count,
             'fail_percent': round(fail_percent, 2),
-            'grade_distribution': grade_counts
+            'grade_distribution': grade_counts,
+            'warnings': [f['message'] for f in results.get('ingestion', {}).get('findings', [])
+                         if f['level'] == 'warning'],
+            'sheets': [self._format_sheet_summary(name, sheet) for name, sheet in results.get('sheets', {}).items()],
+            'skipped_sheets': results.get('skipped_sheets', {})
+        }
+    
+    def _format_sheet_summary(self, name, results):
+        """Bitta varaq (fan) natijalari - ko'p varaqli ish kitoblari uchun"""
+        results_df = results['results_df']
+        return {
+            'sheet': name,
+            'total_students': len(results_df),
+            'total_questions': len(results['item_difficulties']),
+            'average_score': round(float(results_df['Standard Score'].mean()), 2) if len(results_df) else 0.0,
+            'grade_distribution': results['grade_counts']
         }
     
     def _format_detailed_results(self, results):
@@ -347,12 +729,103 @@ class RaschAnalysisService:
             'timestamp': results['timestamp']
         }
     
+    def score_responses(self, session_id, responses, sheet=None):
+        """
+        Yangi javoblar varag'i (yoki kichik partiya) ni sessiya kalibrovkasi bo'yicha baholash.
+        Model qayta ishga tushirilmaydi - natija tahlildagi talabalar bilan bir shkalada.
+        
+        Args:
+            session_id: Tahlil qilingan sessiya
+            responses: "0110..." satri, 0/1 ro'yxati yoki ro'yxatlar ro'yxati
+            sheet: Ko'p varaqli ish kitobida fan (varaq) nomi
+        """
+        session = self._get_session(session_id)
+        if session is None:
+            return {'error': 'Session topilmadi'}
+        if not session['results']:
+            return {'error': 'Natijalar topilmadi'}
+        
+        results = session['results']
+        if results.get('sheets'):
+            if sheet is None or str(sheet) not in results['sheets']:
+                return {'error': f"Varaqni tanlang: {', '.join(results['sheets'])}"}
+            results = results['sheets'][str(sheet)]
+        calibration = results.get('calibration')
+        if calibration is None:
+            return {'error': 'Kalibrovka topilmadi'}
+        
+        try:
+            scores = score_responses(calibration, responses)
+        except ValueError as e:
+            return {'error': str(e)}
+        
+        return {
+            'total_questions': calibration.n_items,
+            'results': [
+                {
+                    'raw_score': int(raw_score),
+                    'theta': round(float(theta), 4),
+                    'se': round(float(se), 4),
+                    'ability': float(ability),
+                    'standard_score': float(standard_score),
+                    'grade': str(grade)
+                }
+                for raw_score, theta, se, ability, standard_score, grade in zip(
+                    scores['raw_score'], scores['theta'], scores['se'], scores['ability'],
+                    scores['standard_score'], scores['grade']
+                )
+            ]
+        }
+    
+    def regrade(self, session_id, thresholds=None, score_range=None):
+        """
+        Sessiya natijalarini yangi baho chegaralari / ball oralig'i bilan qayta baholash
+        (model qayta ishga tushirilmaydi). Eski Excel/PDF o'rniga yangilari so'ralganda yaratiladi.
+        
+        Args:
+            session_id: Tahlil qilingan sessiya
+            thresholds: {baho: minimal ball}
+            score_range: [min, max]
+        """
+        session = self._get_session(session_id)
+        if session is None:
+            return {'error': 'Session topilmadi'}
+        if not session['results']:
+            return {'error': 'Natijalar topilmadi'}
+        
+        try:
+            results = regrade_analysis(session['results'], thresholds=thresholds, score_range=score_range)
+        except ValueError as e:
+            return {'error': str(e)}
+        
+        # Kesh kaliti: asl tahlil kaliti + joriy baholash parametrlari (hisobotlar aralashmaydi)
+        grading = dict(session.get('grading', {}))
+        if thresholds is not None:
+            grading['thresholds'] = sorted((str(grade), float(cutoff)) for grade, cutoff in dict(thresholds).items())
+        if score_range is not None:
+            grading['score_range'] = [float(value) for value in score_range]
+        session['grading'] = grading
+        cache_key = None
+        if session.get('cache_key'):
+            base_key = session.setdefault('base_cache_key', session['cache_key'])
+            cache_key = key_for_bytes(base_key.encode('utf-8'), **grading)
+            session['cache_key'] = cache_key
+        self.store_results(session_id, results, cache_key)
+        
+        job_id = session.get('job_id')
+        if self.job_queue is not None and job_id:
+            self.job_queue.complete(job_id, results)
+            for name in REPORT_ARTIFACTS:
+                self.job_queue.remove_artifact(job_id, name)
+        
+        return self._format_summary_results(results)
+    
     def get_item_difficulties_text(self, session_id):
         """Telegram bot uchun savol qiyinliklari matni"""
-        if session_id not in self.sessions:
+        session = self._get_session(session_id)
+        if session is None:
             return "❌ Session topilmadi."
         
-        session = self.sessions[session_id]
         if not session['results']:
             return "❌ Natijalar topilmadi."
         
@@ -398,33 +871,52 @@ class RaschAnalysisService:
         
         return text
     
-    def get_excel_file(self, session_id):
-        """Excel fayl olish"""
-        if session_id not in self.sessions:
-            return None
-        
-        session = self.sessions[session_id]
-        if not session['results']:
-            return None
-        
-        results = session['results']
-        return prepare_excel_for_download(
-            results['results_df'], 
-            results['df_cleaned'], 
-            results['item_difficulties']
-        )
+    def get_excel_file(self, session_id, mode=None):
+        """
+        Excel fayl olish (birinchi so'rovda yaratiladi).
+
+        mode: 'plain' yoki 'charts' (None - self.excel_mode)
+        """
+        name = EXCEL_MODES.get(mode or self.excel_mode)
+        if name is None:
+            raise ValueError(f"Noma'lum Excel rejimi: {mode}")
+        return self.artifacts.get(session_id, name, self._load_artifact, self._save_artifact)
     
     def get_pdf_file(self, session_id):
-        """PDF fayl olish"""
-        if session_id not in self.sessions:
-            return None
-        
-        session = self.sessions[session_id]
-        if not session['results']:
-            return None
-        
-        results = session['results']
-        return prepare_pdf_for_download(results['results_df'])
+        """PDF fayl olish (birinchi so'rovda yaratiladi)"""
+        return self.artifacts.get(session_id, 'pdf', self._load_artifact, self._save_artifact)
+    
+    def get_report(self, session_id, name):
+        """Istalgan hisobot (REPORT_ARTIFACTS: 'excel', 'pdf', 'stats_pdf', diagrammalar) - BytesIO yoki None"""
+        return self.artifacts.get(session_id, name, self._load_artifact, self._save_artifact)
+    
+    def iter_reports(self, session_id, names=REPORT_ARTIFACTS):
+        """
+        Bir nechta hisobotni parallel tayyorlash - (name, BytesIO yoki None) juftliklari
+        tayyor bo'lish tartibida (tayyor fayllar darhol, qolganlari eng sekini bilan birga).
+        """
+        return self.report_pipeline.render(lambda name: self.get_report(session_id, name), names)
+    
+    def _load_artifact(self, session, name):
+        """Natijalar keshi yoki job_queue dagi tayyor fayl baytlari (yoki None)"""
+        cache_key = session.get('cache_key')
+        job_id = session.get('job_id')
+        if self.result_cache is not None and cache_key:
+            data = self.result_cache.get_artifact(cache_key, name)
+            if data is not None:
+                return data
+        if self.job_queue is not None and job_id:
+            return self.job_queue.read_artifact(job_id, name)
+        return None
+    
+    def _save_artifact(self, session, name, data):
+        """Yangi yaratilgan faylni natijalar keshi va job_queue ga yozish"""
+        cache_key = session.get('cache_key')
+        job_id = session.get('job_id')
+        if self.result_cache is not None and cache_key:
+            self.result_cache.put_artifact(cache_key, name, data)
+        if self.job_queue is not None and job_id:
+            self.job_queue.save_artifact(job_id, name, data)
     
     def create_sample_matrix(self):
         """
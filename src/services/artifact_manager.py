@@ -0,0 +1,123 @@
+#!/usr/bin/env python3
+"""
+Artifact Manager
+Hisobot fayllarini (Excel, PDF) talab bo'yicha yaratish va sessiyada saqlash.
+
+Fayl tahlildan keyin emas, birinchi marta so'ralganda yaratiladi va baytlari
+sessiyaning 'artifacts' lug'atida saqlanadi - keyingi yuklab olishlar qayta
+yaratmaydi. Bir xil fayl uchun bir vaqtdagi so'rovlar bitta yaratishni kutadi
+(sessiya + fayl nomi bo'yicha qulf). Baytlar sessiya ichida bo'lgani uchun
+SessionStore sessiyani chiqarib yuborganda (TTL, xotira) ular ham o'chadi.
+"""
+
+import io
+import threading
+
+
+class ArtifactManager:
+    """
+    Sessiya bo'yicha hisobot fayllari.
+
+    Args:
+        get_session: callback(session_id) -> sessiya lug'ati yoki None
+        builders: {nom: callback(results) -> BytesIO yoki None}
+        on_change: callback(session_id) - sessiyaga fayl qo'shilgach (hajmni qayta hisoblash uchun)
+    """
+
+    def __init__(self, get_session, builders, on_change=None):
+        self.get_session = get_session
+        self.builders = dict(builders)
+        self.on_change = on_change
+        self._locks = {}  # (session_id, nom) -> [qulf, foydalanuvchilar soni]
+        self._guard = threading.Lock()
+        self.hits = 0
+        self.builds = 0
+
+    def get(self, session_id, name, load=None, save=None):
+        """
+        Fayl (yangi BytesIO) yoki None (sessiya/natijalar yo'q yoki yaratib bo'lmadi).
+
+        Args:
+            session_id: Sessiya ID
+            name: Fayl nomi ('excel', 'pdf')
+            load: callback(session, name) -> bayt yoki None - tashqi keshdan o'qish
+            save: callback(session, name, data) - yangi yaratilgan faylni tashqi keshga yozish
+        """
+        session = self.get_session(session_id)
+        if session is None or not session.get('results'):
+            return None
+        data = session.get('artifacts', {}).get(name)
+        if data is not None:
+            self.hits += 1
+            return io.BytesIO(data)
+
+        with self._lock_for(session_id, name):
+            # Boshqa so'rov kutish paytida yaratib qo'ygan bo'lishi mumkin
+            data = session.get('artifacts', {}).get(name)
+            if data is not None:
+                self.hits += 1
+                return io.BytesIO(data)
+
+            results = session['results']
+            data = load(session, name) if load else None
+            if data is None:
+                buffer = self.builders[name](results)
+                if buffer is None:
+                    return None
+                data = buffer.getvalue()
+                self.builds += 1
+                if save:
+                    save(session, name, data)
+
+            # Yaratish paytida natijalar almashtirilgan bo'lsa (qayta baholash), eski faylni saqlamaymiz
+            if session.get('results') is results:
+                session.setdefault('artifacts', {})[name] = data
+                if self.on_change:
+                    self.on_change(session_id)
+        return io.BytesIO(data)
+
+    def discard(self, session_id, name=None):
+        """Sessiya fayllarini (yoki bittasini) o'chirish - natijalar o'zgarganda"""
+        session = self.get_session(session_id)
+        if session is None or 'artifacts' not in session:
+            return
+        if name is None:
+            session.pop('artifacts')
+        else:
+            session['artifacts'].pop(name, None)
+        if self.on_change:
+            self.on_change(session_id)
+
+    def stats(self):
+        return {
+            'hits': self.hits,
+            'builds': self.builds,
+            'building': len(self._locks)
+        }
+
+    def _lock_for(self, session_id, name):
+        return _KeyLock(self, (session_id, name))
+
+
+class _KeyLock:
+    """Kalit bo'yicha qulf - oxirgi foydalanuvchi chiqqach lug'atdan o'chiriladi"""
+
+    def __init__(self, manager, key):
+        self.manager = manager
+        self.key = key
+
+    def __enter__(self):
+        with self.manager._guard:
+            entry = self.manager._locks.setdefault(self.key, [threading.Lock(), 0])
+            entry[1] += 1
+        entry[0].acquire()
+        return self
+
+    def __exit__(self, *exc):
+        with self.manager._guard:
+            entry = self.manager._locks[self.key]
+            entry[0].release()
+            entry[1] -= 1
+            if entry[1] == 0:
+                del self.manager._locks[self.key]
+        return False
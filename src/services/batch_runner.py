@@ -0,0 +1,263 @@
+#!/usr/bin/env python3
+"""
+Batch Runner
+Katalogdagi ko'plab test fayllarini oflayn (bot va web'siz) tahlil qilish.
+
+Fayllar jarayonlar puliga taqsimlanadi. Har bir worker jarayoni og'ir modullarni
+(pandas, scipy, Rasch modeli, hisobot kutubxonalari) va savollar bankini bir marta
+yuklaydi va keyingi fayllarda qayta ishlatadi. Har bir fayl uchun natijalar va
+hisobotlar chiqish katalogiga yoziladi, oxirida o'tkazuvchanlik (fayl/s, talaba/s)
+chiqariladi.
+
+Ishlatish:
+    python batch.py imtihonlar/ -o natijalar/ --workers 4 --formats csv,excel,pdf
+"""
+
+import argparse
+import csv
+import logging
+import multiprocessing as mp
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from pathlib import Path
+import sys
+
+# Add src directory to Python path
+src_dir = Path(__file__).parent.parent
+sys.path.insert(0, str(src_dir))
+# config paketi loyiha ildizida
+if str(src_dir.parent) not in sys.path:
+    sys.path.append(str(src_dir.parent))
+
+from config.settings import BATCH_WORKERS, INGESTION_READER, ITEM_BANK_MODE, ITEM_BANK_PATH
+
+logger = logging.getLogger(__name__)
+
+BATCH_EXTENSIONS = ('.xlsx', '.xls', '.ods', '.csv')
+REPORT_FORMATS = ('csv', 'excel', 'pdf')
+
+# Worker jarayonining holati (_init_worker da bir marta to'ldiriladi)
+_worker = {}
+
+
+def find_exam_files(input_dir, recursive=False):
+    """Katalogdagi test fayllari (nom bo'yicha tartiblangan)"""
+    pattern = '**/*' if recursive else '*'
+    return sorted(
+        path for path in Path(input_dir).glob(pattern)
+        if path.is_file() and path.suffix.lower() in BATCH_EXTENSIONS and not path.name.startswith('~$')
+    )
+
+
+def output_stems(paths, input_dir):
+    """
+    Har bir fayl uchun chiqish nomi. Bir xil nomli fayllar (masalan a.xlsx va a.csv
+    yoki turli papkalarda) bir-birining hisobotini ustidan yozmasligi uchun nisbiy
+    yo'l va kengaytma qo'shiladi.
+    """
+    stems = {}
+    counts = {}
+    for path in paths:
+        counts[path.stem] = counts.get(path.stem, 0) + 1
+    for path in paths:
+        if counts[path.stem] == 1:
+            stems[path] = path.stem
+        else:
+            relative = path.relative_to(input_dir)
+            stems[path] = '_'.join(relative.with_suffix('').parts) + '_' + path.suffix.lstrip('.').lower()
+    return stems
+
+
+def _init_worker(options):
+    """Worker jarayonini tayyorlash: modullar va savollar banki bir marta yuklanadi"""
+    from services.analysis_service import run_analysis, build_excel_report, build_pdf_report
+    from models.item_bank import ItemBank
+
+    options = dict(options)
+    item_bank_path = options.pop('item_bank_path', None)
+    if options.get('bank_mode', 'off') != 'off' and item_bank_path:
+        Path(item_bank_path).parent.mkdir(parents=True, exist_ok=True)
+        options['item_bank'] = ItemBank(str(item_bank_path))
+
+    _worker.update(
+        options=options,
+        run_analysis=run_analysis,
+        builders={'excel': build_excel_report, 'pdf': build_pdf_report}
+    )
+
+
+def write_reports(results, output_dir, stem, formats):
+    """Natijalar va hisobotlarni yozish, yaratilgan fayllar ro'yxatini qaytaradi"""
+    output_dir = Path(output_dir)
+    written = []
+    if 'csv' in formats:
+        path = output_dir / f"{stem}_natijalar.csv"
+        results['results_df'].to_csv(path, index=False, encoding='utf-8-sig')
+        written.append(path.name)
+    for name, suffix in (('excel', 'xlsx'), ('pdf', 'pdf')):
+        if name not in formats:
+            continue
+        path = output_dir / f"{stem}_natijalar.{suffix}"
+        path.write_bytes(_worker['builders'][name](results).getvalue())
+        written.append(path.name)
+    return written
+
+
+def _analyse_file(path, output_dir, stem, formats):
+    """Bitta faylni tahlil qilish (worker jarayonida)"""
+    started = time.perf_counter()
+    try:
+        results = _worker['run_analysis'](Path(path).read_bytes(), **_worker['options'])
+        written = write_reports(results, output_dir, stem, formats)
+    except Exception as e:
+        return {'file': str(path), 'status': 'error', 'error': str(e),
+                'seconds': time.perf_counter() - started}
+    return {
+        'file': str(path),
+        'status': 'ok',
+        'students': len(results['results_df']),
+        'questions': len(results['item_difficulties']),
+        'sheets': len(results.get('sheets', {})) or 1,
+        'outputs': written,
+        'seconds': time.perf_counter() - started
+    }
+
+
+def run_batch(input_dir, output_dir, workers=BATCH_WORKERS, formats=REPORT_FORMATS, recursive=False,
+              estimator='jmle', max_memory_mb=None, bank_mode=ITEM_BANK_MODE, item_bank_path=ITEM_BANK_PATH,
+              reader=INGESTION_READER, on_result=None):
+    """
+    Katalogdagi barcha test fayllarini tahlil qilish.
+
+    Args:
+        input_dir: Test fayllari katalogi
+        output_dir: Natijalar va hisobotlar katalogi (yo'q bo'lsa yaratiladi)
+        workers: Jarayonlar soni (1 - joriy jarayonda ketma-ket)
+        formats: Yoziladigan fayllar: 'csv' (natijalar jadvali), 'excel', 'pdf'
+        on_result: callback(done, total, result) - har bir fayl tugaganda
+
+    Returns:
+        dict: fayllar natijalari ('results') va o'tkazuvchanlik ko'rsatkichlari
+    """
+    input_dir = Path(input_dir)
+    output_dir = Path(output_dir)
+    output_dir.mkdir(parents=True, exist_ok=True)
+    formats = tuple(formats)
+    unknown = set(formats) - set(REPORT_FORMATS)
+    if unknown:
+        raise ValueError(f"Noma'lum format: {', '.join(sorted(unknown))}")
+
+    paths = find_exam_files(input_dir, recursive)
+    stems = output_stems(paths, input_dir)
+    options = {
+        'estimator': estimator,
+        'max_memory_mb': max_memory_mb,
+        'bank_mode': bank_mode,
+        'item_bank_path': str(item_bank_path) if item_bank_path else None,
+        'reader': reader,
+    }
+    # Savollar banki bitta SQLite fayl - bir vaqtda bir nechta jarayon yozmasligi uchun
+    workers = max(1, min(int(workers), len(paths) or 1))
+    if bank_mode != 'off':
+        workers = 1
+
+    results = []
+
+    def record(result):
+        results.append(result)
+        if on_result:
+            on_result(len(results), len(paths), result)
+
+    started = time.perf_counter()
+    if workers == 1:
+        _init_worker(options)
+        for path in paths:
+            record(_analyse_file(path, output_dir, stems[path], formats))
+    else:
+        context = mp.get_context('spawn')
+        with ProcessPoolExecutor(max_workers=workers, mp_context=context,
+                                 initializer=_init_worker, initargs=(options,)) as executor:
+            futures = [
+                executor.submit(_analyse_file, path, output_dir, stems[path], formats)
+                for path in paths
+            ]
+            for future in as_completed(futures):
+                record(future.result())
+    elapsed = time.perf_counter() - started
+
+    # Kiritish tartibida
+    order = {str(path): index for index, path in enumerate(paths)}
+    results.sort(key=lambda result: order[result['file']])
+    write_summary(results, output_dir / 'batch_summary.csv')
+
+    succeeded = [result for result in results if result['status'] == 'ok']
+    students = sum(result['students'] for result in succeeded)
+    return {
+        'results': results,
+        'files': len(paths),
+        'succeeded': len(succeeded),
+        'failed': len(paths) - len(succeeded),
+        'students': students,
+        'workers': workers,
+        'seconds': elapsed,
+        'files_per_second': len(paths) / elapsed if elapsed > 0 else 0.0,
+        'students_per_second': students / elapsed if elapsed > 0 else 0.0
+    }
+
+
+def write_summary(results, path):
+    """Har bir fayl bo'yicha qisqa jadval (holat, talabalar, vaqt, xatolik)"""
+    with open(path, 'w', newline='', encoding='utf-8-sig') as f:
+        writer = csv.writer(f)
+        writer.writerow(['file', 'status', 'students', 'questions', 'sheets', 'seconds', 'outputs', 'error'])
+        for result in results:
+            writer.writerow([
+                result['file'], result['status'], result.get('students', ''), result.get('questions', ''),
+                result.get('sheets', ''), f"{result['seconds']:.3f}", ' '.join(result.get('outputs', [])),
+                result.get('error', '')
+            ])
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Katalogdagi test fayllarini Rasch modeli bilan tahlil qilish")
+    parser.add_argument('input_dir', help="Test fayllari katalogi (.xlsx, .xls, .ods, .csv)")
+    parser.add_argument('-o', '--output', default='natijalar', help="Natijalar katalogi (default: natijalar)")
+    parser.add_argument('-w', '--workers', type=int, default=BATCH_WORKERS, help="Jarayonlar soni")
+    parser.add_argument('--formats', default=','.join(REPORT_FORMATS),
+                        help="Yoziladigan fayllar: csv,excel,pdf (vergul bilan)")
+    parser.add_argument('-r', '--recursive', action='store_true', help="Ichki kataloglarni ham ko'rish")
+    parser.add_argument('--estimator', default='jmle', choices=('jmle', 'pairwise'), help="Rasch baholash usuli")
+    parser.add_argument('--max-memory-mb', type=float, default=None, help="Rasch iteratsiyalari uchun xotira chegarasi")
+    parser.add_argument('--bank-mode', default=ITEM_BANK_MODE, choices=('off', 'warm', 'anchor'),
+                        help="Savollar banki rejimi")
+    args = parser.parse_args(argv)
+
+    if not os.path.isdir(args.input_dir):
+        parser.error(f"Katalog topilmadi: {args.input_dir}")
+    formats = [name.strip() for name in args.formats.split(',') if name.strip()]
+
+    def report(done, total, result):
+        name = Path(result['file']).name
+        if result['status'] == 'ok':
+            print(f"[{done}/{total}] {name}: {result['students']} talaba, {result['seconds']:.2f}s")
+        else:
+            print(f"[{done}/{total}] {name}: XATOLIK - {result['error']}")
+
+    summary = run_batch(
+        args.input_dir, args.output, workers=args.workers, formats=formats, recursive=args.recursive,
+        estimator=args.estimator, max_memory_mb=args.max_memory_mb, bank_mode=args.bank_mode, on_result=report
+    )
+
+    print(
+        f"\nJami: {summary['files']} fayl ({summary['succeeded']} muvaffaqiyatli, {summary['failed']} xato), "
+        f"{summary['students']} talaba, {summary['seconds']:.2f}s, {summary['workers']} jarayon\n"
+        f"O'tkazuvchanlik: {summary['files_per_second']:.2f} fayl/s, "
+        f"{summary['students_per_second']:.1f} talaba/s\n"
+        f"Natijalar: {Path(args.output).resolve()}"
+    )
+    return 0 if summary['failed'] == 0 else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,294 @@
+#!/usr/bin/env python3
+"""
+Job Queue
+Tahlil ishlarining doimiy (SQLite) navbati - qayta ishga tushishda ishlar yo'qolmaydi.
+
+Har bir ish uchun yuklangan fayl, natijalar (pickle) va tayyor Excel/PDF fayllar
+jobs_dir/<job_id>/ papkasida saqlanadi. Jadvalda holat, progress, urinishlar soni
+va fayllar joylashuvi yoziladi. recover() to'xtab qolgan ishlarni qaytadan navbatga qo'yadi.
+"""
+
+import json
+import os
+import pickle
+import shutil
+import sqlite3
+import threading
+import uuid
+from datetime import datetime, timedelta
+
+# Ish holatlari
+JOB_QUEUED = 'queued'
+JOB_RUNNING = 'running'
+JOB_COMPLETED = 'completed'
+JOB_FAILED = 'failed'
+
+ARTIFACT_FILES = {
+    'input': 'input',
+    'results': 'results.pkl',
+    'excel': 'results.xlsx',
+    'excel_charts': 'results_charts.xlsx',
+    'pdf': 'results.pdf',
+    'stats_pdf': 'statistics.pdf',
+    'diagrams': 'diagrams.png',
+    'grade_chart': 'grade_chart.png',
+    'ability_chart': 'ability_chart.png',
+    'difficulty_chart': 'difficulty_chart.png',
+}
+
+
+class JobQueue:
+    def __init__(self, db_file, jobs_dir, max_attempts=3):
+        self.db_file = str(db_file)
+        self.jobs_dir = str(jobs_dir)
+        self.max_attempts = max(1, int(max_attempts))
+        os.makedirs(self.jobs_dir, exist_ok=True)
+        # Thread-local storage for connections
+        self.local = threading.local()
+        self._cleanup_stop = None
+        self.create_tables()
+
+    def connect(self):
+        """Joriy thread uchun baza ulanishi"""
+        if not hasattr(self.local, 'conn') or self.local.conn is None:
+            self.local.conn = sqlite3.connect(self.db_file, timeout=30)
+            self.local.conn.row_factory = sqlite3.Row
+        return self.local.conn
+
+    def close(self):
+        """Joriy thread ulanishini yopish"""
+        if hasattr(self.local, 'conn') and self.local.conn:
+            self.local.conn.close()
+            self.local.conn = None
+
+    def create_tables(self):
+        conn = self.connect()
+        conn.execute('''
+        CREATE TABLE IF NOT EXISTS jobs (
+            job_id TEXT PRIMARY KEY,
+            session_id TEXT,
+            owner TEXT,
+            origin TEXT,
+            status TEXT,
+            progress INTEGER DEFAULT 0,
+            message TEXT,
+            attempts INTEGER DEFAULT 0,
+            options TEXT,
+            meta TEXT,
+            error TEXT,
+            created_at TEXT,
+            updated_at TEXT
+        )
+        ''')
+        conn.execute('CREATE INDEX IF NOT EXISTS idx_jobs_session ON jobs (session_id)')
+        conn.execute('CREATE INDEX IF NOT EXISTS idx_jobs_status ON jobs (status)')
+        conn.commit()
+        self.close()
+
+    # --- fayllar ---
+
+    def job_dir(self, job_id):
+        return os.path.join(self.jobs_dir, job_id)
+
+    def artifact_path(self, job_id, name):
+        """Ish faylining yo'li (fayl mavjud bo'lmasligi mumkin)"""
+        return os.path.join(self.job_dir(job_id), ARTIFACT_FILES[name])
+
+    def has_artifact(self, job_id, name):
+        return os.path.exists(self.artifact_path(job_id, name))
+
+    def read_artifact(self, job_id, name):
+        """Fayl baytlari yoki None"""
+        path = self.artifact_path(job_id, name)
+        if not os.path.exists(path):
+            return None
+        with open(path, 'rb') as f:
+            return f.read()
+
+    def save_artifact(self, job_id, name, data):
+        """Faylni atomar yozish (vaqtinchalik fayl + rename)"""
+        path = self.artifact_path(job_id, name)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, 'wb') as f:
+            f.write(data)
+        os.replace(tmp_path, path)
+        return path
+
+    def remove_artifact(self, job_id, name):
+        """Eskirgan faylni o'chirish (masalan, qayta baholashdan keyingi hisobotlar)"""
+        try:
+            os.remove(self.artifact_path(job_id, name))
+        except FileNotFoundError:
+            pass
+
+    # --- ishlar ---
+
+    def enqueue(self, source, session_id, owner=None, origin='web', options=None, meta=None):
+        """
+        Yangi ishni navbatga qo'shish.
+
+        Args:
+            source: Fayl baytlari yoki fayl yo'li (diskka nusxalanadi)
+            session_id: analysis_service sessiyasi
+            owner: Foydalanuvchi (bot user_id yoki web manzil)
+            origin: 'bot' yoki 'web'
+            options: Tahlil parametrlari (estimator, exam_key, ...)
+            meta: Natijani yetkazish uchun ma'lumotlar (chat_id va h.k.)
+        """
+        job_id = uuid.uuid4().hex
+        if isinstance(source, (bytes, bytearray)):
+            self.save_artifact(job_id, 'input', bytes(source))
+        else:
+            os.makedirs(self.job_dir(job_id), exist_ok=True)
+            shutil.copyfile(str(source), self.artifact_path(job_id, 'input'))
+
+        now = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        conn = self.connect()
+        conn.execute(
+            "INSERT INTO jobs (job_id, session_id, owner, origin, status, progress, message, attempts, "
+            "options, meta, created_at, updated_at) VALUES (?, ?, ?, ?, ?, 0, ?, 0, ?, ?, ?, ?)",
+            (job_id, session_id, None if owner is None else str(owner), origin, JOB_QUEUED,
+             'Navbatda...', json.dumps(options or {}), json.dumps(meta or {}), now, now)
+        )
+        conn.commit()
+        return job_id
+
+    def _update(self, job_id, **fields):
+        fields['updated_at'] = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        columns = ', '.join(f"{name} = ?" for name in fields)
+        conn = self.connect()
+        conn.execute(f"UPDATE jobs SET {columns} WHERE job_id = ?", (*fields.values(), job_id))
+        conn.commit()
+
+    def mark_running(self, job_id):
+        """Ish bajarila boshladi - urinishlar soni oshiriladi"""
+        conn = self.connect()
+        conn.execute(
+            "UPDATE jobs SET status = ?, attempts = attempts + 1, message = ?, updated_at = ? WHERE job_id = ?",
+            (JOB_RUNNING, 'Tahlil qilinmoqda...', datetime.now().strftime("%Y-%m-%d %H:%M:%S"), job_id)
+        )
+        conn.commit()
+
+    def update_progress(self, job_id, percent, message):
+        self._update(job_id, progress=int(percent), message=message)
+
+    def complete(self, job_id, results):
+        """Natijalarni diskka yozish va ishni yakunlash"""
+        self.save_artifact(job_id, 'results', pickle.dumps(results, protocol=pickle.HIGHEST_PROTOCOL))
+        self._update(job_id, status=JOB_COMPLETED, progress=100, message='Tahlil yakunlandi!', error=None)
+
+    def fail(self, job_id, error, retry=True):
+        """
+        Ish xatolik bilan tugadi. retry=True va urinishlar tugamagan bo'lsa ish navbatga qaytadi
+        (worker jarayoni to'xtagan holatlar uchun; fayldagi xatolar qayta urinilmaydi).
+
+        Returns:
+            bool: True - ish qayta urinish uchun navbatda
+        """
+        job = self.get(job_id)
+        if job is None:
+            return False
+        retry = retry and job['attempts'] < self.max_attempts
+        self._update(
+            job_id,
+            status=JOB_QUEUED if retry else JOB_FAILED,
+            progress=0,
+            message='Qayta urinish kutilmoqda...' if retry else f'Xatolik: {error}',
+            error=str(error)
+        )
+        return retry
+
+    def load_results(self, job_id):
+        """Yakunlangan ish natijalari yoki None"""
+        data = self.read_artifact(job_id, 'results')
+        return pickle.loads(data) if data is not None else None
+
+    def _row_to_job(self, row):
+        if row is None:
+            return None
+        job = dict(row)
+        job['options'] = json.loads(job['options'] or '{}')
+        job['meta'] = json.loads(job['meta'] or '{}')
+        return job
+
+    def get(self, job_id):
+        conn = self.connect()
+        row = conn.execute("SELECT * FROM jobs WHERE job_id = ?", (job_id,)).fetchone()
+        return self._row_to_job(row)
+
+    def get_by_session(self, session_id):
+        """Sessiyaning oxirgi ishi"""
+        conn = self.connect()
+        row = conn.execute(
+            "SELECT * FROM jobs WHERE session_id = ? ORDER BY created_at DESC LIMIT 1", (session_id,)
+        ).fetchone()
+        return self._row_to_job(row)
+
+    def recover(self, origin=None):
+        """
+        Qayta ishga tushishda: 'running' holatida qolgan ishlar (jarayon to'xtagan)
+        navbatga qaytariladi yoki urinishlar tugagan bo'lsa 'failed' bo'ladi.
+        origin berilsa faqat shu manbadagi ('bot' yoki 'web') ishlar olinadi - bot va
+        web app bitta bazadan foydalanganda bir-birining ishlarini olmaydi.
+
+        Returns:
+            list: Qayta bajarilishi kerak bo'lgan ishlar (yaratilish tartibida)
+        """
+        conn = self.connect()
+        now = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        origin_filter, origin_args = ("AND origin = ?", (origin,)) if origin else ("", ())
+        conn.execute(
+            f"UPDATE jobs SET status = ?, message = ?, updated_at = ? WHERE status = ? AND attempts >= ? {origin_filter}",
+            (JOB_FAILED, 'Xatolik: jarayon to\'xtatildi', now, JOB_RUNNING, self.max_attempts, *origin_args)
+        )
+        conn.execute(
+            f"UPDATE jobs SET status = ?, message = ?, updated_at = ? WHERE status = ? {origin_filter}",
+            (JOB_QUEUED, 'Navbatda...', now, JOB_RUNNING, *origin_args)
+        )
+        conn.commit()
+        rows = conn.execute(
+            f"SELECT * FROM jobs WHERE status = ? {origin_filter} ORDER BY created_at", (JOB_QUEUED, *origin_args)
+        ).fetchall()
+        return [self._row_to_job(row) for row in rows]
+
+    def cleanup(self, max_age_days=7):
+        """Eski yakunlangan/xato ishlarni va ularning fayllarini o'chirish"""
+        cutoff = (datetime.now() - timedelta(days=max_age_days)).strftime("%Y-%m-%d %H:%M:%S")
+        conn = self.connect()
+        rows = conn.execute(
+            "SELECT job_id FROM jobs WHERE status IN (?, ?) AND updated_at < ?",
+            (JOB_COMPLETED, JOB_FAILED, cutoff)
+        ).fetchall()
+        for row in rows:
+            shutil.rmtree(self.job_dir(row['job_id']), ignore_errors=True)
+        conn.executemany("DELETE FROM jobs WHERE job_id = ?", [(row['job_id'],) for row in rows])
+        conn.commit()
+        return len(rows)
+
+    def start_cleanup(self, max_age_days=7, interval_seconds=3600):
+        """
+        Eski ishlarni fon thread'ida davriy tozalash (birinchisi darhol).
+        Qayta chaqirilsa yangi thread ochilmaydi.
+        """
+        if self._cleanup_stop is not None:
+            return
+        self._cleanup_stop = stop = threading.Event()
+
+        def run():
+            while True:
+                try:
+                    self.cleanup(max_age_days)
+                except Exception:
+                    # Tozalash xatosi ishlar navbatini to'xtatmasligi kerak
+                    pass
+                if stop.wait(interval_seconds):
+                    break
+            self.close()
+
+        threading.Thread(target=run, name='job-queue-cleanup', daemon=True).start()
+
+    def stop_cleanup(self):
+        if self._cleanup_stop is not None:
+            self._cleanup_stop.set()
+            self._cleanup_stop = None
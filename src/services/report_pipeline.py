@@ -0,0 +1,179 @@
+#!/usr/bin/env python3
+"""
+Report Pipeline
+Hisobotlarni (Excel, PDF, statistika PDF, diagrammalar) jarayonlar hovuzida parallel chizish.
+
+matplotlib va reportlab GIL ni deyarli bo'shatmaydi, shuning uchun bir-biriga bog'liq
+bo'lmagan hisobotlar alohida jarayonlarda chiziladi. Hovuz birinchi so'rovda ochiladi
+va ochiq qoladi - har bir worker og'ir modullarni bir marta yuklaydi. render() har bir
+hisobotni tayyor bo'lishi bilan qaytaradi: "barcha hisobotlar" kechikishi eng sekin
+bitta hisobotga teng bo'ladi, ularning yig'indisiga emas.
+"""
+
+import io
+import logging
+import multiprocessing as mp
+import threading
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, as_completed
+from concurrent.futures.process import BrokenProcessPool
+from pathlib import Path
+import sys
+
+# Add src directory to Python path
+src_dir = Path(__file__).parent.parent
+sys.path.insert(0, str(src_dir))
+# config paketi loyiha ildizida
+if str(src_dir.parent) not in sys.path:
+    sys.path.append(str(src_dir.parent))
+
+from config.settings import REPORT_WORKERS
+
+logger = logging.getLogger(__name__)
+
+# Hisobot turlari (ArtifactManager va job_queue dagi nomlar)
+REPORT_ARTIFACTS = ('excel', 'excel_charts', 'pdf', 'stats_pdf', 'diagrams', 'grade_chart', 'ability_chart', 'difficulty_chart')
+
+# Har bir hisobot uchun kerakli natijalar maydonlari - worker'ga faqat shular yuboriladi
+ARTIFACT_FIELDS = {
+    'excel': ('results_df', 'df_cleaned', 'item_difficulties', 'grade_counts', 'score_table'),
+    'excel_charts': ('results_df', 'grade_counts', 'ability_estimates', 'df_cleaned', 'item_difficulties',
+                     'score_table'),
+    'pdf': ('results_df', 'score_table'),
+    'stats_pdf': ('results_df', 'grade_counts', 'ability_estimates'),
+    'diagrams': ('item_difficulties', 'grade_counts'),
+    'grade_chart': ('grade_counts',),
+    'ability_chart': ('ability_estimates',),
+    'difficulty_chart': ('item_difficulties', 'df_cleaned'),
+}
+# Ko'p varaqli ish kitobida varaqlar bo'yicha chiziladigan hisobotlar va varaq maydonlari
+SHEET_ARTIFACTS = ('excel', 'excel_charts', 'pdf')
+SHEET_FIELDS = ('results_df', 'score_table')
+
+
+def _init_worker():
+    """Worker jarayonini tayyorlash: hisobot modullari bir marta yuklanadi"""
+    import services.analysis_service  # noqa: F401
+    import bot.charts  # noqa: F401
+
+
+def artifact_payload(name, results):
+    """
+    Hisobot uchun natijalarning kerakli qismi (jarayonga uzatiladigan hajm kichik bo'lishi uchun).
+    Ko'p varaqli ish kitobida Excel/PDF faqat varaqlar jadvallari va baholar tartibini oladi.
+    """
+    if name not in ARTIFACT_FIELDS:
+        raise ValueError(f"Noma'lum hisobot turi: {name}")
+    if results.get('sheets') and name in SHEET_ARTIFACTS:
+        return {
+            'grade_counts': results['grade_counts'],
+            'sheets': {
+                sheet_name: {field: sheet[field] for field in SHEET_FIELDS if field in sheet}
+                for sheet_name, sheet in results['sheets'].items()
+            }
+        }
+    return {field: results[field] for field in ARTIFACT_FIELDS[name] if field in results}
+
+
+def build_artifact(name, results):
+    """
+    Bitta hisobotni yaratish (worker jarayonida yoki joriy jarayonda).
+
+    Returns:
+        Fayl baytlari yoki None
+    """
+    from services.analysis_service import build_excel_report, build_pdf_report
+    from data_processing.data_processor import prepare_statistics_pdf
+    from bot import charts
+
+    if name == 'excel':
+        buffer = build_excel_report(results)
+    elif name == 'excel_charts':
+        buffer = build_excel_report(results, charts=True)
+    elif name == 'pdf':
+        buffer = build_pdf_report(results)
+    elif name == 'stats_pdf':
+        buffer = prepare_statistics_pdf(results['results_df'], results['grade_counts'], results['ability_estimates'])
+    elif name == 'diagrams':
+        return charts.diagrams_png(results['item_difficulties'], results['grade_counts'])
+    elif name == 'grade_chart':
+        return charts.grade_distribution_png(results['grade_counts'])
+    elif name == 'ability_chart':
+        return charts.ability_distribution_png(results['ability_estimates'])
+    elif name == 'difficulty_chart':
+        beta_values = results['item_difficulties']
+        return charts.item_difficulty_png(beta_values, charts.percent_correct(results.get('df_cleaned'), len(beta_values)))
+    else:
+        raise ValueError(f"Noma'lum hisobot turi: {name}")
+    return buffer.getvalue() if buffer is not None else None
+
+
+class ReportPipeline:
+    """
+    Hisobotlarni parallel yaratish.
+
+    Args:
+        max_workers: Jarayonlar soni (1 - hisobotlar joriy jarayonda ketma-ket)
+    """
+
+    def __init__(self, max_workers=REPORT_WORKERS):
+        self.max_workers = max(1, int(max_workers))
+        self._executor = None
+        self._lock = threading.Lock()
+
+    def build(self, name, results):
+        """Bitta hisobot (BytesIO yoki None) - hovuzda yaratiladi va natija kutiladi"""
+        if self.max_workers == 1:
+            data = build_artifact(name, results)
+        else:
+            try:
+                data = self._get_executor().submit(build_artifact, name, artifact_payload(name, results)).result()
+            except BrokenProcessPool:
+                # Worker to'xtadi - keyingi so'rov yangi hovuz ochadi
+                self._reset()
+                raise
+        return io.BytesIO(data) if data is not None else None
+
+    def render(self, get, names=REPORT_ARTIFACTS):
+        """
+        Bir nechta hisobotni parallel tayyorlash, har birini tayyor bo'lishi bilan qaytarish.
+
+        Args:
+            get: callback(name) -> BytesIO yoki None (masalan ArtifactManager orqali -
+                 keshdagi fayllar darhol qaytadi, yangilari build() bilan yaratiladi)
+            names: Hisobot turlari
+
+        Yields:
+            (name, BytesIO yoki None) - tayyor bo'lish tartibida
+        """
+        names = list(names)
+        if not names:
+            return
+        with ThreadPoolExecutor(max_workers=len(names), thread_name_prefix='report') as threads:
+            futures = {threads.submit(get, name): name for name in names}
+            for future in as_completed(futures):
+                name = futures[future]
+                try:
+                    data = future.result()
+                except Exception as e:
+                    logger.error(f"Hisobot yaratishda xatolik ({name}): {e}")
+                    data = None
+                yield name, data
+
+    def shutdown(self):
+        self._reset()
+
+    def _get_executor(self):
+        with self._lock:
+            if self._executor is None:
+                self._executor = ProcessPoolExecutor(
+                    max_workers=self.max_workers,
+                    mp_context=mp.get_context('spawn'),
+                    initializer=_init_worker
+                )
+            return self._executor
+
+    def _reset(self):
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=False, cancel_futures=True)
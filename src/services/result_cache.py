@@ -0,0 +1,165 @@
+#!/usr/bin/env python3
+"""
+Result Cache
+Bir xil fayl qayta yuborilganda tahlilni takrorlamaslik uchun kontent bo'yicha kesh.
+
+Kalit - fayl baytlari (yoki DataFrame qiymatlari) va tahlil parametrlarining sha256 xeshi.
+Yozuvlar LRU tartibida saqlanadi va umumiy hajm MB chegarasidan oshsa eng eski
+yozuvlar o'chiriladi. Natijalar bilan birga tayyor Excel/PDF baytlari ham saqlanadi.
+"""
+
+import hashlib
+import threading
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
+
+
+def _hash_params(digest, params):
+    """Tahlil parametrlarini xeshga qo'shish (estimator, exam_key va h.k.)"""
+    for name in sorted(params):
+        digest.update(f"\n{name}={params[name]!r}".encode('utf-8'))
+
+
+def key_for_bytes(data, **params):
+    """Fayl baytlari bo'yicha kesh kaliti"""
+    digest = hashlib.sha256(data)
+    _hash_params(digest, params)
+    return digest.hexdigest()
+
+
+def key_for_frame(df, **params):
+    """DataFrame qiymatlari, ustunlari va turlari bo'yicha kesh kaliti"""
+    digest = hashlib.sha256()
+    digest.update(repr([(str(col), str(dtype)) for col, dtype in df.dtypes.items()]).encode('utf-8'))
+    digest.update(pd.util.hash_pandas_object(df, index=True).to_numpy().tobytes())
+    _hash_params(digest, params)
+    return digest.hexdigest()
+
+
+def estimate_size(value):
+    """Obyektning taxminiy xotira hajmi (bayt)"""
+    if isinstance(value, pd.DataFrame):
+        return int(value.memory_usage(deep=True).sum())
+    if isinstance(value, pd.Series):
+        return int(value.memory_usage(deep=True))
+    if isinstance(value, np.ndarray):
+        return int(value.nbytes)
+    # Massivli model obyektlari (Calibration, ScoreTable) o'z hajmini beradi
+    if hasattr(value, 'nbytes'):
+        return int(value.nbytes)
+    if isinstance(value, (bytes, bytearray)):
+        return len(value)
+    if isinstance(value, dict):
+        return sum(estimate_size(v) for v in value.values()) + 64 * len(value)
+    if isinstance(value, (list, tuple)):
+        return sum(estimate_size(v) for v in value) + 8 * len(value)
+    return 64
+
+
+class ResultCache:
+    """
+    Thread-safe LRU kesh, hajm chegarasi MB da.
+
+    Har bir yozuv: {'results': dict, 'artifacts': {nom: bytes}, 'size': int}
+    """
+
+    def __init__(self, max_memory_mb=256):
+        self.max_bytes = int(max_memory_mb * 1024 * 1024)
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.current_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key):
+        """Kesh natijalari yoki None (topilsa yozuv eng yangi bo'ladi)"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry['results']
+
+    def put(self, key, results):
+        """Tahlil natijalarini saqlash"""
+        size = estimate_size(results)
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+            if size > self.max_bytes:
+                return False
+            self._entries[key] = {'results': results, 'artifacts': {}, 'size': size}
+            self.current_bytes += size
+            self._evict()
+            return True
+
+    def get_artifact(self, key, name):
+        """Tayyor fayl baytlari (masalan 'excel', 'pdf') yoki None"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            self._entries.move_to_end(key)
+            return entry['artifacts'].get(name)
+
+    def put_artifact(self, key, name, data):
+        """Fayl baytlarini mavjud yozuvga biriktirish"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return False
+            previous = entry['artifacts'].get(name)
+            delta = len(data) - (len(previous) if previous is not None else 0)
+            entry['artifacts'][name] = data
+            entry['size'] += delta
+            self.current_bytes += delta
+            self._entries.move_to_end(key)
+            self._evict()
+            return True
+
+    def invalidate(self, key):
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.current_bytes = 0
+
+    def stats(self):
+        """Kesh statistikasi"""
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                'entries': len(self._entries),
+                'size_mb': round(self.current_bytes / (1024 * 1024), 2),
+                'max_mb': round(self.max_bytes / (1024 * 1024), 2),
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': round(self.hits / total * 100, 2) if total else 0.0,
+                'evictions': self.evictions
+            }
+
+    def __contains__(self, key):
+        with self._lock:
+            return key in self._entries
+
+    def __len__(self):
+        return len(self._entries)
+
+    def _remove(self, key):
+        entry = self._entries.pop(key)
+        self.current_bytes -= entry['size']
+
+    def _evict(self):
+        # Eng eski (LRU) yozuvlarni chegaraga sig'guncha o'chirish
+        while self.current_bytes > self.max_bytes and self._entries:
+            key = next(iter(self._entries))
+            self._remove(key)
+            self.evictions += 1
@@ -0,0 +1,152 @@
+#!/usr/bin/env python3
+"""
+Session Store
+TTL va xotira chegarasi bilan cheklangan sessiyalar ombori.
+
+Oddiy dict o'rniga ishlatiladi (bir xil interfeys): har bir sessiyaning taxminiy
+hajmi (bayt) hisoblanadi, muddati o'tgan sessiyalar o'chiriladi va umumiy hajm
+chegaradan oshsa eng uzoq ishlatilmagan (LRU) sessiyalar chiqarib yuboriladi.
+"""
+
+import threading
+import time
+from collections import OrderedDict
+from collections.abc import MutableMapping
+
+from services.result_cache import estimate_size
+
+
+class SessionStore(MutableMapping):
+    """
+    Thread-safe, TTL + LRU sessiyalar ombori.
+
+    Args:
+        ttl_seconds: Oxirgi murojaatdan keyin sessiya yashash muddati (None - cheksiz)
+        max_memory_mb: Barcha sessiyalar uchun umumiy xotira chegarasi (None - cheksiz)
+        name: Metrikalar uchun ombor nomi
+        on_evict: callback(name, reason, nbytes) - har bir chiqarib yuborishda chaqiriladi
+    """
+
+    def __init__(self, ttl_seconds=3600, max_memory_mb=512, name='sessions', on_evict=None):
+        self.ttl_seconds = ttl_seconds
+        self.max_bytes = int(max_memory_mb * 1024 * 1024) if max_memory_mb else None
+        self.name = name
+        self.on_evict = on_evict
+        self._entries = OrderedDict()  # key -> [value, size, last_access]
+        self._lock = threading.RLock()
+        self.current_bytes = 0
+        self.evictions = {'ttl': 0, 'memory': 0}
+        self.evicted_bytes = 0
+
+    def __getitem__(self, key):
+        with self._lock:
+            entry = self._entries[key]
+            if self._expired(entry, time.time()):
+                self._evict_key(key, 'ttl')
+                raise KeyError(key)
+            entry[2] = time.time()
+            self._entries.move_to_end(key)
+            return entry[0]
+
+    def __setitem__(self, key, value):
+        with self._lock:
+            if key in self._entries:
+                self._drop(key)
+            size = estimate_size(value)
+            self._entries[key] = [value, size, time.time()]
+            self.current_bytes += size
+            self._enforce_limits(protect=key)
+
+    def __delitem__(self, key):
+        with self._lock:
+            self._drop(key)
+
+    def __iter__(self):
+        with self._lock:
+            self.purge_expired()
+            return iter(list(self._entries))
+
+    def __len__(self):
+        with self._lock:
+            return len(self._entries)
+
+    def refresh(self, key):
+        """
+        Sessiya hajmini qayta hisoblash.
+        Ichki qiymatlar joyida o'zgartirilganda (masalan natijalar qo'shilganda) chaqiriladi.
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return
+            size = estimate_size(entry[0])
+            self.current_bytes += size - entry[1]
+            entry[1] = size
+            entry[2] = time.time()
+            self._entries.move_to_end(key)
+            self._enforce_limits(protect=key)
+
+    def size_of(self, key):
+        """Sessiyaning hisoblangan hajmi (bayt)"""
+        with self._lock:
+            entry = self._entries.get(key)
+            return entry[1] if entry is not None else 0
+
+    def purge_expired(self):
+        """Muddati o'tgan sessiyalarni o'chirish, o'chirilganlar sonini qaytaradi"""
+        if not self.ttl_seconds:
+            return 0
+        with self._lock:
+            now = time.time()
+            # LRU tartibi: birinchi muddati o'tmagan yozuvdan keyingilari ham yangi
+            expired = []
+            for key, entry in self._entries.items():
+                if not self._expired(entry, now):
+                    break
+                expired.append(key)
+            for key in expired:
+                self._evict_key(key, 'ttl')
+            return len(expired)
+
+    def stats(self):
+        """Ombor metrikalari"""
+        with self._lock:
+            return {
+                'name': self.name,
+                'sessions': len(self._entries),
+                'size_mb': round(self.current_bytes / (1024 * 1024), 2),
+                'max_mb': round(self.max_bytes / (1024 * 1024), 2) if self.max_bytes else None,
+                'ttl_seconds': self.ttl_seconds,
+                'evictions_ttl': self.evictions['ttl'],
+                'evictions_memory': self.evictions['memory'],
+                'evicted_mb': round(self.evicted_bytes / (1024 * 1024), 2)
+            }
+
+    def _expired(self, entry, now):
+        return bool(self.ttl_seconds) and now - entry[2] > self.ttl_seconds
+
+    def _drop(self, key):
+        value, size, _ = self._entries.pop(key)
+        self.current_bytes -= size
+        return size
+
+    def _evict_key(self, key, reason):
+        size = self._drop(key)
+        self.evictions[reason] += 1
+        self.evicted_bytes += size
+        if self.on_evict:
+            try:
+                self.on_evict(self.name, reason, size)
+            except Exception:
+                pass
+
+    def _enforce_limits(self, protect=None):
+        self.purge_expired()
+        if self.max_bytes is None:
+            return
+        # Joriy sessiya oxirgi bo'lib qoladi - u hech qachon o'zini chiqarib yubormaydi
+        while self.current_bytes > self.max_bytes and len(self._entries) > 1:
+            key = next(iter(self._entries))
+            if key == protect:
+                break
+            self._evict_key(key, 'memory')
@@ -0,0 +1,448 @@
+#!/usr/bin/env python3
+"""
+Analysis Worker Pool
+Tahlil ishlarini alohida jarayonlarda bajarish - bot handler'lari bloklanmaydi.
+
+Handler ishni topshiradi (submit) va darhol qaytadi; progress va natija callback'lar
+orqali keladi. Navbat hajmi (admission control) va har bir foydalanuvchi uchun bir
+vaqtdagi ishlar soni cheklangan.
+"""
+
+import logging
+import multiprocessing as mp
+import queue
+import threading
+from collections import deque
+from concurrent.futures import CancelledError, Future, ProcessPoolExecutor, ThreadPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+logger = logging.getLogger(__name__)
+
+
+class PoolBusyError(Exception):
+    """Navbat to'la - yangi ish qabul qilinmaydi"""
+
+
+class UserLimitError(Exception):
+    """Foydalanuvchining bir vaqtdagi ishlari chegarasi"""
+
+
+def _analysis_job(job_id, source, options, progress_queue):
+    """Worker jarayonida bajariladigan tahlil (natijalar lug'ati qaytariladi)"""
+    from services.analysis_service import run_analysis
+    from models.item_bank import ItemBank
+
+    def report(percent, message):
+        try:
+            progress_queue.put_nowait((job_id, percent, message))
+        except Exception:
+            pass
+
+    options = dict(options)
+    item_bank_path = options.pop('item_bank_path', None)
+    if options.get('bank_mode', 'off') != 'off' and item_bank_path:
+        options['item_bank'] = ItemBank(str(item_bank_path))
+    return run_analysis(source, report, **options)
+
+
+def _sheet_job(source, sheet, options):
+    """Worker jarayonida ish kitobining bitta varag'i (natijalar yoki {'skipped': sabab})"""
+    from services.analysis_service import run_sheet_analysis
+
+    return run_sheet_analysis(source, sheet, **options)
+
+
+class AnalysisWorkerPool:
+    """
+    Tahlil uchun jarayonlar puli.
+
+    Args:
+        service: RaschAnalysisService - sessiya va kesh shu yerda yangilanadi
+        max_workers: Worker jarayonlar soni
+        max_pending: Bir vaqtda qabul qilinadigan ishlar soni (bajarilayotgan + navbatdagi)
+        per_user_limit: Bitta foydalanuvchining bir vaqtdagi ishlari soni
+        job_queue: JobQueue (ixtiyoriy) - ishlar diskda saqlanadi va qayta ishga tushishda tiklanadi
+    """
+
+    def __init__(self, service, max_workers=2, max_pending=20, per_user_limit=1, job_queue=None):
+        self.service = service
+        self.job_queue = job_queue
+        self.max_workers = max(1, int(max_workers))
+        self.max_pending = max(1, int(max_pending))
+        self.per_user_limit = max(1, int(per_user_limit))
+
+        # Bot ko'p oqimli jarayon - fork o'rniga spawn xavfsizroq
+        self._context = mp.get_context('spawn')
+        self._executor = None
+        # on_done/on_error alohida oqimlarda - executor boshqaruv oqimi bloklanmaydi
+        self._callbacks = ThreadPoolExecutor(max_workers=2, thread_name_prefix='analysis-callback')
+        self._manager = None
+        self._progress_queue = None
+        self._listener = None
+
+        self._lock = threading.Lock()
+        self._slots = threading.BoundedSemaphore(self.max_pending)
+        self._user_jobs = {}
+        self._jobs = {}  # job_id -> progress callback
+        self._backlog = deque()  # slot kutayotgan tiklangan ishlar: (job, callback_factory)
+        self._job_counter = 0
+        self._closed = False
+
+    def _ensure_started(self):
+        # Jarayonlar birinchi ishda ishga tushiriladi
+        if self._executor is not None:
+            return
+        self._manager = self._context.Manager()
+        self._progress_queue = self._manager.Queue()
+        self._executor = ProcessPoolExecutor(max_workers=self.max_workers, mp_context=self._context)
+        self._listener = threading.Thread(target=self._listen_progress, name='analysis-progress', daemon=True)
+        self._listener.start()
+
+    def _listen_progress(self):
+        while not self._closed:
+            try:
+                item = self._progress_queue.get(timeout=0.5)
+            except queue.Empty:
+                continue
+            except (EOFError, OSError):
+                break
+            if item is None:
+                break
+            job_id, percent, message = item
+            with self._lock:
+                callback = self._jobs.get(job_id)
+            if callback:
+                try:
+                    callback(percent, message)
+                except Exception as e:
+                    logger.error(f"Progress callback error: {e}")
+
+    def submit(self, user_id, source, session_id, on_progress=None, on_done=None, on_error=None,
+               estimator='jmle', max_memory_mb=None, exam_key=None, origin='bot', meta=None):
+        """
+        Tahlil ishini topshirish.
+
+        Args:
+            user_id: Foydalanuvchi (per-user limit uchun)
+            source: Fayl baytlari, fayl yo'li yoki DataFrame
+            session_id: analysis_service sessiyasi (create_session bilan yaratilgan)
+            on_progress: callback(percent, message)
+            on_done: callback(session_id) - natijalar sessiyaga yozilgandan keyin
+            on_error: callback(session_id, exception)
+            origin, meta: job_queue yozuvi uchun (natijani qayta ishga tushishdan keyin yetkazish)
+
+        Returns:
+            Ish ID si (job_queue bo'lsa uning ID si) yoki kesh topilganda None
+
+        Raises:
+            UserLimitError: foydalanuvchining oldingi ishi hali tugamagan
+            PoolBusyError: navbat to'la
+        """
+        self._admit(user_id)
+
+        try:
+            self.service.sessions[session_id]['status'] = 'queued'
+            self.service.sessions[session_id]['message'] = 'Navbatda...'
+
+            source, cache_key = self.service.prepare_source(source, estimator=estimator, exam_key=exam_key)
+            options = {'estimator': estimator, 'max_memory_mb': max_memory_mb, 'exam_key': exam_key}
+
+            # Doimiy navbat: fayl diskka yoziladi, qayta ishga tushishda ish tiklanadi
+            job_id = None
+            if self.job_queue is not None and isinstance(source, (bytes, bytearray)):
+                job_id = self.job_queue.enqueue(
+                    source, session_id, owner=user_id, origin=origin, options=options, meta=meta
+                )
+                self.service.sessions[session_id]['job_id'] = job_id
+
+            # Kesh: bir xil fayl uchun ishni jarayonga yubormaslik
+            if self.service.load_cached(session_id, cache_key, on_progress):
+                if job_id is not None:
+                    self.job_queue.complete(job_id, self.service.sessions[session_id]['results'])
+                self._release(user_id, None)
+                if on_done:
+                    self._callbacks.submit(self._run_callback, on_done, session_id)
+                return job_id
+
+            if job_id is None:
+                with self._lock:
+                    self._job_counter += 1
+                    job_id = self._job_counter
+
+            self._dispatch(job_id, user_id, source, session_id, cache_key, options,
+                           on_progress, on_done, on_error)
+        except Exception:
+            self._release(user_id, None)
+            raise
+
+        return job_id
+
+    def recover(self, callback_factory=None, origin=None):
+        """
+        Qayta ishga tushishda job_queue dagi tugallanmagan ishlarni qayta bajarish.
+
+        Args:
+            callback_factory: callback_factory(job) -> {'on_progress', 'on_done', 'on_error'}
+                              (natijani foydalanuvchiga yetkazish uchun, ixtiyoriy)
+            origin: Faqat shu manbadagi ishlar ('bot' yoki 'web')
+
+        Navbat to'la bo'lsa qolgan ishlar kutadi va slot bo'shashi bilan topshiriladi.
+
+        Returns:
+            int: Darhol qayta topshirilgan ishlar soni
+        """
+        if self.job_queue is None:
+            return 0
+
+        jobs = self.job_queue.recover(origin=origin)
+        with self._lock:
+            self._backlog.extend((job, callback_factory) for job in jobs)
+        resumed = self._drain_backlog()
+        if resumed:
+            logger.info(f"{resumed} ta tugallanmagan tahlil ishi qayta ishga tushirildi")
+        with self._lock:
+            waiting = len(self._backlog)
+        if waiting:
+            logger.info(f"{waiting} ta tiklangan ish bo'sh slot kutmoqda")
+        return resumed
+
+    def _drain_backlog(self):
+        """
+        Tiklangan ishlarni bo'sh slotlarga topshirish. Navbat to'lsa qolganlari
+        backlog'da kutadi va _release() slot bo'shatganda davom etadi.
+        """
+        resumed = 0
+        while True:
+            with self._lock:
+                if self._closed or not self._backlog:
+                    return resumed
+                job, callback_factory = self._backlog.popleft()
+
+            source = self.job_queue.read_artifact(job['job_id'], 'input')
+            if source is None:
+                self.job_queue.fail(job['job_id'], 'Kirish fayli topilmadi')
+                continue
+
+            user_id = job['owner']
+            try:
+                self._admit(user_id, check_user_limit=False)
+            except PoolBusyError:
+                # Navbat to'la - ish 'queued' holatida qoladi, slot bo'shaganda olinadi
+                with self._lock:
+                    self._backlog.appendleft((job, callback_factory))
+                return resumed
+
+            try:
+                session_id = job['session_id']
+                if session_id not in self.service.sessions:
+                    self.service.create_session(session_id)
+                self.service.sessions[session_id]['job_id'] = job['job_id']
+                self.service.sessions[session_id]['status'] = 'queued'
+
+                options = job['options']
+                _, cache_key = self.service.prepare_source(
+                    source, estimator=options.get('estimator', 'jmle'), exam_key=options.get('exam_key')
+                )
+                callbacks = callback_factory(job) if callback_factory else None
+                callbacks = callbacks or {}
+                self._dispatch(job['job_id'], user_id, source, session_id, cache_key, options,
+                               callbacks.get('on_progress'), callbacks.get('on_done'), callbacks.get('on_error'))
+                resumed += 1
+            except Exception as e:
+                logger.error(f"Job recovery error ({job['job_id']}): {e}")
+                self._release(user_id, None)
+
+    def _admit(self, user_id, check_user_limit=True):
+        with self._lock:
+            if self._closed:
+                raise PoolBusyError("Worker pool yopilgan")
+            if check_user_limit and self._user_jobs.get(user_id, 0) >= self.per_user_limit:
+                raise UserLimitError(f"Foydalanuvchi {user_id} uchun ishlar chegarasi: {self.per_user_limit}")
+            if not self._slots.acquire(blocking=False):
+                raise PoolBusyError(f"Navbat to'la ({self.max_pending} ta ish)")
+            self._user_jobs[user_id] = self._user_jobs.get(user_id, 0) + 1
+
+    def _dispatch(self, job_id, user_id, source, session_id, cache_key, options,
+                  on_progress, on_done, on_error):
+        """Ishni worker jarayoniga yuborish (slot allaqachon olingan)"""
+        with self._lock:
+            self._ensure_started()
+
+            def progress(percent, message):
+                self.service.update_progress(session_id, percent, message)
+                if self.job_queue is not None and isinstance(job_id, str):
+                    self.job_queue.update_progress(job_id, percent, message)
+                if on_progress:
+                    on_progress(percent, message)
+
+            self._jobs[job_id] = progress
+
+        worker_options = dict(options)
+        worker_options['bank_mode'] = self.service.item_bank_mode
+        worker_options['item_bank_path'] = self.service.item_bank_path
+        sheets = self._workbook_sheets(source)
+
+        if self.job_queue is not None and isinstance(job_id, str):
+            self.job_queue.mark_running(job_id)
+        self.service.sessions[session_id]['status'] = 'processing'
+        if len(sheets) > 1:
+            future = self._submit_workbook(source, sheets, worker_options, progress)
+        else:
+            future = self._submit_job(job_id, source, worker_options)
+
+        def finished(fut):
+            self._callbacks.submit(self._complete, fut, job_id, user_id, source, session_id, cache_key,
+                                   options, on_progress, on_done, on_error)
+
+        future.add_done_callback(finished)
+
+    @staticmethod
+    def _workbook_sheets(source):
+        """Fayl baytlaridagi varaqlar (o'qib bo'lmasa [] - xato tahlil ishida chiqadi)"""
+        if not isinstance(source, (bytes, bytearray)):
+            return []
+        from data_processing.ingestion import list_sheets
+        try:
+            return list_sheets(source)
+        except Exception:
+            return []
+
+    def _submit_job(self, job_id, source, worker_options):
+        return self._submit(_analysis_job, job_id, source, worker_options, self._progress_queue)
+
+    def _submit_workbook(self, source, sheets, worker_options, progress):
+        """
+        Ko'p varaqli ish kitobi: har bir varaq umumiy pulga alohida ish sifatida yuboriladi
+        (ichki jarayonlar puli ochilmaydi) va natijalar join_sheet_outcomes bilan birlashtiriladi.
+        Ish uchun bitta slot olinadi; qaytgan Future oddiy ishniki kabi _complete'ga uzatiladi.
+        """
+        from services.analysis_service import join_sheet_outcomes
+
+        workbook = Future()
+        outcomes = {}
+        lock = threading.Lock()
+
+        def record(sheet, fut):
+            try:
+                outcome = fut.result()
+            except (BrokenProcessPool, CancelledError) as e:
+                # Jarayon to'xtadi - fayldagi xato emas, butun ish qayta urinilishi kerak
+                with lock:
+                    if not workbook.done():
+                        workbook.set_exception(e if isinstance(e, BrokenProcessPool)
+                                               else BrokenProcessPool("Varaq ishi bekor qilindi"))
+                return
+            except Exception as e:
+                outcome = {'skipped': str(e)}
+            with lock:
+                if workbook.done():
+                    return
+                outcomes[sheet] = outcome
+                done = len(outcomes)
+            progress(5 + int(90 * done / len(sheets)), f"{done}/{len(sheets)} varaq tahlil qilindi")
+            if done < len(sheets):
+                return
+            try:
+                result = join_sheet_outcomes(sheets, outcomes)
+            except Exception as e:
+                workbook.set_exception(e)
+            else:
+                workbook.set_result(result)
+
+        for sheet in sheets:
+            future = self._submit(_sheet_job, source, sheet, worker_options)
+            # Birlashtirish callback oqimida - executor boshqaruv oqimi bloklanmaydi
+            future.add_done_callback(lambda fut, sheet=sheet: self._callbacks.submit(record, sheet, fut))
+        return workbook
+
+    def _submit(self, fn, *args):
+        executor = self._executor
+        try:
+            return executor.submit(fn, *args)
+        except BrokenProcessPool:
+            # Worker jarayoni to'satdan to'xtagan (masalan OOM) - pul bir marta qayta yaratiladi:
+            # boshqa oqim allaqachon almashtirgan bo'lsa, yangisi ishlatiladi
+            with self._lock:
+                if self._executor is executor:
+                    logger.warning("Worker pool buzilgan, qayta yaratilmoqda")
+                    self._executor = ProcessPoolExecutor(max_workers=self.max_workers, mp_context=self._context)
+                    broken = executor
+                else:
+                    broken = None
+                executor = self._executor
+            if broken is not None:
+                # Buzilgan pulning boshqaruv oqimi va navbatlari bo'shatiladi
+                broken.shutdown(wait=False, cancel_futures=True)
+            return executor.submit(fn, *args)
+
+    def _complete(self, future, job_id, user_id, source, session_id, cache_key, options,
+                  on_progress, on_done, on_error):
+        durable = self.job_queue is not None and isinstance(job_id, str)
+        try:
+            results = future.result()
+            if durable:
+                self.job_queue.complete(job_id, results)
+            self.service.store_results(session_id, results, cache_key)
+        except Exception as e:
+            # Worker to'xtagan bo'lsa (fayl xatosi emas) doimiy navbatdagi ish qayta yuboriladi
+            if durable and self.job_queue.fail(job_id, e, retry=isinstance(e, BrokenProcessPool)):
+                logger.warning(f"Job {job_id} xatolik bilan tugadi, qayta urinilmoqda: {e}")
+                try:
+                    self._dispatch(job_id, user_id, source, session_id, cache_key, options,
+                                   on_progress, on_done, on_error)
+                    return
+                except Exception as dispatch_error:
+                    e = dispatch_error
+            self.service.fail_session(session_id, e)
+            self._release(user_id, job_id)
+            if on_error:
+                self._run_callback(on_error, session_id, e)
+            return
+        self._release(user_id, job_id)
+        if on_done:
+            self._run_callback(on_done, session_id)
+
+    @staticmethod
+    def _run_callback(callback, *args):
+        try:
+            callback(*args)
+        except Exception as e:
+            logger.error(f"Analysis callback error: {e}")
+
+    def _release(self, user_id, job_id):
+        with self._lock:
+            if job_id is not None:
+                self._jobs.pop(job_id, None)
+            remaining = self._user_jobs.get(user_id, 0) - 1
+            if remaining > 0:
+                self._user_jobs[user_id] = remaining
+            else:
+                self._user_jobs.pop(user_id, None)
+            resume = bool(self._backlog) and not self._closed
+        self._slots.release()
+        if resume:
+            # Tiklangan ishlar bo'shagan slotni oladi (callback oqimida - chaqiruvchi bloklanmaydi)
+            try:
+                self._callbacks.submit(self._drain_backlog)
+            except RuntimeError:
+                pass
+
+    def stats(self):
+        """Pul holati"""
+        with self._lock:
+            active = sum(self._user_jobs.values())
+            return {
+                'max_workers': self.max_workers,
+                'max_pending': self.max_pending,
+                'active_jobs': active,
+                'active_users': len(self._user_jobs)
+            }
+
+    def shutdown(self, wait=True):
+        with self._lock:
+            self._closed = True
+        if self._executor is not None:
+            self._executor.shutdown(wait=wait)
+        self._callbacks.shutdown(wait=wait)
+        if self._manager is not None:
+            self._manager.shutdown()
@@ -34,6 +34,10 @@ def validate_excel_file(file_path: str) -> tuple[bool, str]:
     """
     Validate Excel file format and content
     
+    Fayl tahlil bilan bir xil ingestion orqali o'qiladi; batafsil natijalar
+    (tuzilma, ogohlantirishlar) kerak bo'lsa read_exam_table() ning ExamTable
+    obyektidan foydalaning - fayl qayta o'qilmaydi.
+    
     Args:
         file_path: Path to Excel file
         
@@ -41,34 +45,15 @@ def validate_excel_file(file_path: str) -> tuple[bool, str]:
         Tuple of (is_valid, error_message)
     """
     try:
-        import pandas as pd
+        from data_processing.ingestion import read_exam_table
         
         # Check if file exists
         if not file_path or not os.path.exists(file_path):
             return False, "Fayl topilmadi"
         
-        # Try to read the file
-        df = pd.read_excel(file_path)
-        
-        # Check if file is empty
-        if df.empty:
-            return False, "Fayl bo'sh"
-        
-        # Check minimum requirements
-        if len(df.columns) < 2:
-            return False, "Faylda kamida 2 ta ustun bo'lishi kerak (talaba ismi + savollar)"
-        
-        if len(df) < 1:
-            return False, "Faylda kamida 1 ta talaba bo'lishi kerak"
-        
-        # Check for valid data types
-        for col in df.columns[1:]:  # Skip first column (student names)
-            if not pd.api.types.is_numeric_dtype(df[col]):
-                # Try to convert to numeric
-                try:
-                    pd.to_numeric(df[col], errors='raise')
-                except:
-                    return False, f"Ustun '{col}' raqamli ma'lumotlar emas"
+        table = read_exam_table(file_path)
+        if not table.is_valid:
+            return False, table.errors[0]
         
         return True, ""
         
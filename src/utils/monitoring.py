@@ -18,6 +18,7 @@ class SimpleMonitor:
         self.error_count = 0
         self.processed_files = 0
         self.total_students = 0
+        self.session_evictions = {}  # store -> {'ttl': n, 'memory': n, 'bytes': n}
         
     def increment_request(self):
         """Increment request counter"""
@@ -32,6 +33,12 @@ class SimpleMonitor:
         self.processed_files += 1
         self.total_students += student_count
         
+    def record_session_eviction(self, store: str, reason: str, nbytes: int = 0):
+        """Record a session evicted from a SessionStore (reason: 'ttl' or 'memory')"""
+        counters = self.session_evictions.setdefault(store, {'ttl': 0, 'memory': 0, 'bytes': 0})
+        counters[reason] = counters.get(reason, 0) + 1
+        counters['bytes'] += nbytes
+        
     def get_uptime(self) -> float:
         """Get bot uptime in seconds"""
         return time.time() - self.start_time
@@ -50,6 +57,7 @@ class SimpleMonitor:
                 'error_rate': self.error_count / max(self.request_count, 1) * 100,
                 'processed_files': self.processed_files,
                 'total_students': self.total_students,
+                'session_evictions': {store: dict(c) for store, c in self.session_evictions.items()},
                 'memory_usage_mb': memory.used / 1024 / 1024,
                 'memory_percent': memory.percent,
                 'cpu_percent': cpu_percent,
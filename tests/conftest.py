@@ -0,0 +1,8 @@
+"""Testlar uchun import yo'llari: loyiha ildizi (config) va src (services, models, ...)"""
+import os
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+for path in (ROOT, os.path.join(ROOT, 'src')):
+    if path not in sys.path:
+        sys.path.insert(0, path)
@@ -0,0 +1,123 @@
+"""Hisobot fayllarini talab bo'yicha yaratish va sessiyada saqlash (ArtifactManager)"""
+import io
+import os
+import threading
+import time
+
+from services.analysis_service import RaschAnalysisService
+from services.artifact_manager import ArtifactManager
+
+SAMPLE_FILE = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'namuna_test_data.xlsx')
+
+
+class Builder:
+    """Har bir chaqiruvni sanaydigan sekin quruvchi"""
+
+    def __init__(self, delay=0.0):
+        self.delay = delay
+        self.calls = 0
+
+    def __call__(self, results):
+        self.calls += 1
+        time.sleep(self.delay)
+        return io.BytesIO(f"report-{results['version']}".encode())
+
+
+def make_manager(builder, sessions=None, changes=None):
+    sessions = {'s1': {'results': {'version': 1}}} if sessions is None else sessions
+    manager = ArtifactManager(sessions.get, {'excel': builder},
+                              on_change=changes.append if changes is not None else None)
+    return manager, sessions
+
+
+def test_built_once_then_served_from_session():
+    builder = Builder()
+    changes = []
+    manager, sessions = make_manager(builder, changes=changes)
+
+    assert manager.get('s1', 'excel').getvalue() == b'report-1'
+    assert manager.get('s1', 'excel').getvalue() == b'report-1'
+    assert builder.calls == 1
+    assert sessions['s1']['artifacts'] == {'excel': b'report-1'}
+    assert manager.stats() == {'hits': 1, 'builds': 1, 'building': 0}
+    assert changes == ['s1']
+
+
+def test_missing_session_or_results():
+    builder = Builder()
+    manager, _ = make_manager(builder, sessions={'empty': {'results': None}})
+    assert manager.get('missing', 'excel') is None
+    assert manager.get('empty', 'excel') is None
+    assert builder.calls == 0
+
+
+def test_concurrent_requests_share_one_build():
+    builder = Builder(delay=0.2)
+    manager, _ = make_manager(builder)
+    outputs = []
+    threads = [threading.Thread(target=lambda: outputs.append(manager.get('s1', 'excel').getvalue()))
+               for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert builder.calls == 1
+    assert outputs == [b'report-1'] * 8
+    assert manager.stats()['building'] == 0
+
+
+def test_external_cache_load_and_save():
+    builder = Builder()
+    manager, _ = make_manager(builder)
+    saved = []
+
+    data = manager.get('s1', 'excel', load=lambda session, name: None,
+                       save=lambda session, name, data: saved.append((name, data)))
+    assert data.getvalue() == b'report-1' and saved == [('excel', b'report-1')]
+
+    other, _ = make_manager(builder)
+    assert other.get('s1', 'excel', load=lambda session, name: b'cached').getvalue() == b'cached'
+    assert builder.calls == 1
+
+
+def test_stale_build_not_stored_after_regrade():
+    sessions = {'s1': {'results': {'version': 1}}}
+
+    def builder(results):
+        # Yaratish paytida natijalar almashtiriladi (qayta baholash)
+        sessions['s1']['results'] = {'version': 2}
+        return io.BytesIO(b'old')
+
+    manager = ArtifactManager(sessions.get, {'excel': builder})
+    assert manager.get('s1', 'excel').getvalue() == b'old'
+    assert 'artifacts' not in sessions['s1']
+
+
+def test_discard():
+    builder = Builder()
+    manager, sessions = make_manager(builder)
+    manager.get('s1', 'excel')
+    manager.discard('s1', 'excel')
+    assert sessions['s1']['artifacts'] == {}
+    manager.discard('s1')
+    assert 'artifacts' not in sessions['s1']
+    manager.get('s1', 'excel')
+    assert builder.calls == 2
+
+
+def test_service_builds_report_on_first_request():
+    service = RaschAnalysisService(item_bank_mode='off', result_cache_mb=0)
+    service.create_session('reports')
+    with open(SAMPLE_FILE, 'rb') as f:
+        assert service.process_file(f.read(), 'reports')
+    assert not service._get_session('reports').get('artifacts')
+
+    first = service.get_report('reports', 'excel').getvalue()
+    assert first[:2] == b'PK'
+    assert service.get_report('reports', 'excel').getvalue() == first
+    assert service.artifacts.stats()['builds'] == 1
+
+    # Qayta baholash eski fayllarni o'chiradi
+    assert 'error' not in service.regrade('reports', thresholds={'P': 50, 'F': 0})
+    assert not service._get_session('reports').get('artifacts')
@@ -0,0 +1,89 @@
+"""Oflayn katalog tahlili (batch.py / services.batch_runner)"""
+import csv
+import os
+import shutil
+import subprocess
+import sys
+
+import pandas as pd
+import pytest
+
+from services.batch_runner import find_exam_files, main, output_stems, run_batch
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+SAMPLE_FILE = os.path.join(ROOT, 'namuna_test_data.xlsx')
+
+
+@pytest.fixture
+def exams(tmp_path):
+    exams = tmp_path / 'imtihonlar'
+    (exams / '10-sinf').mkdir(parents=True)
+    shutil.copy(SAMPLE_FILE, exams / 'fizika.xlsx')
+    pd.read_excel(SAMPLE_FILE).to_csv(exams / 'fizika.csv', index=False)
+    shutil.copy(SAMPLE_FILE, exams / '10-sinf' / 'fizika.xlsx')
+    (exams / 'buzilgan.xlsx').write_bytes(b'bu excel emas')
+    (exams / 'izoh.txt').write_text('tahlil qilinmaydi')
+    (exams / '~$fizika.xlsx').write_bytes(b'')
+    return exams
+
+
+def test_find_exam_files(exams):
+    names = [path.name for path in find_exam_files(exams)]
+    assert names == ['buzilgan.xlsx', 'fizika.csv', 'fizika.xlsx']
+    assert len(find_exam_files(exams, recursive=True)) == 4
+
+
+def test_output_stems_do_not_collide(exams):
+    paths = find_exam_files(exams, recursive=True)
+    stems = output_stems(paths, exams)
+    assert len(set(stems.values())) == len(paths)
+    assert stems[exams / 'buzilgan.xlsx'] == 'buzilgan'
+    assert stems[exams / '10-sinf' / 'fizika.xlsx'] == '10-sinf_fizika_xlsx'
+
+
+def test_run_batch_writes_reports_and_summary(exams, tmp_path):
+    output = tmp_path / 'natijalar'
+    progress = []
+    summary = run_batch(exams, output, workers=1, formats=('csv', 'excel'), bank_mode='off',
+                        on_result=lambda done, total, result: progress.append((done, total)))
+
+    assert (summary['files'], summary['succeeded'], summary['failed']) == (3, 2, 1)
+    assert summary['students'] == 200
+    assert progress[-1] == (3, 3)
+    statuses = {os.path.basename(result['file']): result['status'] for result in summary['results']}
+    assert statuses == {'buzilgan.xlsx': 'error', 'fizika.csv': 'ok', 'fizika.xlsx': 'ok'}
+
+    assert (output / 'fizika_xlsx_natijalar.xlsx').exists()
+    results = pd.read_csv(output / 'fizika_csv_natijalar.csv')
+    assert len(results) == 100
+    with open(output / 'batch_summary.csv', encoding='utf-8-sig') as f:
+        rows = list(csv.DictReader(f))
+    assert [row['status'] for row in rows] == ['error', 'ok', 'ok']
+
+
+def test_unknown_format(exams, tmp_path):
+    with pytest.raises(ValueError):
+        run_batch(exams, tmp_path / 'out', formats=('docx',))
+
+
+def test_cli_exit_code(exams, tmp_path, capsys):
+    code = main([str(exams), '-o', str(tmp_path / 'out'), '-w', '1', '--formats', 'csv', '--bank-mode', 'off'])
+    assert code == 1  # buzilgan.xlsx
+    assert 'XATOLIK' in capsys.readouterr().out
+
+    (exams / 'buzilgan.xlsx').unlink()
+    assert main([str(exams), '-o', str(tmp_path / 'out'), '-w', '1', '--formats', 'csv', '--bank-mode', 'off']) == 0
+
+
+def test_batch_script_in_parallel(exams, tmp_path):
+    (exams / 'buzilgan.xlsx').unlink()
+    output = tmp_path / 'parallel'
+    env = dict(os.environ, ITEM_BANK_MODE='off')
+    completed = subprocess.run(
+        [sys.executable, os.path.join(ROOT, 'batch.py'), str(exams), '-o', str(output), '-w', '2',
+         '--formats', 'csv', '--bank-mode', 'off'],
+        capture_output=True, text=True, env=env, timeout=300
+    )
+    assert completed.returncode == 0, completed.stderr
+    assert '2 jarayon' in completed.stdout
+    assert sorted(os.listdir(output)) == ['batch_summary.csv', 'fizika_csv_natijalar.csv', 'fizika_xlsx_natijalar.csv']
@@ -0,0 +1,76 @@
+"""Bot diagrammalari: PNG kesh, kanal DPI si va parallel chizish"""
+import struct
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import pytest
+
+from bot import charts
+from bot.charts import ChartCache, render_chart
+
+GRADES = {'A+': 5, 'A': 10, 'B+': 12, 'B': 20, 'C+': 18, 'C': 15, 'NC': 20}
+
+
+def png_size(png):
+    """PNG sarlavhasidan (IHDR) kenglik va balandlik"""
+    assert png[:8] == b'\x89PNG\r\n\x1a\n'
+    return struct.unpack('>II', png[16:24])
+
+
+@pytest.fixture(autouse=True)
+def fresh_cache(monkeypatch):
+    cache = ChartCache(max_memory_mb=16)
+    monkeypatch.setattr(charts, 'chart_cache', cache)
+    return cache
+
+
+def test_same_data_is_drawn_once(fresh_cache):
+    calls = []
+
+    def draw(fig, ax, values):
+        calls.append(1)
+        ax.plot(values)
+
+    values = np.arange(5, dtype=np.float64)
+    first = render_chart('line', 'compact', draw, values)
+    assert render_chart('line', 'compact', draw, values.copy()) == first
+    assert len(calls) == 1 and fresh_cache.hits == 1
+
+    render_chart('line', 'compact', draw, values + 1)
+    assert len(calls) == 2
+
+
+def test_channel_dpi():
+    telegram = png_size(charts.grade_distribution_png(GRADES, channel='telegram'))
+    printed = png_size(charts.grade_distribution_png(GRADES, channel='print'))
+    ratio = charts.CHART_DPI['print'] / charts.CHART_DPI['telegram']
+    assert printed[0] == pytest.approx(telegram[0] * ratio, rel=0.05)
+    with pytest.raises(ValueError):
+        charts.grade_distribution_png(GRADES, channel='fax')
+
+
+def test_cache_evicts_oldest():
+    cache = ChartCache(max_memory_mb=1 / 1024)  # 1 KB
+    cache.put('a', b'x' * 600)
+    cache.put('b', b'x' * 600)
+    assert cache.get('a') is None and cache.get('b') is not None
+    cache.put('big', b'x' * 2048)
+    assert cache.get('big') is None and cache.current_bytes == 600
+
+
+def test_concurrent_rendering_matches_serial():
+    rng = np.random.default_rng(0)
+    abilities = [rng.normal(size=200) for _ in range(4)]
+    serial = [charts.ability_distribution_png(values) for values in abilities]
+
+    charts.chart_cache.clear()
+    with ThreadPoolExecutor(max_workers=8) as executor:
+        parallel = list(executor.map(charts.ability_distribution_png, abilities * 4))
+    assert parallel == serial * 4
+
+
+def test_custom_grades_and_overview():
+    assert charts._grade_colors(['P', 'F']) == charts.FALLBACK_COLORS[:2]
+    assert charts.statistics_grades_png({'P': 40, 'F': 60})[:4] == b'\x89PNG'
+    assert charts.diagrams_png(np.linspace(-2, 2, 10), GRADES)[:4] == b'\x89PNG'
+    assert charts.item_difficulty_png(None)[:4] == b'\x89PNG'
@@ -0,0 +1,75 @@
+"""Ustun rollarini aniqlash: tanlanma, sarlavha imzosi va shablonlar keshi"""
+import os
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from data_processing import column_detection
+from data_processing.column_detection import (
+    LayoutCache, detect_column_roles, header_signature, stratified_sample
+)
+
+SAMPLE_FILE = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'namuna_test_data.xlsx')
+
+
+@pytest.fixture(scope='module')
+def sample_df():
+    return pd.read_excel(SAMPLE_FILE)
+
+
+def test_header_signature_is_order_and_type_sensitive():
+    assert header_signature(['ID', 'Q1']) == header_signature(['ID', 'Q1'])
+    assert header_signature(['ID', 'Q1']) != header_signature(['Q1', 'ID'])
+    assert header_signature(['ID', 1]) != header_signature(['ID', '1'])
+
+
+def test_stratified_sample_keeps_edges():
+    df = pd.DataFrame({'x': np.arange(10000)})
+    sample = stratified_sample(df, 400)
+    assert len(sample) <= 400
+    assert sample['x'].iloc[:100].tolist() == list(range(100))
+    assert sample['x'].iloc[-1] == 9999
+    assert sample['x'].is_monotonic_increasing
+    small = df.head(50)
+    assert stratified_sample(small, 400) is small
+
+
+def test_sampled_detection_matches_full(sample_df):
+    big = pd.concat([sample_df] * 20, ignore_index=True)
+    sampled = detect_column_roles(big, sample_rows=200, cache=None)
+    full = detect_column_roles(big, sample_rows=None, cache=None)
+    assert sampled == full
+    assert sampled[0] == 'Talaba_ID'
+    assert len(sampled[1]) == 55
+
+
+def test_layout_cache_skips_detection(sample_df, monkeypatch):
+    cache = LayoutCache()
+    expected = detect_column_roles(sample_df, cache=cache)
+    assert cache.stats() == {'layouts': 1, 'hits': 0, 'misses': 1}
+
+    def fail(*args):
+        raise AssertionError('tuzilma keshdan olinishi kerak edi')
+
+    monkeypatch.setattr(column_detection, '_detect_id_column', fail)
+    # Bir xil shablon, boshqa qiymatlar
+    assert detect_column_roles(sample_df.iloc[::-1], cache=cache) == expected
+    assert cache.stats()['hits'] == 1
+
+
+def test_layout_without_questions_is_not_cached():
+    cache = LayoutCache()
+    df = pd.DataFrame({'Izoh': ['matn', 'boshqa matn']})
+    detect_column_roles(df, cache=cache)
+    assert cache.stats()['layouts'] == 0
+
+
+def test_layout_cache_is_lru():
+    cache = LayoutCache(max_entries=2)
+    cache.put('a', ('ID', ('Q1',)))
+    cache.put('b', ('ID', ('Q1',)))
+    cache.get('a')
+    cache.put('c', ('ID', ('Q1',)))
+    assert cache.get('b') is None
+    assert cache.get('a') is not None and cache.get('c') is not None
@@ -0,0 +1,63 @@
+"""Excel'ning o'z diagrammalari bilan eksport (prepare_excel_with_charts)"""
+import io
+import os
+import re
+import zipfile
+
+import openpyxl
+import pandas as pd
+import pytest
+
+from data_processing.data_processor import CHART_DATA_SHEET
+from services.analysis_service import build_excel_report, run_analysis
+
+SAMPLE_FILE = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'namuna_test_data.xlsx')
+
+
+@pytest.fixture(scope='module')
+def results():
+    return run_analysis(pd.read_excel(SAMPLE_FILE))
+
+
+@pytest.fixture(scope='module')
+def workbook_bytes(results):
+    return build_excel_report(results, charts=True).getvalue()
+
+
+def test_native_charts_without_images(workbook_bytes):
+    with zipfile.ZipFile(io.BytesIO(workbook_bytes)) as archive:
+        names = archive.namelist()
+        charts = [name for name in names if re.fullmatch(r'xl/charts/chart\d+\.xml', name)]
+        assert len(charts) == 4
+        assert not [name for name in names if name.startswith('xl/media/')]
+        # Diagrammalar ko'rinadigan ma'lumotlar varag'iga bog'langan
+        for name in charts:
+            assert f"'{CHART_DATA_SHEET}'!" in archive.read(name).decode('utf-8')
+
+
+def test_data_sheet_is_visible_and_formula_bound(results, workbook_bytes):
+    workbook = openpyxl.load_workbook(io.BytesIO(workbook_bytes))
+    assert {'Natijalar', 'Diagrammalar', CHART_DATA_SHEET} <= set(workbook.sheetnames)
+    data_sheet = workbook[CHART_DATA_SHEET]
+    assert data_sheet.sheet_state == 'visible'
+
+    grades = list(results['grade_counts'])
+    assert [data_sheet.cell(row=i + 2, column=1).value for i in range(len(grades))] == grades
+    assert all(str(data_sheet.cell(row=i + 2, column=2).value).startswith('=COUNTIF(Natijalar!')
+               for i in range(len(grades)))
+    # Qiyinlik jadvali: har bir savol uchun bitta qator
+    assert data_sheet.cell(row=56, column=7).value is not None
+    assert data_sheet.cell(row=57, column=7).value is None
+
+
+def test_cached_counts_match_grades(results, workbook_bytes):
+    workbook = openpyxl.load_workbook(io.BytesIO(workbook_bytes), data_only=True)
+    data_sheet = workbook[CHART_DATA_SHEET]
+    counts = {data_sheet.cell(row=i + 2, column=1).value: data_sheet.cell(row=i + 2, column=2).value
+              for i in range(len(results['grade_counts']))}
+    assert counts == {grade: int(count) for grade, count in results['grade_counts'].items()}
+
+
+def test_plain_mode_has_no_charts(results):
+    with zipfile.ZipFile(build_excel_report(results)) as archive:
+        assert not [name for name in archive.namelist() if name.startswith('xl/charts/')]
@@ -0,0 +1,89 @@
+"""Oqimli Excel yozuvchi: qatorlar, ustun formatlari va diapazon shartli formatlari"""
+import io
+
+import numpy as np
+import openpyxl
+import pandas as pd
+
+from data_processing.excel_writer import (
+    FALLBACK_GRADE_COLORS, GRADE_COLORS, add_banding, add_grade_formats, grade_colors, open_workbook,
+    table_to_excel, write_table
+)
+
+
+def sample_frame(n=200):
+    grades = np.array(list(GRADE_COLORS))
+    return pd.DataFrame({
+        'Talaba': [f"Talaba {i}" for i in range(n)],
+        'Ball': np.round(np.linspace(30, 80, n), 2),
+        'Baho': grades[np.arange(n) % len(grades)],
+        'Izoh': [None if i % 3 else 'ok' for i in range(n)],
+    })
+
+
+def test_grade_colors():
+    assert grade_colors() == GRADE_COLORS
+    assert list(grade_colors(['A', 'NC'])) == ['A', 'NC']
+    assert grade_colors(['A', 'NC'])['NC'] == GRADE_COLORS['NC']
+    # Maxsus baholar - palitradan tartib bo'yicha
+    custom = grade_colors(['P', 'F'])
+    assert custom == {'P': FALLBACK_GRADE_COLORS[0], 'F': FALLBACK_GRADE_COLORS[1]}
+
+
+def test_write_table_round_trip():
+    df = sample_frame()
+    output = io.BytesIO()
+    workbook = open_workbook(output)
+    number = workbook.add_format({'num_format': '0.00'})
+    worksheet = write_table(workbook, 'Natijalar', df, {'Ball': number}, {'Talaba': 30})
+    add_banding(workbook, worksheet, 1, len(df), 0, len(df.columns) - 1)
+    workbook.close()
+
+    sheet = openpyxl.load_workbook(io.BytesIO(output.getvalue()))['Natijalar']
+    rows = list(sheet.iter_rows(values_only=True))
+    assert list(rows[0]) == list(df.columns)
+    assert len(rows) == len(df) + 1
+    assert [list(row) for row in rows[1:]] == df.astype(object).where(df.notna(), None).values.tolist()
+    assert sheet.freeze_panes == 'A2'
+    assert int(sheet.column_dimensions['A'].width) == 30
+    assert sheet['B2'].number_format == '0.00'
+    # Banding - bitta diapazon qoidasi
+    assert len(sheet.conditional_formatting) == 1
+
+
+def test_grade_formats_are_range_rules():
+    df = sample_frame(1000)
+    output = io.BytesIO()
+    workbook = open_workbook(output)
+    worksheet = write_table(workbook, 'Natijalar', df)
+    add_grade_formats(workbook, worksheet, 2, 1, len(df), 0, 3)
+    workbook.close()
+
+    sheet = openpyxl.load_workbook(io.BytesIO(output.getvalue()))['Natijalar']
+    ranges = {str(rule_range.sqref): [rule.formula[0] for rule in rule_range.rules]
+              for rule_range in sheet.conditional_formatting}
+    # Qoidalar soni qatorlar soniga bog'liq emas - har bir baho uchun bitta
+    assert ranges == {'A2:D1001': [f'$C2="{grade}"' for grade in GRADE_COLORS]}
+
+
+def test_table_to_excel():
+    df = sample_frame(20).assign(Baho=['P', 'F'] * 10)
+    data = table_to_excel(df, 'Ball', {'Ball': {'num_format': '0.0'}}, {'Talaba': 25},
+                          grade_column='Baho', grades=['P', 'F'])
+    sheet = openpyxl.load_workbook(data)['Ball']
+    assert sheet.max_row == 21
+    assert sheet['C3'].value == 'F'
+    rules = [(str(rule_range.sqref), rule.formula[0])
+             for rule_range in sheet.conditional_formatting for rule in rule_range.rules]
+    assert rules == [('C2:C21', '$C2="P"'), ('C2:C21', '$C2="F"')]
+
+    rows = table_to_excel(df, 'Ball', grade_column='Baho', color_rows=True, grades=['P', 'F'])
+    sheet = openpyxl.load_workbook(rows)['Ball']
+    assert {str(rule_range.sqref) for rule_range in sheet.conditional_formatting} == {'A2:D21'}
+
+
+def test_empty_table():
+    data = table_to_excel(sample_frame(0), 'Bo\'sh', grade_column='Baho')
+    sheet = openpyxl.load_workbook(data)["Bo'sh"]
+    assert sheet.max_row == 1
+    assert len(sheet.conditional_formatting) == 0
@@ -0,0 +1,62 @@
+"""Maxsus baho jadvallari: xulosa (top / o'tgan / yiqilgan) va qayta baholash"""
+import os
+
+import pytest
+
+from models.grading import grade_labels, grade_summary, top_grade_labels
+from services.analysis_service import RaschAnalysisService
+
+SAMPLE_FILE = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'namuna_test_data.xlsx')
+
+
+@pytest.fixture(scope='module')
+def service():
+    service = RaschAnalysisService(item_bank_mode='off', result_cache_mb=0)
+    service.create_session('grading')
+    with open(SAMPLE_FILE, 'rb') as f:
+        assert service.process_file(f.read(), 'grading')
+    return service
+
+
+@pytest.mark.parametrize('labels, top', [
+    (['A+', 'A', 'B+', 'B', 'C+', 'C', 'NC'], ['A+', 'A']),
+    (['A', 'B', 'F'], ['A', 'B']),
+    (['P', 'F'], ['P']),
+    (['F'], []),
+    ([], []),
+])
+def test_top_grade_labels_never_include_failing(labels, top):
+    assert top_grade_labels(labels) == top
+
+
+def test_grade_summary_two_labels():
+    assert grade_summary({'P': 48, 'F': 52}) == (48, 48, 52)
+
+
+def test_grade_summary_three_labels():
+    assert grade_summary({'A': 10, 'B': 30, 'F': 60}) == (40, 40, 60)
+
+
+def test_grade_labels_follow_thresholds():
+    assert grade_labels({'F': 0, 'P': 50}) == ['P', 'F']
+
+
+@pytest.mark.parametrize('thresholds', [
+    {'P': 50, 'F': 0},
+    {'A': 60, 'B': 50, 'F': 0},
+])
+def test_regrade_summary_with_custom_labels(service, thresholds):
+    assert 'error' not in service.regrade('grading', thresholds=thresholds)
+    summary = service.get_results('grading', format='summary')
+
+    labels = list(thresholds)
+    counts = summary['grade_distribution']
+    assert list(counts) == labels
+    assert sum(counts.values()) == summary['total_students'] == 100
+
+    failing = counts[labels[-1]]
+    assert summary['failing_count'] == failing
+    assert summary['passing_count'] == 100 - failing
+    assert summary['top_grades_count'] == sum(counts[label] for label in labels[:-1][:2])
+    assert summary['top_grades_count'] + summary['failing_count'] <= 100
+    assert summary['top_grades_label'] == '/'.join(labels[:-1][:2])
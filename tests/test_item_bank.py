@@ -0,0 +1,87 @@
+"""Savollar banki: warm/anchor rejimlari va jarayonlar orasidagi yangilanishlar"""
+import multiprocessing as mp
+import os
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from data_processing.data_processor import process_exam_data
+from data_processing.ingestion import table_from_frame
+from models.item_bank import ItemBank, exam_fingerprint
+
+SAMPLE_FILE = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'namuna_test_data.xlsx')
+
+
+@pytest.fixture(scope='module')
+def table():
+    return table_from_frame(pd.read_excel(SAMPLE_FILE))
+
+
+@pytest.fixture
+def bank(tmp_path):
+    return ItemBank(str(tmp_path / 'bank.db'))
+
+
+def _update_many(db_file, count):
+    bank = ItemBank(db_file)
+    for _ in range(count):
+        bank.update('exam', ['Q1', 'Q2', 'Q3'], [0.0, 0.5, -0.5], [1.0, 1.0, 1.0], 10)
+
+
+def test_fingerprint_depends_on_columns_and_key():
+    assert exam_fingerprint(['Q1', 'Q2']) == exam_fingerprint(['Q1', 'Q2'])
+    assert exam_fingerprint(['Q1', 'Q2']) != exam_fingerprint(['Q2', 'Q1'])
+    assert exam_fingerprint(['Q1', 'Q2'], 'fizika') != exam_fingerprint(['Q1', 'Q2'], 'kimyo')
+
+
+def test_update_pools_precision(bank):
+    bank.update('exam', ['Q1', 'Q2'], [1.0, -1.0], [2.0, 2.0], 50)
+    beta, precision = bank.update('exam', ['Q1', 'Q2'], [1.0, -1.0], [2.0, 2.0], 30)
+
+    stored = bank.get('exam')
+    assert np.allclose(stored['beta'], [1.0, -1.0])
+    assert np.allclose(stored['precision'], [4.0, 4.0])
+    assert np.allclose(beta, stored['beta']) and np.allclose(precision, stored['precision'])
+    assert stored['n_students'] == 80
+    assert stored['n_updates'] == 2
+    assert stored['question_columns'] == ['Q1', 'Q2']
+
+
+def test_concurrent_process_updates_are_not_lost(tmp_path):
+    db_file = str(tmp_path / 'bank.db')
+    ItemBank(db_file)
+    context = mp.get_context('spawn')
+    processes = [context.Process(target=_update_many, args=(db_file, 5)) for _ in range(4)]
+    for process in processes:
+        process.start()
+    for process in processes:
+        process.join(60)
+        assert process.exitcode == 0
+
+    stored = ItemBank(db_file).get('exam')
+    assert stored['n_updates'] == 20
+    assert stored['n_students'] == 200
+    assert np.allclose(stored['precision'], 20.0)
+
+
+def test_warm_mode_updates_bank(table, bank):
+    first = process_exam_data(table, item_bank=bank, bank_mode='warm')
+    second = process_exam_data(table, item_bank=bank, bank_mode='warm')
+
+    stored = bank.get(exam_fingerprint(table.question_columns))
+    assert stored['n_updates'] == 2
+    assert stored['n_students'] == 200
+    # Bir xil ma'lumot - bankdan boshlangan kalibrovka ham bir xil baholarni beradi
+    assert second[2] == first[2]
+
+
+def test_anchor_mode_keeps_bank_beta(table, bank):
+    process_exam_data(table, item_bank=bank, bank_mode='warm')
+    fingerprint = exam_fingerprint(table.question_columns)
+    banked = bank.get(fingerprint)
+
+    anchored = process_exam_data(table, item_bank=bank, bank_mode='anchor')
+
+    assert np.allclose(anchored[4], banked['beta'])
+    assert bank.get(fingerprint)['n_updates'] == 1
@@ -0,0 +1,103 @@
+"""Doimiy ishlar navbati: tiklash, xatolar, natijalar va tozalash"""
+import os
+import time
+
+import pytest
+
+from services.job_queue import JOB_COMPLETED, JOB_FAILED, JOB_QUEUED, JOB_RUNNING, JobQueue
+
+
+@pytest.fixture
+def queue(tmp_path):
+    return JobQueue(tmp_path / 'jobs.db', tmp_path / 'jobs', max_attempts=2)
+
+
+def test_enqueue_stores_input_and_metadata(queue):
+    job_id = queue.enqueue(b'data', 's1', owner=42, origin='bot', options={'estimator': 'jmle'},
+                           meta={'chat_id': 7})
+    job = queue.get(job_id)
+
+    assert job['status'] == JOB_QUEUED
+    assert job['owner'] == '42' and job['origin'] == 'bot'
+    assert job['options'] == {'estimator': 'jmle'} and job['meta'] == {'chat_id': 7}
+    assert queue.read_artifact(job_id, 'input') == b'data'
+    assert queue.get_by_session('s1')['job_id'] == job_id
+
+
+def test_complete_saves_results(queue):
+    job_id = queue.enqueue(b'data', 's1')
+    queue.mark_running(job_id)
+    queue.complete(job_id, {'grade_counts': {'A': 1}})
+
+    job = queue.get(job_id)
+    assert job['status'] == JOB_COMPLETED and job['progress'] == 100
+    assert queue.load_results(job_id) == {'grade_counts': {'A': 1}}
+
+
+def test_fail_retries_until_attempts_run_out(queue):
+    job_id = queue.enqueue(b'data', 's1')
+    queue.mark_running(job_id)
+    assert queue.fail(job_id, 'worker to\'xtadi') is True
+    assert queue.get(job_id)['status'] == JOB_QUEUED
+
+    queue.mark_running(job_id)
+    assert queue.fail(job_id, 'worker to\'xtadi') is False
+    job = queue.get(job_id)
+    assert job['status'] == JOB_FAILED and job['attempts'] == 2
+
+    other = queue.enqueue(b'data', 's2')
+    queue.mark_running(other)
+    assert queue.fail(other, 'fayl xatosi', retry=False) is False
+    assert queue.fail('missing', 'x') is False
+
+
+def test_recover_requeues_interrupted_jobs(queue):
+    interrupted = queue.enqueue(b'a', 's1', origin='bot')
+    queue.mark_running(interrupted)
+    exhausted = queue.enqueue(b'b', 's2', origin='bot')
+    queue.mark_running(exhausted)
+    queue.mark_running(exhausted)
+    waiting = queue.enqueue(b'c', 's3', origin='bot')
+    web_job = queue.enqueue(b'd', 's4', origin='web')
+    queue.mark_running(web_job)
+
+    recovered = [job['job_id'] for job in queue.recover(origin='bot')]
+
+    assert sorted(recovered) == sorted([interrupted, waiting])
+    assert queue.get(exhausted)['status'] == JOB_FAILED
+    # Boshqa manbaning ishlari tegilmaydi
+    assert queue.get(web_job)['status'] == JOB_RUNNING
+
+
+def test_cleanup_removes_old_finished_jobs(queue):
+    old = queue.enqueue(b'a', 's1')
+    queue.complete(old, {})
+    fresh = queue.enqueue(b'b', 's2')
+    queue.complete(fresh, {})
+    pending = queue.enqueue(b'c', 's3')
+    conn = queue.connect()
+    conn.execute("UPDATE jobs SET updated_at = '2000-01-01 00:00:00' WHERE job_id IN (?, ?)", (old, pending))
+    conn.commit()
+
+    assert queue.cleanup(max_age_days=7) == 1
+    assert queue.get(old) is None and not os.path.exists(queue.job_dir(old))
+    assert queue.get(fresh) is not None
+    # Tugallanmagan ishlar yoshidan qat'i nazar qoladi
+    assert queue.get(pending) is not None
+
+
+def test_periodic_cleanup_runs_immediately(queue):
+    old = queue.enqueue(b'a', 's1')
+    queue.fail(old, 'xato', retry=False)
+    conn = queue.connect()
+    conn.execute("UPDATE jobs SET updated_at = '2000-01-01 00:00:00' WHERE job_id = ?", (old,))
+    conn.commit()
+
+    queue.start_cleanup(max_age_days=1, interval_seconds=3600)
+    try:
+        deadline = time.time() + 10
+        while queue.get(old) is not None and time.time() < deadline:
+            time.sleep(0.02)
+        assert queue.get(old) is None
+    finally:
+        queue.stop_cleanup()
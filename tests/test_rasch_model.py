@@ -0,0 +1,162 @@
+"""Rasch modeli: vektorlashtirilgan joint MLE va uning rejimlari"""
+import numpy as np
+import pytest
+from scipy.special import expit
+
+from models.rasch_model import REG_LAMBDA, rasch_model
+
+
+def simulate(n_students, n_items, seed=0):
+    """Rasch modelidan 0/1 javoblar (theta ~ N(0, 1), beta - teng oraliqda)"""
+    rng = np.random.default_rng(seed)
+    theta = rng.normal(size=n_students)
+    beta = np.linspace(-2, 2, n_items)
+    return (rng.random((n_students, n_items)) < expit(theta[:, None] - beta[None, :])).astype(np.int8)
+
+
+def reference_jmle(data, max_iter=100, tol=1e-6):
+    """Talaba va savol bo'yicha Python sikllari bilan bir xil JMLE (taqqoslash uchun)"""
+    n_students, n_items = data.shape
+
+    def seed(score, n_total):
+        if score == 0:
+            return -3.0
+        if score == n_total:
+            return 3.0
+        p = min(max((score + 0.5) / (n_total + 1), 1e-6), 1 - 1e-6)
+        return float(np.log(p / (1 - p)))
+
+    theta = [seed(data[i].sum(), n_items) for i in range(n_students)]
+    beta = [-seed(data[:, j].sum(), n_students) for j in range(n_items)]
+    for _ in range(max_iter):
+        p = [[float(expit(min(max(theta[i] - beta[j], -15), 15))) for j in range(n_items)]
+             for i in range(n_students)]
+        new_theta, new_beta = [], []
+        for i in range(n_students):
+            gradient = data[i].sum() - sum(p[i]) - REG_LAMBDA * theta[i]
+            hessian = sum(q * (1 - q) for q in p[i]) + REG_LAMBDA
+            new_theta.append(theta[i] + gradient / hessian)
+        for j in range(n_items):
+            column = [p[i][j] for i in range(n_students)]
+            gradient = -(data[:, j].sum() - sum(column)) - REG_LAMBDA * beta[j]
+            hessian = sum(q * (1 - q) for q in column) + REG_LAMBDA
+            new_beta.append(beta[j] + gradient / hessian)
+        change = max(max(abs(a - b) for a, b in zip(new_theta, theta)),
+                     max(abs(a - b) for a, b in zip(new_beta, beta)))
+        theta, beta = new_theta, new_beta
+        if change < tol:
+            break
+    theta = np.array(theta)
+    return theta - theta.mean(), np.array(beta)
+
+
+@pytest.fixture(scope='module')
+def responses():
+    return simulate(300, 20)
+
+
+def test_vectorized_matches_reference_loops():
+    data = simulate(40, 8, seed=1)
+    theta, beta = rasch_model(data)
+    expected_theta, expected_beta = reference_jmle(data)
+
+    assert theta.dtype == np.float32 and beta.dtype == np.float32
+    np.testing.assert_allclose(theta, expected_theta, atol=1e-4)
+    np.testing.assert_allclose(beta, expected_beta, atol=1e-4)
+
+
+def test_theta_centered_and_monotone_in_raw_score(responses):
+    theta, beta = rasch_model(responses)
+    raw = responses.sum(axis=1)
+    order = np.argsort(raw, kind='stable')
+
+    assert theta.shape == (300,) and beta.shape == (20,)
+    assert abs(float(theta.mean())) < 1e-4
+    assert np.all(np.diff(theta[order]) >= -1e-5)
+    # Bir xil xom ball - bir xil theta
+    for score in np.unique(raw):
+        assert np.ptp(theta[raw == score]) < 1e-5
+
+
+def test_recovers_item_order(responses):
+    _, beta = rasch_model(responses)
+    # Simulyatsiyada savollar osondan qiyinga tartiblangan
+    assert np.corrcoef(beta, np.linspace(-2, 2, 20))[0, 1] > 0.98
+
+
+def test_extreme_scores_are_finite():
+    data = simulate(50, 10, seed=2)
+    data[0] = 0
+    data[1] = 1
+    theta, beta = rasch_model(data)
+    assert np.all(np.isfinite(theta)) and np.all(np.isfinite(beta))
+    assert theta[0] == theta.min() and theta[1] == theta.max()
+
+
+def test_unknown_estimator(responses):
+    with pytest.raises(ValueError):
+        rasch_model(responses, estimator='mcmc')
+
+
+def test_score_groups_equal_full_fit(responses):
+    full_theta, full_beta = rasch_model(responses)
+    grouped_theta, grouped_beta = rasch_model(responses, score_groups=True)
+
+    np.testing.assert_allclose(grouped_theta, full_theta, atol=1e-5)
+    np.testing.assert_allclose(grouped_beta, full_beta, atol=1e-5)
+
+
+def test_score_groups_with_anchor_and_warm_start(responses):
+    _, beta = rasch_model(responses)
+    for options in ({'anchor_beta': beta}, {'init_beta': beta}):
+        full = rasch_model(responses, **options)
+        grouped = rasch_model(responses, score_groups=True, **options)
+        np.testing.assert_allclose(grouped[0], full[0], atol=1e-5)
+        np.testing.assert_allclose(grouped[1], full[1], atol=1e-5)
+
+
+def test_pair_counts_match_definition():
+    from models.rasch_model import item_pair_counts
+
+    data = simulate(60, 5, seed=3)
+    counts = item_pair_counts(data, chunk_size=7)
+    for i in range(5):
+        for j in range(5):
+            expected = 0 if i == j else int(np.sum((data[:, i] == 1) & (data[:, j] == 0)))
+            assert counts[i, j] == expected
+
+
+def test_pairwise_estimator(responses):
+    theta, beta = rasch_model(responses, estimator='pairwise')
+    _, jmle_beta = rasch_model(responses)
+
+    assert abs(float(beta.mean())) < 1e-5
+    assert abs(float(theta.mean())) < 1e-4
+    assert np.corrcoef(beta, jmle_beta)[0, 1] > 0.99
+    # Savollar tartibi JMLE bilan deyarli bir xil (rang korrelyatsiyasi)
+    ranks = np.argsort(np.argsort(beta)), np.argsort(np.argsort(jmle_beta))
+    assert np.corrcoef(*ranks)[0, 1] > 0.98
+
+
+def test_pairwise_memory_budget_does_not_change_result(responses):
+    unbounded = rasch_model(responses, estimator='pairwise')
+    bounded = rasch_model(responses, estimator='pairwise', max_memory_mb=0.01)
+    np.testing.assert_allclose(bounded[1], unbounded[1], atol=1e-6)
+
+
+@pytest.mark.parametrize('options', [{}, {'score_groups': True}])
+def test_block_budget_equals_unblocked(options):
+    data = simulate(2000, 30, seed=4)
+    unblocked = rasch_model(data, **options)
+    # ~0.05 MB - bir necha o'nlab qatorli bloklar
+    blocked = rasch_model(data, max_memory_mb=0.05, **options)
+
+    np.testing.assert_allclose(blocked[0], unblocked[0], atol=1e-5)
+    np.testing.assert_allclose(blocked[1], unblocked[1], atol=1e-5)
+
+
+def test_block_rows_for_budget():
+    from models.rasch_model import _block_rows_for_budget
+
+    assert _block_rows_for_budget(1, 64) == 1024 * 1024 // (2 * 64 * 8)
+    assert _block_rows_for_budget(1e-9, 1000) == 1
@@ -0,0 +1,100 @@
+"""
+Regressiya testlari: namuna_test_data.xlsx bo'yicha tahlil natijalari bazaviy
+qiymatlarga mahkamlangan. Optimallashtirishlar natijani o'zgartirmasligi kerak.
+"""
+import os
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from data_processing.data_processor import process_exam_data
+from data_processing.ingestion import read_exam_table, table_from_frame
+from models.grading import grade_scores
+from services.analysis_service import regrade_analysis, run_analysis
+
+SAMPLE_FILE = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'namuna_test_data.xlsx')
+
+BASELINE_GRADE_COUNTS = {'A+': 2, 'A': 4, 'B+': 15, 'B': 15, 'C+': 12, 'C': 11, 'NC': 41}
+BASELINE_TOP_STUDENTS = ['Talaba001', 'Talaba009', 'Talaba019']
+
+THRESHOLDS = {'A+': 70, 'A': 65, 'B+': 60, 'B': 55, 'C+': 50, 'C': 46, 'NC': 0}
+
+
+@pytest.fixture(scope='module')
+def sample_bytes():
+    with open(SAMPLE_FILE, 'rb') as f:
+        return f.read()
+
+
+@pytest.fixture(scope='module')
+def sample_df():
+    return pd.read_excel(SAMPLE_FILE)
+
+
+@pytest.fixture(scope='module')
+def processed(sample_df):
+    return process_exam_data(sample_df)
+
+
+def test_process_exam_data_baseline(processed):
+    results_df, ability_estimates, grade_counts, df_cleaned, item_difficulties, calibration = processed
+
+    assert grade_counts == BASELINE_GRADE_COUNTS
+    assert list(grade_counts) == list(THRESHOLDS)
+    assert len(results_df) == 100
+    assert len(ability_estimates) == 100
+    assert len(item_difficulties) == 55
+    assert results_df['Student ID'].head(3).tolist() == BASELINE_TOP_STUDENTS
+    assert results_df['Rank'].tolist() == list(range(1, 101))
+    assert results_df['Raw Score'].head(3).tolist() == [50, 48, 47]
+    assert results_df['Grade'].value_counts().to_dict() == {
+        grade: count for grade, count in BASELINE_GRADE_COUNTS.items() if count
+    }
+
+
+def test_process_exam_data_grades_match_scores(processed):
+    results_df = processed[0]
+    expected = grade_scores(results_df['Standard Score'].to_numpy(), THRESHOLDS)
+    assert results_df['Grade'].tolist() == list(expected)
+
+
+@pytest.mark.parametrize('score, grade', [
+    (100, 'A+'), (70, 'A+'), (69.99, 'A'), (65, 'A'), (64.99, 'B+'), (60, 'B+'),
+    (55, 'B'), (54.99, 'C+'), (50, 'C+'), (46, 'C'), (45.99, 'NC'), (0, 'NC'), (-5, 'NC'),
+])
+def test_grade_scores_boundaries(score, grade):
+    assert grade_scores(score, THRESHOLDS) == grade
+
+
+def test_grade_scores_array_nan_and_rounding():
+    grades = grade_scores([70.0, np.nan, 64.996], THRESHOLDS)
+    assert list(grades) == ['A+', 'NC', 'B+']
+    # Yaxlitlangandan keyin 64.996 -> 65.0
+    assert grade_scores(64.996, THRESHOLDS, decimals=1) == 'A'
+
+
+def test_grade_scores_custom_labels():
+    thresholds = {'A': 80, 'B': 60, 'C': 40, 'F': 0}
+    assert list(grade_scores([80, 79.9, 40, 39.9], thresholds)) == ['A', 'B', 'C', 'F']
+
+
+def test_read_exam_table_matches_table_from_frame(sample_bytes, sample_df):
+    streamed = read_exam_table(sample_bytes, filename=SAMPLE_FILE)
+    framed = table_from_frame(sample_df)
+
+    assert streamed.shape == framed.shape == (100, 55)
+    assert streamed.id_column == framed.id_column
+    assert streamed.question_columns == framed.question_columns
+    assert streamed.student_ids.equals(framed.student_ids)
+    assert np.array_equal(streamed.responses, framed.responses)
+    assert streamed.errors == framed.errors == []
+
+
+def test_regrade_with_same_thresholds_is_identity(sample_bytes):
+    results = run_analysis(sample_bytes)
+    regraded = regrade_analysis(results, thresholds=THRESHOLDS)
+
+    assert results['grade_counts'] == BASELINE_GRADE_COUNTS
+    assert regraded['grade_counts'] == results['grade_counts']
+    pd.testing.assert_frame_equal(regraded['results_df'], results['results_df'])
@@ -0,0 +1,73 @@
+"""Hisobotlar hovuzi: kerakli maydonlar, kechiktirilgan ishga tushirish va parallel chizish"""
+import os
+
+import pandas as pd
+import pytest
+
+from services.analysis_service import combine_sheet_results, run_analysis
+from services.report_pipeline import (
+    ARTIFACT_FIELDS, REPORT_ARTIFACTS, ReportPipeline, artifact_payload, build_artifact
+)
+
+SAMPLE_FILE = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'namuna_test_data.xlsx')
+
+
+@pytest.fixture(scope='module')
+def results():
+    return run_analysis(pd.read_excel(SAMPLE_FILE))
+
+
+def test_every_artifact_has_fields():
+    assert set(ARTIFACT_FIELDS) == set(REPORT_ARTIFACTS)
+
+
+def test_payload_keeps_only_needed_fields(results):
+    assert set(artifact_payload('grade_chart', results)) == {'grade_counts'}
+    assert set(artifact_payload('pdf', results)) == {'results_df', 'score_table'}
+    for name in REPORT_ARTIFACTS:
+        payload = artifact_payload(name, results)
+        assert 'calibration' not in payload
+        assert set(payload) <= set(ARTIFACT_FIELDS[name])
+
+
+def test_payload_for_workbook_sends_sheet_tables_only(results):
+    workbook = combine_sheet_results({'A': results, 'B': results})
+    payload = artifact_payload('excel', workbook)
+
+    assert set(payload) == {'grade_counts', 'sheets'}
+    assert set(payload['sheets']) == {'A', 'B'}
+    assert set(payload['sheets']['A']) == {'results_df', 'score_table'}
+
+
+def test_unknown_artifact(results):
+    with pytest.raises(ValueError):
+        artifact_payload('docx', results)
+    with pytest.raises(ValueError):
+        build_artifact('docx', results)
+
+
+@pytest.mark.parametrize('name', ['grade_chart', 'stats_pdf', 'excel'])
+def test_payload_builds_same_kind_of_file(results, name):
+    data = build_artifact(name, artifact_payload(name, results))
+    assert data[:4] in (b'\x89PNG', b'%PDF', b'PK\x03\x04')
+
+
+def test_pool_starts_on_first_use(results):
+    pipeline = ReportPipeline(max_workers=2)
+    try:
+        assert pipeline._executor is None
+        chart = pipeline.build('grade_chart', results)
+        assert pipeline._executor is not None
+        assert chart.getvalue()[:4] == b'\x89PNG'
+
+        ready = dict(pipeline.render(lambda name: pipeline.build(name, results), ['ability_chart', 'pdf']))
+        assert set(ready) == {'ability_chart', 'pdf'}
+        assert ready['pdf'].getvalue()[:4] == b'%PDF'
+    finally:
+        pipeline.shutdown()
+
+
+def test_single_worker_runs_inline(results):
+    pipeline = ReportPipeline(max_workers=1)
+    assert pipeline.build('diagrams', results).getvalue()[:4] == b'\x89PNG'
+    assert pipeline._executor is None
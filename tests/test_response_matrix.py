@@ -0,0 +1,66 @@
+"""Bit-packed javoblar matritsasi zich massiv bilan bir xil natija beradi"""
+import numpy as np
+import pandas as pd
+import pytest
+
+from models.rasch_model import rasch_model
+from models.response_matrix import PackedResponses, column_sums, iter_row_blocks, row_sums
+
+
+@pytest.fixture(scope='module')
+def dense():
+    # Savollar soni 8 ga karrali emas - oxirgi baytning to'ldiruvchi bitlari tekshiriladi
+    rng = np.random.default_rng(0)
+    return (rng.random((1000, 37)) < 0.6).astype(np.int8)
+
+
+@pytest.fixture(scope='module')
+def packed(dense):
+    return PackedResponses.from_dense(dense, block_rows=128)
+
+
+def test_shape_and_round_trip(dense, packed):
+    assert packed.shape == dense.shape
+    assert len(packed) == 1000
+    assert packed.nbytes == 1000 * 5
+    assert np.array_equal(packed.unpack(), dense)
+    assert np.array_equal(packed[10:20], dense[10:20])
+    assert np.array_equal(packed[[3, 7]], dense[[3, 7]])
+
+
+def test_from_frame(dense):
+    columns = [f'Q{i}' for i in range(dense.shape[1])]
+    df = pd.DataFrame(dense, columns=columns)
+    df.insert(0, 'ID', range(len(df)))
+    packed = PackedResponses.from_frame(df, columns, block_rows=100)
+    assert np.array_equal(packed.unpack(), dense)
+
+
+def test_sums_match_dense(dense, packed):
+    assert np.array_equal(packed.row_sums(), dense.sum(axis=1))
+    assert np.array_equal(packed.column_sums(block_rows=77), dense.sum(axis=0))
+    np.testing.assert_array_equal(row_sums(packed), row_sums(dense))
+    np.testing.assert_array_equal(column_sums(packed), column_sums(dense))
+
+
+def test_dot_and_sum_columns_match_dense(dense, packed):
+    weights = np.linspace(0.1, 2.0, dense.shape[1])
+    np.testing.assert_allclose(packed.dot(weights, block_rows=99), dense @ weights)
+
+    mask = np.arange(dense.shape[1]) % 3 == 0
+    assert np.array_equal(packed.sum_columns(mask), dense[:, mask].sum(axis=1))
+    assert np.array_equal(packed.sum_columns(np.zeros(dense.shape[1], dtype=bool)), np.zeros(1000))
+
+
+def test_row_blocks_cover_matrix(dense, packed):
+    blocks = list(iter_row_blocks(packed, 300))
+    assert [(start, stop) for start, stop, _ in blocks] == [(0, 300), (300, 600), (600, 900), (900, 1000)]
+    assert np.array_equal(np.vstack([block for _, _, block in blocks]), dense)
+
+
+def test_rasch_model_accepts_packed(dense, packed):
+    for options in ({}, {'score_groups': True}, {'estimator': 'pairwise'}):
+        expected = rasch_model(dense, **options)
+        actual = rasch_model(packed, **options)
+        np.testing.assert_allclose(actual[0], expected[0], atol=1e-6)
+        np.testing.assert_allclose(actual[1], expected[1], atol=1e-6)
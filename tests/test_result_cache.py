@@ -0,0 +1,77 @@
+"""Kontent bo'yicha natijalar keshi: kalitlar, LRU chiqarish va servisdagi kesh"""
+import os
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from services.analysis_service import RaschAnalysisService
+from services.result_cache import ResultCache, key_for_bytes, key_for_frame
+
+SAMPLE_FILE = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'namuna_test_data.xlsx')
+MB = 1024 * 1024
+
+
+def test_keys_depend_on_content_and_params():
+    assert key_for_bytes(b'abc', estimator='jmle') == key_for_bytes(b'abc', estimator='jmle')
+    assert key_for_bytes(b'abc', estimator='jmle') != key_for_bytes(b'abd', estimator='jmle')
+    assert key_for_bytes(b'abc', estimator='jmle') != key_for_bytes(b'abc', estimator='pairwise')
+
+    df = pd.DataFrame({'ID': ['a', 'b'], 'Q1': [1, 0]})
+    assert key_for_frame(df) == key_for_frame(df.copy())
+    assert key_for_frame(df) != key_for_frame(df.assign(Q1=[1, 1]))
+    assert key_for_frame(df) != key_for_frame(df.rename(columns={'Q1': 'Q2'}))
+
+
+def test_hit_miss_and_lru_eviction():
+    cache = ResultCache(max_memory_mb=2.5)
+    assert cache.get('a') is None
+    cache.put('a', {'data': np.zeros(MB // 8)})
+    cache.put('b', {'data': np.zeros(MB // 8)})
+    assert cache.get('a') is not None  # 'a' endi eng yangi
+    cache.put('c', {'data': np.zeros(MB // 8)})
+
+    assert 'a' in cache and 'c' in cache and 'b' not in cache
+    stats = cache.stats()
+    assert (stats['hits'], stats['misses'], stats['evictions']) == (1, 1, 1)
+    assert cache.current_bytes <= cache.max_bytes
+
+
+def test_oversized_entry_is_not_stored():
+    cache = ResultCache(max_memory_mb=1)
+    assert cache.put('big', {'data': np.zeros(MB)}) is False
+    assert len(cache) == 0 and cache.current_bytes == 0
+
+
+def test_artifacts_count_towards_size():
+    cache = ResultCache(max_memory_mb=1)
+    cache.put('a', {'x': 1})
+    before = cache.current_bytes
+    assert cache.put_artifact('a', 'pdf', b'%PDF' * 100)
+    assert cache.get_artifact('a', 'pdf') == b'%PDF' * 100
+    assert cache.current_bytes == before + 400
+    assert cache.put_artifact('missing', 'pdf', b'x') is False
+    cache.invalidate('a')
+    assert cache.current_bytes == 0
+
+
+def test_service_reuses_cached_analysis(monkeypatch):
+    import services.analysis_service as analysis_module
+
+    service = RaschAnalysisService(item_bank_mode='off', result_cache_mb=64)
+    with open(SAMPLE_FILE, 'rb') as f:
+        data = f.read()
+    service.create_session('first')
+    assert service.process_file(data, 'first')
+
+    def fail(*args, **kwargs):
+        raise AssertionError('tahlil keshdan olinishi kerak edi')
+
+    monkeypatch.setattr(analysis_module, 'run_analysis', fail)
+    service.create_session('second')
+    assert service.process_file(data, 'second')
+    assert service.sessions['second']['results']['grade_counts'] == service.sessions['first']['results']['grade_counts']
+    assert service.result_cache.stats()['hits'] == 1
+    # Boshqa parametrlar - boshqa kalit
+    service.create_session('third')
+    assert not service.process_file(data, 'third', estimator='pairwise')
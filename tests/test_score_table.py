@@ -0,0 +1,70 @@
+"""Xom ball -> theta -> standart ball -> baho jadvali (ScoreTable)"""
+import os
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from models.grading import grade_scores
+from models.score_table import REPORT_COLUMNS, ScoreTable
+from services.analysis_service import run_analysis
+
+SAMPLE_FILE = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'namuna_test_data.xlsx')
+
+
+@pytest.fixture(scope='module')
+def results():
+    return run_analysis(pd.read_excel(SAMPLE_FILE))
+
+
+@pytest.fixture(scope='module')
+def table(results):
+    return results['score_table']
+
+
+def test_one_row_per_raw_score(results, table):
+    raw = results['results_df']['Raw Score'].to_numpy()
+    assert table.n_items == 55
+    assert table.theta.shape == (56,)
+    assert np.array_equal(table.students, np.bincount(raw, minlength=56))
+
+
+def test_observed_scores_match_students(results, table):
+    results_df = results['results_df']
+    raw = results_df['Raw Score'].to_numpy()
+    np.testing.assert_allclose(table.ability[raw], results_df['Ability'].to_numpy(), atol=1e-6)
+
+
+def test_theta_increases_with_raw_score(table):
+    assert np.all(np.diff(table.theta) > 0)
+    assert np.all(np.isfinite(table.se)) and np.all(table.se > 0)
+    # Chekka ballarda SE kattaroq
+    assert table.se[0] > table.se[28] and table.se[55] > table.se[28]
+    assert np.array_equal(table.grade, grade_scores(table.standard_score))
+
+
+def test_lookup(table):
+    row = table.lookup([0, 30, 55])
+    assert np.array_equal(row['raw_score'], [0, 30, 55])
+    np.testing.assert_array_equal(row['theta'], table.theta[[0, 30, 55]])
+    with pytest.raises(ValueError):
+        table.lookup([56])
+    with pytest.raises(ValueError):
+        table.lookup([-1])
+
+
+def test_round_trip_and_frame(table):
+    restored = ScoreTable.from_dict(table.to_dict())
+    for name in ('theta', 'se', 'ability', 'weighted', 'standard_score', 'grade', 'students'):
+        assert np.array_equal(getattr(restored, name), getattr(table, name))
+    frame = table.to_frame()
+    assert list(frame.columns) == list(REPORT_COLUMNS)
+    assert frame['raw_score'].tolist() == list(range(56))
+
+
+def test_regraded_keeps_theta(results, table):
+    calibration = results['calibration']
+    regraded = table.regraded(calibration.weighted_mean, calibration.weighted_std, (0, 100), {'P': 50, 'F': 0})
+    assert np.array_equal(regraded.theta, table.theta)
+    assert set(regraded.grade) <= {'P', 'F'}
+    assert np.array_equal(regraded.grade == 'P', regraded.standard_score >= 50)
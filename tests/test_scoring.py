@@ -0,0 +1,74 @@
+"""Saqlangan kalibrovka bo'yicha yangi javoblar varag'ini baholash (score_responses)"""
+import os
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from models.calibration import Calibration, parse_responses, score_responses
+from services.analysis_service import RaschAnalysisService, run_analysis
+
+SAMPLE_FILE = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'namuna_test_data.xlsx')
+
+
+@pytest.fixture(scope='module')
+def results():
+    return run_analysis(pd.read_excel(SAMPLE_FILE))
+
+
+def test_matches_full_analysis(results):
+    calibration = results['calibration']
+    df_cleaned = results['df_cleaned']
+    scores = score_responses(calibration, df_cleaned[calibration.question_columns].to_numpy())
+
+    expected = results['results_df'].set_index('Student ID').loc[df_cleaned['Talaba_ID']]
+    assert np.array_equal(scores['raw_score'], expected['Raw Score'].to_numpy())
+    np.testing.assert_allclose(scores['ability'], expected['Ability'].to_numpy(), atol=1e-6)
+    np.testing.assert_allclose(scores['standard_score'], expected['Standard Score'].to_numpy(), atol=1e-2)
+    assert np.array_equal(scores['grade'], expected['Grade'].to_numpy())
+
+
+@pytest.mark.parametrize('responses', [
+    '0110',
+    '0 1 1 0',
+    '0,1,1,0',
+    [0, 1, 1, 0],
+    np.array([0, 1, 1, 0]),
+])
+def test_parse_responses_formats(responses):
+    assert parse_responses(responses, 4).tolist() == [[0, 1, 1, 0]]
+
+
+def test_parse_responses_batch():
+    data = parse_responses(['0110', '1111'], 4)
+    assert data.shape == (2, 4) and data.dtype == np.int8
+
+
+@pytest.mark.parametrize('responses', ['011', '01101', '01a0', [0, 1, 2, 0], [[0, 1], [1, 0]]])
+def test_parse_responses_rejects_bad_input(responses):
+    with pytest.raises(ValueError):
+        parse_responses(responses, 4)
+
+
+def test_calibration_round_trip(results):
+    calibration = results['calibration']
+    restored = Calibration.from_dict(calibration.to_dict())
+    row = '1' * 30 + '0' * 25
+    before, after = score_responses(calibration, row), score_responses(restored, row)
+    for key in before:
+        assert np.array_equal(before[key], after[key])
+
+
+def test_service_scores_session():
+    service = RaschAnalysisService(item_bank_mode='off', result_cache_mb=0)
+    service.create_session('scoring')
+    with open(SAMPLE_FILE, 'rb') as f:
+        assert service.process_file(f.read(), 'scoring')
+
+    scored = service.score_responses('scoring', ['1' * 55, '0' * 55])
+    assert scored['total_questions'] == 55
+    low, high = scored['results'][1], scored['results'][0]
+    assert (low['raw_score'], high['raw_score']) == (0, 55)
+    assert low['theta'] < high['theta']
+    assert 'error' in service.score_responses('scoring', '0110')
+    assert 'error' in service.score_responses('missing', '0' * 55)
@@ -0,0 +1,88 @@
+"""SessionStore: TTL, LRU xotira chegarasi va hajm hisobi"""
+import os
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from services import session_store
+from services.analysis_service import run_analysis
+from services.result_cache import estimate_size
+from services.session_store import SessionStore
+
+SAMPLE_FILE = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'namuna_test_data.xlsx')
+MB = 1024 * 1024
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(session_store.time, 'time', clock)
+    return clock
+
+
+def test_ttl_expiry(clock):
+    evicted = []
+    store = SessionStore(ttl_seconds=60, max_memory_mb=None,
+                         on_evict=lambda name, reason, nbytes: evicted.append(reason))
+    store['a'] = {'x': 1}
+    clock.now += 30
+    assert store['a'] == {'x': 1}
+    # Murojaat muddatni yangilaydi
+    clock.now += 59
+    assert store.get('a') == {'x': 1}
+    clock.now += 61
+    assert store.get('a') is None
+    assert 'a' not in store
+    assert evicted == ['ttl']
+    assert store.current_bytes == 0
+
+
+def test_purge_expired(clock):
+    store = SessionStore(ttl_seconds=10, max_memory_mb=None)
+    store['old'] = {}
+    clock.now += 5
+    store['new'] = {}
+    clock.now += 7
+    assert store.purge_expired() == 1
+    assert list(store) == ['new']
+
+
+def test_lru_memory_limit(clock):
+    store = SessionStore(ttl_seconds=None, max_memory_mb=2.5)
+    store['a'] = {'data': np.zeros(MB // 8)}
+    store['b'] = {'data': np.zeros(MB // 8)}
+    store['a']  # 'a' endi eng yangi
+    store['c'] = {'data': np.zeros(MB // 8)}
+
+    assert sorted(store) == ['a', 'c']
+    assert store.evictions['memory'] == 1
+    assert store.current_bytes <= store.max_bytes
+
+
+def test_refresh_recounts_size(clock):
+    store = SessionStore(ttl_seconds=None, max_memory_mb=None)
+    store['a'] = {'results': np.zeros(10)}
+    before = store.size_of('a')
+    store['a']['results'] = np.zeros(1000)
+    store.refresh('a')
+    assert store.size_of('a') == before + 7920
+    assert store.current_bytes == store.size_of('a')
+
+
+def test_estimate_size_counts_model_objects():
+    results = run_analysis(pd.read_excel(SAMPLE_FILE))
+    calibration, score_table = results['calibration'], results['score_table']
+
+    assert estimate_size(score_table) >= score_table.theta.nbytes * 5
+    assert estimate_size(calibration) >= (calibration.beta.nbytes + calibration.weights.nbytes
+                                          + estimate_size(score_table))
+    assert estimate_size(results) > estimate_size(results['results_df']) + estimate_size(calibration)
@@ -0,0 +1,66 @@
+"""Ko'p varaqli ish kitoblari: varaqlar joriy jarayonda va umumiy worker pulida"""
+import io
+import os
+import threading
+
+import pandas as pd
+import pytest
+
+from services.analysis_service import RaschAnalysisService, join_sheet_outcomes, run_analysis
+from services.worker_pool import AnalysisWorkerPool
+
+SAMPLE_FILE = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'namuna_test_data.xlsx')
+SUBJECTS = ['Matematika', 'Fizika', 'Kimyo']
+
+
+@pytest.fixture(scope='module')
+def workbook_bytes():
+    df = pd.read_excel(SAMPLE_FILE)
+    output = io.BytesIO()
+    with pd.ExcelWriter(output) as writer:
+        for subject in SUBJECTS:
+            df.to_excel(writer, sheet_name=subject, index=False)
+        pd.DataFrame({'Izoh': ["Yo'riqnoma"]}).to_excel(writer, sheet_name='Info', index=False)
+    return output.getvalue()
+
+
+def test_workbook_sheets_inline(workbook_bytes):
+    results = run_analysis(workbook_bytes)
+
+    assert list(results['sheets']) == SUBJECTS
+    assert list(results['skipped_sheets']) == ['Info']
+    assert len(results['results_df']) == 300
+    assert results['results_df']['Sheet'].unique().tolist() == SUBJECTS
+    for sheet in results['sheets'].values():
+        assert sheet['grade_counts']['NC'] == 41
+
+
+def test_join_sheet_outcomes():
+    single = {'grade_counts': {'A': 1}}
+    assert join_sheet_outcomes(['a', 'b'], {'a': {'skipped': 'bo\'sh'}, 'b': single}) is single
+    with pytest.raises(ValueError, match="bo'sh"):
+        join_sheet_outcomes(['a'], {'a': {'skipped': "bo'sh"}})
+
+
+def test_workbook_sheets_through_shared_pool(workbook_bytes):
+    service = RaschAnalysisService(item_bank_mode='off', result_cache_mb=0)
+    pool = AnalysisWorkerPool(service, max_workers=2)
+    service.create_session('workbook')
+    finished = threading.Event()
+    progress, errors = [], []
+    try:
+        pool.submit(1, workbook_bytes, 'workbook',
+                    on_progress=lambda percent, message: progress.append(message),
+                    on_done=lambda session_id: finished.set(),
+                    on_error=lambda session_id, error: (errors.append(error), finished.set()))
+        assert finished.wait(120)
+    finally:
+        pool.shutdown()
+
+    assert errors == []
+    results = service.sessions['workbook']['results']
+    assert list(results['sheets']) == SUBJECTS
+    assert results['grade_counts'] == run_analysis(workbook_bytes)['grade_counts']
+    # Har bir varaq alohida ish - progress varaqlar bo'yicha
+    assert progress[-1] == '4/4 varaq tahlil qilindi'
+    assert pool.stats()['active_jobs'] == 0
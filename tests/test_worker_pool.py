@@ -0,0 +1,187 @@
+"""AnalysisWorkerPool: navbat chegaralari, qayta urinish, tiklangan ishlar va buzilgan pul"""
+import threading
+import time
+from concurrent.futures import Future
+from concurrent.futures.process import BrokenProcessPool
+
+import pytest
+
+from services import worker_pool
+from services.job_queue import JOB_COMPLETED, JOB_FAILED, JobQueue
+from services.worker_pool import AnalysisWorkerPool, PoolBusyError, UserLimitError
+
+SOURCE = b'ID,Q1\na,1\n'
+
+
+class FakeExecutor:
+    """Ishlarni bajarmaydi - test Future natijasini o'zi beradi"""
+
+    def __init__(self):
+        self.submitted = []
+        self.shutdowns = 0
+
+    def submit(self, fn, *args):
+        future = Future()
+        self.submitted.append(future)
+        return future
+
+    def shutdown(self, **kwargs):
+        self.shutdowns += 1
+
+
+class FakeService:
+    item_bank_mode = 'off'
+    item_bank_path = None
+
+    def __init__(self):
+        self.sessions = {}
+        self.stored = {}
+        self.failed = {}
+
+    def create_session(self, session_id):
+        self.sessions[session_id] = {'status': 'created'}
+
+    def prepare_source(self, source, estimator='jmle', exam_key=None):
+        return source, None
+
+    def load_cached(self, session_id, cache_key, progress_callback=None):
+        return False
+
+    def update_progress(self, session_id, percent, message):
+        pass
+
+    def store_results(self, session_id, results, cache_key=None):
+        self.stored[session_id] = results
+
+    def fail_session(self, session_id, error):
+        self.failed[session_id] = error
+
+
+def wait_for(condition, timeout=10):
+    deadline = time.time() + timeout
+    while not condition():
+        if time.time() > deadline:
+            raise AssertionError('shart bajarilmadi')
+        time.sleep(0.01)
+
+
+@pytest.fixture
+def executor():
+    return FakeExecutor()
+
+
+def make_pool(executor, **options):
+    service = FakeService()
+    pool = AnalysisWorkerPool(service, **options)
+
+    def start():
+        if pool._executor is None:
+            pool._executor = executor
+    pool._ensure_started = start
+    return pool, service
+
+
+def submit(pool, service, user_id, session_id, done):
+    service.create_session(session_id)
+    return pool.submit(user_id, SOURCE, session_id,
+                       on_done=lambda sid: done.append(('done', sid)),
+                       on_error=lambda sid, error: done.append(('error', sid, error)))
+
+
+def test_user_limit_and_queue_size(executor):
+    pool, service = make_pool(executor, max_workers=1, max_pending=2, per_user_limit=1)
+    done = []
+    submit(pool, service, 1, 's1', done)
+    with pytest.raises(UserLimitError):
+        submit(pool, service, 1, 's1b', done)
+    submit(pool, service, 2, 's2', done)
+    with pytest.raises(PoolBusyError):
+        submit(pool, service, 3, 's3', done)
+    assert pool.stats()['active_jobs'] == 2
+
+    executor.submitted[0].set_result({'grade_counts': {}})
+    wait_for(lambda: done == [('done', 's1')])
+    assert service.stored['s1'] == {'grade_counts': {}}
+    # Slot bo'shadi - yangi ish qabul qilinadi
+    submit(pool, service, 3, 's3', done)
+    assert pool.stats()['active_users'] == 2
+    pool.shutdown()
+
+
+def test_broken_worker_is_retried(executor, tmp_path):
+    queue = JobQueue(tmp_path / 'jobs.db', tmp_path / 'jobs', max_attempts=3)
+    pool, service = make_pool(executor, job_queue=queue)
+    done = []
+    job_id = submit(pool, service, 1, 's1', done)
+
+    executor.submitted[0].set_exception(BrokenProcessPool('worker to\'xtadi'))
+    wait_for(lambda: len(executor.submitted) == 2)
+    assert done == []
+    executor.submitted[1].set_result({'ok': True})
+    wait_for(lambda: done == [('done', 's1')])
+
+    job = queue.get(job_id)
+    assert job['status'] == JOB_COMPLETED and job['attempts'] == 2
+    assert queue.load_results(job_id) == {'ok': True}
+    pool.shutdown()
+
+
+def test_file_error_is_not_retried(executor, tmp_path):
+    queue = JobQueue(tmp_path / 'jobs.db', tmp_path / 'jobs')
+    pool, service = make_pool(executor, job_queue=queue)
+    done = []
+    job_id = submit(pool, service, 1, 's1', done)
+
+    executor.submitted[0].set_exception(ValueError("Faylda savol ustunlari topilmadi"))
+    wait_for(lambda: len(done) == 1)
+    assert done[0][:2] == ('error', 's1')
+    assert len(executor.submitted) == 1
+    assert queue.get(job_id)['status'] == JOB_FAILED
+    assert pool.stats()['active_jobs'] == 0
+    pool.shutdown()
+
+
+def test_recovered_jobs_wait_for_free_slots(executor, tmp_path):
+    queue = JobQueue(tmp_path / 'jobs.db', tmp_path / 'jobs')
+    job_ids = [queue.enqueue(SOURCE, f's{i}', owner=i, origin='bot') for i in range(3)]
+    pool, service = make_pool(executor, max_pending=1, job_queue=queue)
+
+    assert pool.recover(origin='bot') == 1
+    for index in range(3):
+        wait_for(lambda: len(executor.submitted) == index + 1)
+        executor.submitted[index].set_result({'index': index})
+    wait_for(lambda: all(queue.get(job_id)['status'] == JOB_COMPLETED for job_id in job_ids))
+    assert sorted(service.stored) == ['s0', 's1', 's2']
+    pool.shutdown()
+
+
+def test_broken_pool_is_replaced_once(monkeypatch):
+    class Broken(FakeExecutor):
+        def submit(self, fn, *args):
+            raise BrokenProcessPool('buzilgan')
+
+    created = []
+
+    def new_executor(**kwargs):
+        created.append(FakeExecutor())
+        return created[-1]
+
+    monkeypatch.setattr(worker_pool, 'ProcessPoolExecutor', new_executor)
+    pool = AnalysisWorkerPool(FakeService())
+    broken = pool._executor = Broken()
+    barrier = threading.Barrier(8)
+    futures = []
+
+    def submit_job():
+        barrier.wait()
+        futures.append(pool._submit_job(1, SOURCE, {}))
+
+    threads = [threading.Thread(target=submit_job) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert len(futures) == 8
+    assert len(created) == 1 and broken.shutdowns == 1
+    assert len(created[0].submitted) == 8
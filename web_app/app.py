@@ -21,7 +21,13 @@ from datetime import datetime
 src_dir = Path(__file__).parent.parent / "src"
 sys.path.insert(0, str(src_dir))
 
-from services.analysis_service import analysis_service
+from services.analysis_service import analysis_service, EXCEL_MODES
+from services.job_queue import JobQueue
+from services.worker_pool import AnalysisWorkerPool, PoolBusyError, UserLimitError
+from config.settings import (
+    ANALYSIS_WORKERS, ANALYSIS_QUEUE_SIZE, ANALYSIS_PER_USER_LIMIT,
+    JOB_QUEUE_PATH, JOBS_DIR, JOB_MAX_ATTEMPTS, JOB_MAX_AGE_DAYS, JOB_CLEANUP_INTERVAL_SECONDS
+)
 
 # Telegram bot qo'llanmasi HTML
 TELEGRAM_GUIDE_HTML = """
@@ -499,39 +505,37 @@ ALLOWED_EXTENSIONS = {'xlsx', 'xls'}
 UPLOAD_FOLDER.mkdir(exist_ok=True)
 RESULTS_FOLDER.mkdir(exist_ok=True)
 
-# Global variables for processing status
-processing_status = {}
-processing_results = {}
+# Doimiy ishlar navbati va worker jarayonlar - qayta ishga tushishda ishlar yo'qolmaydi
+job_queue = JobQueue(JOB_QUEUE_PATH, JOBS_DIR, max_attempts=JOB_MAX_ATTEMPTS)
+analysis_service.job_queue = job_queue
+# Eski ishlar va ularning fayllari davriy o'chiriladi (disk va jadval cheksiz o'smaydi)
+job_queue.start_cleanup(JOB_MAX_AGE_DAYS, JOB_CLEANUP_INTERVAL_SECONDS)
+analysis_pool = AnalysisWorkerPool(
+    analysis_service,
+    max_workers=ANALYSIS_WORKERS,
+    max_pending=ANALYSIS_QUEUE_SIZE,
+    per_user_limit=ANALYSIS_PER_USER_LIMIT,
+    job_queue=job_queue
+)
+_recovery_lock = threading.Lock()
+_recovery_done = False
+
+def recover_jobs():
+    """Oldingi ishga tushishdan qolgan tugallanmagan web ishlarini qayta bajarish (bir marta)"""
+    global _recovery_done
+    with _recovery_lock:
+        if _recovery_done:
+            return
+        _recovery_done = True
+    try:
+        analysis_pool.recover(origin='web')
+    except Exception as e:
+        logger.error(f"Job recovery error: {e}")
 
 def allowed_file(filename):
     """Check if file extension is allowed"""
     return '.' in filename and filename.rsplit('.', 1)[1].lower() in ALLOWED_EXTENSIONS
 
-def process_file_async(file_path, session_id):
-    """Process file in background thread using analysis service"""
-    def progress_callback(percent, message):
-        processing_status[session_id] = {
-            'status': 'processing',
-            'progress': percent,
-            'message': message
-        }
-    
-    # Create session in analysis service
-    analysis_service.create_session(session_id)
-    
-    # Process file
-    success = analysis_service.process_file(file_path, session_id, progress_callback)
-    
-    if success:
-        processing_status[session_id] = {
-            'status': 'completed',
-            'progress': 100,
-            'message': 'Tahlil yakunlandi!'
-        }
-    else:
-        status = analysis_service.get_status(session_id)
-        processing_status[session_id] = status
-
 @app.route('/')
 def index():
     """Main page"""
@@ -565,10 +569,9 @@ def upload_file():
         file_path = UPLOAD_FOLDER / filename
         file.save(file_path)
         
-        # Start processing in background
-        thread = threading.Thread(target=process_file_async, args=(file_path, session_id))
-        thread.daemon = True
-        thread.start()
+        # Ish navbatga yoziladi (fayl nusxasi bilan) va worker jarayonida bajariladi
+        analysis_service.create_session(session_id)
+        analysis_pool.submit(request.remote_addr or 'web', file_path, session_id, origin='web')
         
         return jsonify({
             'success': True,
@@ -576,6 +579,10 @@ def upload_file():
             'message': 'Fayl yuklandi va tahlil boshlandi'
         })
         
+    except UserLimitError:
+        return jsonify({'error': 'Oldingi faylingiz hali tahlil qilinmoqda. Iltimos, kuting.'}), 429
+    except PoolBusyError:
+        return jsonify({'error': 'Server band. Iltimos, birozdan so\'ng qayta urinib ko\'ring.'}), 503
     except Exception as e:
         logger.error(f"Upload error: {e}")
         return jsonify({'error': f'Yuklash xatoligi: {str(e)}'}), 500
@@ -583,10 +590,11 @@ def upload_file():
 @app.route('/status/<session_id>')
 def get_status(session_id):
     """Get processing status"""
-    if session_id not in processing_status:
-        return jsonify({'error': 'Session topilmadi'}), 404
+    status = analysis_service.get_status(session_id)
+    if 'error' in status:
+        return jsonify(status), 404
     
-    return jsonify(processing_status[session_id])
+    return jsonify(status)
 
 @app.route('/results/<session_id>')
 def get_results(session_id):
@@ -602,8 +610,12 @@ def get_results(session_id):
 def download_file(session_id, file_type):
     """Download results file"""
     try:
-        if file_type == 'excel':
-            excel_data = analysis_service.get_excel_file(session_id)
+        if file_type in ('excel', 'excel_charts'):
+            # ?mode=plain|charts - Excel eksport rejimi (standart: EXCEL_EXPORT_MODE)
+            mode = 'charts' if file_type == 'excel_charts' else request.args.get('mode')
+            if mode is not None and mode not in EXCEL_MODES:
+                return jsonify({'error': 'Noto\'g\'ri Excel rejimi'}), 400
+            excel_data = analysis_service.get_excel_file(session_id, mode)
             if not excel_data:
                 return jsonify({'error': 'Natijalar topilmadi'}), 404
             
@@ -631,6 +643,49 @@ def download_file(session_id, file_type):
         logger.error(f"Download error: {e}")
         return jsonify({'error': f'Yuklab olish xatoligi: {str(e)}'}), 500
 
+@app.route('/api/score', methods=['POST'])
+def score_responses():
+    """
+    Score new answer sheets against a finished analysis (no refit).
+
+    JSON: {"session_id": "...", "responses": "0110..." | [0, 1, ...] | [[...], ...], "sheet": optional}
+    """
+    payload = request.get_json(silent=True) or {}
+    session_id = payload.get('session_id')
+    responses = payload.get('responses')
+    if not session_id or responses is None:
+        return jsonify({'error': 'session_id va responses talab qilinadi'}), 400
+
+    scored = analysis_service.score_responses(session_id, responses, sheet=payload.get('sheet'))
+    if 'error' in scored:
+        status = 404 if scored['error'] in ('Session topilmadi', 'Natijalar topilmadi') else 400
+        return jsonify(scored), status
+
+    return jsonify(scored)
+
+@app.route('/api/regrade', methods=['POST'])
+def regrade_results():
+    """
+    Re-grade a finished analysis with new grade thresholds and/or score range (no refit).
+
+    JSON: {"session_id": "...", "thresholds": {"A+": 70, ...} optional, "score_range": [10, 90.1] optional}
+    """
+    payload = request.get_json(silent=True) or {}
+    session_id = payload.get('session_id')
+    thresholds = payload.get('thresholds')
+    score_range = payload.get('score_range')
+    if not session_id:
+        return jsonify({'error': 'session_id talab qilinadi'}), 400
+    if thresholds is not None and not isinstance(thresholds, dict):
+        return jsonify({'error': "thresholds {baho: minimal ball} ko'rinishida bo'lishi kerak"}), 400
+
+    regraded = analysis_service.regrade(session_id, thresholds=thresholds, score_range=score_range)
+    if 'error' in regraded:
+        status = 404 if regraded['error'] in ('Session topilmadi', 'Natijalar topilmadi') else 400
+        return jsonify(regraded), status
+
+    return jsonify({'success': True, 'session_id': session_id, 'results': regraded})
+
 @app.route('/api/sample')
 def get_sample_results():
     """Generate sample results for demonstration"""
@@ -669,4 +724,5 @@ if __name__ == '__main__':
     print(f"📍 URL: http://localhost:{port}")
     print(f"🔧 Debug mode: {debug}")
     
+    recover_jobs()
     app.run(host='0.0.0.0', port=port, debug=debug)
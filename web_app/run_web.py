@@ -22,7 +22,7 @@ if env_file.exists():
                 os.environ[key] = value
 
 # Import and run the web app
-from web_app.app import app
+from web_app.app import app, recover_jobs
 
 if __name__ == '__main__':
     port = int(os.environ.get('WEB_PORT', 5000))
@@ -34,4 +34,5 @@ if __name__ == '__main__':
     print(f"📱 Mobile-friendly interface")
     print(f"🤖 Telegram bot ham ishlaydi")
     
+    recover_jobs()
     app.run(host='0.0.0.0', port=port, debug=debug)